@@ -8,9 +8,10 @@ Enhanced version that supports capability-based access control.
 from __future__ import annotations
 
 import os
+import threading
 import time
 import uuid
-from typing import Any, Dict, List, Optional, Protocol
+from typing import Any, Dict, List, Optional, Protocol, Sequence, Tuple
 from dataclasses import dataclass
 from datetime import datetime, timezone
 
@@ -18,6 +19,21 @@ import jwt
 from cryptography.hazmat.primitives.asymmetric import ed25519
 from cryptography.hazmat.primitives import serialization
 
+from .verifier import (
+    CapabilityTokenVerifier,
+    InMemoryRevocationFilter,
+    RevocationFilter,
+    VerifiedTokenCache,
+    token_digest,
+)
+from .key_set import (
+    KeySetVerifier,
+    UnknownSigningKeyError,
+    key_id_for,
+    public_key_to_pem,
+    token_capabilities,
+)
+
 
 class ReplayGuard(Protocol):
     """Protocol for replay attack prevention."""
@@ -26,22 +42,73 @@ class ReplayGuard(Protocol):
 
 
 class InMemoryReplayGuard:
-    """In-memory implementation of replay guard."""
+    """
+    In-memory implementation of replay guard.
+    
+    JTIs are indexed into one-second expiry buckets (a timing wheel), so each
+    call only purges the buckets that elapsed since the previous call instead
+    of scanning every live JTI. Amortized cost is O(1) per check.
+    """
     def __init__(self) -> None:
         self.storage: Dict[str, float] = {}
+        self._buckets: Dict[int, List[str]] = {}
+        self._next_purge: Optional[int] = None
 
     def check_and_set(self, jti: str, ttl: int) -> bool:
-        # Clean expired entries
         current_time = time.time()
-        expired_keys = [k for k, v in self.storage.items() if v <= current_time]
-        for k in expired_keys:
-            del self.storage[k]
+        self._purge(current_time)
             
-        if jti in self.storage and self.storage[jti] > current_time:
+        expires_at = self.storage.get(jti)
+        if expires_at is not None and expires_at > current_time:
             return False
-        self.storage[jti] = current_time + ttl
+        expires_at = current_time + ttl
+        self.storage[jti] = expires_at
+        self._buckets.setdefault(max(int(expires_at), int(current_time)), []).append(jti)
         return True
 
+    def _purge(self, current_time: float) -> None:
+        """Drop expired JTIs from every bucket that ended before the current second."""
+        now_second = int(current_time)
+        start = self._next_purge
+        self._next_purge = now_second
+        if start is None or start >= now_second:
+            return
+        if now_second - start > len(self._buckets):
+            # Idle for longer than there are buckets: visit the buckets directly.
+            seconds = [s for s in self._buckets if s < now_second]
+        else:
+            seconds = range(start, now_second)
+        storage = self.storage
+        for second in seconds:
+            for jti in self._buckets.pop(second, ()):
+                # Skip JTIs re-set with a later expiry since they were bucketed.
+                expires_at = storage.get(jti)
+                if expires_at is not None and expires_at <= current_time:
+                    del storage[jti]
+
+    def __len__(self) -> int:
+        return len(self.storage)
+
+
+class ShardedReplayGuard:
+    """
+    Replay guard for multi-threaded servers.
+    
+    JTIs are spread over independent InMemoryReplayGuard shards, each behind
+    its own lock, so concurrent verifications rarely contend.
+    """
+    def __init__(self, shards: int = 16) -> None:
+        self._shards = [InMemoryReplayGuard() for _ in range(shards)]
+        self._locks = [threading.Lock() for _ in range(shards)]
+
+    def check_and_set(self, jti: str, ttl: int) -> bool:
+        index = hash(jti) % len(self._shards)
+        with self._locks[index]:
+            return self._shards[index].check_and_set(jti, ttl)
+
+    def __len__(self) -> int:
+        return sum(len(shard) for shard in self._shards)
+
 
 @dataclass
 class CapabilityToken:
@@ -133,7 +200,13 @@ def issue_capability_token_raw(
         "aud": f"tenant:{tenant_id}",  # Audience
     }
     
-    token = jwt.encode(payload, private_key, algorithm="EdDSA")
+    # kid lets in-process verifiers pick the key, or tell a rotation from a forgery
+    token = jwt.encode(
+        payload,
+        private_key,
+        algorithm="EdDSA",
+        headers={"kid": key_id_for(private_key.public_key())}
+    )
     
     return CapabilityToken(
         token=token,
@@ -146,6 +219,68 @@ def issue_capability_token_raw(
     )
 
 
+def issue_capability_tokens_raw(
+    private_key: ed25519.Ed25519PrivateKey,
+    tenant_id: str,
+    requests: Sequence[Tuple[str, List[str], int]],
+) -> List[CapabilityToken]:
+    """
+    Issue many capability tokens for one tenant.
+    
+    Produces the same tokens as calling ``issue_capability_token_raw`` per
+    request, but all TTLs are validated before anything is signed, the key
+    ID is derived once for the shared JWT header and every token shares the
+    same ``iat``.
+    
+    Args:
+        private_key: Ed25519 private key for signing
+        tenant_id: Tenant identifier
+        requests: (subject, capabilities, ttl_secs) tuples
+        
+    Returns:
+        CapabilityTokens in request order
+        
+    Raises:
+        ValueError: If any TTL exceeds 5 minutes
+    """
+    for _, _, ttl_secs in requests:
+        if ttl_secs > 300:  # A.22 requirement: ≤5 minutes
+            raise ValueError("Token TTL cannot exceed 5 minutes (300 seconds)")
+    
+    now = int(time.time())
+    issued_at = datetime.fromtimestamp(now, tz=timezone.utc)
+    audience = f"tenant:{tenant_id}"
+    headers = {"kid": key_id_for(private_key.public_key())}
+    tokens = []
+    
+    for sub, capabilities, ttl_secs in requests:
+        jti = str(uuid.uuid4())
+        expires_at = now + ttl_secs
+        payload = {
+            "sub": sub,
+            "capabilities": capabilities,
+            "exp": expires_at,
+            "iat": now,
+            "jti": jti,
+            "tenant_id": tenant_id,
+            "iss": "anumate-captokens",
+            "aud": audience,
+        }
+        token = jwt.encode(payload, private_key, algorithm="EdDSA", headers=headers)
+        
+        tokens.append(CapabilityToken(
+            token=token,
+            token_id=jti,
+            subject=sub,
+            tenant_id=tenant_id,
+            capabilities=capabilities,
+            issued_at=issued_at,
+            expires_at=datetime.fromtimestamp(expires_at, tz=timezone.utc)
+        ))
+    
+    return tokens
+
+
 def issue_capability_token(
     subject: str,
     capabilities: List[str],
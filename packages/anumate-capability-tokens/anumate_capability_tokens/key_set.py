@@ -0,0 +1,160 @@
+"""
+Embedded verification against a synced public-key set.
+
+Services that only consume capability tokens (e.g. the orchestrator) can
+verify them in-process instead of calling the captokens service: the issuer
+publishes its public keys and recently revoked JTIs, the consumer syncs both
+and checks signature, expiry, revocation and capability scope locally.
+
+``UnknownSigningKeyError`` tells the caller the token was signed by a key it
+has not synced yet (typically a rotation), so it should refresh the key set or
+ask the issuer instead of rejecting the token outright.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519
+
+from .token_generator import TokenKeyManager
+from .verifier import CapabilityTokenVerifier, InMemoryRevocationFilter, VerifiedTokenCache
+
+
+class UnknownSigningKeyError(ValueError):
+    """The token's signing key is not in the local key set."""
+
+
+def key_id_for(public_key: ed25519.Ed25519PublicKey) -> str:
+    """Stable key identifier: truncated SHA-256 of the raw public key."""
+    raw = public_key.public_bytes(
+        encoding=serialization.Encoding.Raw,
+        format=serialization.PublicFormat.Raw,
+    )
+    return hashlib.sha256(raw).hexdigest()[:16]
+
+
+def public_key_to_pem(public_key: ed25519.Ed25519PublicKey) -> str:
+    """Serialize a public key for publishing in a key set."""
+    return public_key.public_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PublicFormat.SubjectPublicKeyInfo,
+    ).decode("utf-8")
+
+
+def token_capabilities(payload: Dict[str, Any]) -> List[str]:
+    """Capabilities claim, for tokens from either issuer (``capabilities`` or ``cap``)."""
+    return list(payload.get("capabilities", payload.get("cap", [])))
+
+
+class KeySetVerifier:
+    """
+    Verifies capability tokens against every key in a public-key set.
+
+    Tokens with a ``kid`` header are checked against that key only; tokens
+    without one (issued before issuers set ``kid``) are tried against each
+    key. All keys share one verified-token cache and one revocation set.
+    """
+
+    def __init__(
+        self,
+        cache: Optional[VerifiedTokenCache] = None,
+        revocation_filter: Optional[InMemoryRevocationFilter] = None,
+    ) -> None:
+        self.cache = cache if cache is not None else VerifiedTokenCache()
+        self.revocation_filter = revocation_filter if revocation_filter is not None else InMemoryRevocationFilter()
+        self._verifiers: Dict[str, CapabilityTokenVerifier] = {}
+
+    @property
+    def key_ids(self) -> List[str]:
+        return list(self._verifiers)
+
+    def load_keys(self, keys: Iterable[Dict[str, str]]) -> bool:
+        """
+        Replace the key set.
+
+        Args:
+            keys: Entries with ``kid`` and ``public_key_pem``
+
+        Returns:
+            True if the set of key IDs changed
+        """
+        verifiers = {}
+        for entry in keys:
+            kid = entry["kid"]
+            if kid in self._verifiers:
+                verifiers[kid] = self._verifiers[kid]
+                continue
+            key_manager = TokenKeyManager()
+            key_manager.load_public_key(entry["public_key_pem"], kid)
+            verifiers[kid] = CapabilityTokenVerifier(
+                key_manager.public_key,
+                cache=self.cache,
+                revocation_filter=self.revocation_filter,
+            )
+
+        changed = verifiers.keys() != self._verifiers.keys()
+        if self._verifiers.keys() - verifiers.keys():
+            # Tokens verified by a retired key must be checked again.
+            self.cache.clear()
+        self._verifiers = verifiers
+        return changed
+
+    def set_revoked(self, jtis: Iterable[str]) -> None:
+        """Replace the set of revoked JTIs."""
+        self.revocation_filter.revoked = set(jtis)
+
+    def verify(
+        self,
+        token: str,
+        required_capabilities: Sequence[str] = (),
+        replay_guard: Optional[Any] = None,
+    ) -> Dict[str, Any]:
+        """
+        Verify a token and its capability scope.
+
+        Returns:
+            Decoded token payload
+
+        Raises:
+            UnknownSigningKeyError: If the token names a key that is not
+                synced, or no keys are synced at all
+            ValueError: If the token is invalid, expired, revoked, replayed or
+                lacks a required capability
+        """
+        try:
+            kid = jwt.get_unverified_header(token).get("kid")
+        except jwt.InvalidTokenError:
+            raise ValueError("Invalid token")
+
+        if kid is not None:
+            if kid not in self._verifiers:
+                raise UnknownSigningKeyError(f"Unknown signing key {kid}")
+            candidates = [self._verifiers[kid]]
+        else:
+            candidates = list(self._verifiers.values())
+
+        payload = None
+        for verifier in candidates:
+            try:
+                payload = verifier.verify(token, replay_guard)
+                break
+            except ValueError as e:
+                # Any other failure is definitive for a correctly signed token.
+                if str(e) != "Invalid token":
+                    raise
+        if payload is None:
+            if not candidates:
+                raise UnknownSigningKeyError("No signing keys synced")
+            # A kid-less token that no synced key accepts is forged or corrupt,
+            # not evidence of a rotation.
+            raise ValueError("Invalid token")
+
+        missing = [cap for cap in required_capabilities if cap not in token_capabilities(payload)]
+        if missing:
+            raise ValueError(f"Token lacks required capabilities: {', '.join(missing)}")
+
+        return payload
@@ -0,0 +1,182 @@
+"""
+Hot-path capability token verification.
+
+Verifying a token means a full ``jwt.decode`` with an Ed25519 signature check.
+Tokens are short-lived (≤5min) and the same token is typically presented for
+every step of an execution, so the decoded payload is cached by token digest
+until the token's own ``exp``. Replay and revocation checks still run on every
+call; only the signature verification and JSON decoding are skipped on a hit.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Protocol, Set, Tuple
+
+import jwt
+from cryptography.hazmat.primitives.asymmetric import ed25519
+
+
+def token_digest(token: str) -> str:
+    """Return the cache key for a token (SHA-256 hex digest)."""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+class RevocationFilter(Protocol):
+    """Protocol for revocation lookups that avoid a database round-trip."""
+    def might_be_revoked(self, jti: str) -> bool:
+        ...
+
+    def add(self, jti: str) -> None:
+        ...
+
+
+class InMemoryRevocationFilter:
+    """Exact in-memory revocation set."""
+    def __init__(self) -> None:
+        self.revoked: Set[str] = set()
+
+    def might_be_revoked(self, jti: str) -> bool:
+        return jti in self.revoked
+
+    def add(self, jti: str) -> None:
+        self.revoked.add(jti)
+
+
+class VerifiedTokenCache:
+    """
+    Bounded LRU cache of verified token payloads.
+
+    Entries are keyed by token digest and are only returned while the token's
+    ``exp`` is in the future. When full, the least recently used entry is evicted.
+    """
+
+    def __init__(self, max_size: int = 10_000) -> None:
+        self.max_size = max_size
+        self._entries: OrderedDict[str, Tuple[Dict[str, Any], int]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, digest: str, now: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Return the cached payload for ``digest`` if present and unexpired."""
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                self.misses += 1
+                return None
+            payload, exp = entry
+            if exp <= now:
+                del self._entries[digest]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(digest)
+            self.hits += 1
+            return payload
+
+    def put(self, digest: str, payload: Dict[str, Any]) -> None:
+        """Cache a verified payload until its ``exp`` claim."""
+        with self._lock:
+            self._entries[digest] = (payload, int(payload["exp"]))
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, digest: str) -> None:
+        """Drop a single entry."""
+        with self._lock:
+            self._entries.pop(digest, None)
+
+    def clear(self) -> None:
+        """Drop all entries."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics."""
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+class CapabilityTokenVerifier:
+    """
+    Verifier with a precomputed verification context and a verified-token cache.
+
+    The decoder, algorithm list and options are built once instead of per call.
+    ``verify`` has the same contract as ``verify_capability_token_raw``: it
+    returns the payload or raises ``ValueError``. A ``revocation_filter`` given
+    here must be exact; probabilistic filters belong in front of an
+    authoritative lookup instead.
+    """
+
+    ALGORITHMS = ["EdDSA"]
+
+    def __init__(
+        self,
+        public_key: ed25519.Ed25519PublicKey,
+        cache: Optional[VerifiedTokenCache] = None,
+        revocation_filter: Optional[RevocationFilter] = None,
+    ) -> None:
+        self.public_key = public_key
+        self.cache = cache if cache is not None else VerifiedTokenCache()
+        self.revocation_filter = revocation_filter
+        # Audience is validated per tenant by callers, not here.
+        self._decoder = jwt.PyJWT(options={"verify_aud": False})
+
+    def decode(self, token: str) -> Dict[str, Any]:
+        """Return the verified payload, from cache when possible."""
+        digest = token_digest(token)
+        payload = self.cache.get(digest)
+        if payload is not None:
+            return dict(payload)
+
+        try:
+            payload = self._decoder.decode(token, self.public_key, algorithms=self.ALGORITHMS)
+        except jwt.ExpiredSignatureError:
+            raise ValueError("Token has expired")
+        except jwt.InvalidTokenError:
+            raise ValueError("Invalid token")
+
+        self.cache.put(digest, payload)
+        return dict(payload)
+
+    def verify(self, token: str, replay_guard: Optional[Any] = None) -> Dict[str, Any]:
+        """
+        Verify a capability token.
+
+        Args:
+            token: JWT token string
+            replay_guard: Optional replay attack prevention
+
+        Returns:
+            Decoded token payload
+
+        Raises:
+            ValueError: If token is invalid, expired, revoked or replayed
+        """
+        payload = self.decode(token)
+
+        ttl = payload["exp"] - int(time.time())
+        if ttl <= 0:
+            raise ValueError("Token has expired")
+
+        if self.revocation_filter is not None and self.revocation_filter.might_be_revoked(payload["jti"]):
+            raise ValueError("Token has been revoked")
+
+        if replay_guard is not None and not replay_guard.check_and_set(payload["jti"], ttl):
+            raise ValueError("Token has been replayed")
+
+        return payload
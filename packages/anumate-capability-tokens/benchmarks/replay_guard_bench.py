@@ -0,0 +1,74 @@
+"""
+Micro-benchmark for replay guards at peak live-token volume.
+
+Preloads N live JTIs (default 100k, spread over the 5 minute token lifetime)
+and then times check_and_set for fresh JTIs and for replays.
+
+    python benchmarks/replay_guard_bench.py --live 100000 --ops 20000
+"""
+
+import argparse
+import random
+import time
+import uuid
+from typing import Dict
+
+from anumate_capability_tokens import InMemoryReplayGuard, ShardedReplayGuard
+
+
+class ScanReplayGuard:
+    """Previous implementation: scans every stored JTI on each call."""
+    def __init__(self) -> None:
+        self.storage: Dict[str, float] = {}
+
+    def check_and_set(self, jti: str, ttl: int) -> bool:
+        current_time = time.time()
+        expired_keys = [k for k, v in self.storage.items() if v <= current_time]
+        for k in expired_keys:
+            del self.storage[k]
+        if jti in self.storage and self.storage[jti] > current_time:
+            return False
+        self.storage[jti] = current_time + ttl
+        return True
+
+
+def run(name: str, guard, live: int, ops: int) -> None:
+    rng = random.Random(42)
+    jtis = [str(uuid.uuid4()) for _ in range(live)]
+    for jti in jtis:
+        guard.check_and_set(jti, rng.randint(1, 300))
+
+    fresh = [str(uuid.uuid4()) for _ in range(ops)]
+    start = time.perf_counter()
+    for jti in fresh:
+        guard.check_and_set(jti, 300)
+    fresh_elapsed = time.perf_counter() - start
+
+    replays = rng.sample(jtis, min(ops, live))
+    start = time.perf_counter()
+    for jti in replays:
+        guard.check_and_set(jti, 300)
+    replay_elapsed = time.perf_counter() - start
+
+    print(
+        f"{name:<22} live={live:>7}  "
+        f"fresh {fresh_elapsed / len(fresh) * 1e6:8.2f} us/op  "
+        f"replay {replay_elapsed / len(replays) * 1e6:8.2f} us/op"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--live", type=int, default=100_000, help="live JTIs to preload")
+    parser.add_argument("--ops", type=int, default=20_000, help="timed operations per phase")
+    parser.add_argument("--include-scan", action="store_true", help="also time the previous O(n) guard (slow)")
+    args = parser.parse_args()
+
+    run("InMemoryReplayGuard", InMemoryReplayGuard(), args.live, args.ops)
+    run("ShardedReplayGuard", ShardedReplayGuard(), args.live, args.ops)
+    if args.include_scan:
+        run("ScanReplayGuard", ScanReplayGuard(), args.live, min(args.ops, 200))
+
+
+if __name__ == "__main__":
+    main()
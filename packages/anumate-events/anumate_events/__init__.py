@@ -5,36 +5,62 @@ from typing import Dict, Any, Optional, List
 from datetime import datetime
 import json
 
+from .codec import (
+    CloudEventEnvelope,
+    decode_binary,
+    decode_message,
+    decode_structured,
+    encode_binary,
+    encode_structured,
+    peek_type,
+)
+
 class EventPublisher:
-    """Event publisher for CloudEvents."""
+    """Event publisher for CloudEvents.
+    
+    Events are built as ``CloudEventEnvelope`` objects and encoded with the
+    shared codec, in binary content mode unless ``binary_mode`` is False. A bus
+    with ``publish_message(subject, payload, headers)`` is handed the encoded
+    message as is; other buses get the event fields through ``publish``.
+    """
     
-    def __init__(self, event_bus=None):
+    def __init__(self, event_bus=None, binary_mode: bool = True):
         self.event_bus = event_bus
+        self.binary_mode = binary_mode
         self.published_events = []
     
     async def publish(self, event_type: str, data: Dict[str, Any], 
-                     source: str = "anumate", subject: Optional[str] = None):
+                     source: str = "anumate", subject: Optional[str] = None) -> CloudEventEnvelope:
         """Publish an event."""
-        event = {
-            "event_type": event_type,
-            "source": source,
-            "subject": subject or event_type,
-            "data": data,
-            "timestamp": datetime.utcnow().isoformat()
-        }
+        event = CloudEventEnvelope(
+            type=event_type,
+            source=source,
+            data=data,
+            subject=subject or event_type,
+        )
         
-        self.published_events.append(event)
+        self.published_events.append(event.to_dict())
         
         if self.event_bus:
-            await self.event_bus.publish(
-                subject=subject or event_type,
-                event_type=event_type,
-                source=source,
-                data=data
-            )
+            publish_message = getattr(self.event_bus, "publish_message", None)
+            if publish_message is not None:
+                if self.binary_mode:
+                    headers, payload = encode_binary(event)
+                else:
+                    headers, payload = None, encode_structured(event)
+                await publish_message(event.subject, payload, headers=headers)
+            else:
+                await self.event_bus.publish(
+                    subject=event.subject,
+                    event_type=event_type,
+                    source=source,
+                    data=data
+                )
+        
+        return event
     
     def get_published_events(self) -> List[Dict[str, Any]]:
-        """Get all published events."""
+        """Get all published events in structured-mode form."""
         return self.published_events.copy()
     
     def clear_events(self):
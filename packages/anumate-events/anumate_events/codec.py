@@ -0,0 +1,329 @@
+"""Lean CloudEvents codec shared by the Anumate event bus implementations.
+
+Two NATS content modes are supported:
+
+* **structured** - the whole envelope is one JSON document in the message body.
+* **binary** - attributes travel as ``ce-*`` message headers and the body is the
+  raw data payload. Consumers can route and filter on headers alone; the data is
+  only decoded when a handler actually reads ``event.data``.
+
+The envelope is a ``__slots__`` class rather than a pydantic model so the publish
+and consume hot paths never pay for validation or ``dict()``/``json()`` round-trips.
+"""
+
+import base64
+import json
+import uuid
+from datetime import datetime, timezone
+from enum import Enum
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised only without orjson
+    orjson = None
+
+SPEC_VERSION = "1.0"
+JSON_CONTENT_TYPE = "application/json"
+HEADER_PREFIX = "ce-"
+CONTENT_TYPE_HEADER = "content-type"
+
+# Extension attributes the platform always carries as first-class slots.
+KNOWN_EXTENSIONS = ("tenantid", "correlationid", "tracecontext")
+
+_OPTIONAL_ATTRIBUTES = ("dataschema", "subject") + KNOWN_EXTENSIONS
+_RESERVED = frozenset(
+    ("specversion", "type", "source", "id", "time", "datacontenttype", "data", "data_base64")
+    + _OPTIONAL_ATTRIBUTES
+)
+_MISSING = object()
+
+
+def _default(obj: Any) -> Any:
+    """Fallback serializer for types the stdlib encoder does not know."""
+    if isinstance(obj, datetime):
+        return format_time(obj)
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    if isinstance(obj, Enum):
+        return obj.value
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z
+
+    def dumps(obj: Any) -> bytes:
+        """Serialize ``obj`` to compact JSON bytes."""
+        return orjson.dumps(obj, default=_default, option=_ORJSON_OPTIONS)
+
+    loads = orjson.loads
+else:
+    _encoder = json.JSONEncoder(separators=(",", ":"), default=_default)
+
+    def dumps(obj: Any) -> bytes:
+        """Serialize ``obj`` to compact JSON bytes."""
+        return _encoder.encode(obj).encode()
+
+    def loads(data: Any) -> Any:
+        """Deserialize JSON from bytes or str."""
+        return json.loads(data)
+
+
+def format_time(value: datetime) -> str:
+    """Format a timestamp as RFC 3339; naive datetimes are treated as UTC."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.isoformat().replace("+00:00", "Z")
+
+
+def parse_time(value: str) -> datetime:
+    """Parse an RFC 3339 timestamp into an aware datetime."""
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+class CloudEventEnvelope:
+    """CloudEvents v1.0 envelope with lazily decoded data.
+
+    ``time`` may be given as a datetime or an RFC 3339 string; decoded events keep
+    the string and only parse it when ``time`` is read. Likewise, events decoded
+    from binary mode keep the raw payload bytes until ``data`` is accessed, and
+    re-encoding such an event forwards those bytes untouched.
+    """
+
+    __slots__ = (
+        "specversion",
+        "type",
+        "source",
+        "id",
+        "datacontenttype",
+        "dataschema",
+        "subject",
+        "tenantid",
+        "correlationid",
+        "tracecontext",
+        "extensions",
+        "_time",
+        "_data",
+        "_raw_data",
+    )
+
+    def __init__(
+        self,
+        type: str,
+        source: str,
+        data: Any = None,
+        id: Optional[str] = None,
+        time: Any = None,
+        subject: Optional[str] = None,
+        datacontenttype: Optional[str] = JSON_CONTENT_TYPE,
+        dataschema: Optional[str] = None,
+        tenantid: Optional[str] = None,
+        correlationid: Optional[str] = None,
+        tracecontext: Optional[str] = None,
+        specversion: str = SPEC_VERSION,
+        extensions: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        self.specversion = specversion
+        self.type = type
+        self.source = source
+        self.id = id or str(uuid.uuid4())
+        self.datacontenttype = datacontenttype
+        self.dataschema = dataschema
+        self.subject = subject
+        self.tenantid = str(tenantid) if tenantid is not None else None
+        self.correlationid = correlationid
+        self.tracecontext = tracecontext
+        self.extensions = extensions or {}
+        self._time = time if time is not None else datetime.now(timezone.utc)
+        self._data = data
+        self._raw_data = None
+
+    @classmethod
+    def from_raw(cls, raw_data: bytes, **attributes: Any) -> "CloudEventEnvelope":
+        """Build an event whose data is kept as undecoded payload bytes."""
+        event = cls(**attributes)
+        event._data = _MISSING
+        event._raw_data = raw_data
+        return event
+
+    @property
+    def time(self) -> Optional[datetime]:
+        """Event timestamp, parsed on first access."""
+        if isinstance(self._time, str):
+            self._time = parse_time(self._time)
+        return self._time
+
+    @time.setter
+    def time(self, value: Any) -> None:
+        self._time = value
+
+    @property
+    def time_str(self) -> Optional[str]:
+        """Event timestamp in wire format, without parsing."""
+        if self._time is None or isinstance(self._time, str):
+            return self._time
+        return format_time(self._time)
+
+    @property
+    def data(self) -> Any:
+        """Event payload, decoded on first access."""
+        if self._data is _MISSING:
+            raw = self._raw_data
+            if raw and _is_json(self.datacontenttype):
+                self._data = loads(raw)
+            else:
+                self._data = raw or None
+        return self._data
+
+    @data.setter
+    def data(self, value: Any) -> None:
+        self._data = value
+        self._raw_data = None
+
+    @property
+    def data_bytes(self) -> bytes:
+        """Event payload in wire format, encoded on first access."""
+        if self._raw_data is None:
+            data = self._data
+            if data is None:
+                self._raw_data = b""
+            elif isinstance(data, (bytes, bytearray, memoryview)):
+                self._raw_data = bytes(data)
+            else:
+                self._raw_data = dumps(data)
+        return self._raw_data
+
+    def attributes(self) -> Dict[str, Any]:
+        """Return the context attributes (everything except data)."""
+        attrs = {
+            "specversion": self.specversion,
+            "type": self.type,
+            "source": self.source,
+            "id": self.id,
+        }
+        time_str = self.time_str
+        if time_str is not None:
+            attrs["time"] = time_str
+        if self.datacontenttype is not None:
+            attrs["datacontenttype"] = self.datacontenttype
+        for name in _OPTIONAL_ATTRIBUTES:
+            value = getattr(self, name)
+            if value is not None:
+                attrs[name] = value
+        if self.extensions:
+            attrs.update(self.extensions)
+        return attrs
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the structured-mode representation."""
+        event_dict = self.attributes()
+        event_dict["data"] = self.data
+        return event_dict
+
+    def __repr__(self) -> str:
+        return f"CloudEventEnvelope(type={self.type!r}, source={self.source!r}, id={self.id!r})"
+
+
+def _is_json(content_type: Optional[str]) -> bool:
+    return content_type is None or "json" in content_type
+
+
+def _split_attributes(attributes: Mapping[str, Any]) -> Dict[str, Any]:
+    """Map wire attributes onto envelope constructor arguments."""
+    kwargs: Dict[str, Any] = {}
+    extensions: Dict[str, Any] = {}
+    for name, value in attributes.items():
+        if name in _RESERVED:
+            kwargs[name] = value
+        else:
+            extensions[name] = value
+    kwargs.setdefault("datacontenttype", None)
+    if extensions:
+        kwargs["extensions"] = extensions
+    return kwargs
+
+
+def encode_structured(event: CloudEventEnvelope) -> bytes:
+    """Encode an event as a single structured-mode JSON document.
+
+    Non-JSON payloads are carried as ``data_base64``.
+    """
+    event_dict = event.attributes()
+    if event._data is _MISSING and _is_json(event.datacontenttype):
+        # Splice the already-encoded payload in instead of decoding it first.
+        head = dumps(event_dict)
+        raw = event._raw_data or b"null"
+        return head[:-1] + b',"data":' + raw + b"}"
+    data = event.data
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        event_dict["data_base64"] = base64.b64encode(data).decode()
+    else:
+        event_dict["data"] = data
+    return dumps(event_dict)
+
+
+def decode_structured(payload: bytes) -> CloudEventEnvelope:
+    """Decode a structured-mode JSON document."""
+    attributes = loads(payload)
+    data = attributes.pop("data", None)
+    data_base64 = attributes.pop("data_base64", None)
+    if data_base64 is not None:
+        data = base64.b64decode(data_base64)
+    time = attributes.pop("time", None)
+    event = CloudEventEnvelope(data=data, **_split_attributes(attributes))
+    event._time = time
+    return event
+
+
+def encode_binary(event: CloudEventEnvelope) -> Tuple[Dict[str, str], bytes]:
+    """Encode an event for binary mode as ``(headers, body)``."""
+    headers = {}
+    for name, value in event.attributes().items():
+        if name == "datacontenttype":
+            headers[CONTENT_TYPE_HEADER] = value
+        else:
+            headers[HEADER_PREFIX + name] = value if isinstance(value, str) else str(value)
+    return headers, event.data_bytes
+
+
+def decode_binary(headers: Mapping[str, str], payload: bytes) -> CloudEventEnvelope:
+    """Decode a binary-mode message; the payload stays undecoded until read."""
+    attributes: Dict[str, Any] = {}
+    for name, value in headers.items():
+        lowered = name.lower()
+        if lowered.startswith(HEADER_PREFIX):
+            attributes[lowered[len(HEADER_PREFIX):]] = value
+        elif lowered == CONTENT_TYPE_HEADER:
+            attributes["datacontenttype"] = value
+    time = attributes.pop("time", None)
+    event = CloudEventEnvelope.from_raw(payload, **_split_attributes(attributes))
+    event._time = time
+    return event
+
+
+def is_binary(headers: Optional[Mapping[str, str]]) -> bool:
+    """Return True if the headers carry a binary-mode CloudEvent."""
+    if not headers:
+        return False
+    return any(name.lower() == HEADER_PREFIX + "specversion" for name in headers)
+
+
+def decode_message(headers: Optional[Mapping[str, str]], payload: bytes) -> CloudEventEnvelope:
+    """Decode a message in whichever content mode it was published."""
+    if is_binary(headers):
+        return decode_binary(headers, payload)
+    return decode_structured(payload)
+
+
+def peek_type(headers: Optional[Mapping[str, str]]) -> Optional[str]:
+    """Return the event type from binary-mode headers without decoding anything."""
+    if not headers:
+        return None
+    value = headers.get(HEADER_PREFIX + "type")
+    if value is not None:
+        return value
+    for name, value in headers.items():
+        if name.lower() == HEADER_PREFIX + "type":
+            return value
+    return None
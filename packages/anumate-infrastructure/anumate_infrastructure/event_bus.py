@@ -1,6 +1,5 @@
 """Event bus using NATS JetStream with CloudEvents support."""
 
-import json
 import os
 from datetime import datetime
 from typing import Any, Dict, Optional
@@ -9,15 +8,27 @@ from uuid import UUID, uuid4
 import nats
 from nats.js import JetStreamContext
 import structlog
+from anumate_events.codec import (
+    CloudEventEnvelope,
+    decode_message,
+    encode_binary,
+    encode_structured,
+)
 
 from .tenant_context import get_current_tenant_id
 
 logger = structlog.get_logger(__name__)
 
 
-class CloudEvent:
-    """CloudEvents specification implementation."""
-    
+class CloudEvent(CloudEventEnvelope):
+    """CloudEvents specification implementation.
+
+    Thin adapter over the shared ``anumate_events`` envelope that keeps the
+    constructor and attribute names this package has always exposed.
+    """
+
+    __slots__ = ()
+
     def __init__(
         self,
         event_type: str,
@@ -29,40 +40,40 @@ class CloudEvent:
         tenant_id: Optional[UUID] = None,
     ) -> None:
         """Initialize CloudEvent."""
-        self.spec_version = "1.0"
-        self.event_type = event_type
-        self.source = source
-        self.subject = subject
-        self.event_id = event_id or str(uuid4())
-        self.time = time or datetime.utcnow()
-        self.data_content_type = "application/json"
-        self.data = data
-        self.tenant_id = tenant_id or get_current_tenant_id()
-    
-    def to_dict(self) -> Dict[str, Any]:
-        """Convert to CloudEvents dictionary format."""
-        event_dict = {
-            "specversion": self.spec_version,
-            "type": self.event_type,
-            "source": self.source,
-            "id": self.event_id,
-            "time": self.time.isoformat() + "Z",
-            "datacontenttype": self.data_content_type,
-            "data": self.data,
-        }
-        
-        if self.subject:
-            event_dict["subject"] = self.subject
-        
-        if self.tenant_id:
-            event_dict["tenantid"] = str(self.tenant_id)
-        
-        return event_dict
-    
+        super().__init__(
+            type=event_type,
+            source=source,
+            data=data,
+            id=event_id,
+            time=time or datetime.utcnow(),
+            subject=subject,
+            tenantid=tenant_id or get_current_tenant_id(),
+        )
+
+    @property
+    def spec_version(self) -> str:
+        return self.specversion
+
+    @property
+    def event_type(self) -> str:
+        return self.type
+
+    @property
+    def event_id(self) -> str:
+        return self.id
+
+    @property
+    def data_content_type(self) -> Optional[str]:
+        return self.datacontenttype
+
+    @property
+    def tenant_id(self) -> Optional[UUID]:
+        return UUID(self.tenantid) if self.tenantid else None
+
     def to_json(self) -> str:
         """Convert to JSON string."""
-        return json.dumps(self.to_dict())
-    
+        return encode_structured(self).decode()
+
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "CloudEvent":
         """Create CloudEvent from dictionary."""
@@ -76,6 +87,15 @@ class CloudEvent:
             tenant_id=UUID(data["tenantid"]) if data.get("tenantid") else None,
         )
 
+    @classmethod
+    def from_message(cls, msg) -> "CloudEvent":
+        """Decode a NATS message published in binary or structured mode."""
+        envelope = decode_message(msg.headers, msg.data)
+        event = cls.__new__(cls)
+        for name in CloudEventEnvelope.__slots__:
+            setattr(event, name, getattr(envelope, name))
+        return event
+
 
 class EventBus:
     """NATS JetStream event bus with CloudEvents support."""
@@ -128,19 +148,10 @@ class EventBus:
             subject=event_subject,
         )
         
-        # Publish to JetStream
-        ack = await self._js.publish(
-            subject,
-            cloud_event.to_json().encode(),
-            headers={
-                "Ce-Specversion": cloud_event.spec_version,
-                "Ce-Type": cloud_event.event_type,
-                "Ce-Source": cloud_event.source,
-                "Ce-Id": cloud_event.event_id,
-                "Ce-Time": cloud_event.time.isoformat() + "Z",
-                "Content-Type": "application/json",
-            }
-        )
+        # Publish to JetStream in binary content mode: attributes in headers,
+        # data as the raw body, so consumers can route without decoding it.
+        headers, payload = encode_binary(cloud_event)
+        await self.publish_message(subject, payload, headers=headers)
         
         logger.info(
             "Published event",
@@ -152,6 +163,16 @@ class EventBus:
         
         return cloud_event.event_id
     
+    async def publish_message(
+        self,
+        subject: str,
+        payload: bytes,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> None:
+        """Publish an already encoded CloudEvent (binary or structured mode)."""
+        await self.connect()
+        await self._js.publish(subject, payload, headers=headers)
+    
     async def subscribe(
         self,
         subject: str,
@@ -165,8 +186,7 @@ class EventBus:
         async def message_handler(msg):
             try:
                 # Parse CloudEvent
-                event_data = json.loads(msg.data.decode())
-                cloud_event = CloudEvent.from_dict(event_data)
+                cloud_event = CloudEvent.from_message(msg)
                 
                 # Set tenant context if available
                 if cloud_event.tenant_id:
@@ -250,8 +270,7 @@ class EventSubscription:
         events = []
         for msg in msgs:
             try:
-                event_data = json.loads(msg.data.decode())
-                cloud_event = CloudEvent.from_dict(event_data)
+                cloud_event = CloudEvent.from_message(msg)
                 events.append((cloud_event, msg))
             except Exception as e:
                 logger.error(
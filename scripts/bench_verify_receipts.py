@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for offline receipt verification.
+
+Generates receipts like the receipt service does (per-receipt signatures and
+Merkle-batched signatures), then times:
+
+- one-at-a-time verification as the verify endpoint did it (content
+  serialized twice, every signature checked)
+- batch verification in one process (serialize once, one check per batch root)
+- batch verification with a process pool
+
+    python scripts/bench_verify_receipts.py --receipts 20000 --batch-size 64 --workers 1 4 8
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+import uuid
+from typing import Any, Dict, List
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from verify_receipt import canonical_json, merkle_root_from_path, verify_receipts_parallel  # noqa: E402
+
+
+def build_tree(content_hashes: List[str]):
+    """Same construction as anumate_receipt_service.merkle.build_tree."""
+    level = [hashlib.sha256(b'\x00' + bytes.fromhex(h)).digest() for h in content_hashes]
+    positions = list(range(len(level)))
+    paths: List[List[Dict[str, str]]] = [[] for _ in level]
+    while len(level) > 1:
+        for leaf, position in enumerate(positions):
+            sibling = position ^ 1
+            if sibling < len(level):
+                paths[leaf].append({'side': 'left' if sibling < position else 'right', 'hash': level[sibling].hex()})
+            positions[leaf] = position // 2
+        level = [
+            hashlib.sha256(b'\x01' + level[i] + level[i + 1]).digest() if i + 1 < len(level) else level[i]
+            for i in range(0, len(level), 2)
+        ]
+    return level[0], paths
+
+
+def generate_receipts(count: int, batch_size: int, private_key: Ed25519PrivateKey) -> List[Dict[str, Any]]:
+    receipts = []
+    for start in range(0, count, max(batch_size, 1)):
+        batch = []
+        for i in range(start, min(start + max(batch_size, 1), count)):
+            data = {
+                'content': {'step': i, 'tool': 'razorpay.payment_links.create', 'amount': 100 + i},
+                'metadata': {'receipt_type': 'execution', 'tenant_id': 'bench', 'version': '1.0.0'},
+            }
+            content_hash = hashlib.sha256(canonical_json(data)).hexdigest()
+            batch.append({
+                'receipt_id': str(uuid.uuid4()),
+                'receipt_data': data,
+                'content_hash': content_hash,
+                'signing_key_id': 'bench-key',
+            })
+
+        if batch_size <= 1:
+            for receipt in batch:
+                receipt['signature'] = private_key.sign(canonical_json(receipt['receipt_data'])).hex()
+        else:
+            root, paths = build_tree([r['content_hash'] for r in batch])
+            header = {'version': 1, 'batch_id': str(uuid.uuid4()), 'merkle_root': root.hex(), 'leaf_count': len(batch)}
+            signature = private_key.sign(canonical_json(header)).hex()
+            for index, (receipt, path) in enumerate(zip(batch, paths)):
+                receipt['signature'] = signature
+                receipt['merkle_proof'] = {**header, 'leaf_index': index, 'path': path}
+        receipts.extend(batch)
+    return receipts
+
+
+def verify_one_at_a_time(receipts: List[Dict[str, Any]], public_key) -> int:
+    """The single-receipt path: serialize twice, check every signature."""
+    valid = 0
+    for receipt in receipts:
+        content_ok = hashlib.sha256(canonical_json(receipt['receipt_data'])).hexdigest() == receipt['content_hash']
+        proof = receipt.get('merkle_proof')
+        if proof:
+            payload = canonical_json({k: proof[k] for k in ('version', 'batch_id', 'merkle_root', 'leaf_count')})
+            proof_ok = merkle_root_from_path(receipt['content_hash'], proof['path']) == proof['merkle_root']
+        else:
+            payload = canonical_json(receipt['receipt_data'])
+            proof_ok = True
+        try:
+            public_key.verify(bytes.fromhex(receipt['signature']), payload)
+            valid += content_ok and proof_ok
+        except Exception:
+            pass
+    return valid
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--receipts', type=int, default=20_000, help="receipts to generate")
+    parser.add_argument('--batch-size', type=int, default=64, help="receipts per signed Merkle batch (1 = unbatched)")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, os.cpu_count() or 1], help="pool sizes to time")
+    args = parser.parse_args()
+
+    private_key = Ed25519PrivateKey.generate()
+    public_pem = private_key.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+    receipts = generate_receipts(args.receipts, args.batch_size, private_key)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'receipts.jsonl')
+        with open(path, 'w') as f:
+            for receipt in receipts:
+                f.write(json.dumps(receipt) + '\n')
+
+        print(f"{len(receipts)} receipts, batch size {args.batch_size}")
+
+        started = time.perf_counter()
+        valid = verify_one_at_a_time(receipts, private_key.public_key())
+        elapsed = time.perf_counter() - started
+        print(f"{'one at a time':<22} {len(receipts) / elapsed:>10.0f} receipts/s  ({valid} valid)")
+
+        for workers in args.workers:
+            started = time.perf_counter()
+            valid = sum(r['is_valid'] for r in verify_receipts_parallel(path, {'': public_pem}, workers))
+            elapsed = time.perf_counter() - started
+            print(f"{f'batch, {workers} workers':<22} {len(receipts) / elapsed:>10.0f} receipts/s  ({valid} valid)")
+
+
+if __name__ == '__main__':
+    main()
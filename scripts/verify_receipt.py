@@ -2,15 +2,30 @@
 """
 Receipt verification script for Anumate execution receipts.
 Validates tamper-evidence and cryptographic signatures.
+
+Receipt service receipts (with ``receipt_data`` and ``content_hash``) are
+verified offline against the service's Ed25519 public key (PEM file or PEM
+text as the signing key argument), including Merkle inclusion proofs for
+batch-signed receipts.
+
+Batch mode streams a JSON Lines file (one receipt per line) or a JSON array
+through a process pool and writes one JSON result per receipt:
+
+    python verify_receipt.py --batch receipts.jsonl --public-key service.pem \
+        [--public-key other-key-id=other.pem] [--workers 8] [--output results.jsonl]
 """
 
+import argparse
 import json
 import hashlib
 import hmac
 import base64
+import os
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterator, List, Optional, Tuple
 
 
 def verify_receipt_signature(receipt: Dict[str, Any], signing_key: str) -> bool:
@@ -98,6 +113,324 @@ def verify_receipt_integrity(receipt: Dict[str, Any]) -> bool:
     return True
 
 
+def canonical_json(data: Dict[str, Any]) -> bytes:
+    """Canonical JSON bytes, as hashed and signed by the receipt service."""
+    return json.dumps(data, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+
+def verify_content_hash(receipt: Dict[str, Any]) -> bool:
+    """
+    Verify that a receipt service receipt's content matches its content hash.
+    
+    Args:
+        receipt: Receipt with receipt_data and content_hash
+    
+    Returns:
+        True if the hash matches
+    """
+    calculated = hashlib.sha256(canonical_json(receipt['receipt_data'])).hexdigest()
+    if calculated != receipt.get('content_hash'):
+        print("❌ Content hash mismatch")
+        print(f"   Expected: {receipt.get('content_hash')}")
+        print(f"   Got:      {calculated}")
+        return False
+    
+    print(f"✅ Content hash verified: {calculated}")
+    return True
+
+
+def merkle_root_from_path(content_hash: str, path: List[Dict[str, str]]) -> str:
+    """Walk an inclusion path up to the root (RFC 6962 leaf/node hashing)."""
+    node = hashlib.sha256(b'\x00' + bytes.fromhex(content_hash)).digest()
+    for step in path:
+        sibling = bytes.fromhex(step['hash'])
+        if step['side'] == 'left':
+            node = hashlib.sha256(b'\x01' + sibling + node).digest()
+        elif step['side'] == 'right':
+            node = hashlib.sha256(b'\x01' + node + sibling).digest()
+        else:
+            raise ValueError(f"invalid proof step side {step['side']!r}")
+    return node.hex()
+
+
+def verify_merkle_proof(receipt: Dict[str, Any]) -> bool:
+    """
+    Verify that a batch-signed receipt is included in its batch's Merkle root.
+    
+    Args:
+        receipt: Receipt with content_hash and merkle_proof
+    
+    Returns:
+        True if the inclusion proof leads to the recorded root
+    """
+    proof = receipt['merkle_proof']
+    try:
+        root = merkle_root_from_path(receipt['content_hash'], proof['path'])
+    except (KeyError, TypeError, ValueError) as e:
+        print(f"❌ Malformed Merkle proof: {e}")
+        return False
+    
+    if root != proof.get('merkle_root'):
+        print("❌ Merkle inclusion proof does not match the batch root")
+        return False
+    
+    print(f"✅ Included in batch {proof.get('batch_id')} "
+          f"(leaf {proof.get('leaf_index')} of {proof.get('leaf_count')})")
+    return True
+
+
+def load_public_key(key_argument: str):
+    """Load an Ed25519 public key from a PEM file path or PEM text."""
+    from cryptography.hazmat.primitives import serialization
+    
+    if os.path.isfile(key_argument):
+        with open(key_argument, 'rb') as f:
+            pem = f.read()
+    else:
+        pem = key_argument.encode('utf-8')
+    return serialization.load_pem_public_key(pem)
+
+
+def is_public_key_argument(key_argument: str) -> bool:
+    """Whether the signing key argument is an Ed25519 public key rather than an HMAC secret."""
+    if key_argument.startswith('-----BEGIN'):
+        return True
+    if os.path.isfile(key_argument):
+        with open(key_argument, 'rb') as f:
+            return f.read(10) == b'-----BEGIN'
+    return False
+
+
+def verify_ed25519_signature(receipt: Dict[str, Any], public_key) -> bool:
+    """
+    Verify a receipt service receipt's Ed25519 signature offline.
+    
+    Batch-signed receipts carry a signature over their batch root; others are
+    signed over the canonical receipt content.
+    
+    Args:
+        receipt: Receipt with signature (and merkle_proof if batch-signed)
+        public_key: Receipt service Ed25519 public key
+    
+    Returns:
+        True if the signature is valid
+    """
+    proof = receipt.get('merkle_proof')
+    if proof:
+        payload = canonical_json({
+            'version': proof['version'],
+            'batch_id': proof['batch_id'],
+            'merkle_root': proof['merkle_root'],
+            'leaf_count': proof['leaf_count'],
+        })
+    else:
+        payload = canonical_json(receipt['receipt_data'])
+    
+    try:
+        public_key.verify(bytes.fromhex(receipt['signature']), payload)
+    except Exception as e:
+        print(f"❌ Ed25519 signature verification failed: {e or 'invalid signature'}")
+        return False
+    
+    print(f"✅ Ed25519 {'batch root ' if proof else ''}signature verified "
+          f"(key {receipt.get('signing_key_id', 'unknown')})")
+    return True
+
+
+def check_service_receipt(
+    receipt: Dict[str, Any],
+    public_keys: Dict[str, Any],
+    verified_roots: Dict[Tuple, bool]
+) -> Dict[str, Any]:
+    """
+    Verify a receipt service receipt without printing, for batch mode.
+    
+    The content is serialized once; batch root signatures are checked once
+    per (key, batch) and remembered in ``verified_roots``.
+    
+    Args:
+        receipt: Receipt service receipt
+        public_keys: Public keys by signing key ID ('' is the default key)
+        verified_roots: Cache of batch root signature results
+    
+    Returns:
+        Per-receipt result
+    """
+    errors = []
+    content_hash_valid = merkle_proof_valid = signature_valid = False
+    proof = receipt.get('merkle_proof')
+    
+    try:
+        serialized = canonical_json(receipt['receipt_data'])
+        content_hash_valid = hashlib.sha256(serialized).hexdigest() == receipt['content_hash']
+        if not content_hash_valid:
+            errors.append("Content hash mismatch")
+    except (KeyError, TypeError) as e:
+        serialized = None
+        errors.append(f"Malformed receipt: {e}")
+    
+    key_id = receipt.get('signing_key_id', '')
+    public_key = public_keys.get(key_id, public_keys.get(''))
+    
+    if proof:
+        try:
+            merkle_proof_valid = merkle_root_from_path(receipt['content_hash'], proof['path']) == proof['merkle_root']
+        except (KeyError, TypeError, ValueError) as e:
+            errors.append(f"Malformed Merkle proof: {e}")
+        if not merkle_proof_valid and not errors:
+            errors.append("Merkle inclusion proof does not match the batch root")
+    else:
+        merkle_proof_valid = None
+    
+    if public_key is None:
+        errors.append(f"No public key for signing key {key_id!r}")
+    elif proof and merkle_proof_valid:
+        root_key = (key_id, proof.get('batch_id'), proof.get('merkle_root'), receipt.get('signature'))
+        if root_key not in verified_roots:
+            verified_roots[root_key] = _ed25519_valid(public_key, receipt.get('signature'), canonical_json({
+                'version': proof['version'],
+                'batch_id': proof['batch_id'],
+                'merkle_root': proof['merkle_root'],
+                'leaf_count': proof['leaf_count'],
+            }))
+        signature_valid = verified_roots[root_key]
+        if not signature_valid:
+            errors.append("Batch root signature verification failed")
+    elif not proof and serialized is not None:
+        signature_valid = _ed25519_valid(public_key, receipt.get('signature'), serialized)
+        if not signature_valid:
+            errors.append("Signature verification failed")
+    
+    return {
+        'receipt_id': receipt.get('receipt_id'),
+        'is_valid': content_hash_valid and signature_valid and merkle_proof_valid is not False and not errors,
+        'content_hash_valid': content_hash_valid,
+        'merkle_proof_valid': merkle_proof_valid,
+        'signature_valid': signature_valid,
+        'errors': errors,
+    }
+
+
+def _ed25519_valid(public_key, signature: Optional[str], payload: bytes) -> bool:
+    try:
+        public_key.verify(bytes.fromhex(signature), payload)
+        return True
+    except Exception:
+        return False
+
+
+_worker_public_keys: Dict[str, Any] = {}
+
+
+def _init_worker(key_pems: Dict[str, bytes]) -> None:
+    """Load public keys once per worker process."""
+    from cryptography.hazmat.primitives import serialization
+    
+    global _worker_public_keys
+    _worker_public_keys = {kid: serialization.load_pem_public_key(pem) for kid, pem in key_pems.items()}
+
+
+def _verify_chunk(chunk: List[Any]) -> List[Dict[str, Any]]:
+    """Verify a chunk of receipts (JSON lines or parsed dicts) in a worker."""
+    verified_roots: Dict[Tuple, bool] = {}
+    results = []
+    for item in chunk:
+        try:
+            receipt = json.loads(item) if isinstance(item, str) else item
+        except json.JSONDecodeError as e:
+            results.append({'receipt_id': None, 'is_valid': False, 'errors': [f"Invalid JSON: {e}"]})
+            continue
+        results.append(check_service_receipt(receipt, _worker_public_keys, verified_roots))
+    return results
+
+
+def iter_receipt_chunks(path: str, chunk_size: int) -> Iterator[List[Any]]:
+    """Stream receipts from a JSON Lines file (or a JSON array) in chunks."""
+    with open(path, 'r') as f:
+        first = f.read(1)
+        while first and first.isspace():
+            first = f.read(1)
+        f.seek(0)
+        
+        if first == '[':
+            receipts = json.load(f)
+            for i in range(0, len(receipts), chunk_size):
+                yield receipts[i:i + chunk_size]
+            return
+        
+        chunk = []
+        for line in f:
+            if line.strip():
+                chunk.append(line)
+                if len(chunk) >= chunk_size:
+                    yield chunk
+                    chunk = []
+        if chunk:
+            yield chunk
+
+
+def verify_receipts_parallel(
+    path: str,
+    key_pems: Dict[str, bytes],
+    workers: int,
+    chunk_size: int = 500
+) -> Iterator[Dict[str, Any]]:
+    """Verify a receipts file with a process pool, yielding results in file order."""
+    if workers <= 1:
+        _init_worker(key_pems)
+        for chunk in iter_receipt_chunks(path, chunk_size):
+            yield from _verify_chunk(chunk)
+        return
+    
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(key_pems,)) as pool:
+        for results in pool.map(_verify_chunk, iter_receipt_chunks(path, chunk_size)):
+            yield from results
+
+
+def parse_public_key_arguments(arguments: List[str]) -> Dict[str, bytes]:
+    """Parse ``[KEY_ID=]PATH`` arguments into PEM bytes by key ID ('' for the default)."""
+    key_pems = {}
+    for argument in arguments:
+        key_id, separator, key_path = argument.partition('=')
+        if not separator:
+            key_id, key_path = '', argument
+        with open(key_path, 'rb') as f:
+            key_pems[key_id] = f.read()
+    return key_pems
+
+
+def batch_main(argv: List[str]) -> None:
+    """Verify a file of receipt service receipts in parallel."""
+    parser = argparse.ArgumentParser(description="Verify many receipt service receipts offline")
+    parser.add_argument('--batch', required=True, help="JSON Lines file (or JSON array) of receipts")
+    parser.add_argument('--public-key', action='append', required=True, help="[KEY_ID=]PEM file; repeatable")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="worker processes")
+    parser.add_argument('--chunk-size', type=int, default=500, help="receipts per work unit")
+    parser.add_argument('--output', help="write per-receipt JSON results here (default: stdout)")
+    args = parser.parse_args(argv)
+    
+    key_pems = parse_public_key_arguments(args.public_key)
+    output = open(args.output, 'w') if args.output else sys.stdout
+    total = valid = 0
+    started = time.perf_counter()
+    try:
+        for result in verify_receipts_parallel(args.batch, key_pems, args.workers, args.chunk_size):
+            total += 1
+            valid += bool(result['is_valid'])
+            output.write(json.dumps(result) + '\n')
+    finally:
+        if args.output:
+            output.close()
+    
+    elapsed = time.perf_counter() - started
+    print(
+        f"Verified {total} receipts: {valid} valid, {total - valid} invalid "
+        f"in {elapsed:.2f}s ({total / elapsed if elapsed else 0:.0f} receipts/s, {args.workers} workers)",
+        file=sys.stderr
+    )
+    sys.exit(0 if valid == total else 1)
+
+
 def verify_plan_hash_binding(receipt: Dict[str, Any], expected_plan_hash: Optional[str] = None) -> bool:
     """
     Verify that the receipt is bound to the correct plan hash.
@@ -164,9 +497,13 @@ def verify_mcp_execution_evidence(receipt: Dict[str, Any]) -> bool:
 
 def main():
     """Main verification function."""
+    if '--batch' in sys.argv[1:]:
+        batch_main(sys.argv[1:])
+    
     if len(sys.argv) < 2:
-        print("Usage: python verify_receipt.py <receipt_file> [signing_key] [expected_plan_hash]")
+        print("Usage: python verify_receipt.py <receipt_file> [signing_key|public_key.pem] [expected_plan_hash]")
         print("       python verify_receipt.py '<receipt_json>' [signing_key] [expected_plan_hash]")
+        print("       python verify_receipt.py --batch <receipts.jsonl> --public-key <key.pem> [--workers N]")
         sys.exit(1)
     
     receipt_input = sys.argv[1]
@@ -193,13 +530,21 @@ def main():
     print()
     
     # Run verification checks
-    checks = [
-        ("Structural Integrity", verify_receipt_integrity(receipt)),
-        ("Plan Hash Binding", verify_plan_hash_binding(receipt, expected_plan_hash)),
-        ("MCP Execution Evidence", verify_mcp_execution_evidence(receipt)),
-    ]
+    if 'receipt_data' in receipt and 'content_hash' in receipt:
+        # Receipt service receipt
+        checks = [("Content Hash", verify_content_hash(receipt))]
+        if receipt.get('merkle_proof'):
+            checks.append(("Merkle Inclusion", verify_merkle_proof(receipt)))
+    else:
+        checks = [
+            ("Structural Integrity", verify_receipt_integrity(receipt)),
+            ("Plan Hash Binding", verify_plan_hash_binding(receipt, expected_plan_hash)),
+            ("MCP Execution Evidence", verify_mcp_execution_evidence(receipt)),
+        ]
     
-    if signing_key:
+    if signing_key and is_public_key_argument(signing_key):
+        checks.append(("Ed25519 Signature", verify_ed25519_signature(receipt, load_public_key(signing_key))))
+    elif signing_key:
         checks.append(("Cryptographic Signature", verify_receipt_signature(receipt, signing_key)))
     else:
         print("⚠️  No signing key provided - skipping signature verification")
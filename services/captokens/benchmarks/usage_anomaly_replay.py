@@ -0,0 +1,171 @@
+"""
+Replay harness for the online usage anomaly detector.
+
+Replays a usage history through ``OnlineUsageDetector`` and compares its
+report with the query-based ``UsageTracker.detect_usage_anomalies`` rules,
+evaluated here over the same rows in memory.
+
+The history is either synthetic or a CSV export of the usage table:
+
+    \\copy (SELECT tenant_id, token_id, created_at, success, response_time_ms
+           FROM token_usage_tracking ORDER BY created_at) TO 'usage.csv' CSV HEADER
+
+    python benchmarks/usage_anomaly_replay.py --events 200000
+    python benchmarks/usage_anomaly_replay.py --csv usage.csv --hours 24
+"""
+
+import argparse
+import csv
+import random
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from anumate_captokens_service.usage_sketch import OnlineUsageDetector
+
+ANOMALY_TYPES = ("high_failure_rate", "unusual_high_frequency", "slow_response_time")
+
+
+class Usage(NamedTuple):
+    tenant_id: str
+    token_id: str
+    timestamp: float
+    success: bool
+    response_time_ms: Optional[int]
+
+
+def synthetic_usage(events: int, tenants: int, tokens: int, hours: float, seed: int) -> List[Usage]:
+    """Mostly uniform traffic with a few hot, failing and slow tokens."""
+    rng = random.Random(seed)
+    start = time.time() - hours * 3600
+    token_ids = {t: [f"tok-{t}-{i}" for i in range(tokens)] for t in range(tenants)}
+    hot = {t: set(rng.sample(token_ids[t], max(1, tokens // 100))) for t in range(tenants)}
+    failing = {t: set(rng.sample(token_ids[t], max(1, tokens // 100))) for t in range(tenants)}
+    slow = {t: set(rng.sample(token_ids[t], max(1, tokens // 100))) for t in range(tenants)}
+
+    usage = []
+    for i in range(events):
+        tenant = rng.randrange(tenants)
+        if rng.random() < 0.1:
+            token = rng.choice(sorted(hot[tenant]))
+        else:
+            token = rng.choice(token_ids[tenant])
+        success = rng.random() > (0.9 if token in failing[tenant] else 0.05)
+        latency = rng.randint(200, 400) if token in slow[tenant] else rng.randint(20, 80)
+        usage.append(Usage(f"tenant-{tenant}", token, start + hours * 3600 * i / events, success, latency))
+    return usage
+
+
+def csv_usage(path: str) -> List[Usage]:
+    usage = []
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            response_time = row.get("response_time_ms")
+            usage.append(Usage(
+                row["tenant_id"],
+                row["token_id"],
+                datetime.fromisoformat(row["created_at"]).timestamp(),
+                row["success"].lower() in ("t", "true", "1"),
+                int(response_time) if response_time else None,
+            ))
+    usage.sort(key=lambda u: u.timestamp)
+    return usage
+
+
+def query_anomalies(usage: Iterable[Usage], tenant_id: str, since: float) -> Set[Tuple[str, str]]:
+    """The query-based detector's rules over in-memory rows."""
+    totals: Dict[str, int] = defaultdict(int)
+    failures: Dict[str, int] = defaultdict(int)
+    latency: Dict[str, List[int]] = defaultdict(list)
+    for u in usage:
+        if u.tenant_id != tenant_id or u.timestamp < since:
+            continue
+        totals[u.token_id] += 1
+        failures[u.token_id] += not u.success
+        if u.response_time_ms is not None:
+            latency[u.token_id].append(u.response_time_ms)
+
+    anomalies = set()
+    for token_id, total in totals.items():
+        if total > 10 and failures[token_id] / total > 0.5:
+            anomalies.add(("high_failure_rate", token_id))
+    if totals:
+        avg_usage = sum(totals.values()) / len(totals)
+        anomalies.update(
+            ("unusual_high_frequency", token_id)
+            for token_id, count in totals.items() if count > avg_usage * 3
+        )
+    averages = {token_id: sum(v) / len(v) for token_id, v in latency.items()}
+    if averages:
+        baseline = sum(averages.values()) / len(averages)
+        anomalies.update(
+            ("slow_response_time", token_id)
+            for token_id, avg in averages.items() if avg > baseline * 2
+        )
+    return anomalies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--csv", help="usage table export (default: synthetic workload)")
+    parser.add_argument("--events", type=int, default=100_000, help="synthetic events")
+    parser.add_argument("--tenants", type=int, default=5, help="synthetic tenants")
+    parser.add_argument("--tokens", type=int, default=500, help="synthetic tokens per tenant")
+    parser.add_argument("--hours", type=float, default=24, help="detection window in hours")
+    parser.add_argument("--width", type=int, default=2048, help="sketch width")
+    parser.add_argument("--depth", type=int, default=4, help="sketch depth")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    if args.csv:
+        usage = csv_usage(args.csv)
+    else:
+        usage = synthetic_usage(args.events, args.tenants, args.tokens, args.hours, args.seed)
+    if not usage:
+        print("no usage rows")
+        return
+
+    detector = OnlineUsageDetector(window_seconds=args.hours * 3600, width=args.width, depth=args.depth)
+    flagged_live = 0
+    start = time.perf_counter()
+    for u in usage:
+        flagged_live += len(detector.record(u.tenant_id, u.token_id, u.success, u.response_time_ms, now=u.timestamp))
+    record_elapsed = time.perf_counter() - start
+
+    now = usage[-1].timestamp
+    # The detector drops whole buckets, so compare from its bucket boundary.
+    bucket = detector.window_seconds / detector.buckets
+    since = (int(now // bucket) - detector.buckets + 1) * bucket
+    tenants = sorted({u.tenant_id for u in usage})
+
+    expected: Set[Tuple[str, str, str]] = set()
+    actual: Set[Tuple[str, str, str]] = set()
+    query_elapsed = detect_elapsed = 0.0
+    for tenant_id in tenants:
+        start = time.perf_counter()
+        expected.update((tenant_id, *a) for a in query_anomalies(usage, tenant_id, since))
+        query_elapsed += time.perf_counter() - start
+
+        start = time.perf_counter()
+        actual.update(
+            (tenant_id, a["type"], a["token_id"])
+            for a in detector.detect(tenant_id, now=now) if a["type"] in ANOMALY_TYPES
+        )
+        detect_elapsed += time.perf_counter() - start
+
+    print(f"events={len(usage)} tenants={len(tenants)} sketch={args.depth}x{args.width}")
+    print(f"record  {record_elapsed / len(usage) * 1e6:8.2f} us/event  ({flagged_live} live flags)")
+    print(f"detect  {detect_elapsed * 1e3:8.2f} ms  vs in-memory query rules {query_elapsed * 1e3:8.2f} ms")
+    print(f"{'type':<24} {'query':>7} {'online':>7} {'both':>7} {'precision':>10} {'recall':>7}")
+    for anomaly_type in ANOMALY_TYPES:
+        exp = {a for a in expected if a[1] == anomaly_type}
+        act = {a for a in actual if a[1] == anomaly_type}
+        both = len(exp & act)
+        precision = both / len(act) if act else 1.0
+        recall = both / len(exp) if exp else 1.0
+        print(f"{anomaly_type:<24} {len(exp):>7} {len(act):>7} {both:>7} {precision:>10.3f} {recall:>7.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,7 @@ Provides REST endpoints for token management and verification.
 import logging
 import os
 from contextlib import asynccontextmanager
+from datetime import datetime, timezone
 from typing import List, Optional, Dict, Any
 import asyncio
 
@@ -19,7 +20,7 @@ from pydantic import BaseModel, Field, validator
 # Database imports - optional for development
 try:
     from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-    from sqlalchemy import event
+    from sqlalchemy import event, select
     from sqlalchemy.engine import Engine
     DATABASE_AVAILABLE = True
 except ImportError:
@@ -54,7 +55,10 @@ try:
         verify_capability_token, 
         check_capability,
         CapabilityToken,
-        InMemoryReplayGuard
+        CapabilityTokenVerifier,
+        InMemoryReplayGuard,
+        key_id_for,
+        public_key_to_pem
     )
     CAPABILITY_TOKENS_AVAILABLE = True
 except ImportError:
@@ -63,7 +67,9 @@ except ImportError:
 
 # Import token service - optional for development  
 try:
-    from token_service import TokenService, TokenRecord, TokenUsageAudit, Base, TokenCleanupService
+    from .services.token_service import TokenService, TokenRecord, TokenUsageAudit, Base, TokenCleanupService
+    from .services.batch_writer import BatchInsertWriter
+    from .services.revocation_service import RevocationBloomFilter
     TOKEN_SERVICE_AVAILABLE = True
 except ImportError:
     TOKEN_SERVICE_AVAILABLE = False
@@ -103,6 +109,16 @@ class TokenIssueResponse(BaseModel):
     expires_at: str = Field(..., description="Token expiration time (ISO 8601)")
     
 
+class TokenBatchIssueRequest(BaseModel):
+    """Request to issue capability tokens in bulk."""
+    tokens: List[TokenIssueRequest] = Field(..., description="Tokens to issue", min_items=1, max_items=1000)
+
+
+class TokenBatchIssueResponse(BaseModel):
+    """Response from bulk token issuance."""
+    tokens: List[TokenIssueResponse] = Field(..., description="Issued tokens, in request order")
+
+
 class TokenVerifyRequest(BaseModel):
     """Request to verify a token."""
     token: str = Field(..., description="JWT token to verify")
@@ -148,6 +164,24 @@ class TokenRefreshResponse(BaseModel):
     expires_at: str = Field(..., description="Token expiration time (ISO 8601)")
 
 
+class PublicKeyInfo(BaseModel):
+    """A token signing public key."""
+    kid: str = Field(..., description="Key identifier")
+    alg: str = Field(default="EdDSA", description="Signing algorithm")
+    public_key_pem: str = Field(..., description="Ed25519 public key (PEM)")
+
+
+class KeySetResponse(BaseModel):
+    """Public keys that sign currently valid tokens."""
+    keys: List[PublicKeyInfo] = Field(..., description="Signing public keys")
+
+
+class RevocationFeedResponse(BaseModel):
+    """Revoked tokens that have not yet expired."""
+    revoked: List[str] = Field(..., description="Revoked token IDs")
+    as_of: str = Field(..., description="Snapshot time (ISO 8601)")
+
+
 class AuditResponse(BaseModel):
     """Audit trail response."""
     records: List[Dict[str, Any]] = Field(..., description="Audit records")
@@ -188,7 +222,10 @@ async def get_token_service(db_session: AsyncSession = Depends(get_db_session))
         private_key=token_service.private_key,
         public_key=token_service.public_key,
         db_session=db_session,
-        replay_guard=token_service.replay_guard
+        replay_guard=token_service.replay_guard,
+        verifier=token_service.verifier,
+        revocation_filter=token_service.revocation_filter,
+        audit_writer=token_service.audit_writer
     )
 
 
@@ -245,12 +282,35 @@ async def lifespan(app: FastAPI):
             public_key_pem.encode()
         )
     
+    # Hot-path verification: cached signature checks, Redis revocation filter,
+    # and audit rows written behind the request
+    verifier = CapabilityTokenVerifier(public_key)
+    audit_writer = BatchInsertWriter(db_sessionmaker, TokenUsageAudit)
+    await audit_writer.start()
+    
+    revocation_filter = None
+    redis_url = os.getenv("REDIS_URL")
+    if redis_url:
+        import redis.asyncio as redis
+        revocation_filter = RevocationBloomFilter(redis.from_url(redis_url))
+        async with db_sessionmaker() as session:
+            result = await session.execute(
+                select(TokenRecord.token_id).where(
+                    TokenRecord.revoked == True,
+                    TokenRecord.expires_at > datetime.now(timezone.utc)
+                )
+            )
+            await revocation_filter.rebuild(result.scalars().all())
+    
     # Initialize token service
     async with db_sessionmaker() as session:
         token_service = TokenService(
             private_key=private_key,
             public_key=public_key,
-            db_session=session
+            db_session=session,
+            verifier=verifier,
+            revocation_filter=revocation_filter,
+            audit_writer=audit_writer
         )
     
     # Start cleanup service
@@ -267,6 +327,7 @@ async def lifespan(app: FastAPI):
     if cleanup_service:
         cleanup_service.stop()
     
+    await audit_writer.stop()
     await engine.dispose()
     logger.info("Capability Tokens Service shutdown complete")
 
@@ -330,6 +391,43 @@ async def issue_token(
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+@app.post("/v1/captokens/batch", response_model=TokenBatchIssueResponse)
+async def issue_tokens_batch(
+    request: TokenBatchIssueRequest,
+    tenant_id: str = Depends(get_tenant_id),
+    service: TokenService = Depends(get_token_service)
+) -> TokenBatchIssueResponse:
+    """
+    Issue capability tokens in bulk.
+    
+    All tokens are stored and audited in a single transaction; if any request
+    is invalid, none are issued.
+    """
+    try:
+        capability_tokens = await service.issue_tokens(
+            tenant_id=tenant_id,
+            requests=[(t.subject, t.capabilities, t.ttl_seconds) for t in request.tokens],
+            created_by="api"
+        )
+        
+        return TokenBatchIssueResponse(tokens=[
+            TokenIssueResponse(
+                token=capability_token.token,
+                token_id=capability_token.token_id,
+                subject=capability_token.subject,
+                capabilities=capability_token.capabilities,
+                expires_at=capability_token.expires_at.isoformat()
+            )
+            for capability_token in capability_tokens
+        ])
+        
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error issuing tokens: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
 @app.post("/v1/captokens/verify", response_model=TokenVerifyResponse)
 async def verify_token(
     request: TokenVerifyRequest,
@@ -500,6 +598,39 @@ async def get_audit_trail(
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+@app.get("/v1/captokens/keys", response_model=KeySetResponse)
+async def get_signing_keys() -> KeySetResponse:
+    """
+    Publish the token signing public keys for in-process verification.
+    """
+    if not token_service:
+        raise HTTPException(status_code=500, detail="Token service not initialized")
+    
+    return KeySetResponse(keys=[
+        PublicKeyInfo(
+            kid=key_id_for(token_service.public_key),
+            public_key_pem=public_key_to_pem(token_service.public_key)
+        )
+    ])
+
+
+@app.get("/v1/captokens/revocations", response_model=RevocationFeedResponse)
+async def get_revocations(
+    service: TokenService = Depends(get_token_service)
+) -> RevocationFeedResponse:
+    """
+    Revocation feed for in-process verifiers: every revoked, unexpired token.
+    """
+    try:
+        as_of = datetime.now(timezone.utc)
+        revoked = await service.get_active_revocations()
+        return RevocationFeedResponse(revoked=revoked, as_of=as_of.isoformat())
+        
+    except Exception as e:
+        logger.error(f"Error fetching revocations: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
 @app.get("/v1/captokens/stats")
 async def get_token_stats(
     tenant_id: str = Depends(get_tenant_id),
@@ -5,6 +5,7 @@ Anumate CapTokens Service - Production FastAPI Application
 Production-grade FastAPI application for Ed25519/JWT capability token management.
 """
 
+import asyncio
 import os
 import uuid
 from datetime import datetime, timedelta
@@ -19,18 +20,35 @@ from fastapi.responses import JSONResponse
 from pydantic import BaseModel, Field
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from .database import get_async_session, init_database, close_database, check_database_health
+from .database import get_async_session, init_database, close_database, check_database_health, async_session_factory
 from .database_services import (
     DatabaseTokenService, 
     AuditService, 
     CleanupService, 
     ReplayProtectionService
 )
-from .models import CapabilityToken, ToolAllowList, CapabilityViolation, TokenUsageTracking
+from .models import CapabilityToken, ToolAllowList, CapabilityViolation, TokenAuditLog, TokenUsageTracking
 from .capability_checker import CapabilityChecker
 from .violation_logger import ViolationLogger
 from .usage_tracker import UsageTracker
-from anumate_capability_tokens import issue_capability_token, verify_capability_token, check_capability
+from .services.batch_writer import BatchInsertWriter
+from .services.cleanup_service import CleanupScheduler
+from .services.replay_service import (
+    ReplayProtectionService as RedisReplayProtectionService,
+    create_replay_writer,
+    replay_conflict_columns,
+)
+from .services.revocation_service import RevocationBloomFilter
+from anumate_capability_tokens import (
+    issue_capability_token,
+    issue_capability_tokens_raw,
+    check_capability,
+    CapabilityTokenVerifier,
+    get_keys,
+    get_replay_guard,
+    key_id_for,
+    public_key_to_pem,
+)
 
 # Import logging with fallback  
 try:
@@ -71,6 +89,16 @@ class TokenIssueResponse(BaseModel):
     issued_at: datetime = Field(..., description="Token issuance time")
 
 
+class TokenBatchIssueRequest(BaseModel):
+    """Request model for issuing capability tokens in bulk."""
+    tokens: List[TokenIssueRequest] = Field(..., description="Tokens to issue", min_items=1, max_items=1000)
+
+
+class TokenBatchIssueResponse(BaseModel):
+    """Response model for bulk token issuance."""
+    tokens: List[TokenIssueResponse] = Field(..., description="Issued tokens, in request order")
+
+
 class TokenVerifyRequest(BaseModel):
     """Request model for token verification."""
     token: str = Field(..., description="JWT token to verify")
@@ -112,6 +140,24 @@ class CapabilityCheckResponse(BaseModel):
     payload: Optional[Dict[str, Any]] = Field(None, description="Token payload if valid")
 
 
+class PublicKeyInfo(BaseModel):
+    """A token signing public key."""
+    kid: str = Field(..., description="Key identifier")
+    alg: str = Field(default="EdDSA", description="Signing algorithm")
+    public_key_pem: str = Field(..., description="Ed25519 public key (PEM)")
+
+
+class KeySetResponse(BaseModel):
+    """Response model for the signing key set."""
+    keys: List[PublicKeyInfo] = Field(..., description="Signing public keys")
+
+
+class RevocationFeedResponse(BaseModel):
+    """Response model for the revocation feed."""
+    revoked: List[str] = Field(..., description="Revoked, unexpired token IDs")
+    as_of: datetime = Field(..., description="Snapshot time")
+
+
 class AuditTrailResponse(BaseModel):
     """Response model for audit trail."""
     audit_records: List[Dict[str, Any]] = Field(..., description="List of audit records")
@@ -205,6 +251,49 @@ async def lifespan(app: FastAPI):
         await init_database()
         logger.info("Database initialized successfully")
         
+        # Usage rows are written behind requests in batches and fed to the
+        # online anomaly detector as they are tracked
+        await UsageTracker.start_writer(async_session_factory)
+        UsageTracker.enable_online_detection()
+        
+        # With Redis, replay checks are atomic in Redis and replay rows are
+        # upserted behind the request; without it they go to the database inline
+        app.state.replay_redis = None
+        app.state.replay_writer = None
+        app.state.replay_conflict_columns = None
+        redis_url = os.getenv("REDIS_URL")
+        if redis_url:
+            import redis.asyncio as redis
+            app.state.replay_redis = redis.from_url(redis_url, decode_responses=True)
+            async with async_session_factory() as session:
+                app.state.replay_conflict_columns = await replay_conflict_columns(session)
+            app.state.replay_writer = create_replay_writer(
+                async_session_factory,
+                conflict_columns=app.state.replay_conflict_columns,
+            )
+            await app.state.replay_writer.start()
+        
+        # Hot-path verification: cached signature checks, the Redis revocation
+        # filter in front of the database, and verify audit rows written in batches
+        _, public_key = get_keys()
+        app.state.token_verifier = CapabilityTokenVerifier(public_key)
+        app.state.audit_writer = BatchInsertWriter(async_session_factory, TokenAuditLog)
+        await app.state.audit_writer.start()
+        app.state.revocation_filter = None
+        if app.state.replay_redis is not None:
+            app.state.revocation_filter = RevocationBloomFilter(app.state.replay_redis)
+            async with async_session_factory() as session:
+                revoked = await DatabaseTokenService(session).get_active_revocations()
+            await app.state.revocation_filter.rebuild(revoked)
+        
+        # Partition upkeep and expiry; set CLEANUP_SCHEDULER_ENABLED=false when
+        # cleanup runs elsewhere (e.g. the cleanup-scheduler CLI)
+        app.state.cleanup_scheduler = None
+        app.state.cleanup_task = None
+        if os.getenv("CLEANUP_SCHEDULER_ENABLED", "true").lower() == "true":
+            app.state.cleanup_scheduler = CleanupScheduler(async_session_factory)
+            app.state.cleanup_task = asyncio.create_task(app.state.cleanup_scheduler.start())
+        
         # Store startup time
         app.state.startup_time = datetime.utcnow()
         
@@ -217,6 +306,20 @@ async def lifespan(app: FastAPI):
     finally:
         # Shutdown
         logger.info("Shutting down CapTokens Service...")
+        if getattr(app.state, "cleanup_task", None) is not None:
+            app.state.cleanup_scheduler.stop()
+            app.state.cleanup_task.cancel()
+            try:
+                await app.state.cleanup_task
+            except asyncio.CancelledError:
+                pass
+        await UsageTracker.stop_writer()
+        if getattr(app.state, "audit_writer", None) is not None:
+            await app.state.audit_writer.stop()
+        if getattr(app.state, "replay_writer", None) is not None:
+            await app.state.replay_writer.stop()
+        if getattr(app.state, "replay_redis", None) is not None:
+            await app.state.replay_redis.aclose()
         await close_database()
         logger.info("CapTokens Service shutdown complete")
 
@@ -262,6 +365,8 @@ def create_app() -> FastAPI:
                 "issue_token": "POST /v1/captokens",
                 "verify_token": "POST /v1/captokens/verify",
                 "refresh_token": "POST /v1/captokens/refresh",
+                "signing_keys": "GET /v1/captokens/keys",
+                "revocations": "GET /v1/captokens/revocations",
                 "audit_trail": "GET /v1/captokens/audit"
             },
             "features": [
@@ -413,6 +518,124 @@ def create_app() -> FastAPI:
                 detail={"error": ErrorCode.INTERNAL_ERROR, "message": "Token issuance failed"}
             )
     
+    # Bulk token issuance endpoint
+    @app.post("/v1/captokens/batch", response_model=TokenBatchIssueResponse)
+    async def issue_tokens_batch(
+        request: TokenBatchIssueRequest,
+        tenant_id: UUID = Depends(get_tenant_id),
+        db: AsyncSession = Depends(get_async_session),
+        http_request: Request = None,
+    ):
+        """Issue capability tokens in bulk; all are stored in one transaction, or none are."""
+        start_time = datetime.utcnow()
+        token_service = DatabaseTokenService(db)
+        client_ip = http_request.client.host if http_request else None
+        user_agent = http_request.headers.get("user-agent") if http_request else None
+        
+        try:
+            # Sign off the event loop; the JWT header and key ID are shared by the batch
+            private_key, _ = get_keys()
+            loop = asyncio.get_running_loop()
+            tokens = await loop.run_in_executor(
+                None,
+                issue_capability_tokens_raw,
+                private_key,
+                str(tenant_id),
+                [(t.subject, t.capabilities, t.ttl_seconds) for t in request.tokens],
+            )
+            
+            await token_service.store_tokens(
+                tenant_id=tenant_id,
+                tokens=[
+                    dict(
+                        token_id=UUID(token.token_id),
+                        token_hash=token_service._hash_token(token.token),
+                        subject=token.subject,
+                        capabilities=token.capabilities,
+                        expires_at=token.expires_at,
+                    )
+                    for token in tokens
+                ],
+                created_by=tenant_id,  # In production, this would be the authenticated user
+                client_ip=client_ip,
+                user_agent=user_agent,
+            )
+            
+            # Log audit trail
+            duration_ms = int((datetime.utcnow() - start_time).total_seconds() * 1000)
+            for token in tokens:
+                await app.state.audit_writer.submit(dict(
+                    tenant_id=tenant_id,
+                    token_id=UUID(token.token_id),
+                    operation="issue",
+                    status="success",
+                    request_data={
+                        "subject": token.subject,
+                        "capabilities": token.capabilities,
+                        "batch_size": len(tokens),
+                    },
+                    response_data={
+                        "token_id": token.token_id,
+                        "expires_at": token.expires_at.isoformat(),
+                    },
+                    endpoint="/v1/captokens/batch",
+                    http_method="POST",
+                    client_ip=client_ip,
+                    user_agent=user_agent,
+                    duration_ms=duration_ms,
+                ))
+            
+            logger.info(
+                "Tokens issued successfully",
+                extra={"tenant_id": str(tenant_id), "tokens": len(tokens)}
+            )
+            
+            return TokenBatchIssueResponse(tokens=[
+                TokenIssueResponse(
+                    token=token.token,
+                    token_id=token.token_id,
+                    subject=token.subject,
+                    capabilities=token.capabilities,
+                    expires_at=token.expires_at,
+                    issued_at=token.issued_at,
+                )
+                for token in tokens
+            ])
+            
+        except ValueError as e:
+            raise HTTPException(
+                status_code=400,
+                detail={"error": ErrorCode.VALIDATION_ERROR, "message": str(e)}
+            )
+        except Exception as e:
+            # Log audit trail for failure
+            await app.state.audit_writer.submit(dict(
+                tenant_id=tenant_id,
+                token_id=uuid.uuid4(),  # Generate placeholder ID for failed attempts
+                operation="issue",
+                status="failure",
+                request_data={"batch_size": len(request.tokens)},
+                error_details={"error": str(e)},
+                endpoint="/v1/captokens/batch",
+                http_method="POST",
+                client_ip=client_ip,
+                user_agent=user_agent,
+                duration_ms=int((datetime.utcnow() - start_time).total_seconds() * 1000),
+            ))
+            
+            logger.error(f"Bulk token issuance failed: {e}")
+            raise HTTPException(
+                status_code=500,
+                detail={"error": ErrorCode.INTERNAL_ERROR, "message": "Token issuance failed"}
+            )
+    
+    async def is_token_revoked(db: AsyncSession, token_id: str) -> bool:
+        """The revocation filter rules most tokens out; the database decides the rest."""
+        revocation_filter = app.state.revocation_filter
+        if revocation_filter is not None and not await revocation_filter.might_be_revoked(token_id):
+            return False
+        return await DatabaseTokenService(db).is_token_revoked(UUID(token_id))
+    
     # Token verification endpoint
     @app.post("/v1/captokens/verify", response_model=TokenVerifyResponse)
     async def verify_token(
@@ -420,16 +643,47 @@ def create_app() -> FastAPI:
         tenant_id: UUID = Depends(get_tenant_id),
         db: AsyncSession = Depends(get_async_session),
         http_request: Request = None,
-        background_tasks: BackgroundTasks = None,
     ):
         """Verify a capability token."""
         start_time = datetime.utcnow()
-        audit_service = AuditService(db)
-        replay_service = ReplayProtectionService(db)
+        if app.state.replay_redis is not None:
+            replay_service = RedisReplayProtectionService(
+                db,
+                redis_client=app.state.replay_redis,
+                writer=app.state.replay_writer,
+                conflict_columns=app.state.replay_conflict_columns,
+            )
+        else:
+            replay_service = ReplayProtectionService(db)
+        
+        def audit_row(token_id: UUID, status: str, response_data: Dict[str, Any], error_details=None) -> Dict[str, Any]:
+            return dict(
+                tenant_id=tenant_id,
+                token_id=token_id,
+                operation="verify",
+                status=status,
+                request_data={"token_provided": bool(request.token)},
+                response_data=response_data,
+                error_details=error_details,
+                endpoint="/v1/captokens/verify",
+                http_method="POST",
+                client_ip=http_request.client.host if http_request else None,
+                user_agent=http_request.headers.get("user-agent") if http_request else None,
+                duration_ms=int((datetime.utcnow() - start_time).total_seconds() * 1000),
+            )
         
         try:
-            # Verify the token using A.22 implementation
-            verification_result = verify_capability_token(request.token, str(tenant_id))
+            # Signature, expiry and replay checks through the cached verifier
+            try:
+                payload = app.state.token_verifier.verify(request.token, get_replay_guard())
+                if payload.get("tenant_id") != str(tenant_id):
+                    verification_result = {"valid": False, "error": "Token tenant mismatch"}
+                elif await is_token_revoked(db, payload["jti"]):
+                    verification_result = {"valid": False, "error": "Token has been revoked"}
+                else:
+                    verification_result = {"valid": True, "payload": payload}
+            except ValueError as e:
+                verification_result = {"valid": False, "error": str(e)}
             
             if verification_result["valid"]:
                 # Check for replay attacks
@@ -454,28 +708,17 @@ def create_app() -> FastAPI:
                     )
                     # Still return the verification result but log the replay
             
-            # Log audit trail
-            duration_ms = int((datetime.utcnow() - start_time).total_seconds() * 1000)
+            # Log audit trail (written behind the request, in batches)
             token_id = UUID(verification_result["payload"]["jti"]) if verification_result["valid"] else uuid.uuid4()
-            
-            background_tasks.add_task(
-                audit_service.log_operation,
-                tenant_id=tenant_id,
-                token_id=token_id,
-                operation="verify",
-                status="success" if verification_result["valid"] else "warning",
-                request_data={"token_provided": bool(request.token)},
-                response_data={"valid": verification_result["valid"]},
-                endpoint="/v1/captokens/verify",
-                http_method="POST",
-                client_ip=http_request.client.host if http_request else None,
-                user_agent=http_request.headers.get("user-agent") if http_request else None,
-                duration_ms=duration_ms,
-            )
+            await app.state.audit_writer.submit(audit_row(
+                token_id,
+                "success" if verification_result["valid"] else "warning",
+                {"valid": verification_result["valid"]},
+            ))
             
             return TokenVerifyResponse(
                 valid=verification_result["valid"],
-                payload=verification_result["payload"],
+                payload=verification_result.get("payload"),
                 error=verification_result.get("error"),
             )
             
@@ -483,27 +726,42 @@ def create_app() -> FastAPI:
             logger.error(f"Token verification failed: {e}")
             
             # Log audit trail for failure
-            duration_ms = int((datetime.utcnow() - start_time).total_seconds() * 1000)
-            background_tasks.add_task(
-                audit_service.log_operation,
-                tenant_id=tenant_id,
-                token_id=uuid.uuid4(),
-                operation="verify",
-                status="failure",
-                request_data={"token_provided": bool(request.token)},
-                error_details={"error": str(e)},
-                endpoint="/v1/captokens/verify",
-                http_method="POST",
-                client_ip=http_request.client.host if http_request else None,
-                user_agent=http_request.headers.get("user-agent") if http_request else None,
-                duration_ms=duration_ms,
-            )
+            await app.state.audit_writer.submit(audit_row(uuid.uuid4(), "failure", {}, {"error": str(e)}))
             
             raise HTTPException(
                 status_code=500,
                 detail={"error": ErrorCode.EXECUTION_ERROR, "message": "Token verification failed"}
             )
     
+    # Key set and revocation feed for in-process verifiers (orchestrator)
+    @app.get("/v1/captokens/keys", response_model=KeySetResponse)
+    async def get_signing_keys():
+        """Publish the token signing public keys."""
+        _, public_key = get_keys()
+        return KeySetResponse(keys=[
+            PublicKeyInfo(
+                kid=key_id_for(public_key),
+                public_key_pem=public_key_to_pem(public_key),
+            )
+        ])
+    
+    @app.get("/v1/captokens/revocations", response_model=RevocationFeedResponse)
+    async def get_revocations(db: AsyncSession = Depends(get_async_session)):
+        """Revocation feed: every revoked token that has not yet expired."""
+        token_service = DatabaseTokenService(db)
+        
+        try:
+            as_of = datetime.utcnow()
+            revoked = await token_service.get_active_revocations()
+            return RevocationFeedResponse(revoked=revoked, as_of=as_of)
+            
+        except Exception as e:
+            logger.error(f"Failed to fetch revocations: {e}")
+            raise HTTPException(
+                status_code=500,
+                detail={"error": ErrorCode.INTERNAL_ERROR, "message": "Failed to fetch revocations"}
+            )
+    
     # A.24 - Capability Enforcement Endpoints
     
     @app.post("/v1/capabilities/rules", response_model=ToolAllowListResponse)
@@ -529,6 +787,7 @@ def create_app() -> FastAPI:
             db.add(rule)
             await db.commit()
             await db.refresh(rule)
+            CapabilityChecker.clear_cache(tenant_id)
             
             return ToolAllowListResponse(
                 rule_id=str(rule.rule_id),
@@ -6,7 +6,6 @@ Core service for validating capabilities against tool access patterns.
 Implements strict tool allow-lists and capability enforcement.
 """
 
-import re
 import logging
 from typing import List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass
@@ -16,6 +15,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_
 
 from .models import ToolAllowList
+from .capability_matcher import CompiledRuleRegistry, CompiledRuleSet
 
 logger = logging.getLogger(__name__)
 
@@ -60,13 +60,14 @@ class CapabilityChecker:
     - Pattern-based tool access control
     - Hierarchical capability matching
     - Priority-based rule evaluation
-    - Caching for performance
+    - Rules compiled once per tenant with a versioned decision cache
     """
     
+    # Compiled rules are shared by every checker instance in the process.
+    _registry = CompiledRuleRegistry(ttl_seconds=300)
+    
     def __init__(self, db: AsyncSession):
         self.db = db
-        self._rule_cache: Dict[str, List[ToolAllowList]] = {}
-        self._cache_timeout = 300  # 5 minutes
     
     async def check_capability(self, request: CapabilityCheckRequest) -> CapabilityCheckResult:
         """
@@ -79,10 +80,10 @@ class CapabilityChecker:
             Result indicating if access is allowed
         """
         try:
-            # Get active rules for this tenant
-            rules = await self._get_active_rules(request.tenant_id)
+            # Get compiled rules for this tenant
+            rule_set = await self._get_rule_set(request.tenant_id)
             
-            if not rules:
+            if not rule_set.rules:
                 logger.warning(f"No capability rules found for tenant {request.tenant_id}")
                 return CapabilityCheckResult(
                     allowed=False,
@@ -91,46 +92,23 @@ class CapabilityChecker:
                     required_capabilities=[]
                 )
             
-            # Evaluate rules in priority order
-            matched_rules = []
-            allow_decision = None
-            
-            for rule in sorted(rules, key=lambda r: r.priority):
-                if await self._rule_matches(rule, request):
-                    matched_rules.append(self._rule_to_dict(rule))
-                    
-                    # First matching rule determines the decision
-                    if allow_decision is None:
-                        allow_decision = rule.rule_type == RuleType.ALLOW.value
-                    
-                    # DENY rules override ALLOW rules
-                    if rule.rule_type == RuleType.DENY.value:
-                        allow_decision = False
-                        break
-            
-            # Default deny if no rules match
-            if allow_decision is None:
-                allow_decision = False
-                violation_reason = f"No matching capability rules for tool '{request.tool}'"
-            else:
-                violation_reason = None if allow_decision else "Access denied by capability rules"
+            # Evaluate rules in priority order (cached per capabilities/tool/action)
+            decision = rule_set.evaluate(frozenset(request.capabilities), request.tool, request.action)
             
             # Determine required capabilities if access denied
             required_capabilities = []
-            if not allow_decision:
-                required_capabilities = await self._get_required_capabilities(
-                    request.tool, request.action, request.tenant_id
-                )
+            if not decision.allowed:
+                required_capabilities = list(rule_set.allow_capabilities)
             
-            logger.info(
+            logger.debug(
                 f"Capability check: tool='{request.tool}', capabilities={request.capabilities}, "
-                f"allowed={allow_decision}, matched_rules={len(matched_rules)}"
+                f"allowed={decision.allowed}, matched_rules={len(decision.matched_rules)}"
             )
             
             return CapabilityCheckResult(
-                allowed=allow_decision,
-                matched_rules=matched_rules,
-                violation_reason=violation_reason,
+                allowed=decision.allowed,
+                matched_rules=[dict(rule) for rule in decision.matched_rules],
+                violation_reason=decision.violation_reason,
                 required_capabilities=required_capabilities
             )
             
@@ -143,133 +121,36 @@ class CapabilityChecker:
                 required_capabilities=[]
             )
     
-    async def _get_active_rules(self, tenant_id: str) -> List[ToolAllowList]:
-        """Get active capability rules for a tenant."""
-        try:
-            # Check cache first
-            cache_key = f"rules:{tenant_id}"
-            if cache_key in self._rule_cache:
-                return self._rule_cache[cache_key]
-            
-            # Query database
-            query = select(ToolAllowList).where(
-                and_(
-                    ToolAllowList.tenant_id == tenant_id,
-                    ToolAllowList.is_active == True
-                )
+    async def _get_rule_set(self, tenant_id: str) -> CompiledRuleSet:
+        """Get the compiled rule set for a tenant, compiling it on first use."""
+        cache_key = str(tenant_id)
+        rule_set = self._registry.get(cache_key)
+        if rule_set is None:
+            # Read the version first: an invalidation during the query must
+            # keep this (possibly stale) result out of the registry.
+            version = self._registry.version(cache_key)
+            rules = await self._get_active_rules(tenant_id)
+            rule_set = self._registry.compile(
+                cache_key, [self._rule_to_dict(rule) for rule in rules], version
             )
-            
-            result = await self.db.execute(query)
-            rules = result.scalars().all()
-            
-            # Cache results
-            self._rule_cache[cache_key] = list(rules)
-            
-            return rules
-            
-        except Exception as e:
-            logger.error(f"Failed to get capability rules: {e}")
-            return []
-    
-    async def _rule_matches(self, rule: ToolAllowList, request: CapabilityCheckRequest) -> bool:
-        """Check if a rule matches the request."""
-        try:
-            # Check if any provided capability matches the rule's capability
-            capability_matches = False
-            for capability in request.capabilities:
-                if self._capability_matches(capability, rule.capability_name):
-                    capability_matches = True
-                    break
-            
-            if not capability_matches:
-                return False
-            
-            # Check tool pattern
-            if not self._pattern_matches(request.tool, rule.tool_pattern, rule.pattern_type):
-                return False
-            
-            # Check action pattern if specified
-            if rule.action_pattern and request.action:
-                if not self._pattern_matches(request.action, rule.action_pattern, rule.pattern_type):
-                    return False
-            
-            return True
-            
-        except Exception as e:
-            logger.error(f"Rule matching failed: {e}")
-            return False
+        return rule_set
     
-    def _capability_matches(self, provided: str, required: str) -> bool:
+    async def _get_active_rules(self, tenant_id: str) -> List[ToolAllowList]:
         """
-        Check if a provided capability matches a required capability.
+        Get active capability rules for a tenant.
         
-        Supports hierarchical matching (e.g., 'admin' matches 'admin.*')
+        Database errors propagate: an empty list here would be compiled and
+        cached as the tenant's rule set.
         """
-        # Exact match
-        if provided == required:
-            return True
-        
-        # Hierarchical matching (dot notation)
-        if "." in required:
-            # 'admin.read' matches 'admin.*' or 'admin'
-            required_parts = required.split(".")
-            provided_parts = provided.split(".")
-            
-            if len(provided_parts) >= len(required_parts):
-                for i, req_part in enumerate(required_parts):
-                    if req_part == "*":
-                        return True
-                    if i >= len(provided_parts) or provided_parts[i] != req_part:
-                        return False
-                return True
-        
-        # Admin-level capabilities
-        if provided == "admin" and not required.startswith("admin."):
-            return True
-            
-        return False
-    
-    def _pattern_matches(self, value: str, pattern: str, pattern_type: str) -> bool:
-        """Check if a value matches a pattern based on pattern type."""
-        try:
-            if pattern_type == PatternType.EXACT.value:
-                return value == pattern
-            
-            elif pattern_type == PatternType.REGEX.value:
-                return bool(re.match(pattern, value))
-            
-            elif pattern_type == PatternType.GLOB.value:
-                # Convert glob pattern to regex
-                regex_pattern = pattern.replace("*", ".*").replace("?", ".")
-                return bool(re.match(f"^{regex_pattern}$", value))
-            
-            else:
-                logger.warning(f"Unknown pattern type: {pattern_type}")
-                return False
-                
-        except Exception as e:
-            logger.error(f"Pattern matching failed: {e}")
-            return False
-    
-    async def _get_required_capabilities(self, tool: str, action: Optional[str], tenant_id: str) -> List[str]:
-        """Get the capabilities required to access a tool/action."""
-        try:
-            query = select(ToolAllowList.capability_name).where(
-                and_(
-                    ToolAllowList.tenant_id == tenant_id,
-                    ToolAllowList.is_active == True,
-                    ToolAllowList.rule_type == RuleType.ALLOW.value
-                )
+        query = select(ToolAllowList).where(
+            and_(
+                ToolAllowList.tenant_id == tenant_id,
+                ToolAllowList.is_active == True
             )
-            
-            result = await self.db.execute(query)
-            capabilities = [row[0] for row in result.fetchall()]
-            
-            return capabilities
-            
-        except Exception as e:
-            logger.error(f"Failed to get required capabilities: {e}")
-            return []
+        )
+        
+        result = await self.db.execute(query)
+        return list(result.scalars().all())
     
     def _rule_to_dict(self, rule: ToolAllowList) -> Dict[str, Any]:
         """Convert a ToolAllowList rule to dictionary."""
@@ -347,6 +228,7 @@ class CapabilityChecker:
                 self.db.add(rule)
             
             await self.db.commit()
+            self.clear_cache(tenant_id)
             logger.info(f"Added {len(default_rules)} default capability rules for tenant {tenant_id}")
             
         except Exception as e:
@@ -354,10 +236,7 @@ class CapabilityChecker:
             await self.db.rollback()
             raise
     
-    def clear_cache(self, tenant_id: Optional[str] = None) -> None:
-        """Clear the rule cache."""
-        if tenant_id:
-            cache_key = f"rules:{tenant_id}"
-            self._rule_cache.pop(cache_key, None)
-        else:
-            self._rule_cache.clear()
+    @classmethod
+    def clear_cache(cls, tenant_id: Optional[str] = None) -> None:
+        """Invalidate compiled rules and cached decisions; call after any rule change."""
+        cls._registry.invalidate(str(tenant_id) if tenant_id else None)
@@ -0,0 +1,266 @@
+"""
+Compiled Capability Rule Matcher
+================================
+
+Compiles a tenant's tool allow-list rules once into lookup structures so a
+capability check never re-sorts rules, rebuilds regexes or re-splits
+capability strings:
+
+- exact capability names in a hash map
+- hierarchical (dot notation) capability names in a trie of name parts
+- tool/action patterns as precompiled matchers
+
+Compiled rule sets are versioned per tenant and carry a bounded LRU of
+decisions keyed by (capabilities, tool, action).
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+import logging
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+ADMIN_CAPABILITY = "admin"
+
+
+@dataclass(frozen=True)
+class CapabilityDecision:
+    """Cached outcome of evaluating a request against a rule set."""
+    allowed: bool
+    matched_rules: Tuple[Dict[str, Any], ...]
+    violation_reason: Optional[str]
+
+
+def compile_pattern(pattern: str, pattern_type: str) -> Callable[[str], bool]:
+    """Compile a tool/action pattern into a predicate; invalid patterns never match."""
+    try:
+        if pattern_type == "exact":
+            return pattern.__eq__
+        if pattern_type == "regex":
+            return _as_predicate(re.compile(pattern).match)
+        if pattern_type == "glob":
+            # Same translation the checker has always used (dots stay unescaped).
+            regex_pattern = pattern.replace("*", ".*").replace("?", ".")
+            return _as_predicate(re.compile(f"^{regex_pattern}$").match)
+    except re.error as e:
+        logger.error(f"Invalid {pattern_type} pattern {pattern!r}: {e}")
+        return _never
+    logger.warning(f"Unknown pattern type: {pattern_type}")
+    return _never
+
+
+def _never(value: str) -> bool:
+    return False
+
+
+def _as_predicate(match: Callable[[str], Any]) -> Callable[[str], bool]:
+    return lambda value: match(value) is not None
+
+
+class _TrieNode:
+    __slots__ = ("children", "rules")
+
+    def __init__(self) -> None:
+        self.children: Dict[str, "_TrieNode"] = {}
+        # (rule index, minimum number of parts the provided capability needs)
+        self.rules: List[Tuple[int, int]] = []
+
+
+@dataclass
+class _CompiledRule:
+    index: int
+    rule_type: str
+    tool_match: Callable[[str], bool]
+    action_match: Optional[Callable[[str], bool]]
+    info: Dict[str, Any]
+
+
+class CompiledRuleSet:
+    """
+    A tenant's active rules compiled for matching.
+
+    Capability matching semantics:
+    - exact names match exactly ('read' matches 'read')
+    - dot notation matches by prefix ('tools.http' matches 'tools.http.get')
+    - '*' parts match anything from that point ('tools.*' matches 'tools.http')
+    - 'admin' matches every rule except other 'admin.*' rules
+    """
+
+    def __init__(self, rules: List[Dict[str, Any]], version: int, decision_cache_size: int = 4096):
+        self.version = version
+        self.compiled_at = time.monotonic()
+        self.decision_cache_size = decision_cache_size
+        self._decisions: "OrderedDict[Tuple[FrozenSet[str], str, Optional[str]], CapabilityDecision]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Lower priority value wins; the sort is stable so ties keep database order.
+        ordered = sorted(rules, key=lambda r: r["priority"])
+        self.rules: List[_CompiledRule] = []
+        self._exact: Dict[str, List[int]] = {}
+        self._trie = _TrieNode()
+        self._admin_matches: List[int] = []
+        self.allow_capabilities: List[str] = [
+            r["capability_name"] for r in rules if r["rule_type"] == "allow"
+        ]
+
+        for index, rule in enumerate(ordered):
+            action_pattern = rule.get("action_pattern")
+            self.rules.append(_CompiledRule(
+                index=index,
+                rule_type=rule["rule_type"],
+                tool_match=compile_pattern(rule["tool_pattern"], rule["pattern_type"]),
+                action_match=compile_pattern(action_pattern, rule["pattern_type"]) if action_pattern else None,
+                info=rule,
+            ))
+            self._index_capability(index, rule["capability_name"])
+
+    def _index_capability(self, index: int, required: str) -> None:
+        if not required.startswith(ADMIN_CAPABILITY + "."):
+            self._admin_matches.append(index)
+
+        if "." not in required:
+            self._exact.setdefault(required, []).append(index)
+            return
+
+        # 'a.b.*' matches any capability with at least three parts starting 'a.b';
+        # 'a.b' matches any capability with at least two parts starting 'a.b'.
+        parts = required.split(".")
+        prefix = parts[:parts.index("*")] if "*" in parts else parts
+        node = self._trie
+        for part in prefix:
+            node = node.children.setdefault(part, _TrieNode())
+        node.rules.append((index, len(parts)))
+
+    def _rules_for_capabilities(self, capabilities: FrozenSet[str]) -> List[int]:
+        matched = set()
+        for capability in capabilities:
+            matched.update(self._exact.get(capability, ()))
+            if capability == ADMIN_CAPABILITY:
+                matched.update(self._admin_matches)
+            parts = capability.split(".")
+            node = self._trie
+            for rule_index, min_parts in node.rules:
+                if len(parts) >= min_parts:
+                    matched.add(rule_index)
+            for part in parts:
+                node = node.children.get(part)
+                if node is None:
+                    break
+                for rule_index, min_parts in node.rules:
+                    if len(parts) >= min_parts:
+                        matched.add(rule_index)
+        return sorted(matched)
+
+    def evaluate(self, capabilities: FrozenSet[str], tool: str, action: Optional[str]) -> CapabilityDecision:
+        """Evaluate a request, using the decision cache when possible."""
+        key = (capabilities, tool, action)
+        with self._lock:
+            decision = self._decisions.get(key)
+            if decision is not None:
+                self._decisions.move_to_end(key)
+                return decision
+
+        decision = self._evaluate(capabilities, tool, action)
+
+        with self._lock:
+            self._decisions[key] = decision
+            while len(self._decisions) > self.decision_cache_size:
+                self._decisions.popitem(last=False)
+        return decision
+
+    def _evaluate(self, capabilities: FrozenSet[str], tool: str, action: Optional[str]) -> CapabilityDecision:
+        matched_rules = []
+        allow_decision = None
+
+        for rule_index in self._rules_for_capabilities(capabilities):
+            rule = self.rules[rule_index]
+            if not rule.tool_match(tool):
+                continue
+            if rule.action_match is not None and action and not rule.action_match(action):
+                continue
+
+            matched_rules.append(rule.info)
+
+            # First matching rule determines the decision
+            if allow_decision is None:
+                allow_decision = rule.rule_type == "allow"
+
+            # DENY rules override ALLOW rules
+            if rule.rule_type == "deny":
+                allow_decision = False
+                break
+
+        if allow_decision is None:
+            return CapabilityDecision(
+                allowed=False,
+                matched_rules=(),
+                violation_reason=f"No matching capability rules for tool '{tool}'",
+            )
+        return CapabilityDecision(
+            allowed=allow_decision,
+            matched_rules=tuple(matched_rules),
+            violation_reason=None if allow_decision else "Access denied by capability rules",
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get rule set statistics."""
+        return {
+            "version": self.version,
+            "rules": len(self.rules),
+            "cached_decisions": len(self._decisions),
+        }
+
+
+@dataclass
+class CompiledRuleRegistry:
+    """
+    Process-wide store of compiled rule sets, one per tenant.
+
+    ``invalidate`` bumps the tenant's version so the next check recompiles
+    from the database; rule sets also expire after ``ttl_seconds`` so changes
+    made by other processes are picked up.
+    """
+    ttl_seconds: float = 300.0
+    _rule_sets: Dict[str, CompiledRuleSet] = field(default_factory=dict)
+    _versions: Dict[str, int] = field(default_factory=dict)
+    _epoch: int = 0  # bumped by invalidating every tenant
+
+    def version(self, tenant_id: str) -> int:
+        """Current rule version of a tenant; read it before loading rules to compile."""
+        return self._epoch + self._versions.get(tenant_id, 0)
+
+    def get(self, tenant_id: str) -> Optional[CompiledRuleSet]:
+        """Return the current compiled rule set, or None if stale or missing."""
+        rule_set = self._rule_sets.get(tenant_id)
+        if rule_set is None:
+            return None
+        if rule_set.version != self.version(tenant_id):
+            return None
+        if time.monotonic() - rule_set.compiled_at > self.ttl_seconds:
+            return None
+        return rule_set
+
+    def compile(self, tenant_id: str, rules: List[Dict[str, Any]], version: int) -> CompiledRuleSet:
+        """
+        Compile rules loaded at ``version``.
+
+        The rule set is only stored if no invalidation happened since
+        ``version`` was read; otherwise it is returned for this check alone.
+        """
+        rule_set = CompiledRuleSet(rules, version=version)
+        if version == self.version(tenant_id):
+            self._rule_sets[tenant_id] = rule_set
+        return rule_set
+
+    def invalidate(self, tenant_id: Optional[str] = None) -> None:
+        """Invalidate one tenant's rules, or every tenant's."""
+        if tenant_id is None:
+            self._epoch += 1
+            self._rule_sets.clear()
+            return
+        self._versions[tenant_id] = self._versions.get(tenant_id, 0) + 1
+        self._rule_sets.pop(tenant_id, None)
@@ -16,8 +16,8 @@ from rich.console import Console
 from rich.table import Table
 
 from . import create_app
-from .services import CleanupService, AuditService
-from .database import get_async_session
+from .services import CleanupService, CleanupScheduler, AuditService
+from .database import get_async_session, async_session_factory
 from anumate_logging import get_logger
 
 app = typer.Typer(help="Anumate CapTokens Service CLI")
@@ -113,6 +113,36 @@ def cleanup(
     asyncio.run(run_cleanup())
 
 
+@app.command()
+def cleanup_scheduler(
+    min_interval: float = typer.Option(30, help="Shortest wait between runs (seconds)"),
+    max_interval: float = typer.Option(900, help="Longest wait between runs (seconds)"),
+    target_backlog: int = typer.Option(10_000, help="Backlog at which runs happen at the shortest interval"),
+    batch_size: int = typer.Option(1000, help="Batch size for row-level cleanup"),
+    max_age_days: int = typer.Option(30, help="Maximum age in days for expired tokens"),
+) -> None:
+    """Run cleanup continuously, scheduled by the current backlog."""
+    
+    scheduler = CleanupScheduler(
+        async_session_factory,
+        min_interval=min_interval,
+        max_interval=max_interval,
+        target_backlog=target_backlog,
+        batch_size=batch_size,
+        max_age_days=max_age_days,
+    )
+    
+    console.print(
+        f"🧹 Starting cleanup scheduler ({min_interval:.0f}s-{max_interval:.0f}s)", style="bold yellow"
+    )
+    
+    try:
+        asyncio.run(scheduler.start())
+    except KeyboardInterrupt:
+        scheduler.stop()
+        console.print("🛑 Cleanup scheduler stopped", style="yellow")
+
+
 @app.command()
 def stats(
     days: int = typer.Option(7, help="Number of days to analyze"),
@@ -141,6 +171,7 @@ def stats(
             cleanup_table.add_row("Success Rate", f"{cleanup_stats['success_rate_percent']}%")
             cleanup_table.add_row("Total Tokens Cleaned", str(cleanup_stats["total_tokens_cleaned"]))
             cleanup_table.add_row("Avg Duration (s)", str(cleanup_stats["average_duration_seconds"]))
+            cleanup_table.add_row("Cleanup Backlog", str(cleanup_stats["backlog"]["total"]))
             
             console.print(cleanup_table)
             
@@ -12,6 +12,7 @@ from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sess
 from sqlalchemy.pool import NullPool
 
 from .models import Base
+from .partitions import ensure_all_partitions
 
 # Import logging with fallback
 try:
@@ -85,6 +86,11 @@ async def init_database() -> None:
             
             logger.info("Database tables created/verified successfully")
         
+        # Time-partitioned tables need their current and upcoming partitions
+        async with async_session_factory() as session:
+            created = await ensure_all_partitions(session)
+            logger.info(f"Partitions verified ({created} created)")
+        
         # Test session creation using the session factory directly
         async with async_session_factory() as session:
             from sqlalchemy import text
@@ -12,7 +12,7 @@ from typing import List, Dict, Any, Optional
 from uuid import UUID
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, delete, func, text
+from sqlalchemy import select, insert, update, delete, func, text
 from sqlalchemy.orm import selectinload
 
 from .models import CapabilityToken, TokenAuditLog, ReplayProtection, TokenCleanupJob
@@ -77,6 +77,35 @@ class DatabaseTokenService:
             logger.error(f"Failed to store token: {e}")
             raise
 
+    async def store_tokens(
+        self,
+        tenant_id: UUID,
+        tokens: List[Dict[str, Any]],
+        created_by: UUID,
+        client_ip: Optional[str] = None,
+        user_agent: Optional[str] = None,
+    ) -> None:
+        """Store many new tokens with one multi-row INSERT and a single commit."""
+        try:
+            await self.db.execute(insert(CapabilityToken), [
+                dict(
+                    tenant_id=tenant_id,
+                    created_by=created_by,
+                    client_ip=client_ip,
+                    user_agent=user_agent,
+                    **token,
+                )
+                for token in tokens
+            ])
+            await self.db.commit()
+            
+            logger.info(f"Stored {len(tokens)} tokens for tenant {tenant_id}")
+
+        except Exception as e:
+            await self.db.rollback()
+            logger.error(f"Failed to store tokens: {e}")
+            raise
+
     async def get_token(self, token_id: UUID) -> Optional[CapabilityToken]:
         """Retrieve a token by ID."""
         try:
@@ -88,6 +117,13 @@ class DatabaseTokenService:
             logger.error(f"Failed to retrieve token {token_id}: {e}")
             raise
 
+    async def is_token_revoked(self, token_id: UUID) -> bool:
+        """Check whether a token has been revoked."""
+        result = await self.db.execute(
+            select(CapabilityToken.revoked_at).where(CapabilityToken.token_id == token_id)
+        )
+        return result.scalar_one_or_none() is not None
+
     async def revoke_token(self, token_id: UUID, revoked_by: UUID) -> bool:
         """Revoke a capability token."""
         try:
@@ -110,6 +146,16 @@ class DatabaseTokenService:
             logger.error(f"Failed to revoke token {token_id}: {e}")
             raise
 
+    async def get_active_revocations(self) -> List[str]:
+        """Get IDs of revoked tokens that have not yet expired."""
+        result = await self.db.execute(
+            select(CapabilityToken.token_id).where(
+                CapabilityToken.revoked_at.isnot(None),
+                CapabilityToken.expires_at > datetime.utcnow(),
+            )
+        )
+        return [str(token_id) for token_id in result.scalars().all()]
+
     async def cleanup_expired_tokens(self, batch_size: int = 1000) -> int:
         """Clean up expired tokens."""
         try:
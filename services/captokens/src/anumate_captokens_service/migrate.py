@@ -9,8 +9,9 @@ import asyncio
 import os
 from pathlib import Path
 
-from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from anumate_captokens_service.models import Base
+from anumate_captokens_service.partitions import ensure_all_partitions
 from anumate_captokens_service.database import DATABASE_URL
 from anumate_logging import get_logger
 
@@ -32,6 +33,11 @@ async def migrate_database():
             await conn.run_sync(Base.metadata.create_all)
             logger.info("Database tables created successfully")
         
+        # Create current and upcoming time partitions
+        async with async_sessionmaker(engine, class_=AsyncSession)() as session:
+            created = await ensure_all_partitions(session)
+            logger.info(f"Created {created} table partitions")
+        
         await engine.dispose()
         logger.info("Database migration completed successfully")
         
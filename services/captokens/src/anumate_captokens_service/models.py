@@ -3,6 +3,12 @@ Database Models for CapTokens Service
 =====================================
 
 Production-grade SQLAlchemy models for capability token management.
+
+Capability tokens, token audit logs and replay records are range-partitioned
+by time so expiry drops whole partitions (see ``partitions.py``). PostgreSQL
+requires the partition column in every primary key and unique constraint, and
+rows referencing tokens use plain indexed columns rather than foreign keys so
+token partitions can be dropped independently.
 """
 
 import uuid
@@ -60,12 +66,12 @@ class CapabilityToken(Base, TimestampMixin, TenantMixin):
     token_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     
     # Token metadata
-    token_hash = Column(String(255), nullable=False, unique=True, index=True)
+    token_hash = Column(String(255), nullable=False, index=True)
     subject = Column(String(255), nullable=False)
     capabilities = Column(JSONB, nullable=False)
     
-    # Expiration and lifecycle
-    expires_at = Column(DateTime(timezone=True), nullable=False)
+    # Expiration and lifecycle (partition key)
+    expires_at = Column(DateTime(timezone=True), primary_key=True, nullable=False)
     last_used_at = Column(DateTime(timezone=True), nullable=True)
     revoked_at = Column(DateTime(timezone=True), nullable=True)
     revoked_by = Column(UUID(as_uuid=True), nullable=True)
@@ -82,9 +88,24 @@ class CapabilityToken(Base, TimestampMixin, TenantMixin):
     user_agent = Column(Text, nullable=True)
     
     # Relationships
-    audit_logs = relationship("TokenAuditLog", back_populates="token", cascade="all, delete-orphan")
-    violations = relationship("CapabilityViolation", back_populates="token", cascade="all, delete-orphan")
-    usage_tracking = relationship("TokenUsageTracking", back_populates="token", cascade="all, delete-orphan")
+    audit_logs = relationship(
+        "TokenAuditLog",
+        primaryjoin="CapabilityToken.token_id == foreign(TokenAuditLog.token_id)",
+        back_populates="token",
+        cascade="all, delete-orphan",
+    )
+    violations = relationship(
+        "CapabilityViolation",
+        primaryjoin="CapabilityToken.token_id == foreign(CapabilityViolation.token_id)",
+        back_populates="token",
+        cascade="all, delete-orphan",
+    )
+    usage_tracking = relationship(
+        "TokenUsageTracking",
+        primaryjoin="CapabilityToken.token_id == foreign(TokenUsageTracking.token_id)",
+        back_populates="token",
+        cascade="all, delete-orphan",
+    )
     
     # Indexes for performance
     __table_args__ = (
@@ -94,8 +115,10 @@ class CapabilityToken(Base, TimestampMixin, TenantMixin):
         Index("idx_capability_tokens_active", "tenant_id", "active"),
         Index("idx_capability_tokens_created_by", "tenant_id", "created_by"),
         Index("idx_capability_tokens_cleanup", "active", "expires_at"),  # For cleanup job
+        UniqueConstraint("token_hash", "expires_at", name="uq_capability_tokens_token_hash"),
         CheckConstraint("expires_at > created_at", name="check_expires_after_created"),
         CheckConstraint("usage_count >= 0", name="check_usage_count_positive"),
+        {"postgresql_partition_by": "RANGE (expires_at)"},
     )
     
     def __repr__(self) -> str:
@@ -115,11 +138,12 @@ class TokenAuditLog(Base, TimestampMixin, TenantMixin):
     
     __tablename__ = "token_audit_logs"
     
-    # Primary key
+    # Primary key (created_at is the partition key)
     audit_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    created_at = Column(DateTime(timezone=True), primary_key=True, server_default=func.now(), nullable=False)
     
     # Token reference
-    token_id = Column(UUID(as_uuid=True), ForeignKey("capability_tokens.token_id"), nullable=False)
+    token_id = Column(UUID(as_uuid=True), nullable=False)
     
     # Operation details
     operation = Column(String(50), nullable=False)  # issue, verify, refresh, revoke, cleanup
@@ -149,7 +173,11 @@ class TokenAuditLog(Base, TimestampMixin, TenantMixin):
     span_id = Column(String(16), nullable=True)
     
     # Relationships
-    token = relationship("CapabilityToken", back_populates="audit_logs")
+    token = relationship(
+        "CapabilityToken",
+        primaryjoin="foreign(TokenAuditLog.token_id) == CapabilityToken.token_id",
+        back_populates="audit_logs",
+    )
     
     # Indexes for audit queries
     __table_args__ = (
@@ -160,6 +188,7 @@ class TokenAuditLog(Base, TimestampMixin, TenantMixin):
         Index("idx_token_audit_logs_status", "tenant_id", "status"),
         Index("idx_token_audit_logs_correlation_id", "correlation_id"),
         CheckConstraint("duration_ms >= 0", name="check_duration_positive"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
     )
     
     def __repr__(self) -> str:
@@ -236,11 +265,11 @@ class ReplayProtection(Base, TimestampMixin):
     nonce_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     
     # Token identification
-    token_jti = Column(String(255), nullable=False, unique=True, index=True)  # JWT ID claim
+    token_jti = Column(String(255), nullable=False, index=True)  # JWT ID claim
     token_hash = Column(String(255), nullable=False, index=True)
     
-    # Expiration management
-    expires_at = Column(DateTime(timezone=True), nullable=False)
+    # Expiration management (partition key; always the token's exp)
+    expires_at = Column(DateTime(timezone=True), primary_key=True, nullable=False)
     
     # Request context for audit
     first_seen_ip = Column(String(45), nullable=True)
@@ -253,7 +282,9 @@ class ReplayProtection(Base, TimestampMixin):
         Index("idx_replay_protection_token_jti", "token_jti"),
         Index("idx_replay_protection_expires_at", "expires_at"),
         Index("idx_replay_protection_cleanup", "expires_at"),  # For cleanup job
+        UniqueConstraint("token_jti", "expires_at", name="uq_replay_protection_token_jti"),
         CheckConstraint("usage_count > 0", name="check_usage_count_positive"),
+        {"postgresql_partition_by": "RANGE (expires_at)"},
     )
     
     def __repr__(self) -> str:
@@ -270,7 +301,7 @@ class CapabilityViolation(Base, TimestampMixin, TenantMixin):
     __tablename__ = "capability_violations"
     
     violation_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    token_id = Column(UUID(as_uuid=True), ForeignKey("capability_tokens.token_id"), nullable=True)
+    token_id = Column(UUID(as_uuid=True), nullable=True)
     
     # Violation details
     violation_type = Column(String(100), nullable=False)  # insufficient_capability, invalid_token, tool_blocked
@@ -292,7 +323,11 @@ class CapabilityViolation(Base, TimestampMixin, TenantMixin):
     severity = Column(String(20), nullable=False, default="medium")  # low, medium, high, critical
     
     # Relationships
-    token = relationship("CapabilityToken", back_populates="violations")
+    token = relationship(
+        "CapabilityToken",
+        primaryjoin="foreign(CapabilityViolation.token_id) == CapabilityToken.token_id",
+        back_populates="violations",
+    )
     
     __table_args__ = (
         Index("idx_capability_violations_tenant", "tenant_id"),
@@ -317,7 +352,7 @@ class TokenUsageTracking(Base, TimestampMixin, TenantMixin):
     __tablename__ = "token_usage_tracking"
     
     usage_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    token_id = Column(UUID(as_uuid=True), ForeignKey("capability_tokens.token_id"), nullable=False)
+    token_id = Column(UUID(as_uuid=True), nullable=False)
     
     # Usage details
     action_performed = Column(String(200), nullable=False)
@@ -337,7 +372,11 @@ class TokenUsageTracking(Base, TimestampMixin, TenantMixin):
     extra_metadata = Column(JSONB, nullable=True)
     
     # Relationships
-    token = relationship("CapabilityToken", back_populates="usage_tracking")
+    token = relationship(
+        "CapabilityToken",
+        primaryjoin="foreign(TokenUsageTracking.token_id) == CapabilityToken.token_id",
+        back_populates="usage_tracking",
+    )
     
     __table_args__ = (
         Index("idx_token_usage_tenant", "tenant_id"),
@@ -0,0 +1,235 @@
+"""
+Time Partition Management
+=========================
+
+Tokens, token audit logs and replay records are range-partitioned by time
+(see ``postgresql_partition_by`` in ``models.py``), so expiring old data means
+detaching and dropping whole partitions instead of deleting rows.
+
+Partitions are named ``<table>_p<YYYYMMDD>`` (daily) or ``<table>_p<YYYYMMDDHH>``
+(hourly) and cover ``[start, start + interval)`` in UTC. Each table also has a
+``<table>_default`` partition so inserts never fail if partitions were not
+created ahead in time; rows that land there are removed by row-level cleanup.
+
+Databases created before partitioning keep plain tables; ``is_partitioned``
+lets callers fall back to row-level deletes for those.
+
+A partition past the cutoff is only dropped once every row in it would also
+be removed by row-level cleanup: ``PartitionSpec.retain_where`` names the rows
+that must survive (e.g. tokens still marked active), and a partition holding
+any of them is left for row-level cleanup instead.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Import logging with fallback
+try:
+    from anumate_logging import get_logger
+except ImportError:
+    import logging
+    def get_logger(name: str):
+        return logging.getLogger(name)
+
+logger = get_logger(__name__)
+
+
+@dataclass(frozen=True)
+class PartitionSpec:
+    """How a table is partitioned."""
+    table: str
+    column: str
+    interval: timedelta
+    premake: int  # partitions kept ready ahead of the current one
+    retain_where: Optional[str] = None  # SQL over partition rows aliased ``r`` that blocks a drop
+
+    @property
+    def name_format(self) -> str:
+        return "%Y%m%d%H" if self.interval < timedelta(days=1) else "%Y%m%d"
+
+    def floor(self, moment: datetime) -> datetime:
+        """Start of the partition containing ``moment``."""
+        seconds = int(self.interval.total_seconds())
+        timestamp = int(moment.timestamp())
+        return datetime.fromtimestamp(timestamp - timestamp % seconds, tz=timezone.utc)
+
+    def partition_name(self, start: datetime) -> str:
+        return f"{self.table}_p{start.strftime(self.name_format)}"
+
+    def partition_start(self, name: str) -> Optional[datetime]:
+        """Parse a partition's start from its name; None for default/foreign partitions."""
+        prefix = f"{self.table}_p"
+        if not name.startswith(prefix):
+            return None
+        try:
+            start = datetime.strptime(name[len(prefix):], self.name_format)
+        except ValueError:
+            return None
+        return start.replace(tzinfo=timezone.utc)
+
+
+@dataclass(frozen=True)
+class PartitionInfo:
+    """An existing time partition."""
+    name: str
+    start: datetime
+    end: datetime
+    estimated_rows: int
+
+
+PARTITION_SPECS: Dict[str, PartitionSpec] = {
+    # Row cleanup only deletes expired tokens that are no longer active...
+    "capability_tokens": PartitionSpec(
+        "capability_tokens", "expires_at", timedelta(days=1), premake=7,
+        retain_where="r.active",
+    ),
+    # ...and deletes audit logs together with their token.
+    "token_audit_logs": PartitionSpec(
+        "token_audit_logs", "created_at", timedelta(days=1), premake=7,
+        retain_where="EXISTS (SELECT 1 FROM capability_tokens t WHERE t.token_id = r.token_id)",
+    ),
+    # Replay records only matter until the token expires (≤5 minutes).
+    "replay_protection": PartitionSpec("replay_protection", "expires_at", timedelta(hours=1), premake=48),
+}
+
+
+class PartitionManager:
+    """
+    Creates upcoming partitions and drops expired ones.
+
+    Features:
+    - Idempotent partition creation ahead of time
+    - Expiry by DETACH + DROP, one transaction per partition
+    - Row estimates from catalog statistics, without scanning
+    """
+
+    def __init__(self, db_session: AsyncSession):
+        self.db = db_session
+
+    async def is_partitioned(self, table: str) -> bool:
+        """Whether ``table`` exists as a partitioned table."""
+        result = await self.db.execute(
+            text(
+                "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table pt "
+                "JOIN pg_class c ON c.oid = pt.partrelid WHERE c.relname = :table)"
+            ),
+            {"table": table},
+        )
+        return bool(result.scalar())
+
+    async def ensure_partitions(self, spec: PartitionSpec, now: Optional[datetime] = None) -> int:
+        """Create the current and upcoming partitions; returns how many were created."""
+        now = now or datetime.now(timezone.utc)
+        existing = {info.name for info in await self.list_partitions(spec)}
+        created = 0
+
+        await self.db.execute(
+            text(f"CREATE TABLE IF NOT EXISTS {spec.table}_default PARTITION OF {spec.table} DEFAULT")
+        )
+        await self.db.commit()
+
+        start = spec.floor(now)
+        for _ in range(spec.premake + 1):
+            end = start + spec.interval
+            name = spec.partition_name(start)
+            if name not in existing:
+                try:
+                    await self.db.execute(text(
+                        f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {spec.table} "
+                        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+                    ))
+                    await self.db.commit()
+                    created += 1
+                except Exception as e:
+                    # Fails if the default partition already holds rows for this
+                    # range; row-level cleanup removes them and a later run retries.
+                    await self.db.rollback()
+                    logger.warning(f"Could not create partition {name}: {e}")
+            start = end
+
+        if created:
+            logger.info(f"Created {created} partitions for {spec.table}")
+        return created
+
+    async def list_partitions(self, spec: PartitionSpec) -> List[PartitionInfo]:
+        """List time partitions of a table, oldest first."""
+        result = await self.db.execute(
+            text(
+                "SELECT c.relname, c.reltuples FROM pg_inherits i "
+                "JOIN pg_class c ON c.oid = i.inhrelid "
+                "JOIN pg_class p ON p.oid = i.inhparent "
+                "WHERE p.relname = :table"
+            ),
+            {"table": spec.table},
+        )
+        partitions = []
+        for name, reltuples in result.fetchall():
+            start = spec.partition_start(name)
+            if start is not None:
+                partitions.append(PartitionInfo(
+                    name=name,
+                    start=start,
+                    end=start + spec.interval,
+                    estimated_rows=max(int(reltuples or 0), 0),
+                ))
+        return sorted(partitions, key=lambda info: info.start)
+
+    async def expired_partitions(self, spec: PartitionSpec, cutoff: datetime) -> List[PartitionInfo]:
+        """Partitions whose whole range lies before ``cutoff`` and that hold no rows to retain."""
+        expired = []
+        for info in await self.list_partitions(spec):
+            if info.end <= cutoff and not await self._has_retained_rows(spec, info):
+                expired.append(info)
+        return expired
+
+    async def _has_retained_rows(self, spec: PartitionSpec, info: PartitionInfo) -> bool:
+        if spec.retain_where is None:
+            return False
+        result = await self.db.execute(
+            text(f"SELECT EXISTS (SELECT 1 FROM {info.name} r WHERE {spec.retain_where})")
+        )
+        return bool(result.scalar())
+
+    async def drop_partitions_before(
+        self,
+        spec: PartitionSpec,
+        cutoff: datetime,
+        dry_run: bool = False,
+    ) -> Dict[str, int]:
+        """
+        Detach and drop every partition entirely before ``cutoff`` whose rows
+        all qualify for removal (see ``PartitionSpec.retain_where``).
+
+        Returns:
+            Partitions dropped and the estimated rows they held
+        """
+        dropped = 0
+        rows = 0
+        for info in await self.expired_partitions(spec, cutoff):
+            if not dry_run:
+                await self.db.execute(text(f"ALTER TABLE {spec.table} DETACH PARTITION {info.name}"))
+                await self.db.execute(text(f"DROP TABLE {info.name}"))
+                await self.db.commit()
+            dropped += 1
+            rows += info.estimated_rows
+
+        if dropped:
+            logger.info(
+                f"{'Would drop' if dry_run else 'Dropped'} {dropped} partitions of {spec.table} "
+                f"(~{rows} rows) before {cutoff.isoformat()}"
+            )
+        return {"partitions_dropped": dropped, "estimated_rows": rows}
+
+
+async def ensure_all_partitions(db_session: AsyncSession) -> int:
+    """Create upcoming partitions for every partitioned table; returns how many were created."""
+    manager = PartitionManager(db_session)
+    created = 0
+    for spec in PARTITION_SPECS.values():
+        if await manager.is_partitioned(spec.table):
+            created += await manager.ensure_partitions(spec)
+    return created
@@ -13,12 +13,19 @@ Comprehensive service layer with:
 
 from .token_service import TokenService
 from .audit_service import AuditService
-from .cleanup_service import CleanupService
-from .replay_service import ReplayProtectionService
+from .cleanup_service import CleanupService, CleanupScheduler
+from .replay_service import ReplayProtectionService, create_replay_writer, replay_conflict_columns
+from .revocation_service import RevocationBloomFilter
+from .batch_writer import BatchInsertWriter
 
 __all__ = [
     "TokenService",
     "AuditService", 
     "CleanupService",
+    "CleanupScheduler",
     "ReplayProtectionService",
+    "create_replay_writer",
+    "replay_conflict_columns",
+    "RevocationBloomFilter",
+    "BatchInsertWriter",
 ]
@@ -0,0 +1,177 @@
+"""
+Batched Insert Writer for CapTokens
+===================================
+
+Write-behind buffer that moves append-only rows (audit entries, usage records)
+off the request path and inserts them in multi-row batches.
+"""
+
+import asyncio
+from typing import Any, Callable, Dict, List, Optional, Type
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Executable
+
+from anumate_logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class BatchInsertWriter:
+    """
+    Bounded write-behind queue flushed by size or time.
+
+    Features:
+    - Multi-row INSERT per flush, one transaction per batch
+    - Bounded queue: ``submit`` waits when the database falls behind
+    - Failed batches stay queued and are retried with exponential backoff
+    - Drain on shutdown so accepted rows are not lost
+    - ``flush`` returns only once every row submitted before it is written,
+      and raises if they could not be
+    
+    ``statement`` replaces the plain INSERT, e.g. with an upsert. Upserts cannot
+    touch the same row twice in one statement, so ``dedupe_key`` collapses rows
+    sharing that column within a batch, keeping the most recent one.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession],
+        model: Type[Any],
+        batch_size: int = 500,
+        flush_interval: float = 0.5,
+        max_queue_size: int = 10_000,
+        statement: Optional[Executable] = None,
+        dedupe_key: Optional[str] = None,
+        retry_backoff: float = 0.1,
+        max_retry_backoff: float = 5.0,
+    ):
+        self.session_factory = session_factory
+        self.model = model
+        self.statement = statement if statement is not None else insert(model)
+        self.dedupe_key = dedupe_key
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retry_backoff = retry_backoff
+        self.max_retry_backoff = max_retry_backoff
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue_size)
+        self._task: Optional[asyncio.Task] = None
+        self._running = False
+        # Rows are only dequeued under this lock, so batches are written in order.
+        self._lock = asyncio.Lock()
+        self._has_rows = asyncio.Event()
+        # Batch taken off the queue but not yet written; nothing else is dequeued
+        # until it is, so a failing database fills the queue and blocks ``submit``.
+        self._held: List[Dict[str, Any]] = []
+        self._enqueued = 0
+        self._completed = 0
+        self.rows_written = 0
+        self.flush_failures = 0
+
+    async def start(self) -> None:
+        """Start the background flush loop."""
+        if self._task is None:
+            self._running = True
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"Started batch writer for {self.model.__tablename__}")
+
+    async def stop(self) -> None:
+        """Stop accepting work and drain everything already queued."""
+        self._running = False
+        if self._task is not None:
+            await self._task
+            self._task = None
+        if self.pending:
+            logger.error(f"Stopped with {self.pending} {self.model.__tablename__} rows not written")
+        logger.info(f"Stopped batch writer for {self.model.__tablename__}")
+
+    async def submit(self, row: Dict[str, Any]) -> None:
+        """Queue a row for insertion, waiting if the queue is full."""
+        if self._task is None:
+            # Not started (e.g. CLI or tests): write through.
+            await self._write([row])
+            return
+        await self._queue.put(row)
+        self._enqueued += 1
+        self._has_rows.set()
+
+    @property
+    def pending(self) -> int:
+        """Number of submitted rows not yet written (queued or in flight)."""
+        return self._enqueued - self._completed
+
+    async def flush(self) -> int:
+        """
+        Write everything submitted so far, including batches in flight; returns rows handled.
+        
+        Raises the database error if a batch cannot be written. Its rows stay
+        queued and the background loop keeps retrying them.
+        """
+        start, target = self._completed, self._enqueued
+        async with self._lock:
+            while self._completed < target:
+                await self._flush_batch()
+        return self._completed - start
+
+    async def _run(self) -> None:
+        backoff = self.retry_backoff
+        while self._running:
+            try:
+                await asyncio.wait_for(self._has_rows.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                continue
+            # Give concurrent producers a chance to fill the batch.
+            if self._queue.qsize() < self.batch_size:
+                await asyncio.sleep(min(self.flush_interval, 0.01))
+            failed = False
+            async with self._lock:
+                try:
+                    await self._flush_batch()
+                except Exception:
+                    failed = True
+                if self._queue.empty() and not self._held:
+                    self._has_rows.clear()
+            if failed:
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, self.max_retry_backoff)
+            else:
+                backoff = self.retry_backoff
+        try:
+            await self.flush()
+        except Exception:
+            pass  # Reported by stop()
+
+    async def _flush_batch(self) -> int:
+        if not self._held:
+            while len(self._held) < self.batch_size and not self._queue.empty():
+                self._held.append(self._queue.get_nowait())
+        rows = self._held
+        if not rows:
+            return 0
+        await self._write(rows)
+        self._held = []
+        self._completed += len(rows)
+        return len(rows)
+
+    async def _write(self, rows: List[Dict[str, Any]]) -> None:
+        if self.dedupe_key is not None:
+            rows = list({row[self.dedupe_key]: row for row in rows}.values())
+        try:
+            async with self.session_factory() as session:
+                await session.execute(self.statement, rows)
+                await session.commit()
+            self.rows_written += len(rows)
+        except Exception as e:
+            self.flush_failures += 1
+            logger.error(f"Failed to write {len(rows)} {self.model.__tablename__} rows, will retry: {e}")
+            raise
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get writer statistics."""
+        return {
+            "table": self.model.__tablename__,
+            "pending": self.pending,
+            "rows_written": self.rows_written,
+            "flush_failures": self.flush_failures,
+        }
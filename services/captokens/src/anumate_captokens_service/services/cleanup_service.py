@@ -3,24 +3,47 @@ Cleanup Service for CapTokens
 =============================
 
 Production-grade background cleanup service for expired and revoked tokens.
+
+Where tables are time-partitioned, expired partitions are dropped whole and
+only the remainder (the partly expired partition, the default partition, or an
+unpartitioned table) goes through batched row deletes.
 """
 
 import asyncio
 import uuid
-from datetime import datetime, timedelta
-from typing import Dict, Any, Optional, List
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Any, Optional, List
 from uuid import UUID
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, delete, and_, func, update
+from sqlalchemy import select, delete, and_, or_, not_, func, update
 from sqlalchemy.sql import text
 
 from ..models import CapabilityToken, TokenAuditLog, TokenCleanupJob, ReplayProtection
+from ..partitions import PARTITION_SPECS, PartitionManager, ensure_all_partitions
 from anumate_logging import get_logger
 
 logger = get_logger(__name__)
 
 
+def adaptive_interval(
+    backlog: int,
+    min_interval: float,
+    max_interval: float,
+    target_backlog: int,
+) -> float:
+    """
+    Seconds until the next cleanup run.
+    
+    An empty backlog waits ``max_interval``; the wait shrinks linearly as the
+    backlog grows, down to ``min_interval`` at ``target_backlog`` or more.
+    """
+    if backlog <= 0:
+        return max_interval
+    fraction = min(backlog / target_backlog, 1.0)
+    return max_interval - (max_interval - min_interval) * fraction
+
+
 class CleanupService:
     """
     Production-grade cleanup service for token lifecycle management.
@@ -32,10 +55,24 @@ class CleanupService:
     - Job tracking and monitoring
     - Configurable cleanup policies
     - Error handling and retry logic
+    - Partition drops for time-partitioned tables
     """
     
     def __init__(self, db_session: AsyncSession):
         self.db = db_session
+        self.partitions = PartitionManager(db_session)
+    
+    async def ensure_partitions(self) -> int:
+        """Create upcoming partitions; returns how many were created."""
+        return await ensure_all_partitions(self.db)
+    
+    async def _drop_expired_partitions(self, table: str, cutoff: datetime, dry_run: bool = False) -> Dict[str, int]:
+        """Drop partitions of ``table`` entirely before ``cutoff`` (naive UTC), if partitioned."""
+        if not await self.partitions.is_partitioned(table):
+            return {"partitions_dropped": 0, "estimated_rows": 0}
+        return await self.partitions.drop_partitions_before(
+            PARTITION_SPECS[table], cutoff.replace(tzinfo=timezone.utc), dry_run=dry_run
+        )
     
     async def cleanup_expired_tokens(
         self,
@@ -84,10 +121,17 @@ class CleanupService:
             )
             
             cutoff_date = datetime.utcnow() - timedelta(days=max_age_days)
-            total_processed = 0
-            total_cleaned = 0
+            
+            # Whole partitions first; counts are catalog estimates
+            token_partitions = await self._drop_expired_partitions("capability_tokens", cutoff_date, dry_run)
+            audit_partitions = await self._drop_expired_partitions("token_audit_logs", cutoff_date, dry_run)
+            partitions_dropped = token_partitions["partitions_dropped"] + audit_partitions["partitions_dropped"]
+            
+            total_processed = token_partitions["estimated_rows"]
+            total_cleaned = token_partitions["estimated_rows"]
             errors = 0
             
+            # Then the remaining rows, batch by batch
             while True:
                 # Find expired tokens
                 query = select(CapabilityToken).where(
@@ -189,6 +233,7 @@ class CleanupService:
                 "status": "completed",
                 "tokens_processed": total_processed,
                 "tokens_cleaned": total_cleaned,
+                "partitions_dropped": partitions_dropped,
                 "errors_encountered": errors,
                 "duration_seconds": duration,
                 "dry_run": dry_run,
@@ -261,8 +306,12 @@ class CleanupService:
             )
             
             current_time = datetime.utcnow()
-            total_cleaned = 0
             
+            # Whole partitions first; counts are catalog estimates
+            replay_partitions = await self._drop_expired_partitions("replay_protection", current_time)
+            total_cleaned = replay_partitions["estimated_rows"]
+            
+            # Then the remaining rows, batch by batch
             while True:
                 # Delete expired replay protection records
                 delete_result = await self.db.execute(
@@ -311,6 +360,7 @@ class CleanupService:
                 "job_id": str(job_id),
                 "status": "completed",
                 "records_cleaned": total_cleaned,
+                "partitions_dropped": replay_partitions["partitions_dropped"],
                 "duration_seconds": duration,
             }
             
@@ -343,18 +393,69 @@ class CleanupService:
             )
             raise
     
+    async def get_cleanup_backlog(self, max_age_days: int = 30) -> Dict[str, int]:
+        """
+        Count data currently eligible for cleanup.
+        
+        Rows in expired partitions are taken from catalog estimates, so only
+        the unpartitioned remainder is counted with a query.
+        
+        Args:
+            max_age_days: Maximum age for expired tokens before cleanup
+            
+        Returns:
+            Eligible tokens, replay records and their total
+        """
+        now = datetime.utcnow()
+        expired_tokens = await self._count_expired(
+            "capability_tokens",
+            CapabilityToken.expires_at,
+            now - timedelta(days=max_age_days),
+            CapabilityToken.active == False,
+        )
+        expired_replay_records = await self._count_expired(
+            "replay_protection",
+            ReplayProtection.expires_at,
+            now,
+        )
+        return {
+            "expired_tokens": expired_tokens,
+            "expired_replay_records": expired_replay_records,
+            "total": expired_tokens + expired_replay_records,
+        }
+    
+    async def _count_expired(self, table: str, column, cutoff: datetime, *criteria) -> int:
+        estimated = 0
+        if await self.partitions.is_partitioned(table):
+            expired = await self.partitions.expired_partitions(
+                PARTITION_SPECS[table], cutoff.replace(tzinfo=timezone.utc)
+            )
+            if expired:
+                estimated = sum(info.estimated_rows for info in expired)
+                # Count only rows outside the droppable partitions
+                criteria += (not_(or_(*(
+                    and_(column >= info.start, column < info.end) for info in expired
+                ))),)
+        
+        result = await self.db.execute(
+            select(func.count()).select_from(column.class_).where(and_(column < cutoff, *criteria))
+        )
+        return estimated + (result.scalar() or 0)
+    
     async def get_cleanup_statistics(
         self,
         days: int = 7,
+        max_age_days: int = 30,
     ) -> Dict[str, Any]:
         """
         Get cleanup job statistics for monitoring.
         
         Args:
             days: Number of days to look back
+            max_age_days: Maximum age for expired tokens, for the backlog
             
         Returns:
-            Cleanup statistics
+            Cleanup statistics, including the current cleanup backlog
         """
         try:
             cutoff_date = datetime.utcnow() - timedelta(days=days)
@@ -388,6 +489,7 @@ class CleanupService:
                 "success_rate_percent": round(success_rate, 2),
                 "total_tokens_cleaned": total_tokens_cleaned,
                 "average_duration_seconds": round(avg_duration, 2),
+                "backlog": await self.get_cleanup_backlog(max_age_days),
                 "recent_jobs": [
                     {
                         "job_id": str(job.job_id),
@@ -418,3 +520,96 @@ class CleanupService:
                 extra={"error": str(e), "days": days}
             )
             raise
+
+
+class CleanupScheduler:
+    """
+    Background runner for cleanup jobs with a backlog-driven schedule.
+    
+    Each cycle creates upcoming partitions, reads the backlog from
+    ``get_cleanup_statistics`` and runs only the cleanups that have work. The
+    next wake-up comes sooner the larger the backlog was (see
+    ``adaptive_interval``), so bursts of expiry are cleared quickly while an
+    idle system is barely touched.
+    
+    Every service worker may run a scheduler; a cycle only does work in the
+    worker holding the cleanup advisory lock, the others just wait for the
+    next wake-up.
+    """
+    
+    ADVISORY_LOCK_KEY = 0x616E756D  # arbitrary, shared by every captokens worker
+    
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession],
+        min_interval: float = 30,
+        max_interval: float = 900,
+        target_backlog: int = 10_000,
+        batch_size: int = 1000,
+        max_age_days: int = 30,
+    ):
+        self.session_factory = session_factory
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.target_backlog = target_backlog
+        self.batch_size = batch_size
+        self.max_age_days = max_age_days
+        self.running = False
+        self.last_backlog: Optional[Dict[str, int]] = None
+    
+    async def run_once(self) -> float:
+        """Run one cleanup cycle; returns the delay before the next one."""
+        # A transaction-scoped lock held open on its own session for the cycle
+        async with self.session_factory() as lock_session:
+            result = await lock_session.execute(
+                text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": self.ADVISORY_LOCK_KEY}
+            )
+            if not result.scalar():
+                logger.debug("Cleanup cycle skipped: another worker holds the lock")
+                return self.max_interval
+            return await self._run_cycle()
+    
+    async def _run_cycle(self) -> float:
+        async with self.session_factory() as session:
+            cleanup_service = CleanupService(session)
+            await cleanup_service.ensure_partitions()
+            
+            statistics = await cleanup_service.get_cleanup_statistics(
+                days=1, max_age_days=self.max_age_days
+            )
+            backlog = statistics["backlog"]
+            self.last_backlog = backlog
+            
+            if backlog["expired_tokens"]:
+                await cleanup_service.cleanup_expired_tokens(
+                    batch_size=self.batch_size, max_age_days=self.max_age_days
+                )
+            if backlog["expired_replay_records"]:
+                await cleanup_service.cleanup_replay_protection(batch_size=self.batch_size * 5)
+        
+        interval = adaptive_interval(
+            backlog["total"], self.min_interval, self.max_interval, self.target_backlog
+        )
+        logger.info(
+            "Cleanup cycle finished",
+            extra={"backlog": backlog["total"], "next_run_seconds": round(interval, 1)}
+        )
+        return interval
+    
+    async def start(self) -> None:
+        """Run cleanup cycles until stopped."""
+        self.running = True
+        logger.info("Started cleanup scheduler")
+        
+        while self.running:
+            try:
+                interval = await self.run_once()
+            except Exception as e:
+                logger.error("Cleanup cycle failed", extra={"error": str(e)})
+                interval = self.min_interval
+            await asyncio.sleep(interval)
+    
+    def stop(self) -> None:
+        """Stop after the current cycle."""
+        self.running = False
+        logger.info("Stopped cleanup scheduler")
@@ -8,19 +8,101 @@ Production-grade Redis-backed replay attack prevention service.
 import hashlib
 import json
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Sequence, Tuple
 from uuid import UUID
 
 import redis.asyncio as redis
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, delete, and_
+from sqlalchemy import select, delete, and_, func, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 from ..models import ReplayProtection
+from .batch_writer import BatchInsertWriter
 from anumate_logging import get_logger
 
 logger = get_logger(__name__)
 
 
+# Atomic check-and-record.
+# Returns {is_replay, usage_count, first_seen_at, first_seen_ip, first_seen_user_agent}.
+# KEYS[1] = replay key
+# ARGV = now, client_ip, user_agent, token_hash, expires_at, ttl_seconds
+CHECK_AND_RECORD_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    local count = redis.call('HINCRBY', KEYS[1], 'usage_count', 1)
+    redis.call('HSET', KEYS[1], 'last_used_at', ARGV[1], 'last_used_ip', ARGV[2])
+    local first = redis.call('HMGET', KEYS[1], 'first_seen_at', 'first_seen_ip', 'first_seen_user_agent')
+    return {1, count, first[1], first[2], first[3]}
+end
+redis.call('HSET', KEYS[1],
+    'token_hash', ARGV[4],
+    'usage_count', 1,
+    'first_seen_at', ARGV[1],
+    'first_seen_ip', ARGV[2],
+    'first_seen_user_agent', ARGV[3],
+    'last_used_at', ARGV[1],
+    'expires_at', ARGV[5])
+redis.call('EXPIRE', KEYS[1], tonumber(ARGV[6]))
+return {0, 1, ARGV[1], ARGV[2], ARGV[3]}
+"""
+
+
+# Unique key of partitioned replay tables; tables created before partitioning
+# are unique on token_jti alone (see ``replay_conflict_columns``).
+REPLAY_CONFLICT_COLUMNS: Tuple[str, ...] = ("token_jti", "expires_at")
+
+
+async def replay_conflict_columns(db_session: AsyncSession) -> Tuple[str, ...]:
+    """
+    Pick the upsert conflict target matching the replay table's unique indexes.
+    
+    ON CONFLICT needs a unique index on exactly the target columns, so the
+    partitioned (token_jti, expires_at) key is only used where it exists.
+    """
+    result = await db_session.execute(text(
+        "SELECT array_agg(a.attname::text ORDER BY k.ord) "
+        "FROM pg_index i "
+        "JOIN LATERAL unnest(i.indkey) WITH ORDINALITY AS k(attnum, ord) ON true "
+        "JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = k.attnum "
+        "WHERE i.indrelid = 'replay_protection'::regclass AND i.indisunique "
+        "GROUP BY i.indexrelid"
+    ))
+    unique_keys = {frozenset(columns) for (columns,) in result.fetchall()}
+    
+    for candidate in (REPLAY_CONFLICT_COLUMNS, ("token_jti",)):
+        if frozenset(candidate) in unique_keys:
+            return candidate
+    logger.error("replay_protection has no unique key on token_jti; replay upserts will fail")
+    return REPLAY_CONFLICT_COLUMNS
+
+
+def _replay_upsert_statement(conflict_columns: Sequence[str] = REPLAY_CONFLICT_COLUMNS):
+    """Insert replay records, keeping the highest usage count on conflict."""
+    stmt = pg_insert(ReplayProtection)
+    return stmt.on_conflict_do_update(
+        index_elements=[getattr(ReplayProtection, column) for column in conflict_columns],
+        set_={
+            "usage_count": func.greatest(ReplayProtection.usage_count, stmt.excluded.usage_count),
+            "last_used_at": func.greatest(ReplayProtection.last_used_at, stmt.excluded.last_used_at),
+        },
+    )
+
+
+def create_replay_writer(
+    session_factory,
+    conflict_columns: Sequence[str] = REPLAY_CONFLICT_COLUMNS,
+    **kwargs: Any,
+) -> BatchInsertWriter:
+    """Background writer that persists replay records in batched upserts."""
+    return BatchInsertWriter(
+        session_factory,
+        ReplayProtection,
+        statement=_replay_upsert_statement(conflict_columns),
+        dedupe_key="token_jti",
+        **kwargs,
+    )
+
+
 class ReplayProtectionService:
     """
     Production-grade replay protection service using Redis and database.
@@ -32,6 +114,10 @@ class ReplayProtectionService:
     - Token nonce tracking
     - Performance optimized
     - High availability support
+    
+    ``writer`` is shared across requests (see ``create_replay_writer``); without
+    it, records are upserted through ``db_session`` before returning, on
+    ``conflict_columns`` (see ``replay_conflict_columns``).
     """
     
     def __init__(
@@ -40,10 +126,15 @@ class ReplayProtectionService:
         redis_client: Optional[redis.Redis] = None,
         redis_url: str = "redis://localhost:6379",
         key_prefix: str = "anumate:replay:",
+        writer: Optional[BatchInsertWriter] = None,
+        conflict_columns: Sequence[str] = REPLAY_CONFLICT_COLUMNS,
     ):
         self.db = db_session
         self.redis_client = redis_client or redis.from_url(redis_url, decode_responses=True)
         self.key_prefix = key_prefix
+        self.writer = writer
+        self.conflict_columns = tuple(conflict_columns)
+        self._check_and_record_script = self.redis_client.register_script(CHECK_AND_RECORD_SCRIPT)
     
     def _get_redis_key(self, token_jti: str) -> str:
         """Generate Redis key for token JTI."""
@@ -64,6 +155,10 @@ class ReplayProtectionService:
         """
         Check if token has been used before and record this usage.
         
+        The check and the record happen atomically in Redis in a single
+        round-trip; database persistence goes through the background writer
+        when one is configured.
+        
         Args:
             token: The JWT token
             token_jti: JWT ID claim (unique identifier)
@@ -74,62 +169,11 @@ class ReplayProtectionService:
         Returns:
             Dictionary with replay check results
         """
+        token_hash = self._get_token_hash(token)
+        current_time = datetime.utcnow()
+        ttl_seconds = int((expires_at - current_time).total_seconds())
+        
         try:
-            redis_key = self._get_redis_key(token_jti)
-            token_hash = self._get_token_hash(token)
-            
-            # Check Redis first (fast path)
-            redis_exists = await self.redis_client.exists(redis_key)
-            
-            if redis_exists:
-                # Token has been used before - replay attack detected
-                usage_data = await self.redis_client.hgetall(redis_key)
-                
-                # Update usage count
-                new_count = int(usage_data.get('usage_count', 0)) + 1
-                await self.redis_client.hset(
-                    redis_key,
-                    mapping={
-                        'usage_count': str(new_count),
-                        'last_used_at': datetime.utcnow().isoformat(),
-                        'last_used_ip': client_ip or '',
-                    }
-                )
-                
-                # Update database record
-                await self.db.execute(
-                    self.db.query(ReplayProtection)
-                    .filter(ReplayProtection.token_jti == token_jti)
-                    .update({
-                        ReplayProtection.usage_count: new_count,
-                        ReplayProtection.last_used_at: datetime.utcnow(),
-                    })
-                )
-                await self.db.commit()
-                
-                logger.warning(
-                    "Replay attack detected",
-                    extra={
-                        "token_jti": token_jti,
-                        "usage_count": new_count,
-                        "first_seen_ip": usage_data.get('first_seen_ip'),
-                        "current_ip": client_ip,
-                        "token_hash": token_hash[:16] + "...",
-                    }
-                )
-                
-                return {
-                    "is_replay": True,
-                    "usage_count": new_count,
-                    "first_seen_at": usage_data.get('first_seen_at'),
-                    "first_seen_ip": usage_data.get('first_seen_ip'),
-                    "message": "Token has been used before - potential replay attack"
-                }
-            
-            # First time seeing this token - record it
-            current_time = datetime.utcnow()
-            ttl_seconds = int((expires_at - current_time).total_seconds())
-            
             if ttl_seconds <= 0:
                 # Token already expired
                 return {
@@ -138,35 +182,56 @@ class ReplayProtectionService:
                     "message": "Token is already expired"
                 }
             
-            # Store in Redis with TTL
-            token_data = {
-                'token_hash': token_hash,
-                'usage_count': '1',
-                'first_seen_at': current_time.isoformat(),
-                'first_seen_ip': client_ip or '',
-                'first_seen_user_agent': user_agent or '',
-                'last_used_at': current_time.isoformat(),
-                'expires_at': expires_at.isoformat(),
-            }
-            
-            await self.redis_client.hset(redis_key, mapping=token_data)
-            await self.redis_client.expire(redis_key, ttl_seconds)
+            (
+                is_replay,
+                usage_count,
+                first_seen_at,
+                first_seen_ip,
+                first_seen_user_agent,
+            ) = await self._check_and_record_script(
+                keys=[self._get_redis_key(token_jti)],
+                args=[
+                    current_time.isoformat(),
+                    client_ip or '',
+                    user_agent or '',
+                    token_hash,
+                    expires_at.isoformat(),
+                    ttl_seconds,
+                ],
+            )
+            usage_count = int(usage_count)
             
-            # Store in database for audit persistence
-            replay_record = ReplayProtection(
+            await self._persist_usage(
                 token_jti=token_jti,
                 token_hash=token_hash,
                 expires_at=expires_at,
-                first_seen_ip=client_ip,
-                first_seen_user_agent=user_agent,
-                usage_count=1,
+                first_seen_ip=first_seen_ip or None,
+                first_seen_user_agent=first_seen_user_agent or None,
+                usage_count=usage_count,
                 last_used_at=current_time,
             )
             
-            self.db.add(replay_record)
-            await self.db.commit()
+            if is_replay:
+                logger.warning(
+                    "Replay attack detected",
+                    extra={
+                        "token_jti": token_jti,
+                        "usage_count": usage_count,
+                        "first_seen_ip": first_seen_ip,
+                        "current_ip": client_ip,
+                        "token_hash": token_hash[:16] + "...",
+                    }
+                )
+                
+                return {
+                    "is_replay": True,
+                    "usage_count": usage_count,
+                    "first_seen_at": first_seen_at,
+                    "first_seen_ip": first_seen_ip,
+                    "message": "Token has been used before - potential replay attack"
+                }
             
-            logger.info(
+            logger.debug(
                 "Token recorded for replay protection",
                 extra={
                     "token_jti": token_jti,
@@ -179,7 +244,7 @@ class ReplayProtectionService:
             return {
                 "is_replay": False,
                 "usage_count": 1,
-                "first_seen_at": current_time.isoformat(),
+                "first_seen_at": first_seen_at,
                 "ttl_seconds": ttl_seconds,
                 "message": "Token recorded successfully"
             }
@@ -205,6 +270,14 @@ class ReplayProtectionService:
             )
             raise
     
+    async def _persist_usage(self, **row: Any) -> None:
+        """Persist a usage record, behind the request when a writer is configured."""
+        if self.writer is not None:
+            await self.writer.submit(row)
+            return
+        await self.db.execute(_replay_upsert_statement(self.conflict_columns), [row])
+        await self.db.commit()
+    
     async def _database_replay_check(
         self,
         token_jti: str,
@@ -219,8 +292,13 @@ class ReplayProtectionService:
         Used when Redis is unavailable.
         """
         try:
-            # Check if token exists in database
-            query = select(ReplayProtection).where(ReplayProtection.token_jti == token_jti)
+            # Check if token exists in database (expires_at prunes to one partition)
+            query = select(ReplayProtection).where(
+                and_(
+                    ReplayProtection.token_jti == token_jti,
+                    ReplayProtection.expires_at == expires_at,
+                )
+            )
             result = await self.db.execute(query)
             existing_record = result.scalar_one_or_none()
             
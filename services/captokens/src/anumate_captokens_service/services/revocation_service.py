@@ -0,0 +1,96 @@
+"""
+Revocation Filter for CapTokens
+===============================
+
+Redis-backed bloom filter over revoked token JTIs.
+
+Revocations are rare compared to verifications, so the verify path asks the
+filter first: a negative answer is definitive and skips the database lookup,
+a positive answer (revoked, or a false positive) falls back to the database.
+"""
+
+import hashlib
+import uuid
+from typing import Iterable, List
+
+import redis.asyncio as redis
+
+from anumate_logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class RevocationBloomFilter:
+    """
+    Bloom filter of revoked JTIs stored in a single Redis bitmap.
+
+    Features:
+    - One pipelined round-trip per lookup
+    - No false negatives, so a miss never needs the database
+    - Sized for the expected revocation volume within token lifetime
+    """
+
+    def __init__(
+        self,
+        redis_client: redis.Redis,
+        key: str = "anumate:revoked:bloom",
+        size_bits: int = 1 << 24,
+        num_hashes: int = 7,
+    ):
+        self.redis_client = redis_client
+        self.key = key
+        self.size_bits = size_bits
+        self.num_hashes = num_hashes
+
+    def _positions(self, jti: str) -> List[int]:
+        """Derive bit positions with double hashing over one SHA-256 digest."""
+        digest = hashlib.sha256(jti.encode()).digest()
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:16], "big") | 1
+        return [(h1 + i * h2) % self.size_bits for i in range(self.num_hashes)]
+
+    async def might_be_revoked(self, jti: str) -> bool:
+        """Return False only if the JTI has definitely not been revoked."""
+        pipe = self.redis_client.pipeline(transaction=False)
+        for position in self._positions(jti):
+            pipe.getbit(self.key, position)
+        bits = await pipe.execute()
+        return all(bits)
+
+    async def add(self, jti: str) -> None:
+        """Record a revoked JTI."""
+        await self.add_many([jti])
+
+    async def add_many(self, jtis: Iterable[str]) -> None:
+        """Record several revoked JTIs in one round-trip."""
+        await self._set_bits(self.key, jtis)
+
+    async def _set_bits(self, key: str, jtis: Iterable[str]) -> None:
+        pipe = self.redis_client.pipeline(transaction=False)
+        for jti in jtis:
+            for position in self._positions(jti):
+                pipe.setbit(key, position, 1)
+        await pipe.execute()
+
+    async def rebuild(self, jtis: Iterable[str]) -> None:
+        """
+        Load revoked JTIs in bulk, e.g. from the database on startup.
+
+        The bits are set under a temporary key and merged into the live
+        filter with one ``BITOP OR``, so lookups never see a partially
+        loaded filter. The filter only ever gains bits: revocations that
+        other replicas record meanwhile are kept. Load only revoked tokens
+        that have not expired, to keep the false-positive rate down.
+        """
+        jtis = list(jtis)
+        if not jtis:
+            logger.info("Loaded 0 revoked tokens into the revocation filter")
+            return
+
+        temp_key = f"{self.key}:rebuild:{uuid.uuid4().hex}"
+        try:
+            await self._set_bits(temp_key, jtis)
+            await self.redis_client.bitop("OR", self.key, self.key, temp_key)
+        finally:
+            await self.redis_client.delete(temp_key)
+        logger.info(f"Loaded {len(jtis)} revoked tokens into the revocation filter")
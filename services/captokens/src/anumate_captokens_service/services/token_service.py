@@ -7,7 +7,7 @@ Provides centralized token management with audit trails.
 
 import logging
 from datetime import datetime, timezone, timedelta
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Sequence, Tuple
 import asyncio
 import uuid
 import time
@@ -16,19 +16,25 @@ from sqlalchemy import Column, String, DateTime, Integer, Text, Boolean
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.dialects.postgresql import UUID, ARRAY
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, func
+from sqlalchemy import select, and_, func, insert
 from sqlalchemy.orm import selectinload
 
 from cryptography.hazmat.primitives.asymmetric import ed25519
 from anumate_capability_tokens import (
     issue_capability_token, 
+    issue_capability_tokens_raw,
     verify_capability_token,
     check_capability,
     CapabilityToken,
+    CapabilityTokenVerifier,
     InMemoryReplayGuard,
     ReplayGuard
 )
 
+from .batch_writer import BatchInsertWriter
+from .cleanup_service import adaptive_interval
+from .revocation_service import RevocationBloomFilter
+
 logger = logging.getLogger(__name__)
 Base = declarative_base()
 
@@ -75,19 +81,33 @@ class TokenService:
     - Capability-based access control
     - Token verification service
     - Audit trail for compliance
+    
+    The optional ``verifier``, ``revocation_filter`` and ``audit_writer`` are
+    process-wide and shared across per-request instances; together they keep
+    the database off the verify hot path.
     """
     
+    # Audit actions written behind the request when an audit writer is configured.
+    # Lifecycle actions (issued, revoked, refreshed) stay in the caller's transaction.
+    BATCHED_AUDIT_ACTIONS = frozenset({"verified", "capability_check"})
+    
     def __init__(
         self, 
         private_key: ed25519.Ed25519PrivateKey,
         public_key: ed25519.Ed25519PublicKey,
         db_session: AsyncSession,
-        replay_guard: Optional[ReplayGuard] = None
+        replay_guard: Optional[ReplayGuard] = None,
+        verifier: Optional[CapabilityTokenVerifier] = None,
+        revocation_filter: Optional[RevocationBloomFilter] = None,
+        audit_writer: Optional[BatchInsertWriter] = None
     ):
         self.private_key = private_key
         self.public_key = public_key
         self.db_session = db_session
         self.replay_guard = replay_guard or InMemoryReplayGuard()
+        self.verifier = verifier
+        self.revocation_filter = revocation_filter
+        self.audit_writer = audit_writer
         
     async def issue_token(
         self,
@@ -152,6 +172,66 @@ class TokenService:
         
         return capability_token
     
+    async def issue_tokens(
+        self,
+        tenant_id: str,
+        requests: Sequence[Tuple[str, List[str], int]],
+        created_by: Optional[str] = None
+    ) -> List[CapabilityToken]:
+        """
+        Issue many capability tokens in one transaction.
+        
+        Used for fan-out workflows that need a token per step. Tokens are signed
+        off the event loop, then token and audit rows are written with one
+        multi-row INSERT each and a single commit.
+        
+        Args:
+            tenant_id: Tenant identifier
+            requests: (subject, capabilities, ttl_seconds) tuples
+            created_by: Token issuer identifier
+            
+        Returns:
+            CapabilityTokens in request order
+            
+        Raises:
+            ValueError: If any TTL exceeds 5 minutes; nothing is issued
+        """
+        if not requests:
+            return []
+        
+        loop = asyncio.get_running_loop()
+        tokens = await loop.run_in_executor(
+            None, issue_capability_tokens_raw, self.private_key, tenant_id, list(requests)
+        )
+        
+        now = datetime.now(timezone.utc)
+        token_rows = []
+        audit_rows = []
+        for token in tokens:
+            token_rows.append(dict(
+                token_id=token.token_id,
+                tenant_id=tenant_id,
+                subject=token.subject,
+                capabilities=token.capabilities,
+                issued_at=token.issued_at,
+                expires_at=token.expires_at,
+                created_by=created_by
+            ))
+            audit_rows.append(dict(
+                token_id=token.token_id,
+                tenant_id=tenant_id,
+                action="issued",
+                result="success",
+                timestamp=now
+            ))
+        
+        await self.db_session.execute(insert(TokenRecord), token_rows)
+        await self.db_session.execute(insert(TokenUsageAudit), audit_rows)
+        await self.db_session.commit()
+        
+        logger.info(f"Issued {len(tokens)} capability tokens for tenant {tenant_id}")
+        return tokens
+    
     async def verify_token(
         self, 
         token: str,
@@ -174,27 +254,12 @@ class TokenService:
         """
         try:
             # Verify using the package
-            payload = verify_capability_token(
-                public_key=self.public_key,
-                token=token,
-                replay_guard=self.replay_guard
-            )
+            payload = self._verify_signature(token)
             
             token_id = payload["jti"]
             tenant_id = payload["tenant_id"]
             
-            # Check if token is revoked in database
-            result = await self.db_session.execute(
-                select(TokenRecord).where(
-                    and_(
-                        TokenRecord.token_id == token_id,
-                        TokenRecord.revoked == False
-                    )
-                )
-            )
-            token_record = result.scalar_one_or_none()
-            
-            if not token_record:
+            if not await self._is_active(token_id):
                 await self._add_audit_record(
                     token_id=token_id,
                     tenant_id=tenant_id,
@@ -216,7 +281,7 @@ class TokenService:
                 user_agent=user_agent
             )
             
-            await self.db_session.commit()
+            await self._commit_audit()
             return payload
             
         except ValueError as e:
@@ -239,7 +304,7 @@ class TokenService:
                 client_ip=client_ip,
                 user_agent=user_agent
             )
-            await self.db_session.commit()
+            await self._commit_audit()
             raise
     
     async def check_capability(
@@ -280,7 +345,7 @@ class TokenService:
                 user_agent=user_agent
             )
             
-            await self.db_session.commit()
+            await self._commit_audit()
             return has_cap, payload
             
         except ValueError:
@@ -324,6 +389,8 @@ class TokenService:
         )
         
         await self.db_session.commit()
+        if self.revocation_filter:
+            await self.revocation_filter.add(token_id)
         logger.info(f"Revoked token {token_id} by {revoked_by}")
     
     async def refresh_token(
@@ -350,11 +417,7 @@ class TokenService:
         """
         # First verify the current token
         try:
-            payload = verify_capability_token(
-                public_key=self.public_key,
-                token=token,
-                replay_guard=self.replay_guard
-            )
+            payload = self._verify_signature(token)
         except ValueError as e:
             await self._add_audit_record(
                 token_id="unknown",
@@ -436,10 +499,29 @@ class TokenService:
         )
         
         await self.db_session.commit()
+        if self.revocation_filter:
+            await self.revocation_filter.add(old_token_id)
         logger.info(f"Refreshed token {old_token_id} -> {new_token.token_id} for {payload['sub']}")
         
         return new_token
     
+    async def get_active_revocations(self) -> List[str]:
+        """
+        Get IDs of revoked tokens that have not yet expired.
+        
+        Tokens live at most 5 minutes, so this is the complete set an
+        in-process verifier needs to mirror.
+        """
+        result = await self.db_session.execute(
+            select(TokenRecord.token_id).where(
+                and_(
+                    TokenRecord.revoked == True,
+                    TokenRecord.expires_at > datetime.now(timezone.utc)
+                )
+            )
+        )
+        return list(result.scalars().all())
+    
     async def get_token_audit_trail(
         self, 
         tenant_id: str,
@@ -527,7 +609,7 @@ class TokenService:
         user_agent: Optional[str] = None
     ):
         """Add an audit record."""
-        audit_record = TokenUsageAudit(
+        row = dict(
             token_id=token_id,
             tenant_id=tenant_id,
             action=action,
@@ -539,15 +621,62 @@ class TokenService:
             timestamp=datetime.now(timezone.utc)
         )
         
-        self.db_session.add(audit_record)
+        if self.audit_writer and action in self.BATCHED_AUDIT_ACTIONS:
+            await self.audit_writer.submit(row)
+        else:
+            self.db_session.add(TokenUsageAudit(**row))
+    
+    async def _commit_audit(self):
+        """Commit pending audit rows, if any went to the session."""
+        if self.db_session.new or self.db_session.dirty:
+            await self.db_session.commit()
+    
+    def _verify_signature(self, token: str) -> Dict[str, any]:
+        """Verify signature, expiry and replay, via the cached verifier when configured."""
+        if self.verifier:
+            return self.verifier.verify(token, self.replay_guard)
+        return verify_capability_token(
+            public_key=self.public_key,
+            token=token,
+            replay_guard=self.replay_guard
+        )
+    
+    async def _is_active(self, token_id: str) -> bool:
+        """Check the token has not been revoked, skipping the database when the filter allows."""
+        if self.revocation_filter and not await self.revocation_filter.might_be_revoked(token_id):
+            return True
+        
+        result = await self.db_session.execute(
+            select(TokenRecord.id).where(
+                and_(
+                    TokenRecord.token_id == token_id,
+                    TokenRecord.revoked == False
+                )
+            )
+        )
+        return result.scalar_one_or_none() is not None
 
 
 class TokenCleanupService:
-    """Background service for token cleanup."""
+    """
+    Background service for token cleanup.
+    
+    ``cleanup_interval`` is the longest wait between runs; after a run that
+    found expired tokens the next one comes sooner, down to ``min_interval``
+    once ``target_backlog`` tokens were cleaned.
+    """
     
-    def __init__(self, token_service: TokenService, cleanup_interval: int = 300):
+    def __init__(
+        self,
+        token_service: TokenService,
+        cleanup_interval: int = 300,
+        min_interval: int = 15,
+        target_backlog: int = 1000
+    ):
         self.token_service = token_service
         self.cleanup_interval = cleanup_interval  # 5 minutes default
+        self.min_interval = min_interval
+        self.target_backlog = target_backlog
         self.running = False
         
     async def start(self):
@@ -557,8 +686,10 @@ class TokenCleanupService:
         
         while self.running:
             try:
-                await self.token_service.cleanup_expired_tokens()
-                await asyncio.sleep(self.cleanup_interval)
+                cleaned = await self.token_service.cleanup_expired_tokens()
+                await asyncio.sleep(adaptive_interval(
+                    cleaned, self.min_interval, self.cleanup_interval, self.target_backlog
+                ))
             except Exception as e:
                 logger.error(f"Error in token cleanup: {e}")
                 await asyncio.sleep(60)  # Short retry delay
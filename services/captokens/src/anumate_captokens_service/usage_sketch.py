@@ -0,0 +1,431 @@
+"""
+Online Usage Anomaly Detection
+==============================
+
+Streaming counterpart of ``UsageTracker.detect_usage_anomalies``: instead of
+group-by queries over the usage table, each recorded usage updates
+
+- sliding-window count-min sketches keyed by tenant and token (usage count,
+  failures, response-time sum and count)
+- per-tenant sliding event counters and last-seen times of active tokens
+- per-tenant EWMA baselines for event rate and response time
+
+so every event is checked in constant time, independent of history size.
+
+Sketch estimates never undercount, so anomaly decisions are approximate in
+one direction only: a token may look slightly busier than it was. State is
+per process; with several workers each sees only its share of traffic.
+"""
+
+import hashlib
+import math
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Thresholds shared with the query-based detector
+MIN_ATTEMPTS_FOR_FAILURE_RATE = 10
+FAILURE_RATE_THRESHOLD = 0.5
+HIGH_FAILURE_RATE_THRESHOLD = 0.8
+FREQUENCY_MULTIPLIER = 3
+SLOW_RESPONSE_MULTIPLIER = 2
+
+
+class CountMinSketch:
+    """Count-min sketch over string keys with ``depth`` rows of ``width`` counters."""
+
+    def __init__(self, width: int = 2048, depth: int = 4):
+        self.width = width
+        self.depth = depth
+        self.rows = [array("q", bytes(8 * width)) for _ in range(depth)]
+
+    def indexes(self, key: str) -> List[int]:
+        """Counter positions for ``key`` (double hashing over one digest)."""
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.width for i in range(self.depth)]
+
+    def add(self, indexes: Sequence[int], count: int = 1) -> None:
+        for row, index in zip(self.rows, indexes):
+            row[index] += count
+
+    def estimate(self, indexes: Sequence[int]) -> int:
+        return min(row[index] for row, index in zip(self.rows, indexes))
+
+    def clear(self) -> None:
+        for i in range(self.depth):
+            self.rows[i] = array("q", bytes(8 * self.width))
+
+
+class SlidingCountMinSketch:
+    """
+    Count-min sketch over a sliding time window.
+
+    The window is split into ``buckets`` sub-sketches; a bucket is cleared when
+    time moves past it, and estimates sum the buckets inside the window.
+    """
+
+    def __init__(self, window_seconds: float, buckets: int = 12, width: int = 2048, depth: int = 4):
+        self.bucket_seconds = window_seconds / buckets
+        self.buckets = [CountMinSketch(width, depth) for _ in range(buckets)]
+        self.epochs = [-1] * buckets
+
+    def indexes(self, key: str) -> List[int]:
+        return self.buckets[0].indexes(key)
+
+    def _bucket(self, now: float) -> CountMinSketch:
+        epoch = int(now // self.bucket_seconds)
+        slot = epoch % len(self.buckets)
+        if self.epochs[slot] != epoch:
+            self.buckets[slot].clear()
+            self.epochs[slot] = epoch
+        return self.buckets[slot]
+
+    def add(self, indexes: Sequence[int], now: float, count: int = 1) -> None:
+        self._bucket(now).add(indexes, count)
+
+    def estimate(self, indexes: Sequence[int], now: float, seconds: Optional[float] = None) -> int:
+        epoch = int(now // self.bucket_seconds)
+        span = len(self.buckets) if seconds is None else max(1, math.ceil(seconds / self.bucket_seconds))
+        oldest = epoch - min(span, len(self.buckets)) + 1
+        return sum(
+            sketch.estimate(indexes)
+            for sketch, bucket_epoch in zip(self.buckets, self.epochs)
+            if oldest <= bucket_epoch <= epoch
+        )
+
+
+class SlidingCounter:
+    """Exact counter over a sliding window, bucketed like ``SlidingCountMinSketch``."""
+
+    def __init__(self, window_seconds: float, buckets: int = 12):
+        self.bucket_seconds = window_seconds / buckets
+        self.counts = [0] * buckets
+        self.epochs = [-1] * buckets
+
+    def add(self, now: float, count: int = 1) -> None:
+        epoch = int(now // self.bucket_seconds)
+        slot = epoch % len(self.counts)
+        if self.epochs[slot] != epoch:
+            self.counts[slot] = 0
+            self.epochs[slot] = epoch
+        self.counts[slot] += count
+
+    def total(self, now: float, seconds: Optional[float] = None) -> int:
+        epoch = int(now // self.bucket_seconds)
+        span = len(self.counts) if seconds is None else max(1, math.ceil(seconds / self.bucket_seconds))
+        oldest = epoch - min(span, len(self.counts)) + 1
+        return sum(
+            count for count, bucket_epoch in zip(self.counts, self.epochs)
+            if oldest <= bucket_epoch <= epoch
+        )
+
+
+class EWMARate:
+    """Exponentially decayed event rate (events/second) with a given half-life."""
+
+    def __init__(self, half_life_seconds: float):
+        self.half_life = half_life_seconds
+        self.rate = 0.0
+        self.updated_at: Optional[float] = None
+
+    def _decay(self, now: float) -> float:
+        if self.updated_at is None:
+            return 0.0
+        return 0.5 ** (max(now - self.updated_at, 0.0) / self.half_life)
+
+    def update(self, now: float, count: int = 1) -> None:
+        self.rate = self.rate * self._decay(now) + count * math.log(2) / self.half_life
+        self.updated_at = now
+
+    def value(self, now: float) -> float:
+        return self.rate * self._decay(now)
+
+
+class EWMA:
+    """Exponentially weighted moving average of a per-event value."""
+
+    def __init__(self, alpha: float):
+        self.alpha = alpha
+        self.value: Optional[float] = None
+
+    def update(self, sample: float) -> None:
+        self.value = sample if self.value is None else self.value + self.alpha * (sample - self.value)
+
+
+class _TenantState:
+    __slots__ = ("events", "recent_tokens", "fast_rate", "slow_rate", "response_time")
+
+    def __init__(self, window_seconds: float, buckets: int, rate_half_lives: Sequence[float], latency_alpha: float):
+        self.events = SlidingCounter(window_seconds, buckets)
+        # token -> last seen, least recently seen first
+        self.recent_tokens: "OrderedDict[str, float]" = OrderedDict()
+        self.fast_rate = EWMARate(rate_half_lives[0])
+        self.slow_rate = EWMARate(rate_half_lives[1])
+        self.response_time = EWMA(latency_alpha)
+
+
+class OnlineUsageDetector:
+    """
+    Constant-time anomaly detection over recorded token usage.
+
+    Features:
+    - Same anomaly types and thresholds as the query-based detector
+    - Per-event checks via ``record`` (returns anomalies raised by that event)
+    - On-demand reports via ``detect`` over the tenant's recently active tokens
+    - Tenant rate spikes from fast vs. slow EWMA rates
+    """
+
+    def __init__(
+        self,
+        window_seconds: float = 24 * 3600,
+        buckets: int = 12,
+        width: int = 2048,
+        depth: int = 4,
+        max_tracked_tokens: int = 10_000,
+        rate_half_lives: Sequence[float] = (60.0, 3600.0),
+        rate_spike_multiplier: float = 3.0,
+        min_spike_rate: float = 1.0,
+        latency_alpha: float = 0.01,
+    ):
+        self.window_seconds = window_seconds
+        self.buckets = buckets
+        self.max_tracked_tokens = max_tracked_tokens
+        self.rate_half_lives = rate_half_lives
+        self.rate_spike_multiplier = rate_spike_multiplier
+        self.min_spike_rate = min_spike_rate
+        self.latency_alpha = latency_alpha
+
+        self._usage = SlidingCountMinSketch(window_seconds, buckets, width, depth)
+        self._failures = SlidingCountMinSketch(window_seconds, buckets, width, depth)
+        self._latency_sum = SlidingCountMinSketch(window_seconds, buckets, width, depth)
+        self._latency_count = SlidingCountMinSketch(window_seconds, buckets, width, depth)
+        self._tenants: Dict[str, _TenantState] = {}
+        self._lock = threading.Lock()
+        self.events_recorded = 0
+
+    def _tenant(self, tenant_id: str) -> _TenantState:
+        state = self._tenants.get(tenant_id)
+        if state is None:
+            state = _TenantState(self.window_seconds, self.buckets, self.rate_half_lives, self.latency_alpha)
+            self._tenants[tenant_id] = state
+        return state
+
+    def record(
+        self,
+        tenant_id: str,
+        token_id: str,
+        success: bool = True,
+        response_time_ms: Optional[int] = None,
+        now: Optional[float] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Record one usage and check it.
+
+        Returns:
+            Anomalies this event raised (usually none)
+        """
+        now = time.time() if now is None else now
+        tenant_id, token_id = str(tenant_id), str(token_id)
+        indexes = self._usage.indexes(f"{tenant_id}:{token_id}")
+
+        with self._lock:
+            tenant = self._tenant(tenant_id)
+            self.events_recorded += 1
+
+            self._usage.add(indexes, now)
+            tenant.events.add(now)
+            if not success:
+                self._failures.add(indexes, now)
+            if response_time_ms is not None:
+                self._latency_sum.add(indexes, now, int(response_time_ms))
+                self._latency_count.add(indexes, now)
+                tenant.response_time.update(response_time_ms)
+
+            tenant.recent_tokens[token_id] = now
+            tenant.recent_tokens.move_to_end(token_id)
+            while len(tenant.recent_tokens) > self.max_tracked_tokens:
+                tenant.recent_tokens.popitem(last=False)
+            self._evict_idle_tokens(tenant, now)
+
+            tenant.fast_rate.update(now)
+            tenant.slow_rate.update(now)
+
+            anomalies = self._check_token(tenant, token_id, indexes, now, None)
+            spike = self._check_rate_spike(tenant, now)
+            if spike:
+                anomalies.append(spike)
+            return anomalies
+
+    def detect(self, tenant_id: str, hours: Optional[float] = None, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Report anomalies for a tenant's recently active tokens.
+
+        ``hours`` narrows the window (rounded up to whole buckets); it cannot
+        exceed the detector's window.
+        """
+        now = time.time() if now is None else now
+        seconds = None if hours is None else min(hours * 3600, self.window_seconds)
+
+        with self._lock:
+            tenant = self._tenants.get(str(tenant_id))
+            if tenant is None:
+                return []
+
+            anomalies: List[Dict[str, Any]] = []
+            usage_counts = {}
+            latencies = {}
+            for token_id in tenant.recent_tokens:
+                indexes = self._usage.indexes(f"{tenant_id}:{token_id}")
+                count = self._usage.estimate(indexes, now, seconds)
+                if not count:
+                    continue
+                usage_counts[token_id] = count
+                failures = self._failures.estimate(indexes, now, seconds)
+                anomaly = self._failure_anomaly(token_id, count, failures)
+                if anomaly:
+                    anomalies.append(anomaly)
+                latency_count = self._latency_count.estimate(indexes, now, seconds)
+                if latency_count:
+                    latencies[token_id] = self._latency_sum.estimate(indexes, now, seconds) / latency_count
+
+            if usage_counts:
+                avg_usage = sum(usage_counts.values()) / len(usage_counts)
+                for token_id, count in usage_counts.items():
+                    if count > avg_usage * FREQUENCY_MULTIPLIER:
+                        anomalies.append(self._frequency_anomaly(token_id, count, avg_usage))
+
+            if latencies:
+                baseline = sum(latencies.values()) / len(latencies)
+                for token_id, latency in latencies.items():
+                    if latency > baseline * SLOW_RESPONSE_MULTIPLIER:
+                        anomalies.append(self._latency_anomaly(token_id, latency, baseline))
+
+            spike = self._check_rate_spike(tenant, now)
+            if spike:
+                anomalies.append(spike)
+            return anomalies
+
+    def _check_token(
+        self,
+        tenant: _TenantState,
+        token_id: str,
+        indexes: Sequence[int],
+        now: float,
+        seconds: Optional[float],
+    ) -> List[Dict[str, Any]]:
+        anomalies = []
+        count = self._usage.estimate(indexes, now, seconds)
+
+        anomaly = self._failure_anomaly(token_id, count, self._failures.estimate(indexes, now, seconds))
+        if anomaly:
+            anomalies.append(anomaly)
+
+        distinct = self._distinct_tokens(tenant, now, seconds)
+        if distinct > 1:
+            avg_usage = tenant.events.total(now, seconds) / distinct
+            if count > avg_usage * FREQUENCY_MULTIPLIER:
+                anomalies.append(self._frequency_anomaly(token_id, count, avg_usage))
+
+        latency_count = self._latency_count.estimate(indexes, now, seconds)
+        baseline = tenant.response_time.value
+        if latency_count and baseline:
+            latency = self._latency_sum.estimate(indexes, now, seconds) / latency_count
+            if latency > baseline * SLOW_RESPONSE_MULTIPLIER:
+                anomalies.append(self._latency_anomaly(token_id, latency, baseline))
+
+        return anomalies
+
+    def _evict_idle_tokens(self, tenant: _TenantState, now: float) -> None:
+        """Forget tokens not seen within the window (amortized O(1) per event)."""
+        cutoff = now - self.window_seconds
+        recent = tenant.recent_tokens
+        while recent and next(iter(recent.values())) < cutoff:
+            recent.popitem(last=False)
+
+    def _distinct_tokens(self, tenant: _TenantState, now: float, seconds: Optional[float]) -> int:
+        """
+        Tokens seen within the last ``seconds`` (default: the window).
+
+        Exact up to ``max_tracked_tokens``; the full-window count is the size
+        of ``recent_tokens`` after eviction, narrower spans count from the
+        most recently seen end.
+        """
+        if seconds is None or seconds >= self.window_seconds:
+            return len(tenant.recent_tokens)
+        cutoff = now - seconds
+        distinct = 0
+        for last_seen in reversed(tenant.recent_tokens.values()):
+            if last_seen < cutoff:
+                break
+            distinct += 1
+        return distinct
+
+    def _check_rate_spike(self, tenant: _TenantState, now: float) -> Optional[Dict[str, Any]]:
+        fast = tenant.fast_rate.value(now)
+        slow = tenant.slow_rate.value(now)
+        if fast >= self.min_spike_rate and fast > slow * self.rate_spike_multiplier:
+            return {
+                "type": "usage_rate_spike",
+                "token_id": None,
+                "rate_per_second": fast,
+                "baseline_rate_per_second": slow,
+                "severity": "medium",
+            }
+        return None
+
+    @staticmethod
+    def _failure_anomaly(token_id: str, total: int, failures: int) -> Optional[Dict[str, Any]]:
+        if total <= MIN_ATTEMPTS_FOR_FAILURE_RATE:
+            return None
+        failure_rate = min(failures / total, 1.0)
+        if failure_rate <= FAILURE_RATE_THRESHOLD:
+            return None
+        return {
+            "type": "high_failure_rate",
+            "token_id": token_id,
+            "failure_rate": failure_rate,
+            "total_attempts": total,
+            "severity": "high" if failure_rate > HIGH_FAILURE_RATE_THRESHOLD else "medium",
+        }
+
+    @staticmethod
+    def _frequency_anomaly(token_id: str, count: int, avg_usage: float) -> Dict[str, Any]:
+        return {
+            "type": "unusual_high_frequency",
+            "token_id": token_id,
+            "usage_count": count,
+            "average_usage": avg_usage,
+            "severity": "medium",
+        }
+
+    @staticmethod
+    def _latency_anomaly(token_id: str, latency: float, baseline: float) -> Dict[str, Any]:
+        return {
+            "type": "slow_response_time",
+            "token_id": token_id,
+            "avg_response_time_ms": float(latency),
+            "baseline_avg_ms": baseline,
+            "severity": "low",
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get detector statistics."""
+        now = time.time()
+        return {
+            "events_recorded": self.events_recorded,
+            "tenants": len(self._tenants),
+            "tracked_tokens": sum(len(t.recent_tokens) for t in self._tenants.values()),
+            "window_seconds": self.window_seconds,
+            "tenant_rates": {
+                tenant_id: round(state.fast_rate.value(now), 3)
+                for tenant_id, state in self._tenants.items()
+            },
+        }
@@ -4,18 +4,31 @@ Usage Tracker Service
 
 Service for tracking capability token usage patterns and analytics.
 Provides insights into token usage for security monitoring and optimization.
+
+When a usage writer is started, usage rows are written behind the request in
+multi-row batches; readers flush pending rows first so they see every usage
+recorded before the call.
+
+When online detection is enabled, every tracked usage also feeds an
+``OnlineUsageDetector`` (see ``usage_sketch.py``) that flags anomalies as they
+happen. ``detect_usage_anomalies(online=True)`` answers from it without
+scanning the table, but the detector only sees this process's traffic, so the
+query-based report stays the default.
 """
 
 import logging
+import time
 import uuid
-from datetime import datetime, timedelta
-from typing import Dict, Any, Optional, List
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Any, Optional, List
 from dataclasses import dataclass
 
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_, desc, func
 
 from .models import TokenUsageTracking
+from .services.batch_writer import BatchInsertWriter
+from .usage_sketch import OnlineUsageDetector
 
 logger = logging.getLogger(__name__)
 
@@ -40,11 +53,85 @@ class UsageTracker:
     - Performance monitoring
     - Pattern detection for anomaly detection
     - Usage optimization insights
+    - Optional write-behind batching of usage rows
+    - Optional streaming anomaly detection
     """
     
+    # Shared by every tracker instance in the process; None means write-through.
+    _writer: Optional[BatchInsertWriter] = None
+    _detector: Optional[OnlineUsageDetector] = None
+    _detector_started_at: float = 0.0
+    
     def __init__(self, db: AsyncSession):
         self.db = db
     
+    @classmethod
+    async def start_writer(
+        cls,
+        session_factory: Callable[[], AsyncSession],
+        batch_size: int = 500,
+        flush_interval: float = 0.5,
+        max_queue_size: int = 10_000
+    ) -> BatchInsertWriter:
+        """
+        Start write-behind usage tracking for this process.
+        
+        Rows are flushed when ``batch_size`` accumulate or after ``flush_interval``
+        seconds. Once ``max_queue_size`` rows are pending, ``track_token_usage``
+        waits for the database to catch up.
+        """
+        if cls._writer is None:
+            cls._writer = BatchInsertWriter(
+                session_factory,
+                TokenUsageTracking,
+                batch_size=batch_size,
+                flush_interval=flush_interval,
+                max_queue_size=max_queue_size
+            )
+            await cls._writer.start()
+        return cls._writer
+    
+    @classmethod
+    async def stop_writer(cls) -> None:
+        """Drain pending usage rows and return to write-through tracking."""
+        if cls._writer is not None:
+            writer, cls._writer = cls._writer, None
+            await writer.stop()
+    
+    @classmethod
+    def enable_online_detection(cls, **detector_options: Any) -> OnlineUsageDetector:
+        """
+        Start feeding tracked usage into an in-process anomaly detector.
+        
+        Options are passed to ``OnlineUsageDetector``. The detector only knows
+        usage recorded after this call, so ``detect_usage_anomalies`` keeps
+        using queries until it has observed the requested period.
+        """
+        if cls._detector is None:
+            cls._detector = OnlineUsageDetector(**detector_options)
+            cls._detector_started_at = time.time()
+        return cls._detector
+    
+    @classmethod
+    def disable_online_detection(cls) -> None:
+        """Stop online anomaly detection."""
+        cls._detector = None
+    
+    def _detector_covers(self, hours: int) -> bool:
+        """Whether the online detector can answer for the last ``hours`` hours."""
+        if self._detector is None:
+            return False
+        seconds = hours * 3600
+        return (
+            seconds <= self._detector.window_seconds
+            and time.time() - self._detector_started_at >= seconds
+        )
+    
+    async def _flush_pending(self) -> None:
+        """Write queued usage rows so queries below see them."""
+        if self._writer is not None and self._writer.pending:
+            await self._writer.flush()
+    
     async def track_token_usage(
         self,
         tenant_id: str,
@@ -72,7 +159,7 @@ class UsageTracker:
             context = context or UsageContext()
             
             # Create usage tracking record
-            usage = TokenUsageTracking(
+            usage = dict(
                 usage_id=uuid.uuid4(),
                 tenant_id=tenant_id,
                 token_id=token_id,
@@ -87,13 +174,27 @@ class UsageTracker:
                 extra_metadata=context.metadata or {}
             )
             
-            self.db.add(usage)
-            await self.db.commit()
+            if self._writer is not None:
+                # Stamp now; the row may reach the database a little later.
+                usage["created_at"] = datetime.now(timezone.utc)
+                await self._writer.submit(usage)
+            else:
+                self.db.add(TokenUsageTracking(**usage))
+                await self.db.commit()
+            
+            if self._detector is not None:
+                for anomaly in self._detector.record(
+                    tenant_id, token_id, success, context.response_time_ms
+                ):
+                    logger.warning(
+                        f"Usage anomaly detected: {anomaly['type']}",
+                        extra={"tenant_id": tenant_id, **anomaly}
+                    )
             
             logger.debug(
                 f"Token usage tracked: {action_performed}",
                 extra={
-                    "usage_id": str(usage.usage_id),
+                    "usage_id": str(usage["usage_id"]),
                     "tenant_id": tenant_id,
                     "token_id": token_id,
                     "action": action_performed,
@@ -102,7 +203,7 @@ class UsageTracker:
                 }
             )
             
-            return str(usage.usage_id)
+            return str(usage["usage_id"])
             
         except Exception as e:
             logger.error(f"Failed to track token usage: {e}", exc_info=True)
@@ -127,6 +228,8 @@ class UsageTracker:
             Usage statistics
         """
         try:
+            await self._flush_pending()
+            
             since = datetime.utcnow() - timedelta(hours=hours)
             
             base_filter = and_(
@@ -234,6 +337,8 @@ class UsageTracker:
             List of usage tracking records
         """
         try:
+            await self._flush_pending()
+            
             query = select(TokenUsageTracking).where(
                 and_(
                     TokenUsageTracking.tenant_id == tenant_id,
@@ -251,7 +356,8 @@ class UsageTracker:
     async def detect_usage_anomalies(
         self,
         tenant_id: str,
-        hours: int = 24
+        hours: int = 24,
+        online: bool = False
     ) -> List[Dict[str, Any]]:
         """
         Detect anomalous usage patterns.
@@ -259,11 +365,20 @@ class UsageTracker:
         Args:
             tenant_id: Tenant ID
             hours: Number of hours to analyze
+            online: Answer from this process's online detector when it covers
+                ``hours`` (approximate, and blind to other workers' usage)
             
         Returns:
             List of detected anomalies
         """
+        if online and self._detector_covers(hours):
+            anomalies = self._detector.detect(tenant_id, hours)
+            logger.info(f"Detected {len(anomalies)} usage anomalies for tenant {tenant_id} (online)")
+            return anomalies
+        
         try:
+            await self._flush_pending()
+            
             anomalies = []
             since = datetime.utcnow() - timedelta(hours=hours)
             
@@ -305,14 +420,14 @@ class UsageTracker:
                 )
             ).group_by(TokenUsageTracking.token_id)
             
-            frequency_result = await self.db.execute(frequency_query)
-            usage_counts = [row[1] for row in frequency_result.fetchall()]
+            frequency_rows = (await self.db.execute(frequency_query)).fetchall()
+            usage_counts = [row[1] for row in frequency_rows]
             
             if usage_counts:
                 avg_usage = sum(usage_counts) / len(usage_counts)
                 threshold = avg_usage * 3  # 3x average usage
                 
-                for row in frequency_result.fetchall():
+                for row in frequency_rows:
                     token_id, usage_count = row
                     if usage_count > threshold:
                         anomalies.append({
@@ -335,14 +450,14 @@ class UsageTracker:
                 )
             ).group_by(TokenUsageTracking.token_id)
             
-            response_time_result = await self.db.execute(response_time_query)
-            response_times = [row[1] for row in response_time_result.fetchall()]
+            response_time_rows = (await self.db.execute(response_time_query)).fetchall()
+            response_times = [row[1] for row in response_time_rows]
             
             if response_times:
                 avg_response_time = sum(response_times) / len(response_times)
                 slow_threshold = avg_response_time * 2  # 2x average response time
                 
-                for row in response_time_result.fetchall():
+                for row in response_time_rows:
                     token_id, token_avg_response = row
                     if token_avg_response > slow_threshold:
                         anomalies.append({
@@ -376,6 +491,8 @@ class UsageTracker:
             Capability usage insights
         """
         try:
+            await self._flush_pending()
+            
             since = datetime.utcnow() - timedelta(hours=hours)
             
             # Get all usage records for analysis
@@ -444,6 +561,8 @@ class UsageTracker:
             Number of records cleaned up
         """
         try:
+            await self._flush_pending()
+            
             cutoff_date = datetime.utcnow() - timedelta(days=days)
             
             # Delete old usage records
@@ -22,6 +22,7 @@ import aioredis
 from pydantic import BaseModel, Field, validator
 from fastapi import FastAPI, HTTPException, BackgroundTasks
 from contextlib import asynccontextmanager
+from anumate_events.codec import CloudEventEnvelope, decode_message, encode_binary, peek_type
 
 logger = logging.getLogger(__name__)
 
@@ -119,6 +120,41 @@ class CloudEvent(BaseModel):
     class Config:
         allow_population_by_field_name = True
 
+    def to_envelope(self) -> CloudEventEnvelope:
+        """Convert to the shared wire envelope without a pydantic round-trip."""
+        return CloudEventEnvelope(
+            type=self.type,
+            source=self.source,
+            data=self.data,
+            id=self.id,
+            time=self.time,
+            subject=self.subject,
+            datacontenttype=self.datacontenttype,
+            dataschema=self.dataschema,
+            tenantid=self.tenantid,
+            correlationid=self.correlationid,
+            tracecontext=self.tracecontext,
+            specversion=self.specversion,
+        )
+
+    @classmethod
+    def from_envelope(cls, envelope: CloudEventEnvelope) -> "CloudEvent":
+        """Build from a decoded wire envelope, skipping validation."""
+        return cls.construct(
+            specversion=envelope.specversion,
+            type=envelope.type,
+            source=envelope.source,
+            id=envelope.id,
+            time=envelope.time,
+            datacontenttype=envelope.datacontenttype,
+            dataschema=envelope.dataschema,
+            subject=envelope.subject,
+            tenantid=envelope.tenantid,
+            correlationid=envelope.correlationid,
+            tracecontext=envelope.tracecontext,
+            data=envelope.data,
+        )
+
 
 @dataclass
 class EventSubscription:
@@ -276,11 +312,11 @@ class EventBusService:
             if not subject:
                 subject = f"events.{event.type.replace('.', '_')}"
                 
-            # Serialize event
-            event_data = event.json().encode()
+            # Serialize event in binary content mode
+            headers, payload = encode_binary(event.to_envelope())
             
             # Publish to JetStream
-            ack = await self.jetstream.publish(subject, event_data)
+            ack = await self.jetstream.publish(subject, payload, headers=headers)
             
             # Track event in Redis
             await self._track_event_published(event, ack.seq)
@@ -354,15 +390,26 @@ class EventBusService:
             # Subscribe with message handler
             async def message_handler(msg: Msg):
                 try:
+                    # Filter on the ce-type header before decoding anything
+                    header_type = peek_type(msg.headers)
+                    if (
+                        header_type is not None
+                        and subscription.event_types
+                        and header_type not in subscription.event_types
+                    ):
+                        await msg.ack()
+                        return
+                        
                     # Parse CloudEvent
-                    event_data = json.loads(msg.data.decode())
-                    event = CloudEvent.parse_obj(event_data)
+                    envelope = decode_message(msg.headers, msg.data)
                     
                     # Filter by event types if specified
-                    if subscription.event_types and event.type not in subscription.event_types:
+                    if subscription.event_types and envelope.type not in subscription.event_types:
                         await msg.ack()
                         return
                         
+                    event = CloudEvent.from_envelope(envelope)
+                    
                     # Track event processing
                     await self._track_event_processing(event, consumer_name)
                     
@@ -384,8 +431,7 @@ class EventBusService:
                     # Try to extract event ID for tracking
                     event_id = "unknown"
                     try:
-                        event_data = json.loads(msg.data.decode())
-                        event_id = event_data.get("id", "unknown")
+                        event_id = decode_message(msg.headers, msg.data).id
                     except:
                         pass
                         
@@ -474,8 +520,7 @@ class EventBusService:
                 nonlocal events_replayed
                 
                 try:
-                    event_data = json.loads(msg.data.decode())
-                    event = CloudEvent.parse_obj(event_data)
+                    event = decode_message(msg.headers, msg.data)
                     
                     # Filter by event types if specified
                     if event_types and event.type not in event_types:
@@ -515,6 +560,7 @@ class EventBusService:
             dead_letter_data = {
                 "original_subject": msg.subject,
                 "original_data": msg.data.decode(),
+                "original_headers": dict(msg.headers or {}),
                 "error": error,
                 "failed_at": datetime.now(timezone.utc).isoformat(),
                 "attempts": msg.metadata.num_delivered,
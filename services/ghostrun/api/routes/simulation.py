@@ -15,6 +15,7 @@ from src.models import (
     GhostRunRequest,
     GhostRunStatus,
     PreflightReport,
+    RiskLevel,
     SimulationStatus,
     ExecutablePlan,
 )
@@ -236,15 +237,20 @@ class ReportListResponse(BaseModel):
 @router.get("/reports", response_model=ReportListResponse)
 async def list_preflight_reports(
     tenant_id: UUID = Depends(get_tenant_id),
-    limit: int = Query(50, ge=1, le=100, description="Maximum number of results")
+    limit: int = Query(50, ge=1, le=100, description="Maximum number of results"),
+    offset: int = Query(0, ge=0, description="Number of results to skip"),
+    risk_level: Optional[RiskLevel] = Query(None, description="Only reports with this overall risk")
 ) -> ReportListResponse:
-    """List preflight reports for the tenant."""
+    """List preflight reports for the tenant, newest first."""
     
-    reports = await report_storage.list_reports(tenant_id=tenant_id, limit=limit)
+    reports = await report_storage.list_reports(
+        tenant_id=tenant_id, limit=limit, offset=offset, risk_level=risk_level
+    )
+    total_count = await report_storage.count_reports(tenant_id=tenant_id, risk_level=risk_level)
     
     return ReportListResponse(
         reports=reports,
-        total_count=len(reports)
+        total_count=total_count
     )
 
 
@@ -0,0 +1,177 @@
+"""Latency and failure models for GhostRun mock connectors.
+
+Each model samples one call latency from a ``random.Random`` (used by
+``MockConnector.simulate_call``) or a vector of latencies from a NumPy
+generator (used by the Monte Carlo batch mode). ``fit_call_models`` builds
+log-normal or empirical-histogram models per (connector, tool, action) from
+execution traces recorded locally as JSON lines::
+
+    {"connector": "stripe", "tool": "payment", "action": "charge",
+     "latency_ms": 412, "success": true}
+"""
+
+import bisect
+import json
+import math
+import random
+import statistics
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Tuple, Union
+
+import numpy as np
+
+CallKey = Tuple[str, str, str]  # (connector, tool, action)
+
+# Extra histogram edges above the 90th percentile, so the tail is not one wide bin
+TAIL_QUANTILES = (0.95, 0.99, 0.995, 0.999, 1.0)
+
+
+class LatencyModel:
+    """Distribution of a connector call's latency in milliseconds."""
+    
+    def sample(self, rng: random.Random) -> int:
+        """Draw one latency."""
+        raise NotImplementedError
+    
+    def sample_array(self, rng: np.random.Generator, n: int) -> np.ndarray:
+        """Draw ``n`` latencies as an int64 array."""
+        raise NotImplementedError
+
+
+@dataclass(frozen=True)
+class UniformLatencyModel(LatencyModel):
+    """Uniform integer latency on ``latency_ms +/- variance_ms`` (the built-in default)."""
+    
+    latency_ms: int
+    variance_ms: int = 0
+    
+    def sample(self, rng: random.Random) -> int:
+        return self.latency_ms + rng.randint(-self.variance_ms, self.variance_ms)
+    
+    def sample_array(self, rng: np.random.Generator, n: int) -> np.ndarray:
+        return self.latency_ms + rng.integers(-self.variance_ms, self.variance_ms + 1, size=n)
+
+
+@dataclass(frozen=True)
+class LogNormalLatencyModel(LatencyModel):
+    """Log-normal latency; ``mu`` and ``sigma`` are the mean and std dev of log(ms)."""
+    
+    mu: float
+    sigma: float
+    
+    @classmethod
+    def fit(cls, latencies: List[float]) -> "LogNormalLatencyModel":
+        """Maximum-likelihood fit to observed latencies."""
+        logs = [math.log(max(latency, 1.0)) for latency in latencies]
+        return cls(mu=statistics.fmean(logs), sigma=statistics.pstdev(logs))
+    
+    def sample(self, rng: random.Random) -> int:
+        return round(rng.lognormvariate(self.mu, self.sigma))
+    
+    def sample_array(self, rng: np.random.Generator, n: int) -> np.ndarray:
+        return np.rint(rng.lognormal(self.mu, self.sigma, size=n)).astype(np.int64)
+
+
+@dataclass(frozen=True)
+class EmpiricalLatencyModel(LatencyModel):
+    """Histogram of observed latencies, sampled uniformly within the chosen bin.
+    
+    ``edges`` has one more entry than ``cumulative``, which holds the running
+    bin weights (its last value is the total).
+    """
+    
+    edges: Tuple[float, ...]
+    cumulative: Tuple[float, ...]
+    
+    @classmethod
+    def fit(cls, latencies: List[float], bins: int = 30) -> "EmpiricalLatencyModel":
+        """Quantile-edged histogram: ``bins`` equal-mass bins up to p90, then ``TAIL_QUANTILES``."""
+        ordered = np.sort(np.asarray(latencies, dtype=float))
+        probabilities = np.concatenate([np.linspace(0.0, 0.9, bins + 1), TAIL_QUANTILES])
+        edges = np.quantile(ordered, probabilities)
+        return cls(
+            edges=tuple(float(edge) for edge in edges),
+            cumulative=tuple(float(p) for p in probabilities[1:])
+        )
+    
+    def sample(self, rng: random.Random) -> int:
+        u = rng.random() * self.cumulative[-1]
+        i = min(bisect.bisect_right(self.cumulative, u), len(self.cumulative) - 1)
+        low, high = self.edges[i], self.edges[i + 1]
+        return round(low + rng.random() * (high - low))
+    
+    def sample_array(self, rng: np.random.Generator, n: int) -> np.ndarray:
+        cumulative = np.asarray(self.cumulative)
+        edges = np.asarray(self.edges)
+        bins = np.minimum(
+            np.searchsorted(cumulative, rng.random(n) * cumulative[-1], side="right"),
+            len(cumulative) - 1
+        )
+        low, high = edges[bins], edges[bins + 1]
+        return np.rint(low + rng.random(n) * (high - low)).astype(np.int64)
+
+
+@dataclass(frozen=True)
+class CallModel:
+    """Latency distribution and success probability of one connector action."""
+    
+    latency: LatencyModel
+    success_probability: float
+    samples: int = 0  # trace records the model was fitted from (0 for built-in defaults)
+
+
+def load_traces(path: Union[str, Path]) -> Iterator[Dict[str, Any]]:
+    """Yield trace records from a JSON-lines file or a directory of ``*.jsonl`` files."""
+    path = Path(path)
+    files = sorted(path.glob("*.jsonl")) if path.is_dir() else [path]
+    for trace_file in files:
+        with open(trace_file, "r") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def fit_call_models(
+    records: Iterable[Dict[str, Any]],
+    kind: str = "empirical",
+    min_samples: int = 20,
+    bins: int = 30
+) -> Dict[CallKey, CallModel]:
+    """Fit one ``CallModel`` per (connector, tool, action) seen in the traces.
+    
+    Latency is fitted from successful calls only (failures tend to time out or
+    fail fast, which would distort the distribution); if there are fewer than
+    ``min_samples`` of them the action is skipped. Success probability uses
+    Laplace smoothing so a clean trace never yields a certain outcome.
+    """
+    if kind not in ("empirical", "lognormal"):
+        raise ValueError(f"Unknown latency model kind: {kind}")
+    
+    grouped: Dict[CallKey, Tuple[List[float], int]] = {}
+    for record in records:
+        key = (record["connector"], record["tool"], record["action"])
+        latencies, failures = grouped.setdefault(key, ([], 0))
+        if record.get("success", True):
+            latencies.append(float(record["latency_ms"]))
+        else:
+            grouped[key] = (latencies, failures + 1)
+    
+    models = {}
+    for key, (latencies, failures) in grouped.items():
+        if len(latencies) < min_samples:
+            continue
+        
+        if kind == "lognormal":
+            latency_model: LatencyModel = LogNormalLatencyModel.fit(latencies)
+        else:
+            latency_model = EmpiricalLatencyModel.fit(latencies, bins=bins)
+        
+        total = len(latencies) + failures
+        models[key] = CallModel(
+            latency=latency_model,
+            success_probability=(len(latencies) + 1) / (total + 2),
+            samples=total
+        )
+    
+    return models
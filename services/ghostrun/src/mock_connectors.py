@@ -1,11 +1,26 @@
 """Mock connector system for GhostRun simulation."""
 
+import os
 import random
 import time
-from typing import Any, Dict, List, Optional
-
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from .latency_models import (
+    CallKey,
+    CallModel,
+    UniformLatencyModel,
+    fit_call_models,
+    load_traces,
+)
 from .models import MockConnectorResponse, RiskLevel
 
+# Used when a caller does not supply its own seeded generator
+_unseeded_rng = random.Random()
+
+# Override keys that replace a calibrated model with the config-derived one
+_MODEL_OVERRIDE_KEYS = ("typical_latency_ms", "risk_level")
+
 
 class MockConnectorRegistry:
     """Registry of mock connectors for simulation."""
@@ -26,6 +41,43 @@ class MockConnectorRegistry:
         """List all registered connector names."""
         return list(self._connectors.keys())
     
+    def resolve(
+        self, 
+        step_tool: str, 
+        action: str
+    ) -> Tuple[Optional["MockConnector"], Optional[str]]:
+        """Resolve a plan step's tool to (connector, connector tool).
+        
+        Steps name the connector (``"stripe"``) or a connector tool
+        (``"stripe.payment"``); with the connector alone, the tool is the
+        first one registered that supports ``action``. Either part is None
+        when it cannot be resolved.
+        """
+        connector_name, _, tool_name = step_tool.partition(".")
+        connector = self.get_connector(connector_name)
+        if connector is None:
+            return None, None
+        return connector, connector.resolve_tool(action, tool_name or None)
+    
+    def calibrate(self, models: Dict[CallKey, CallModel]) -> int:
+        """Install fitted call models; returns how many matched a registered connector."""
+        applied = 0
+        for (connector_name, tool_name, action), model in models.items():
+            connector = self.get_connector(connector_name)
+            if connector and connector.supports_action(tool_name, action):
+                connector.set_call_model(tool_name, action, model)
+                applied += 1
+        return applied
+    
+    def calibrate_from_traces(
+        self, 
+        path: Union[str, Path], 
+        kind: str = "empirical",
+        min_samples: int = 20
+    ) -> int:
+        """Fit call models from recorded execution traces and install them."""
+        return self.calibrate(fit_call_models(load_traces(path), kind=kind, min_samples=min_samples))
+    
     def _register_default_connectors(self) -> None:
         """Register default mock connectors."""
         # Payment connectors
@@ -59,6 +111,7 @@ class MockConnector:
         self.name = name
         self.base_latency_ms = base_latency_ms
         self._supported_tools: Dict[str, Dict[str, Any]] = {}
+        self._call_models: Dict[Tuple[str, str], CallModel] = {}
     
     def register_tool(
         self, 
@@ -78,20 +131,71 @@ class MockConnector:
         """Check if connector supports a tool."""
         return tool_name in self._supported_tools
     
+    def resolve_tool(self, action: str, tool_name: Optional[str] = None) -> Optional[str]:
+        """Tool that handles ``action``: ``tool_name`` if registered, else the first supporting it."""
+        if tool_name is not None:
+            return tool_name if self.supports_tool(tool_name) else None
+        for name, tool_config in self._supported_tools.items():
+            if action in tool_config["actions"]:
+                return name
+        return None
+    
     def supports_action(self, tool_name: str, action: str) -> bool:
         """Check if connector supports a specific action."""
         if not self.supports_tool(tool_name):
             return False
         return action in self._supported_tools[tool_name]["actions"]
     
+    def set_call_model(self, tool_name: str, action: str, model: CallModel) -> None:
+        """Use a calibrated latency/failure model for one action."""
+        self._call_models[(tool_name, action)] = model
+    
+    def get_call_model(
+        self,
+        tool_name: str,
+        action: str,
+        overrides: Optional[Dict[str, Any]] = None
+    ) -> CallModel:
+        """Distribution that ``simulate_call`` samples from for this call.
+        
+        A calibrated model wins unless the overrides set latency or risk,
+        in which case the model is derived from the overridden tool config.
+        """
+        if not self.supports_action(tool_name, action):
+            return CallModel(latency=UniformLatencyModel(50), success_probability=0.0)
+        
+        overrides = overrides or {}
+        calibrated = self._call_models.get((tool_name, action))
+        if calibrated and not any(key in overrides for key in _MODEL_OVERRIDE_KEYS):
+            return calibrated
+        
+        tool_config = self._supported_tools[tool_name].copy()
+        tool_config.update(overrides)
+        return self._model_from_config(tool_config)
+    
+    def _model_from_config(self, tool_config: Dict[str, Any]) -> CallModel:
+        """Build the default model for a (possibly overridden) tool config."""
+        base_latency = tool_config.get("typical_latency_ms", self.base_latency_ms)
+        risk_level = tool_config.get("risk_level", RiskLevel.LOW)
+        return CallModel(
+            latency=UniformLatencyModel(base_latency, int(base_latency * 0.3)),  # 30% variance
+            success_probability=self._get_success_probability(risk_level)
+        )
+    
     def simulate_call(
         self, 
         tool_name: str, 
         action: str, 
         parameters: Dict[str, Any],
-        overrides: Optional[Dict[str, Any]] = None
+        overrides: Optional[Dict[str, Any]] = None,
+        rng: Optional[random.Random] = None
     ) -> MockConnectorResponse:
-        """Simulate a connector call."""
+        """Simulate a connector call.
+        
+        Pass a seeded ``rng`` to make the simulated latency, outcome and
+        response data reproducible; the module-level generator is used
+        otherwise.
+        """
         
         # Check if tool/action is supported
         if not self.supports_action(tool_name, action):
@@ -111,29 +215,36 @@ class MockConnector:
             tool_config.update(overrides)
         
         # Simulate response
-        return self._generate_mock_response(tool_name, action, parameters, tool_config)
+        return self._generate_mock_response(
+            tool_name, 
+            action, 
+            parameters, 
+            tool_config, 
+            self.get_call_model(tool_name, action, overrides),
+            rng or _unseeded_rng
+        )
     
     def _generate_mock_response(
         self, 
         tool_name: str, 
         action: str, 
         parameters: Dict[str, Any],
-        tool_config: Dict[str, Any]
+        tool_config: Dict[str, Any],
+        call_model: CallModel,
+        rng: random.Random
     ) -> MockConnectorResponse:
         """Generate a mock response for the action."""
         
         # Calculate simulated latency
-        base_latency = tool_config.get("typical_latency_ms", self.base_latency_ms)
-        latency_variance = int(base_latency * 0.3)  # 30% variance
-        simulated_latency = base_latency + random.randint(-latency_variance, latency_variance)
+        simulated_latency = call_model.latency.sample(rng)
         
-        # Determine success probability based on action risk
+        # Determine success probability (risk-based, or calibrated from traces)
         risk_level = tool_config.get("risk_level", RiskLevel.LOW)
-        success_probability = self._get_success_probability(risk_level)
-        success = random.random() < success_probability
+        success_probability = call_model.success_probability
+        success = rng.random() < success_probability
         
         # Generate mock response data
-        response_data = self._generate_response_data(tool_name, action, parameters, success)
+        response_data = self._generate_response_data(tool_name, action, parameters, success, rng)
         
         # Generate simulation notes
         notes = [
@@ -141,6 +252,8 @@ class MockConnector:
             f"Risk level: {risk_level.value}",
             f"Success probability: {success_probability:.2f}"
         ]
+        if call_model.samples:
+            notes.append(f"Calibrated from {call_model.samples} recorded calls")
         
         return MockConnectorResponse(
             connector_name=self.name,
@@ -167,7 +280,8 @@ class MockConnector:
         tool_name: str, 
         action: str, 
         parameters: Dict[str, Any],
-        success: bool
+        success: bool,
+        rng: random.Random
     ) -> Dict[str, Any]:
         """Generate mock response data. Override in subclasses."""
         if success:
@@ -216,13 +330,14 @@ class StripeConnector(MockConnector):
         tool_name: str, 
         action: str, 
         parameters: Dict[str, Any],
-        success: bool
+        success: bool,
+        rng: random.Random
     ) -> Dict[str, Any]:
         """Generate Stripe-specific mock response data."""
         if tool_name == "payment":
             if success:
                 return {
-                    "id": f"ch_mock_{random.randint(1000, 9999)}",
+                    "id": f"ch_mock_{rng.randint(1000, 9999)}",
                     "amount": parameters.get("amount", 1000),
                     "currency": parameters.get("currency", "usd"),
                     "status": "succeeded" if action == "charge" else "refunded",
@@ -237,7 +352,7 @@ class StripeConnector(MockConnector):
                     }
                 }
         
-        return super()._generate_response_data(tool_name, action, parameters, success)
+        return super()._generate_response_data(tool_name, action, parameters, success, rng)
 
 
 class PayPalConnector(MockConnector):
@@ -478,7 +593,8 @@ class HTTPConnector(MockConnector):
         tool_name: str, 
         action: str, 
         parameters: Dict[str, Any],
-        success: bool
+        success: bool,
+        rng: random.Random
     ) -> Dict[str, Any]:
         """Generate HTTP-specific mock response data."""
         if success:
@@ -499,4 +615,11 @@ class HTTPConnector(MockConnector):
 
 
 # Global registry instance
-mock_connector_registry = MockConnectorRegistry()
\ No newline at end of file
+mock_connector_registry = MockConnectorRegistry()
+
+# Optional calibration from locally recorded execution traces
+if os.getenv("GHOSTRUN_LATENCY_TRACES"):
+    mock_connector_registry.calibrate_from_traces(
+        os.environ["GHOSTRUN_LATENCY_TRACES"],
+        kind=os.getenv("GHOSTRUN_LATENCY_MODEL", "empirical")
+    )
\ No newline at end of file
@@ -76,6 +76,11 @@ class StepSimulationResult(BaseModel):
     # Dependencies
     dependency_issues: List[str] = Field(default_factory=list, description="Dependency issues")
     
+    # Schedule (relative to flow start)
+    earliest_start_ms: int = Field(default=0, description="Earliest start time within the flow")
+    earliest_finish_ms: int = Field(default=0, description="Earliest finish time within the flow")
+    slack_ms: int = Field(default=0, description="Delay tolerated without extending the flow")
+    
     # Outputs
     simulated_outputs: Dict[str, Any] = Field(
         default_factory=dict, 
@@ -91,7 +96,15 @@ class FlowSimulationResult(BaseModel):
     
     # Overall flow results
     would_complete: bool = Field(..., description="Whether flow would complete successfully")
-    total_execution_time_ms: int = Field(..., description="Total estimated execution time")
+    total_execution_time_ms: int = Field(
+        ..., 
+        description="Estimated flow duration (makespan of the step schedule)"
+    )
+    cumulative_step_time_ms: int = Field(
+        default=0, 
+        description="Sum of step execution times, ignoring parallelism"
+    )
+    peak_concurrency: int = Field(default=0, description="Most steps running at once in the schedule")
     
     # Step results
     step_results: List[StepSimulationResult] = Field(
@@ -137,6 +150,42 @@ class PreflightRecommendation(BaseModel):
     )
 
 
+class StepFailureContribution(BaseModel):
+    """How often a step fails across Monte Carlo trials."""
+    
+    flow_id: str = Field(..., description="Flow containing the step")
+    step_id: str = Field(..., description="Step identifier")
+    failure_rate: float = Field(..., description="Share of trials in which the step failed")
+    failure_contribution: float = Field(
+        ..., 
+        description="Share of failed trials in which this was the first step to fail"
+    )
+
+
+class MonteCarloSummary(BaseModel):
+    """Outcome distribution from a batch of seeded simulation trials."""
+    
+    trials: int = Field(..., description="Number of trials run")
+    seed: int = Field(..., description="Seed the trials were drawn from")
+    budget_exhausted: bool = Field(
+        default=False, 
+        description="Whether the CPU time budget stopped the batch before all trials ran"
+    )
+    
+    # Plan duration distribution (flows run back to back)
+    mean_makespan_ms: float = Field(..., description="Mean plan duration")
+    p50_makespan_ms: float = Field(..., description="Median plan duration")
+    p95_makespan_ms: float = Field(..., description="95th percentile plan duration")
+    p99_makespan_ms: float = Field(..., description="99th percentile plan duration")
+    
+    # Outcomes
+    completion_probability: float = Field(..., description="Share of trials where every step succeeded")
+    step_failures: List[StepFailureContribution] = Field(
+        default_factory=list,
+        description="Per-step failure statistics, largest contribution first"
+    )
+
+
 class PreflightReport(BaseModel):
     """Comprehensive preflight validation report."""
     
@@ -195,6 +244,12 @@ class PreflightReport(BaseModel):
     total_steps: int = Field(..., description="Total number of steps")
     steps_with_issues: int = Field(..., description="Number of steps with issues")
     high_risk_steps: int = Field(..., description="Number of high-risk steps")
+    
+    # Batch simulation
+    monte_carlo: Optional[MonteCarloSummary] = Field(
+        None, 
+        description="Monte Carlo outcome distribution, when requested"
+    )
 
 
 class GhostRunRequest(BaseModel):
@@ -222,6 +277,27 @@ class GhostRunRequest(BaseModel):
         default_factory=dict,
         description="Override settings for specific connectors"
     )
+    random_seed: Optional[int] = Field(
+        default=None,
+        description="Seed for mock connector randomness (derived from plan_hash if not set)"
+    )
+    max_concurrent_steps: Optional[int] = Field(
+        default=None,
+        ge=1,
+        description="Cap on steps running at once when estimating flow duration"
+    )
+    monte_carlo_trials: int = Field(
+        default=0,
+        ge=0,
+        le=100000,
+        description="Number of seeded Monte Carlo trials to run (0 disables batch mode)"
+    )
+    monte_carlo_time_budget_ms: int = Field(
+        default=2000,
+        ge=1,
+        le=30000,
+        description="CPU time budget for the Monte Carlo trials"
+    )
     
     # Validation options
     strict_validation: bool = Field(
@@ -0,0 +1,168 @@
+"""Vectorized Monte Carlo batch simulation for GhostRun.
+
+A single GhostRun samples each connector call once, so its report is one
+draw from the outcome distribution. ``MonteCarloSimulator`` replays a plan
+many times from per-step sampling profiles: latency (from each connector's
+``LatencyModel``) and success draws for all trials of a chunk are NumPy
+arrays, and the schedule of each flow is computed across trials at once,
+one step at a time in topological order.
+"""
+
+import time
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from .latency_models import LatencyModel
+from .models import MonteCarloSummary, StepFailureContribution
+
+
+@dataclass(frozen=True)
+class StepProfile:
+    """Sampling inputs for one step of a flow."""
+    
+    step_id: str
+    fixed_time_ms: int
+    latency: Optional[LatencyModel] = None  # connector call latency, if the step makes one
+    success_probability: float = 1.0
+    depends_on: Tuple[int, ...] = ()  # indices of earlier steps in the flow profile
+
+
+@dataclass(frozen=True)
+class FlowProfile:
+    """Steps of a flow in topological order."""
+    
+    flow_id: str
+    steps: List[StepProfile]
+
+
+class MonteCarloSimulator:
+    """Runs seeded batches of plan trials within a CPU time budget."""
+    
+    def __init__(self, chunk_size: int = 2048) -> None:
+        self.chunk_size = chunk_size
+    
+    def run(
+        self,
+        flows: List[FlowProfile],
+        trials: int,
+        seed: int,
+        time_budget_ms: int,
+        max_concurrency: Optional[int] = None
+    ) -> MonteCarloSummary:
+        """Run up to ``trials`` trials, stopping early once the budget is spent.
+        
+        Trials are drawn in chunks from one generator, so the first N trials
+        are the same for a given seed however many chunks the budget allows.
+        At least one chunk always runs. The budget is CPU time of the calling
+        thread, so concurrent simulations do not use up each other's budgets.
+        """
+        rng = np.random.default_rng(seed)
+        step_index = [(flow.flow_id, step.step_id) for flow in flows for step in flow.steps]
+        
+        makespans: List[np.ndarray] = []
+        failure_counts = np.zeros(len(step_index), dtype=np.int64)
+        first_failure_counts = np.zeros(len(step_index), dtype=np.int64)
+        completed = 0
+        done = 0
+        
+        started = time.thread_time()
+        deadline = started + time_budget_ms / 1000
+        
+        while done < trials:
+            n = min(self.chunk_size, trials - done)
+            makespan = np.zeros(n, dtype=np.int64)
+            failures = []
+            
+            for flow in flows:
+                flow_makespan, flow_failures = self._sample_flow(flow, rng, n, max_concurrency)
+                makespan += flow_makespan
+                failures.append(flow_failures)
+            
+            failed = np.concatenate(failures, axis=1) if failures else np.zeros((n, 0), dtype=bool)
+            any_failed = failed.any(axis=1)
+            
+            makespans.append(makespan)
+            failure_counts += failed.sum(axis=0)
+            if any_failed.any():
+                # argmax finds the first True in plan/topological order
+                first = failed[any_failed].argmax(axis=1)
+                first_failure_counts += np.bincount(first, minlength=len(step_index))
+            completed += int(n - any_failed.sum())
+            done += n
+            
+            if time.thread_time() >= deadline:
+                break
+        
+        all_makespans = np.concatenate(makespans)
+        p50, p95, p99 = np.percentile(all_makespans, [50, 95, 99])
+        failed_trials = done - completed
+        
+        step_failures = [
+            StepFailureContribution(
+                flow_id=flow_id,
+                step_id=step_id,
+                failure_rate=float(failure_counts[i] / done),
+                failure_contribution=(
+                    float(first_failure_counts[i] / failed_trials) if failed_trials else 0.0
+                )
+            )
+            for i, (flow_id, step_id) in enumerate(step_index)
+            if failure_counts[i]
+        ]
+        step_failures.sort(key=lambda item: (-item.failure_contribution, -item.failure_rate))
+        
+        return MonteCarloSummary(
+            trials=done,
+            seed=seed,
+            budget_exhausted=done < trials,
+            mean_makespan_ms=float(all_makespans.mean()),
+            p50_makespan_ms=float(p50),
+            p95_makespan_ms=float(p95),
+            p99_makespan_ms=float(p99),
+            completion_probability=completed / done,
+            step_failures=step_failures
+        )
+    
+    def _sample_flow(
+        self,
+        flow: FlowProfile,
+        rng: np.random.Generator,
+        n: int,
+        max_concurrency: Optional[int]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Sample ``n`` trials of a flow; returns (makespan per trial, failure matrix)."""
+        steps = flow.steps
+        if not steps:
+            return np.zeros(n, dtype=np.int64), np.zeros((n, 0), dtype=bool)
+        
+        fixed = np.array([step.fixed_time_ms for step in steps], dtype=np.int64)
+        success_probability = np.array([step.success_probability for step in steps])
+        
+        # One latency draw per (trial, step) from each step's connector model
+        durations = np.tile(fixed, (n, 1))
+        for j, step in enumerate(steps):
+            if step.latency is not None:
+                durations[:, j] += step.latency.sample_array(rng, n)
+        failed = rng.random((n, len(steps))) >= success_probability
+        
+        # Same forward pass as SimulationEngine._schedule_steps, across all trials at once
+        finish = np.empty((n, len(steps)), dtype=np.int64)
+        slots = np.zeros((n, max_concurrency), dtype=np.int64) if max_concurrency else None
+        rows = np.arange(n)
+        
+        for j, step in enumerate(steps):
+            if step.depends_on:
+                ready = finish[:, list(step.depends_on)].max(axis=1)
+            else:
+                ready = np.zeros(n, dtype=np.int64)
+            if slots is not None:
+                slot = slots.argmin(axis=1)
+                ready = np.maximum(ready, slots[rows, slot])
+                finish[:, j] = ready + durations[:, j]
+                slots[rows, slot] = finish[:, j]
+            else:
+                finish[:, j] = ready + durations[:, j]
+        
+        return finish.max(axis=1), failed
@@ -1,140 +1,243 @@
-"""Preflight report storage and retrieval service."""
+"""Preflight report storage and retrieval service.
+
+Report bodies are JSON files grouped into hourly segment directories
+(``<storage_path>/segments/YYYYMMDDHH/<run_id>.json``). A SQLite index next to
+them holds the listing metadata (tenant, created time, risk, summary counts),
+so listing, statistics and expiry never read report bodies, and startup does
+not load history into memory. Bodies are read on demand through a small LRU
+cache. Expiry drops whole segments once they are past the cutoff.
+"""
 
 import json
-import os
-from datetime import datetime, timezone
+import shutil
+import sqlite3
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from uuid import UUID
 
-from .models import PreflightReport, GhostRunStatus
+from .models import PreflightReport, RiskLevel
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    run_id TEXT PRIMARY KEY,
+    tenant_id TEXT,
+    report_id TEXT NOT NULL,
+    plan_hash TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    segment TEXT NOT NULL,
+    path TEXT NOT NULL,
+    overall_status TEXT NOT NULL,
+    overall_risk_level TEXT NOT NULL,
+    execution_feasible INTEGER NOT NULL,
+    total_steps INTEGER NOT NULL,
+    steps_with_issues INTEGER NOT NULL,
+    high_risk_steps INTEGER NOT NULL,
+    simulation_duration_ms INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_reports_tenant_created ON reports (tenant_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_reports_created ON reports (created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_reports_risk_created ON reports (overall_risk_level, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_reports_segment ON reports (segment);
+"""
+
+_LISTING_COLUMNS = (
+    "run_id, report_id, plan_hash, created_at, overall_status, overall_risk_level, "
+    "execution_feasible, total_steps, steps_with_issues, high_risk_steps, simulation_duration_ms"
+)
+
+SEGMENT_FORMAT = "%Y%m%d%H"
 
 
 class ReportStorage:
     """Handles storage and retrieval of preflight reports."""
     
-    def __init__(self, storage_path: str = "data/ghostrun/reports") -> None:
+    def __init__(
+        self,
+        storage_path: str = "data/ghostrun/reports",
+        cache_size: int = 128
+    ) -> None:
         self.storage_path = Path(storage_path)
         self.storage_path.mkdir(parents=True, exist_ok=True)
-        
-        # In-memory cache for fast access
-        self._report_cache: Dict[UUID, PreflightReport] = {}
-        self._cache_timestamps: Dict[UUID, datetime] = {}
-        
-        # Load existing reports into cache
-        self._load_existing_reports()
+        self.segments_path = self.storage_path / "segments"
+        self.segments_path.mkdir(exist_ok=True)
+        
+        # Bounded cache of recently read report bodies
+        self.cache_size = cache_size
+        self._report_cache: "OrderedDict[UUID, PreflightReport]" = OrderedDict()
+        
+        self._db = sqlite3.connect(
+            str(self.storage_path / "index.sqlite3"),
+            check_same_thread=False
+        )
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+        
+        # One-time import of reports written by the flat-file layout
+        self._import_legacy_reports()
     
     async def store_report(
-        self, 
-        run_id: UUID, 
-        report: PreflightReport
+        self,
+        run_id: UUID,
+        report: PreflightReport,
+        tenant_id: Optional[UUID] = None
     ) -> None:
         """Store a preflight report."""
         
-        # Store in cache
-        self._report_cache[run_id] = report
-        self._cache_timestamps[run_id] = datetime.now(timezone.utc)
+        created_at = report.generated_at
+        segment = self._segment_for(created_at)
+        report_file = self.segments_path / segment / f"{run_id}.json"
         
-        # Persist to disk
-        await self._persist_report(run_id, report)
+        # Body first, so an index row never points at a missing file
+        await self._persist_report(report_file, report)
+        self._index_report(run_id, report, tenant_id, segment, report_file)
+        
+        self._cache_put(run_id, report)
     
     async def get_report(self, run_id: UUID) -> Optional[PreflightReport]:
         """Retrieve a preflight report."""
         
         # Check cache first
         if run_id in self._report_cache:
+            self._report_cache.move_to_end(run_id)
             return self._report_cache[run_id]
         
-        # Try to load from disk
-        report = await self._load_report(run_id)
+        row = self._db.execute(
+            "SELECT path FROM reports WHERE run_id = ?", (str(run_id),)
+        ).fetchone()
+        if row is None:
+            return None
+        
+        # Load body from disk on demand
+        report = await self._load_report(run_id, self.storage_path / row["path"])
         if report:
-            self._report_cache[run_id] = report
-            self._cache_timestamps[run_id] = datetime.now(timezone.utc)
+            self._cache_put(run_id, report)
         
         return report
     
     async def list_reports(
-        self, 
+        self,
         tenant_id: Optional[UUID] = None,
-        limit: int = 50
-    ) -> List[Dict[str, any]]:
-        """List available reports with metadata."""
-        
-        reports = []
-        
-        # Get reports from cache
-        for run_id, report in self._report_cache.items():
-            # Filter by tenant if specified
-            if tenant_id and hasattr(report, 'tenant_id'):
-                # Note: PreflightReport doesn't have tenant_id, would need to be added
-                # For now, we'll include all reports
-                pass
-            
-            reports.append({
-                "run_id": run_id,
-                "report_id": report.report_id,
-                "plan_hash": report.plan_hash,
-                "generated_at": report.generated_at,
-                "overall_status": report.overall_status,
-                "overall_risk_level": report.overall_risk_level.value,
-                "execution_feasible": report.execution_feasible,
-                "total_steps": report.total_steps,
-                "steps_with_issues": report.steps_with_issues,
-                "high_risk_steps": report.high_risk_steps,
-                "simulation_duration_ms": report.simulation_duration_ms
-            })
-        
-        # Sort by generation time (newest first)
-        reports.sort(key=lambda x: x["generated_at"], reverse=True)
-        
-        return reports[:limit]
+        limit: int = 50,
+        offset: int = 0,
+        risk_level: Optional[RiskLevel] = None
+    ) -> List[Dict[str, Any]]:
+        """List reports with metadata, newest first, one page at a time."""
+        
+        where, params = self._filters(tenant_id, risk_level)
+        rows = self._db.execute(
+            f"SELECT {_LISTING_COLUMNS} FROM reports {where} "
+            "ORDER BY created_at DESC, run_id DESC LIMIT ? OFFSET ?",
+            (*params, limit, offset)
+        ).fetchall()
+        
+        return [
+            {
+                "run_id": UUID(row["run_id"]),
+                "report_id": UUID(row["report_id"]),
+                "plan_hash": row["plan_hash"],
+                "generated_at": datetime.fromtimestamp(row["created_at"], tz=timezone.utc),
+                "overall_status": row["overall_status"],
+                "overall_risk_level": row["overall_risk_level"],
+                "execution_feasible": bool(row["execution_feasible"]),
+                "total_steps": row["total_steps"],
+                "steps_with_issues": row["steps_with_issues"],
+                "high_risk_steps": row["high_risk_steps"],
+                "simulation_duration_ms": row["simulation_duration_ms"]
+            }
+            for row in rows
+        ]
+    
+    async def count_reports(
+        self,
+        tenant_id: Optional[UUID] = None,
+        risk_level: Optional[RiskLevel] = None
+    ) -> int:
+        """Count reports matching the listing filters."""
+        
+        where, params = self._filters(tenant_id, risk_level)
+        return self._db.execute(f"SELECT COUNT(*) FROM reports {where}", params).fetchone()[0]
     
     async def delete_report(self, run_id: UUID) -> bool:
         """Delete a preflight report."""
         
         # Remove from cache
-        if run_id in self._report_cache:
-            del self._report_cache[run_id]
-            del self._cache_timestamps[run_id]
+        self._report_cache.pop(run_id, None)
+        
+        row = self._db.execute(
+            "SELECT path FROM reports WHERE run_id = ?", (str(run_id),)
+        ).fetchone()
+        if row is None:
+            return False
+        
+        with self._db:
+            self._db.execute("DELETE FROM reports WHERE run_id = ?", (str(run_id),))
         
         # Remove from disk
-        report_file = self._get_report_file_path(run_id)
+        report_file = self.storage_path / row["path"]
         if report_file.exists():
             report_file.unlink()
-            return True
         
-        return False
+        return True
     
     async def cleanup_old_reports(self, max_age_hours: int = 168) -> int:
-        """Clean up old reports (default: 7 days)."""
+        """Clean up old reports (default: 7 days).
         
-        cutoff_time = datetime.now(timezone.utc).timestamp() - (max_age_hours * 3600)
-        cleaned_count = 0
-        
-        # Clean up cache
-        expired_run_ids = []
-        for run_id, timestamp in self._cache_timestamps.items():
-            if timestamp.timestamp() < cutoff_time:
-                expired_run_ids.append(run_id)
+        Segments that end before the cutoff are dropped whole; only the
+        segment straddling the cutoff is cleaned report by report.
+        """
         
-        for run_id in expired_run_ids:
-            await self.delete_report(run_id)
-            cleaned_count += 1
+        cutoff = datetime.now(timezone.utc) - timedelta(hours=max_age_hours)
+        cutoff_segment = self._segment_for(cutoff)
+        cleaned_count = 0
         
-        # Clean up disk files
-        for report_file in self.storage_path.glob("*.json"):
-            if report_file.stat().st_mtime < cutoff_time:
-                report_file.unlink()
+        # Whole expired segments: one index delete and one directory removal each
+        expired_segments = [
+            row["segment"] for row in self._db.execute(
+                "SELECT DISTINCT segment FROM reports WHERE segment < ?", (cutoff_segment,)
+            )
+        ]
+        expired_segments.extend(
+            path.name for path in self.segments_path.iterdir()
+            if path.is_dir() and path.name < cutoff_segment and path.name not in expired_segments
+        )
+        
+        for segment in expired_segments:
+            with self._db:
+                cleaned_count += self._db.execute(
+                    "DELETE FROM reports WHERE segment = ?", (segment,)
+                ).rowcount
+            shutil.rmtree(self.segments_path / segment, ignore_errors=True)
+        
+        # Segment straddling the cutoff
+        straddling = self._db.execute(
+            "SELECT run_id FROM reports WHERE segment = ? AND created_at < ?",
+            (cutoff_segment, cutoff.timestamp())
+        ).fetchall()
+        for row in straddling:
+            if await self.delete_report(UUID(row["run_id"])):
                 cleaned_count += 1
         
+        expired = {run_id for run_id, report in self._report_cache.items() if report.generated_at < cutoff}
+        for run_id in expired:
+            del self._report_cache[run_id]
+        
         return cleaned_count
     
-    async def get_report_statistics(self) -> Dict[str, any]:
+    async def get_report_statistics(self) -> Dict[str, Any]:
         """Get statistics about stored reports."""
         
-        total_reports = len(self._report_cache)
+        totals = self._db.execute(
+            "SELECT COUNT(*) AS total_reports, "
+            "AVG(simulation_duration_ms) AS average_simulation_duration_ms, "
+            "AVG(execution_feasible) AS success_rate, "
+            "AVG(total_steps) AS average_steps "
+            "FROM reports"
+        ).fetchone()
         
-        if total_reports == 0:
+        if totals["total_reports"] == 0:
             return {
                 "total_reports": 0,
                 "average_simulation_duration_ms": 0,
@@ -143,37 +246,93 @@ class ReportStorage:
                 "risk_level_distribution": {}
             }
         
-        # Calculate statistics
-        total_duration = 0
-        successful_reports = 0
-        total_steps = 0
-        risk_levels = {}
-        
-        for report in self._report_cache.values():
-            total_duration += report.simulation_duration_ms
-            if report.execution_feasible:
-                successful_reports += 1
-            total_steps += report.total_steps
-            
-            risk_level = report.overall_risk_level.value
-            risk_levels[risk_level] = risk_levels.get(risk_level, 0) + 1
+        risk_levels = {
+            row["overall_risk_level"]: row["count"] for row in self._db.execute(
+                "SELECT overall_risk_level, COUNT(*) AS count FROM reports "
+                "GROUP BY overall_risk_level"
+            )
+        }
         
         return {
-            "total_reports": total_reports,
-            "average_simulation_duration_ms": total_duration / total_reports,
-            "success_rate": successful_reports / total_reports,
-            "average_steps": total_steps / total_reports,
+            "total_reports": totals["total_reports"],
+            "average_simulation_duration_ms": totals["average_simulation_duration_ms"],
+            "success_rate": totals["success_rate"],
+            "average_steps": totals["average_steps"],
             "risk_level_distribution": risk_levels
         }
     
-    def _get_report_file_path(self, run_id: UUID) -> Path:
-        """Get file path for a report."""
-        return self.storage_path / f"{run_id}.json"
+    def close(self) -> None:
+        """Close the index database."""
+        self._db.close()
+    
+    def _segment_for(self, timestamp: datetime) -> str:
+        """Name of the hourly segment holding reports created at ``timestamp``."""
+        if timestamp.tzinfo is None:
+            timestamp = timestamp.replace(tzinfo=timezone.utc)
+        return timestamp.astimezone(timezone.utc).strftime(SEGMENT_FORMAT)
+    
+    def _filters(
+        self,
+        tenant_id: Optional[UUID],
+        risk_level: Optional[RiskLevel]
+    ) -> Tuple[str, Tuple[Any, ...]]:
+        """WHERE clause and parameters for the listing filters."""
+        clauses = []
+        params = []
+        if tenant_id:
+            clauses.append("tenant_id = ?")
+            params.append(str(tenant_id))
+        if risk_level:
+            clauses.append("overall_risk_level = ?")
+            params.append(RiskLevel(risk_level).value)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        return where, tuple(params)
     
-    async def _persist_report(self, run_id: UUID, report: PreflightReport) -> None:
+    def _cache_put(self, run_id: UUID, report: PreflightReport) -> None:
+        """Add a report body to the LRU cache."""
+        self._report_cache[run_id] = report
+        self._report_cache.move_to_end(run_id)
+        while len(self._report_cache) > self.cache_size:
+            self._report_cache.popitem(last=False)
+    
+    def _index_report(
+        self,
+        run_id: UUID,
+        report: PreflightReport,
+        tenant_id: Optional[UUID],
+        segment: str,
+        report_file: Path
+    ) -> None:
+        """Insert or replace the index row for a report."""
+        generated_at = report.generated_at
+        if generated_at.tzinfo is None:
+            generated_at = generated_at.replace(tzinfo=timezone.utc)
+        
+        with self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO reports VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    str(run_id),
+                    str(tenant_id) if tenant_id else None,
+                    str(report.report_id),
+                    report.plan_hash,
+                    generated_at.timestamp(),
+                    segment,
+                    str(report_file.relative_to(self.storage_path)),
+                    report.overall_status,
+                    RiskLevel(report.overall_risk_level).value,
+                    int(report.execution_feasible),
+                    report.total_steps,
+                    report.steps_with_issues,
+                    report.high_risk_steps,
+                    report.simulation_duration_ms
+                )
+            )
+    
+    async def _persist_report(self, report_file: Path, report: PreflightReport) -> None:
         """Persist report to disk."""
         
-        report_file = self._get_report_file_path(run_id)
+        report_file.parent.mkdir(parents=True, exist_ok=True)
         
         # Convert report to JSON
         report_data = report.model_dump(mode='json')
@@ -182,11 +341,9 @@ class ReportStorage:
         with open(report_file, 'w') as f:
             json.dump(report_data, f, indent=2, default=str)
     
-    async def _load_report(self, run_id: UUID) -> Optional[PreflightReport]:
+    async def _load_report(self, run_id: UUID, report_file: Path) -> Optional[PreflightReport]:
         """Load report from disk."""
         
-        report_file = self._get_report_file_path(run_id)
-        
         if not report_file.exists():
             return None
         
@@ -200,30 +357,26 @@ class ReportStorage:
             print(f"Error loading report {run_id}: {e}")
             return None
     
-    def _load_existing_reports(self) -> None:
-        """Load existing reports from disk into cache."""
-        
-        if not self.storage_path.exists():
-            return
+    def _import_legacy_reports(self) -> None:
+        """Move reports from the old flat ``<run_id>.json`` layout into segments."""
         
         for report_file in self.storage_path.glob("*.json"):
             try:
                 run_id = UUID(report_file.stem)
                 
                 with open(report_file, 'r') as f:
-                    report_data = json.load(f)
-                
-                report = PreflightReport(**report_data)
-                self._report_cache[run_id] = report
-                
-                # Use file modification time as cache timestamp
-                mtime = datetime.fromtimestamp(report_file.stat().st_mtime, tz=timezone.utc)
-                self._cache_timestamps[run_id] = mtime
+                    report = PreflightReport(**json.load(f))
                 
+                segment = self._segment_for(report.generated_at)
+                target = self.segments_path / segment / report_file.name
+                target.parent.mkdir(parents=True, exist_ok=True)
+                report_file.replace(target)
+                self._index_report(run_id, report, None, segment, target)
+            
             except Exception as e:
-                print(f"Error loading report from {report_file}: {e}")
+                print(f"Error importing report from {report_file}: {e}")
                 continue
 
 
 # Global report storage instance
-report_storage = ReportStorage()
\ No newline at end of file
+report_storage = ReportStorage()
@@ -155,7 +155,7 @@ class GhostRunService:
             
             # Store report and publish completion event
             if status.report:
-                await report_storage.store_report(run_id, status.report)
+                await report_storage.store_report(run_id, status.report, status.tenant_id)
                 await event_publisher.publish_preflight_completed(status, status.report)
             
         except Exception as e:
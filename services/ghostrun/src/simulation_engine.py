@@ -1,7 +1,11 @@
 """Core simulation engine for GhostRun dry-run execution."""
 
 import asyncio
+import hashlib
+import heapq
+import random
 import time
+from dataclasses import dataclass
 from typing import Any, Dict, List, Optional, Tuple
 from uuid import uuid4
 
@@ -18,16 +22,26 @@ from .models import (
     ExecutionStep,
 )
 from .mock_connectors import mock_connector_registry
+from .monte_carlo import FlowProfile, MonteCarloSimulator, StepProfile
 from .risk_analyzer import RiskAnalyzer
 from .validation_engine import ValidationEngine
 
 
+@dataclass(frozen=True)
+class FlowSchedule:
+    """Flow-level outcome of scheduling the simulated steps."""
+    
+    makespan_ms: int
+    peak_concurrency: int
+
+
 class SimulationEngine:
     """Core engine for simulating ExecutablePlan execution."""
     
     def __init__(self) -> None:
         self.risk_analyzer = RiskAnalyzer()
         self.validation_engine = ValidationEngine()
+        self.monte_carlo = MonteCarloSimulator()
     
     async def simulate_plan(
         self, 
@@ -50,7 +64,19 @@ class SimulationEngine:
         
         # Phase 3: Simulation
         simulation_start = time.time()
-        flow_results = await self._simulate_flows(plan, request)
+        seed = self._resolve_seed(plan, request)
+        flow_results = await self._simulate_flows(plan, request, seed)
+        monte_carlo = None
+        if request.monte_carlo_trials:
+            # CPU-bound NumPy work; keep it off the event loop
+            monte_carlo = await asyncio.to_thread(
+                self.monte_carlo.run,
+                self._build_flow_profiles(plan, request, flow_results),
+                request.monte_carlo_trials,
+                seed,
+                request.monte_carlo_time_budget_ms,
+                request.max_concurrent_steps
+            )
         simulation_time = time.time() - simulation_start
         
         # Phase 4: Report generation
@@ -58,13 +84,14 @@ class SimulationEngine:
         report = await self._generate_preflight_report(
             plan, request, flow_results, validation_issues, start_time
         )
+        report.monte_carlo = monte_carlo
         report_time = time.time() - report_start
         
         # Calculate metrics
         total_steps = sum(len(flow.steps) for flow in plan.flows)
         total_connectors = len(set(
-            step.tool for flow in plan.flows for step in flow.steps 
-            if step.tool and mock_connector_registry.get_connector(step.tool)
+            step.tool.partition(".")[0] for flow in plan.flows for step in flow.steps 
+            if step.tool and mock_connector_registry.get_connector(step.tool.partition(".")[0])
         ))
         total_api_calls = sum(
             len(result.connector_responses) 
@@ -105,17 +132,28 @@ class SimulationEngine:
                             f"Step '{step.step_id}' depends on non-existent step '{dep}'"
                         )
     
+    def _resolve_seed(self, plan: ExecutablePlan, request: GhostRunRequest) -> int:
+        """Seed for connector randomness; stable per plan unless the request sets one."""
+        if request.random_seed is not None:
+            return request.random_seed
+        return int(hashlib.sha256(plan.plan_hash.encode()).hexdigest()[:16], 16)
+    
+    def _step_rng(self, seed: int, flow_id: str, step_id: str) -> random.Random:
+        """Independent generator per step so results do not depend on scheduling order."""
+        return random.Random(f"{seed}:{flow_id}:{step_id}")
+    
     async def _simulate_flows(
         self, 
         plan: ExecutablePlan, 
-        request: GhostRunRequest
+        request: GhostRunRequest,
+        seed: int
     ) -> List[FlowSimulationResult]:
         """Simulate all flows in the plan."""
         
         flow_results = []
         
         for flow in plan.flows:
-            flow_result = await self._simulate_flow(flow, plan, request)
+            flow_result = await self._simulate_flow(flow, plan, request, seed)
             flow_results.append(flow_result)
         
         return flow_results
@@ -124,63 +162,147 @@ class SimulationEngine:
         self, 
         flow: ExecutionFlow, 
         plan: ExecutablePlan, 
-        request: GhostRunRequest
+        request: GhostRunRequest,
+        seed: int
     ) -> FlowSimulationResult:
-        """Simulate execution of a single flow."""
+        """Simulate execution of a single flow.
+        
+        Steps are simulated level by level through the dependency DAG, each
+        with its own seeded generator, so results do not depend on the order
+        steps within a level are simulated in.
+        """
         
         step_results = []
-        total_execution_time = 0
+        cumulative_step_time = 0
         flow_issues = []
+        steps_by_id = {step.step_id: step for step in flow.steps}
         
         # Build dependency graph
         dependency_graph = self._build_dependency_graph(flow.steps)
         
-        # Simulate steps in dependency order
-        execution_order = self._get_execution_order(dependency_graph)
+        # Simulate steps in dependency order, one DAG level at a time
+        execution_levels = self._get_execution_levels(dependency_graph)
         
-        for step_id in execution_order:
-            step = next(s for s in flow.steps if s.step_id == step_id)
-            
-            try:
-                step_result = await self._simulate_step(step, plan, request)
-                step_results.append(step_result)
-                total_execution_time += step_result.execution_time_ms
-                
-            except Exception as e:
-                # Handle step simulation errors
-                error_result = StepSimulationResult(
-                    step_id=step.step_id,
-                    step_name=step.name,
-                    would_execute=False,
-                    execution_time_ms=0,
-                    validation_passed=False,
-                    validation_issues=[f"Simulation error: {str(e)}"],
-                    risk_level=RiskLevel.CRITICAL
+        for level in execution_levels:
+            for step_id in level:
+                step_result, issue = await self._simulate_step_safely(
+                    steps_by_id[step_id], flow, plan, request, seed
                 )
-                step_results.append(error_result)
-                flow_issues.append(f"Step {step.step_id} simulation failed: {str(e)}")
+                step_results.append(step_result)
+                cumulative_step_time += step_result.execution_time_ms
+                if issue:
+                    flow_issues.append(issue)
+        
+        simulated = {step_id for level in execution_levels for step_id in level}
+        cyclic_steps = [step_id for step_id in dependency_graph if step_id not in simulated]
+        if cyclic_steps:
+            flow_issues.append(
+                f"Steps not simulated due to dependency cycle: {', '.join(cyclic_steps)}"
+            )
+        
+        # Schedule the simulated steps to estimate the flow duration
+        schedule = self._schedule_steps(
+            step_results, dependency_graph, request.max_concurrent_steps
+        )
         
         # Analyze flow-level risks
         overall_risk = self._calculate_flow_risk(step_results)
-        would_complete = all(result.would_execute for result in step_results)
+        would_complete = not cyclic_steps and all(result.would_execute for result in step_results)
         critical_path = self._identify_critical_path(step_results, dependency_graph)
         
         return FlowSimulationResult(
             flow_id=flow.flow_id,
             flow_name=flow.name,
             would_complete=would_complete,
-            total_execution_time_ms=total_execution_time,
+            total_execution_time_ms=schedule.makespan_ms,
+            cumulative_step_time_ms=cumulative_step_time,
+            peak_concurrency=schedule.peak_concurrency,
             step_results=step_results,
             flow_issues=flow_issues,
             overall_risk_level=overall_risk,
             critical_path_steps=critical_path
         )
     
+    def _build_flow_profiles(
+        self,
+        plan: ExecutablePlan,
+        request: GhostRunRequest,
+        flow_results: List[FlowSimulationResult]
+    ) -> List[FlowProfile]:
+        """Turn simulated flows into Monte Carlo sampling profiles.
+        
+        The fixed part of each step's time, and whether it can run at all,
+        come from the single simulation; the connector call contributes the
+        latency and success distribution that the trials resample.
+        """
+        flows_by_id = {flow.flow_id: flow for flow in plan.flows}
+        profiles = []
+        
+        for flow_result in flow_results:
+            steps_by_id = {step.step_id: step for step in flows_by_id[flow_result.flow_id].steps}
+            index = {result.step_id: i for i, result in enumerate(flow_result.step_results)}
+            step_profiles = []
+            
+            for result in flow_result.step_results:
+                step = steps_by_id[result.step_id]
+                connector_time = sum(resp.response_time_ms for resp in result.connector_responses)
+                can_run = result.validation_passed and not result.dependency_issues
+                call_model = None
+                
+                if result.connector_responses:
+                    action = step.action or "execute"
+                    connector, tool_name = mock_connector_registry.resolve(step.tool, action)
+                    call_model = connector.get_call_model(
+                        tool_name or step.tool,
+                        action,
+                        request.connector_overrides.get(connector.name, {})
+                    )
+                
+                success_probability = call_model.success_probability if call_model else 1.0
+                step_profiles.append(StepProfile(
+                    step_id=result.step_id,
+                    fixed_time_ms=result.execution_time_ms - connector_time,
+                    latency=call_model.latency if call_model else None,
+                    success_probability=success_probability if can_run else 0.0,
+                    depends_on=tuple(index[dep] for dep in step.depends_on if dep in index)
+                ))
+            
+            profiles.append(FlowProfile(flow_id=flow_result.flow_id, steps=step_profiles))
+        
+        return profiles
+    
+    async def _simulate_step_safely(
+        self,
+        step: ExecutionStep,
+        flow: ExecutionFlow,
+        plan: ExecutablePlan,
+        request: GhostRunRequest,
+        seed: int
+    ) -> Tuple[StepSimulationResult, Optional[str]]:
+        """Simulate a step, turning simulation errors into a failed result and flow issue."""
+        rng = self._step_rng(seed, flow.flow_id, step.step_id)
+        try:
+            return await self._simulate_step(step, plan, request, rng), None
+        
+        except Exception as e:
+            # Handle step simulation errors
+            error_result = StepSimulationResult(
+                step_id=step.step_id,
+                step_name=step.name,
+                would_execute=False,
+                execution_time_ms=0,
+                validation_passed=False,
+                validation_issues=[f"Simulation error: {str(e)}"],
+                risk_level=RiskLevel.CRITICAL
+            )
+            return error_result, f"Step {step.step_id} simulation failed: {str(e)}"
+    
     async def _simulate_step(
         self, 
         step: ExecutionStep, 
         plan: ExecutablePlan, 
-        request: GhostRunRequest
+        request: GhostRunRequest,
+        rng: Optional[random.Random] = None
     ) -> StepSimulationResult:
         """Simulate execution of a single step."""
         
@@ -192,17 +314,19 @@ class SimulationEngine:
         execution_time = 0
         
         if step.tool and request.mock_external_calls:
-            connector = mock_connector_registry.get_connector(step.tool)
+            action = step.action or "execute"
+            connector, tool_name = mock_connector_registry.resolve(step.tool, action)
             if connector:
                 # Get connector overrides
-                overrides = request.connector_overrides.get(step.tool, {})
+                overrides = request.connector_overrides.get(connector.name, {})
                 
-                # Simulate the action
+                # Simulate the action (an unresolved tool simulates as unsupported)
                 response = connector.simulate_call(
-                    tool_name=step.tool,
-                    action=step.action or "execute",
+                    tool_name=tool_name or step.tool,
+                    action=action,
                     parameters=step.parameters,
-                    overrides=overrides
+                    overrides=overrides,
+                    rng=rng
                 )
                 connector_responses.append(response)
                 execution_time += response.response_time_ms
@@ -263,10 +387,10 @@ class SimulationEngine:
         
         # Check tool availability
         if step.tool:
-            connector = mock_connector_registry.get_connector(step.tool)
+            connector, tool_name = mock_connector_registry.resolve(step.tool, step.action or "execute")
             if not connector:
                 issues.append(f"Connector '{step.tool}' not available")
-            elif step.action and not connector.supports_action(step.tool, step.action):
+            elif step.action and not tool_name:
                 issues.append(f"Action '{step.action}' not supported by connector '{step.tool}'")
         
         # Check security context
@@ -283,33 +407,43 @@ class SimulationEngine:
             graph[step.step_id] = step.depends_on.copy()
         return graph
     
+    def _get_execution_levels(self, dependency_graph: Dict[str, List[str]]) -> List[List[str]]:
+        """Group steps into DAG levels using Kahn's algorithm.
+        
+        Every step in a level depends only on steps in earlier levels. Within a
+        level steps keep their plan order. Steps caught in a dependency cycle
+        are left out.
+        """
+        position = {node: index for index, node in enumerate(dependency_graph)}
+        remaining = {}
+        dependents: Dict[str, List[str]] = {node: [] for node in dependency_graph}
+        
+        for node, deps in dependency_graph.items():
+            known_deps = {dep for dep in deps if dep in dependency_graph}
+            remaining[node] = len(known_deps)
+            for dep in known_deps:
+                dependents[dep].append(node)
+        
+        levels = []
+        level = [node for node in dependency_graph if remaining[node] == 0]
+        
+        while level:
+            levels.append(level)
+            next_level = []
+            for node in level:
+                for dependent in dependents[node]:
+                    remaining[dependent] -= 1
+                    if remaining[dependent] == 0:
+                        next_level.append(dependent)
+            level = sorted(next_level, key=position.__getitem__)
+        
+        return levels
+    
     def _get_execution_order(self, dependency_graph: Dict[str, List[str]]) -> List[str]:
         """Get execution order using topological sort."""
-        # Simple topological sort implementation
-        in_degree = {node: 0 for node in dependency_graph}
-        
-        # Calculate in-degrees
-        for node in dependency_graph:
-            for dep in dependency_graph[node]:
-                if dep in in_degree:
-                    in_degree[dep] += 1
-        
-        # Find nodes with no dependencies
-        queue = [node for node, degree in in_degree.items() if degree == 0]
-        result = []
-        
-        while queue:
-            node = queue.pop(0)
-            result.append(node)
-            
-            # Update in-degrees of dependent nodes
-            for dependent in dependency_graph:
-                if node in dependency_graph[dependent]:
-                    in_degree[dependent] -= 1
-                    if in_degree[dependent] == 0:
-                        queue.append(dependent)
-        
-        return result
+        return [
+            node for level in self._get_execution_levels(dependency_graph) for node in level
+        ]
     
     def _calculate_flow_risk(self, step_results: List[StepSimulationResult]) -> RiskLevel:
         """Calculate overall risk level for a flow."""
@@ -331,21 +465,89 @@ class SimulationEngine:
         else:
             return RiskLevel.LOW
     
+    def _schedule_steps(
+        self,
+        step_results: List[StepSimulationResult],
+        dependency_graph: Dict[str, List[str]],
+        max_concurrency: Optional[int] = None
+    ) -> FlowSchedule:
+        """Compute earliest start/finish, slack and makespan for simulated steps.
+        
+        ``step_results`` must be in topological order (as produced by
+        ``_simulate_flow``). A forward pass places each step once all of its
+        dependencies finish; with ``max_concurrency`` the step also waits for
+        the earliest free slot (greedy list scheduling in topological order),
+        and the step that freed the slot becomes an extra predecessor. A
+        backward pass against the makespan gives the latest start, and slack
+        is the difference. The timings are written onto the step results.
+        """
+        results_by_id = {result.step_id: result for result in step_results}
+        # Free times of the concurrency slots, with the step that last held each
+        slots: List[Tuple[int, str]] = [(0, "")] * max_concurrency if max_concurrency else []
+        # Steps whose start was pushed back waiting for a slot (and by whom)
+        slot_waits: Dict[str, str] = {}
+        
+        # Forward pass: earliest start/finish
+        for result in step_results:
+            ready = max(
+                (results_by_id[dep].earliest_finish_ms
+                 for dep in dependency_graph.get(result.step_id, ()) if dep in results_by_id),
+                default=0
+            )
+            if slots:
+                slot_free, previous = heapq.heappop(slots)
+                if slot_free > ready:
+                    ready = slot_free
+                    slot_waits[result.step_id] = previous
+            result.earliest_start_ms = ready
+            result.earliest_finish_ms = ready + result.execution_time_ms
+            if max_concurrency:
+                heapq.heappush(slots, (result.earliest_finish_ms, result.step_id))
+        
+        makespan = max((result.earliest_finish_ms for result in step_results), default=0)
+        
+        # Backward pass: a step must finish before any step waiting on it
+        # (through a dependency or a slot) has to start
+        latest_start: Dict[str, int] = {}
+        latest_finish = {result.step_id: makespan for result in step_results}
+        for result in reversed(step_results):
+            start = latest_finish[result.step_id] - result.execution_time_ms
+            latest_start[result.step_id] = start
+            predecessors = list(dependency_graph.get(result.step_id, ()))
+            if result.step_id in slot_waits:
+                predecessors.append(slot_waits[result.step_id])
+            for dep in predecessors:
+                if dep in latest_finish:
+                    latest_finish[dep] = min(latest_finish[dep], start)
+        
+        for result in step_results:
+            result.slack_ms = latest_start[result.step_id] - result.earliest_start_ms
+        
+        # Sweep start/finish events; finishes sort first so back-to-back steps don't overlap
+        events = sorted(
+            [(result.earliest_start_ms, 1) for result in step_results] +
+            [(result.earliest_finish_ms, -1) for result in step_results]
+        )
+        running = peak = 0
+        for _, delta in events:
+            running += delta
+            peak = max(peak, running)
+        
+        return FlowSchedule(makespan_ms=makespan, peak_concurrency=peak)
+    
     def _identify_critical_path(
         self, 
         step_results: List[StepSimulationResult],
         dependency_graph: Dict[str, List[str]]
     ) -> List[str]:
-        """Identify critical path steps (longest execution time path)."""
-        # Simple implementation - return steps with highest execution times
-        sorted_steps = sorted(
-            step_results, 
-            key=lambda x: x.execution_time_ms, 
-            reverse=True
-        )
-        
-        # Return top 3 longest steps as critical path
-        return [step.step_id for step in sorted_steps[:3]]
+        """Identify critical path steps (zero slack in the flow schedule).
+        
+        Expects ``_schedule_steps`` to have run. Steps are returned in order
+        of earliest start.
+        """
+        critical = [result for result in step_results if result.slack_ms == 0]
+        critical.sort(key=lambda result: result.earliest_start_ms)
+        return [result.step_id for result in critical]
     
     def _check_step_dependencies(self, step: ExecutionStep) -> List[str]:
         """Check step dependencies for issues."""
@@ -524,7 +726,7 @@ class SimulationEngine:
         """Analyze resource requirements based on simulation."""
         
         total_execution_time = sum(result.total_execution_time_ms for result in flow_results)
-        concurrent_steps = max(len(result.step_results) for result in flow_results) if flow_results else 0
+        concurrent_steps = max((result.peak_concurrency for result in flow_results), default=0)
         
         return {
             "estimated_cpu_usage": f"{concurrent_steps * 100}m",  # 100m per concurrent step
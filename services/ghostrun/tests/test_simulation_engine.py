@@ -0,0 +1,120 @@
+"""Tests for the GhostRun simulation engine against the default mock connectors."""
+
+import asyncio
+from uuid import uuid4
+
+from src.mock_connectors import mock_connector_registry
+from src.models import (
+    ExecutablePlan,
+    ExecutionFlow,
+    ExecutionStep,
+    GhostRunRequest,
+    PlanMetadata,
+    SecurityContext,
+)
+from src.simulation_engine import SimulationEngine
+
+# Plan-compiler models, put on the path by src.models
+from models import ResourceRequirement
+
+
+def make_plan() -> ExecutablePlan:
+    """Payment flow whose steps name connectors, as compiled plans do."""
+    steps = [
+        ExecutionStep(
+            step_id="charge_payment",
+            name="Charge Payment",
+            step_type="action",
+            action="charge",
+            tool="stripe",
+            parameters={"amount": 2500, "currency": "usd"},
+            timeout=1000
+        ),
+        ExecutionStep(
+            step_id="send_receipt",
+            name="Send Receipt",
+            step_type="action",
+            action="send",
+            tool="sendgrid",
+            parameters={"to": "customer@example.com"},
+            depends_on=["charge_payment"],
+            timeout=500
+        ),
+        ExecutionStep(
+            step_id="record_payment",
+            name="Record Payment",
+            step_type="action",
+            action="insert",
+            tool="postgresql.query",
+            parameters={"table": "payments"},
+            depends_on=["charge_payment"],
+            timeout=200
+        ),
+    ]
+    flow = ExecutionFlow(flow_id="payments", name="Payments", steps=steps)
+    return ExecutablePlan.create(
+        tenant_id=uuid4(),
+        name="Payment Plan",
+        version="1.0.0",
+        flows=[flow],
+        main_flow="payments",
+        metadata=PlanMetadata(
+            source_capsule_id=uuid4(),
+            source_capsule_name="payments",
+            source_capsule_version="1.0.0",
+            source_capsule_checksum="sha256:test",
+            compiled_by=uuid4(),
+            compiler_version="1.0.0"
+        ),
+        resource_requirements=ResourceRequirement(),
+        security_context=SecurityContext()
+    )
+
+
+def simulate(plan: ExecutablePlan, **request_options):
+    request = GhostRunRequest(plan_hash=plan.plan_hash, random_seed=7, **request_options)
+    report, _ = asyncio.run(SimulationEngine().simulate_plan(plan, request))
+    return report
+
+
+def test_registry_resolves_connector_tools():
+    connector, tool_name = mock_connector_registry.resolve("stripe", "charge")
+    assert connector.name == "stripe" and tool_name == "payment"
+
+    connector, tool_name = mock_connector_registry.resolve("postgresql.query", "insert")
+    assert connector.name == "postgresql" and tool_name == "query"
+
+    stripe = mock_connector_registry.get_connector("stripe")
+    assert mock_connector_registry.resolve("stripe", "teleport") == (stripe, None)
+    assert mock_connector_registry.resolve("stripe.nope", "charge") == (stripe, None)
+    assert mock_connector_registry.resolve("unknown", "charge") == (None, None)
+
+
+def test_steps_call_the_connector_tool_for_their_action():
+    report = simulate(make_plan())
+    results = {result.step_id: result for result in report.flow_results[0].step_results}
+
+    for step_id, tool_name in [
+        ("charge_payment", "payment"),
+        ("send_receipt", "email"),
+        ("record_payment", "query"),
+    ]:
+        result = results[step_id]
+        assert result.validation_passed, result.validation_issues
+        (response,) = result.connector_responses
+        assert response.tool_name == tool_name
+        assert not any("not supported" in note for note in response.simulation_notes)
+
+
+def test_monte_carlo_uses_the_connector_success_model():
+    report = simulate(make_plan(), monte_carlo_trials=2000)
+    summary = report.monte_carlo
+
+    expected = 1.0
+    for step_tool, action in [("stripe", "charge"), ("sendgrid", "send"), ("postgresql.query", "insert")]:
+        connector, tool_name = mock_connector_registry.resolve(step_tool, action)
+        expected *= connector.get_call_model(tool_name, action).success_probability
+
+    assert 0.5 < expected < 1.0
+    assert abs(summary.completion_probability - expected) < 0.03
+    assert summary.p50_makespan_ms > 1000
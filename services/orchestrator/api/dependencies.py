@@ -1,6 +1,6 @@
 """FastAPI dependencies for orchestrator service."""
 
-from typing import Annotated
+from typing import Annotated, Optional
 from uuid import UUID
 
 from fastapi import Depends, HTTPException, Header, status
@@ -45,14 +45,29 @@ async def get_tenant_id(
         )
 
 
+_orchestrator_service: Optional[OrchestratorService] = None
+
+
+def set_orchestrator_service(service: Optional[OrchestratorService]) -> None:
+    """Install the process-wide orchestrator service (None to clear)."""
+    global _orchestrator_service
+    _orchestrator_service = service
+
+
 async def get_orchestrator_service() -> OrchestratorService:
     """Get orchestrator service instance.
     
+    One instance serves all requests, so a single execution monitor
+    tracks every run started by this process.
+    
     Returns:
         Orchestrator service instance
     """
-    # In production, this would be injected with proper dependencies
-    return OrchestratorService()
+    global _orchestrator_service
+    if _orchestrator_service is None:
+        # In production, this would be injected with proper dependencies
+        _orchestrator_service = OrchestratorService()
+    return _orchestrator_service
 
 
 async def get_tenant_context_dep() -> TenantContext:
@@ -55,6 +55,26 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
         # Store client in app state for later use
         app.state.portia_client = portia_client
         
+        # One orchestrator service (and execution monitor) for all requests
+        from dependencies import get_orchestrator_service
+        app.state.orchestrator_service = await get_orchestrator_service()
+        
+        # Track Razorpay settlements (webhooks first, polling fallback)
+        if settings.RAZORPAY_KEY_ID and settings.RAZORPAY_KEY_SECRET:
+            from src.razorpay_poll import RazorpayPoller
+            from src.razorpay_settlement import SettlementTracker, set_settlement_tracker
+            
+            tracker = SettlementTracker(
+                RazorpayPoller(settings),
+                webhook_secret=settings.RAZORPAY_WEBHOOK_SECRET,
+                initial_poll_delay=settings.RAZORPAY_POLL_INTERVAL_SEC,
+                max_poll_interval=settings.RAZORPAY_POLL_MAX_INTERVAL_SEC,
+                budget_per_minute=settings.RAZORPAY_POLL_BUDGET_PER_MIN,
+            )
+            await tracker.start()
+            set_settlement_tracker(tracker)
+            app.state.settlement_tracker = tracker
+        
         logger.info("✅ Portia SDK validation passed - service ready")
         
     except Exception as e:
@@ -76,7 +96,34 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
             await app.state.portia_client.close()
         except Exception as e:
             logger.warning(f"Error closing Portia client: {e}")
+
+    # Stop execution monitoring and flush queued progress writes
+    if hasattr(app.state, 'orchestrator_service'):
+        try:
+            from dependencies import set_orchestrator_service
+            await app.state.orchestrator_service.close()
+            set_orchestrator_service(None)
+        except Exception as e:
+            logger.warning(f"Error stopping execution monitor: {e}")
+
+    # Stop Razorpay settlement tracking
+    if hasattr(app.state, 'settlement_tracker'):
+        try:
+            from src.razorpay_settlement import set_settlement_tracker
+            await app.state.settlement_tracker.stop()
+            for poller in app.state.settlement_tracker.pollers.values():
+                await poller.client.aclose()
+            set_settlement_tracker(None)
+        except Exception as e:
+            logger.warning(f"Error stopping settlement tracker: {e}")
     
+    # Close pooled upstream HTTP connections
+    try:
+        from src.http_pool import close_http_pool
+        await close_http_pool()
+    except Exception as e:
+        logger.warning(f"Error closing HTTP client pool: {e}")
+
     logger.info("Orchestrator API service shutdown complete")
 
 
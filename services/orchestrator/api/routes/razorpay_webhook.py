@@ -2,8 +2,6 @@
 Razorpay Webhook Integration
 Handles incoming webhook events from Razorpay with HMAC SHA256 verification
 """
-import hmac
-import hashlib
 import logging
 from typing import Optional
 
@@ -18,7 +16,8 @@ router = APIRouter(prefix="/integrations", tags=["integrations"])
 @router.post("/razorpay/webhook")
 async def razorpay_webhook(
     request: Request,
-    x_razorpay_signature: Optional[str] = Header(default=None, alias="X-Razorpay-Signature")
+    x_razorpay_signature: Optional[str] = Header(default=None, alias="X-Razorpay-Signature"),
+    x_razorpay_event_id: Optional[str] = Header(default=None, alias="X-Razorpay-Event-Id")
 ):
     """
     Razorpay webhook endpoint with HMAC SHA256 signature verification.
@@ -26,6 +25,7 @@ async def razorpay_webhook(
     Args:
         request: FastAPI request object
         x_razorpay_signature: HMAC signature from Razorpay headers
+        x_razorpay_event_id: Event ID, used to ignore redelivered events
         
     Returns:
         JSON response with success status
@@ -38,6 +38,7 @@ async def razorpay_webhook(
     import os
     sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../..'))
     from src.settings import Settings
+    from src.razorpay_settlement import get_settlement_tracker, verify_webhook_signature
     
     settings = Settings()
     
@@ -67,27 +68,11 @@ async def razorpay_webhook(
             detail="Missing signature header"
         )
     
-    # Compute HMAC SHA256 digest
-    try:
-        expected_digest = hmac.new(
-            settings.RAZORPAY_WEBHOOK_SECRET.encode('utf-8'),
-            raw_body,
-            hashlib.sha256
-        ).hexdigest()
-        
-        # Compare signatures securely
-        if not hmac.compare_digest(expected_digest, x_razorpay_signature):
-            logger.warning("❌ Invalid webhook signature")
-            raise HTTPException(
-                status_code=400,
-                detail="Invalid signature"
-            )
-            
-    except Exception as e:
-        logger.error(f"❌ Signature verification failed: {e}")
+    if not verify_webhook_signature(settings.RAZORPAY_WEBHOOK_SECRET, raw_body, x_razorpay_signature):
+        logger.warning("❌ Invalid webhook signature")
         raise HTTPException(
             status_code=400,
-            detail="Signature verification failed"
+            detail="Invalid signature"
         )
     
     # Parse webhook payload
@@ -97,13 +82,12 @@ async def razorpay_webhook(
         
         logger.info(f"✅ Received Razorpay webhook: {event_type}")
         
-        # TODO: Handle specific webhook events
-        # - payment.link.paid
-        # - refund.processed
-        # - payment.captured
-        # etc.
+        # Settle tracked payment links and refunds (payment_link.*, refund.*)
+        settled = False
+        tracker = get_settlement_tracker()
+        if tracker is not None:
+            settled = tracker.handle_event(webhook_data, x_razorpay_event_id)
         
-        # For now, just log the event for debugging
         logger.info(f"📋 Webhook payload keys: {list(webhook_data.keys())}")
         
         return JSONResponse(
@@ -111,7 +95,8 @@ async def razorpay_webhook(
             content={
                 "ok": True,
                 "message": "Webhook processed successfully",
-                "event": event_type
+                "event": event_type,
+                "settled": settled
             }
         )
         
@@ -0,0 +1,270 @@
+"""
+Local fake Razorpay gateway for exercising settlement tracking.
+
+The fake serves the payment link and refund endpoints ``RazorpayPoller``
+uses (single fetch and list), settles each item after a random delay and
+sends a signed webhook for it, dropping a configurable share of webhooks so
+the polling fallback gets exercised too. It counts the API calls it serves.
+
+Running it compares the webhook-first ``SettlementTracker`` with fixed
+interval polling (``RazorpayPoller.poll_payment_completion``) on the same
+settlement schedule:
+
+    python benchmarks/fake_razorpay_gateway.py --links 200 --webhook-loss 0.2
+    python benchmarks/fake_razorpay_gateway.py --links 200 --webhook-loss 1.0   # polling only
+"""
+
+import argparse
+import asyncio
+import hashlib
+import hmac
+import json
+import os
+import random
+import sys
+import time
+import uuid
+from types import SimpleNamespace
+from typing import Awaitable, Callable, Dict, List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.razorpay_poll import RazorpayPoller  # noqa: E402
+from src.razorpay_settlement import SettlementTracker  # noqa: E402
+
+WebhookSink = Callable[[bytes, str, str], Awaitable[None]]
+
+
+class FakeRazorpayGateway:
+    """In-process HTTP fake of the Razorpay payment link and refund APIs."""
+
+    def __init__(
+        self,
+        webhook_secret: str,
+        webhook_sink: Optional[WebhookSink] = None,
+        webhook_loss: float = 0.0,
+        webhook_delay: float = 0.05,
+        seed: int = 7,
+    ):
+        self.webhook_secret = webhook_secret
+        self.webhook_sink = webhook_sink
+        self.webhook_loss = webhook_loss
+        self.webhook_delay = webhook_delay
+        self.rng = random.Random(seed)
+        self.payment_links: Dict[str, Dict] = {}
+        self.refunds: Dict[str, Dict] = {}
+        self.api_calls = 0
+        self.webhooks_sent = 0
+        self._server = None
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self) -> str:
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        host, port = self._server.sockets[0].getsockname()[:2]
+        return f"http://{host}:{port}/v1"
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        self._server.close()
+        await self._server.wait_closed()
+
+    def create_payment_link(self, amount: int, settle_after: float, status: str = "paid") -> str:
+        link_id = f"plink_{uuid.uuid4().hex[:14]}"
+        self.payment_links[link_id] = {
+            "id": link_id,
+            "entity": "payment_link",
+            "status": "created",
+            "amount": amount,
+            "currency": "INR",
+            "created_at": int(time.time()),
+            "payments": [],
+        }
+        self._tasks.append(asyncio.create_task(self._settle_link(link_id, settle_after, status)))
+        return link_id
+
+    def create_refund(self, payment_id: str, amount: int, settle_after: float, status: str = "processed") -> str:
+        refund_id = f"rfnd_{uuid.uuid4().hex[:14]}"
+        self.refunds[refund_id] = {
+            "id": refund_id,
+            "entity": "refund",
+            "payment_id": payment_id,
+            "status": "pending",
+            "amount": amount,
+            "currency": "INR",
+            "created_at": int(time.time()),
+        }
+        self._tasks.append(asyncio.create_task(self._settle_refund(refund_id, settle_after, status)))
+        return refund_id
+
+    async def _settle_link(self, link_id: str, delay: float, status: str) -> None:
+        await asyncio.sleep(delay)
+        link = self.payment_links[link_id]
+        payment = {
+            "id": f"pay_{uuid.uuid4().hex[:14]}",
+            "entity": "payment",
+            "amount": link["amount"],
+            "currency": "INR",
+            "method": "upi",
+            "created_at": int(time.time()),
+        }
+        link["status"] = status
+        if status == "paid":
+            link["payments"] = [{"payment_id": payment["id"], **payment}]
+        await self._send_webhook(f"payment_link.{status}", {
+            "payment_link": {"entity": link},
+            "payment": {"entity": payment},
+        })
+
+    async def _settle_refund(self, refund_id: str, delay: float, status: str) -> None:
+        await asyncio.sleep(delay)
+        refund = self.refunds[refund_id]
+        refund["status"] = status
+        refund["processed_at"] = int(time.time())
+        await self._send_webhook(f"refund.{status}", {"refund": {"entity": refund}})
+
+    async def _send_webhook(self, event_type: str, payload: Dict) -> None:
+        if self.webhook_sink is None or self.rng.random() < self.webhook_loss:
+            return
+        body = json.dumps({"entity": "event", "event": event_type, "payload": payload}).encode()
+        signature = hmac.new(self.webhook_secret.encode(), body, hashlib.sha256).hexdigest()
+        await asyncio.sleep(self.webhook_delay)
+        self.webhooks_sent += 1
+        await self.webhook_sink(body, signature, f"evt_{uuid.uuid4().hex[:14]}")
+
+    def _route(self, path: str, query: Dict[str, List[str]]):
+        parts = [p for p in path.split("/") if p][1:]  # drop "v1"
+        count = int(query.get("count", ["10"])[0])
+        if parts == ["payment_links"]:
+            links = sorted(self.payment_links.values(), key=lambda l: l["created_at"], reverse=True)
+            return 200, {"payment_links": links[:count]}
+        if parts == ["refunds"]:
+            refunds = sorted(self.refunds.values(), key=lambda r: r["created_at"], reverse=True)
+            return 200, {"entity": "collection", "count": min(count, len(refunds)), "items": refunds[:count]}
+        if len(parts) == 2 and parts[0] == "payment_links" and parts[1] in self.payment_links:
+            return 200, self.payment_links[parts[1]]
+        if len(parts) == 2 and parts[0] == "refunds" and parts[1] in self.refunds:
+            return 200, self.refunds[parts[1]]
+        return 404, {"error": {"code": "BAD_REQUEST_ERROR", "description": "The id provided does not exist"}}
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                request_line = head.split(b"\r\n", 1)[0].decode()
+                _, target, _ = request_line.split(" ", 2)
+                url = urlsplit(target)
+                self.api_calls += 1
+                status, body = self._route(url.path, parse_qs(url.query))
+                data = json.dumps(body).encode()
+                writer.write(
+                    f"HTTP/1.1 {status} {'OK' if status == 200 else 'Not Found'}\r\n"
+                    f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n\r\n".encode() + data
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+def poller_settings(args: argparse.Namespace) -> SimpleNamespace:
+    return SimpleNamespace(
+        RAZORPAY_KEY_ID="rzp_test_fake",
+        RAZORPAY_KEY_SECRET="fake_secret",
+        RAZORPAY_POLL_TIMEOUT_SEC=int(args.max_settle * 4) + 10,
+        RAZORPAY_POLL_INTERVAL_SEC=args.fixed_interval,
+    )
+
+
+async def run_tracker(args: argparse.Namespace, delays: List[float]) -> Dict[str, float]:
+    secret = "whsec_fake"
+    tracker: Optional[SettlementTracker] = None
+
+    async def sink(body: bytes, signature: str, event_id: str) -> None:
+        tracker.handle_webhook(body, signature, event_id)
+
+    gateway = FakeRazorpayGateway(secret, sink, webhook_loss=args.webhook_loss)
+    base = await gateway.start()
+    poller = RazorpayPoller(poller_settings(args), base_url=base)
+    tracker = SettlementTracker(
+        poller,
+        webhook_secret=secret,
+        initial_poll_delay=args.initial_poll_delay,
+        max_poll_interval=args.max_poll_interval,
+        budget_per_minute=args.budget_per_minute,
+    )
+    await tracker.start()
+
+    async def one(delay: float) -> float:
+        link_id = gateway.create_payment_link(1000, delay)
+        start = time.monotonic()
+        await tracker.wait_for_payment_link(link_id, timeout_sec=args.max_settle * 4 + 10)
+        return time.monotonic() - start - delay
+
+    lags = await asyncio.gather(*(one(d) for d in delays))
+    stats = tracker.get_stats()
+    await tracker.stop()
+    await poller.client.aclose()
+    await gateway.stop()
+    return {
+        "api_calls": gateway.api_calls,
+        "mean_lag": sum(lags) / len(lags),
+        "max_lag": max(lags),
+        "webhook_settlements": stats["webhook_settlements"],
+        "poll_settlements": stats["poll_settlements"],
+    }
+
+
+async def run_fixed_polling(args: argparse.Namespace, delays: List[float]) -> Dict[str, float]:
+    gateway = FakeRazorpayGateway("whsec_fake")
+    base = await gateway.start()
+    poller = RazorpayPoller(poller_settings(args), base_url=base)
+
+    async def one(delay: float) -> float:
+        link_id = gateway.create_payment_link(1000, delay)
+        start = time.monotonic()
+        await poller.poll_payment_completion(link_id)
+        return time.monotonic() - start - delay
+
+    lags = await asyncio.gather(*(one(d) for d in delays))
+    await poller.client.aclose()
+    await gateway.stop()
+    return {
+        "api_calls": gateway.api_calls,
+        "mean_lag": sum(lags) / len(lags),
+        "max_lag": max(lags),
+        "webhook_settlements": 0,
+        "poll_settlements": len(delays),
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    rng = random.Random(args.seed)
+    delays = [rng.uniform(args.min_settle, args.max_settle) for _ in range(args.links)]
+
+    print(
+        f"{args.links} payment links settling in {args.min_settle}-{args.max_settle}s, "
+        f"webhook loss {args.webhook_loss:.0%}"
+    )
+    for name, run in (("fixed polling", run_fixed_polling), ("webhook-first", run_tracker)):
+        r = await run(args, delays)
+        print(
+            f"  {name:14s} {r['api_calls']:6d} API calls  lag mean {r['mean_lag'] * 1000:7.1f}ms "
+            f"max {r['max_lag'] * 1000:7.1f}ms  (webhook {r['webhook_settlements']}, poll {r['poll_settlements']})"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--links", type=int, default=200)
+    parser.add_argument("--min-settle", type=float, default=0.2)
+    parser.add_argument("--max-settle", type=float, default=5.0)
+    parser.add_argument("--webhook-loss", type=float, default=0.2)
+    parser.add_argument("--fixed-interval", type=int, default=1)
+    parser.add_argument("--initial-poll-delay", type=float, default=1.0)
+    parser.add_argument("--max-poll-interval", type=float, default=4.0)
+    parser.add_argument("--budget-per-minute", type=float, default=6000.0)
+    parser.add_argument("--seed", type=int, default=1)
+    asyncio.run(main(parser.parse_args()))
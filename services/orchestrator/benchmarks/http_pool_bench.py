@@ -0,0 +1,126 @@
+"""
+Connection reuse benchmark for the orchestrator HTTP client pool.
+
+Starts a local stub upstream (plain asyncio HTTP/1.1 with keep-alive) that
+counts accepted connections, then sends the same request load twice: once
+with a new ``httpx.AsyncClient`` per call (the old client behaviour) and once
+through ``HTTPClientPool``.
+
+    python benchmarks/http_pool_bench.py --requests 2000 --concurrency 32
+    python benchmarks/http_pool_bench.py --latency-ms 2
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from typing import Dict
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.http_pool import HTTPClientPool  # noqa: E402
+
+RESPONSE_BODY = b'{"receipt_id": "00000000-0000-0000-0000-000000000000"}'
+
+
+class StubUpstream:
+    """Minimal keep-alive HTTP/1.1 server answering every request with JSON."""
+
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency = latency_ms / 1000
+        self.connections = 0
+        self.requests = 0
+        self._server = None
+
+    async def start(self) -> str:
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        host, port = self._server.sockets[0].getsockname()[:2]
+        return f"http://{host}:{port}"
+
+    async def stop(self) -> None:
+        self._server.close()
+        await self._server.wait_closed()
+
+    def reset(self) -> None:
+        self.connections = 0
+        self.requests = 0
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in head.split(b"\r\n"):
+                    if line.lower().startswith(b"content-length:"):
+                        length = int(line.split(b":", 1)[1])
+                if length:
+                    await reader.readexactly(length)
+                self.requests += 1
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                    b"Content-Length: " + str(len(RESPONSE_BODY)).encode() + b"\r\n\r\n" + RESPONSE_BODY
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+async def run_load(send, requests: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one() -> None:
+        async with semaphore:
+            response = await send()
+            response.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    return time.perf_counter() - start
+
+
+async def main(args: argparse.Namespace) -> None:
+    stub = StubUpstream(args.latency_ms)
+    base = await stub.start()
+    payload = {"receipt_type": "execution", "subject": "bench", "receipt_data": {}}
+    results: Dict[str, Dict[str, float]] = {}
+
+    async def per_call():
+        async with httpx.AsyncClient(timeout=30.0) as client:
+            return await client.post(f"{base}/v1/receipts", json=payload)
+
+    pool = HTTPClientPool(max_keepalive_connections=args.concurrency)
+
+    async def pooled():
+        return await pool.request("POST", base, "/v1/receipts", json=payload, timeout=10.0)
+
+    for name, send in (("per-call client", per_call), ("pooled client", pooled)):
+        stub.reset()
+        elapsed = await run_load(send, args.requests, args.concurrency)
+        results[name] = {
+            "seconds": elapsed,
+            "rps": args.requests / elapsed,
+            "connections": stub.connections,
+        }
+
+    await pool.aclose()
+    await stub.stop()
+
+    print(f"{args.requests} requests, concurrency {args.concurrency}, upstream latency {args.latency_ms}ms")
+    for name, r in results.items():
+        print(f"  {name:16s} {r['seconds']:7.3f}s  {r['rps']:9.1f} req/s  {r['connections']:6d} connections")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    asyncio.run(main(parser.parse_args()))
@@ -1,41 +1,172 @@
 """
 Capability tokens client for token verification.
+
+Tokens are verified in-process against the CapTokens service's published
+public keys and revocation feed. The service itself is only called when no
+keys could be synced yet or when the revocation feed is too stale to trust.
+A token naming an unknown signing key triggers at most one rate-limited key
+resync; if the key is still unknown the token is rejected locally.
 """
 
+import asyncio
 import logging
-from typing import List
+import time
+from typing import Any, Dict, List, Optional
 
 import httpx
 
+from anumate_capability_tokens import KeySetVerifier, UnknownSigningKeyError
+
+from .http_pool import get_http_client
+
 logger = logging.getLogger(__name__)
 
 
-async def verify_token(base: str, token: str, required_caps: List[str]) -> None:
+class TokenVerificationError(Exception):
+    """Token rejected by local verification (invalid, expired, revoked or out of scope)."""
+
+
+class CapTokensVerifier:
     """
-    Verify capability token has required capabilities.
-    
-    Args:
-        base: CapTokens service base URL
-        token: Capability token to verify
-        required_caps: List of required capabilities
-        
-    Raises:
-        httpx.HTTPStatusError: If verification fails or token lacks capabilities
+    In-process verifier for one CapTokens service.
+
+    Features:
+    - Local signature, expiry, revocation and capability checks
+    - Key set refreshed periodically and (rate-limited) on unknown signing keys
+    - Revocation feed refreshed lazily; remote verification if it goes stale
+    - Failed syncs are retried no more often than the refresh intervals
+    - Sync and fallback calls share the process-wide pooled client
     """
-    logger.info(f"Verifying token for capabilities: {required_caps}")
-    
-    verify_request = {
-        "token": token,
-        "required_capabilities": required_caps
-    }
-    
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        response = await client.post(
-            f"{base.rstrip('/')}/v1/captokens/verify",
+
+    def __init__(
+        self,
+        base: str,
+        client: Optional[httpx.AsyncClient] = None,
+        key_refresh_interval: float = 300.0,
+        revocation_refresh_interval: float = 5.0,
+        revocation_max_staleness: float = 30.0,
+        forced_key_refresh_interval: float = 10.0,
+    ):
+        self.base = base.rstrip('/')
+        self._client = client
+        self.key_refresh_interval = key_refresh_interval
+        self.revocation_refresh_interval = revocation_refresh_interval
+        self.revocation_max_staleness = revocation_max_staleness
+        self.forced_key_refresh_interval = forced_key_refresh_interval
+        self.key_set = KeySetVerifier()
+        self._keys_synced_at = 0.0
+        self._revocations_synced_at = 0.0  # last successful sync, for staleness
+        self._revocations_attempted_at = 0.0  # last attempt, for rate limiting
+        self._sync_lock = asyncio.Lock()
+        self.local_verifications = 0
+        self.remote_verifications = 0
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        return self._client or get_http_client(self.base)
+
+    async def refresh_keys(self, force: bool = False) -> bool:
+        """
+        Sync the public key set; returns True if it changed.
+
+        A forced sync still waits ``forced_key_refresh_interval`` since the
+        previous attempt, so tokens naming bogus keys cannot drive a resync
+        per request.
+        """
+        interval = self.forced_key_refresh_interval if force else self.key_refresh_interval
+        async with self._sync_lock:
+            if time.monotonic() - self._keys_synced_at < interval:
+                return False
+            try:
+                response = await self.client.get(f"{self.base}/v1/captokens/keys")
+                response.raise_for_status()
+                changed = self.key_set.load_keys(response.json()["keys"])
+            except Exception as e:
+                logger.warning(f"Failed to sync capability token keys: {e}")
+                return False
+            finally:
+                # Also rate-limits retries against a service without the endpoint.
+                self._keys_synced_at = time.monotonic()
+            if changed:
+                logger.info(f"Capability token key set updated: {self.key_set.key_ids}")
+            return changed
+
+    async def refresh_revocations(self) -> None:
+        """Sync revoked token IDs if the local copy is due for a refresh."""
+        if time.monotonic() - self._revocations_attempted_at < self.revocation_refresh_interval:
+            return
+        async with self._sync_lock:
+            if time.monotonic() - self._revocations_attempted_at < self.revocation_refresh_interval:
+                return
+            try:
+                response = await self.client.get(f"{self.base}/v1/captokens/revocations")
+                response.raise_for_status()
+                self.key_set.set_revoked(response.json()["revoked"])
+                self._revocations_synced_at = time.monotonic()
+            except Exception as e:
+                logger.warning(f"Failed to sync capability token revocations: {e}")
+            finally:
+                self._revocations_attempted_at = time.monotonic()
+
+    async def verify(self, token: str, required_caps: List[str]) -> Dict[str, Any]:
+        """
+        Verify a token locally, falling back to the CapTokens service.
+
+        Returns:
+            Token payload (``{}`` when verified remotely)
+
+        Raises:
+            TokenVerificationError: If local verification rejects the token
+            httpx.HTTPStatusError: If remote verification rejects the token
+        """
+        await self.refresh_keys()
+        await self.refresh_revocations()
+
+        if time.monotonic() - self._revocations_synced_at > self.revocation_max_staleness:
+            # Cannot vouch for revocation status locally.
+            return await self._verify_remote(token, required_caps)
+
+        try:
+            payload = self._verify_local(token, required_caps)
+        except UnknownSigningKeyError as e:
+            # Well-formed token naming a key we have not synced: key rotation,
+            # first use, or a forgery. Resync (rate-limited) and retry once.
+            await self.refresh_keys(force=True)
+            if not self.key_set.key_ids:
+                # Nothing to verify against yet; let the service decide.
+                return await self._verify_remote(token, required_caps)
+            try:
+                payload = self._verify_local(token, required_caps)
+            except UnknownSigningKeyError:
+                logger.error(f"Token verification failed: {e}")
+                raise TokenVerificationError(str(e)) from e
+
+        self.local_verifications += 1
+        return payload
+
+    def _verify_local(self, token: str, required_caps: List[str]) -> Dict[str, Any]:
+        try:
+            return self.key_set.verify(token, required_caps)
+        except UnknownSigningKeyError:
+            raise
+        except ValueError as e:
+            logger.error(f"Token verification failed: {e}")
+            raise TokenVerificationError(str(e)) from e
+
+    async def _verify_remote(self, token: str, required_caps: List[str]) -> Dict[str, Any]:
+        self.remote_verifications += 1
+
+        verify_request = {
+            "token": token,
+            "required_capabilities": required_caps
+        }
+
+        response = await self.client.post(
+            f"{self.base}/v1/captokens/verify",
             json=verify_request,
             headers={"Content-Type": "application/json"}
         )
-        
+
         if response.status_code == 403:
             error_detail = "Token lacks required capabilities"
             try:
@@ -49,6 +180,44 @@ async def verify_token(base: str, token: str, required_caps: List[str]) -> None:
                 request=response.request,
                 response=response
             )
-        
+
         response.raise_for_status()
-        logger.info("Token verification successful")
+        return {}
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get verifier statistics."""
+        return {
+            "key_ids": self.key_set.key_ids,
+            "local_verifications": self.local_verifications,
+            "remote_verifications": self.remote_verifications,
+            "cache": self.key_set.cache.get_stats(),
+        }
+
+
+_verifiers: Dict[str, CapTokensVerifier] = {}
+
+
+def get_verifier(base: str) -> CapTokensVerifier:
+    """Process-wide verifier for a CapTokens base URL."""
+    key = base.rstrip('/')
+    if key not in _verifiers:
+        _verifiers[key] = CapTokensVerifier(key)
+    return _verifiers[key]
+
+
+async def verify_token(base: str, token: str, required_caps: List[str]) -> None:
+    """
+    Verify capability token has required capabilities.
+
+    Args:
+        base: CapTokens service base URL
+        token: Capability token to verify
+        required_caps: List of required capabilities
+
+    Raises:
+        TokenVerificationError: If the token is rejected locally
+        httpx.HTTPStatusError: If verification fails or token lacks capabilities
+    """
+    logger.info(f"Verifying token for capabilities: {required_caps}")
+    await get_verifier(base).verify(token, required_caps)
+    logger.info("Token verification successful")
@@ -10,6 +10,7 @@ from uuid import UUID, uuid4
 
 import httpx
 
+from .http_pool import get_http_client
 from .models import Clarification, ClarificationStatus
 from .portia_client import PortiaClient
 
@@ -59,22 +60,22 @@ async def open_approval(
         f"clarification_id={clar.get('id')}"
     )
     
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        response = await client.post(
-            f"{approvals_base.rstrip('/')}/v1/approvals",
-            json=approval_request,
-            headers={
-                "Content-Type": "application/json",
-                "X-Tenant-ID": tenant_id
-            }
-        )
-        response.raise_for_status()
-        
-        result = response.json()
-        approval_id = result["approval_id"]
-        
-        logger.info(f"Opened approval: {approval_id}")
-        return approval_id
+    client = get_http_client(approvals_base)
+    response = await client.post(
+        "/v1/approvals",
+        json=approval_request,
+        headers={
+            "Content-Type": "application/json",
+            "X-Tenant-ID": tenant_id
+        }
+    )
+    response.raise_for_status()
+    
+    result = response.json()
+    approval_id = result["approval_id"]
+    
+    logger.info(f"Opened approval: {approval_id}")
+    return approval_id
 
 
 async def wait_for_approval(
@@ -101,49 +102,49 @@ async def wait_for_approval(
     """
     logger.info(f"Waiting for approval {approval_id}, timeout={timeout_s}s")
     
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        start_time = asyncio.get_event_loop().time()
+    client = get_http_client(approvals_base)
+    start_time = asyncio.get_event_loop().time()
+    
+    while True:
+        # Check if we've exceeded timeout
+        elapsed = asyncio.get_event_loop().time() - start_time
+        if elapsed > timeout_s:
+            logger.error(f"Approval {approval_id} timed out after {timeout_s}s")
+            raise asyncio.TimeoutError(f"Approval {approval_id} timed out")
         
-        while True:
-            # Check if we've exceeded timeout
-            elapsed = asyncio.get_event_loop().time() - start_time
-            if elapsed > timeout_s:
-                logger.error(f"Approval {approval_id} timed out after {timeout_s}s")
-                raise asyncio.TimeoutError(f"Approval {approval_id} timed out")
+        # Poll approval status
+        try:
+            response = await client.get(
+                f"/v1/approvals/{approval_id}"
+            )
+            response.raise_for_status()
             
-            # Poll approval status
-            try:
-                response = await client.get(
-                    f"{approvals_base.rstrip('/')}/v1/approvals/{approval_id}"
-                )
-                response.raise_for_status()
-                
-                approval = response.json()
-                status = approval.get("status")
-                
-                logger.debug(f"Approval {approval_id} status: {status}")
-                
-                # Check for terminal states
-                if status in {"approved", "rejected"}:
-                    logger.info(f"Approval {approval_id} resolved: {status}")
-                    return status
-                
-                # Wait before next poll
-                await asyncio.sleep(poll_s)
-                
-            except httpx.HTTPStatusError as e:
-                if e.response.status_code == 404:
-                    logger.error(f"Approval {approval_id} not found")
-                    raise
-                
-                logger.warning(f"Error polling approval {approval_id}: {e}")
-                # Continue polling on transient errors
-                await asyncio.sleep(poll_s)
+            approval = response.json()
+            status = approval.get("status")
+            
+            logger.debug(f"Approval {approval_id} status: {status}")
+            
+            # Check for terminal states
+            if status in {"approved", "rejected"}:
+                logger.info(f"Approval {approval_id} resolved: {status}")
+                return status
+            
+            # Wait before next poll
+            await asyncio.sleep(poll_s)
+            
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 404:
+                logger.error(f"Approval {approval_id} not found")
+                raise
+            
+            logger.warning(f"Error polling approval {approval_id}: {e}")
+            # Continue polling on transient errors
+            await asyncio.sleep(poll_s)
 
 import asyncio
 import logging
 from datetime import datetime, timezone, timedelta
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional
 from uuid import UUID, uuid4
 
 import httpx
@@ -174,16 +175,20 @@ class ClarificationsBridge:
         self,
         approvals_base_url: Optional[str] = None,
         event_bus: Optional[Any] = None,
+        on_run_changed: Optional[Callable[[str], Any]] = None,
     ):
         """Initialize clarifications bridge.
         
         Args:
             approvals_base_url: Approvals service base URL
             event_publisher: Event publisher for notifications
+            on_run_changed: Called with the run ID once a clarification is
+                answered, since the run resumes or stops
         """
         # For now, use placeholder URL since Approvals service isn't implemented yet
         self.approvals_base_url = approvals_base_url or "http://localhost:8004"
         self.event_publisher = event_bus  # Use event_bus parameter
+        self.on_run_changed = on_run_changed
         self.timeout = 30.0
     
     @trace_async("clarifications_bridge.create_approval_request")
@@ -297,6 +302,9 @@ class ClarificationsBridge:
                     approver_id=approver_id,
                 )
             
+            if self.on_run_changed:
+                self.on_run_changed(clarification.run_id)
+            
             logger.info(f"Responded to clarification {clarification_id}: {'approved' if approved else 'rejected'}")
             return clarification
             
@@ -1,9 +1,28 @@
-"""Execution monitoring and progress tracking for orchestrator service."""
+"""Execution monitoring and progress tracking for orchestrator service.
+
+All active runs are tracked by one scheduler task instead of a polling loop
+per run:
+
+- Runs due for a status check are looked up together, through one shared
+  Portia client, with bounded concurrency; each lookup is bounded by
+  ``lookup_timeout`` so one slow lookup cannot stall the scheduler
+- Polling is adaptive: new runs and runs whose status just changed are
+  checked every ``min_poll_interval``; the interval grows by
+  ``poll_backoff`` for each unchanged check, up to ``max_poll_interval``
+- ``notify(run_id)`` (a push notification or webhook) schedules an
+  immediate check
+- Progress writes to Redis are coalesced per run (latest wins) and flushed
+  in one pipeline every ``progress_flush_interval``
+"""
 
 import asyncio
+import heapq
+import itertools
+import json
 import logging
+from dataclasses import dataclass
 from datetime import datetime, timezone, timedelta
-from typing import Any, Dict, List, Optional, Set
+from typing import Any, Dict, List, Optional, Set, Tuple
 from uuid import UUID
 
 try:
@@ -24,12 +43,43 @@ from .portia_sdk_client import PortiaSDKClient
 
 logger = logging.getLogger(__name__)
 
+TERMINAL_STATUSES = {
+    ExecutionStatusEnum.COMPLETED,
+    ExecutionStatusEnum.FAILED,
+    ExecutionStatusEnum.CANCELLED,
+}
+
+# Portia SDK run states that differ from ours
+PORTIA_RUN_STATES = {
+    "not_started": ExecutionStatusEnum.PENDING,
+    "in_progress": ExecutionStatusEnum.RUNNING,
+    "need_clarification": ExecutionStatusEnum.PAUSED,
+    "ready_to_resume": ExecutionStatusEnum.PAUSED,
+    "complete": ExecutionStatusEnum.COMPLETED,
+}
+
+PROGRESS_TTL_SECONDS = 86400
+
 
 class ExecutionMonitorError(Exception):
     """Execution monitor error."""
     pass
 
 
+@dataclass
+class _MonitoredRun:
+    """Scheduling state of one monitored run."""
+    run_id: str
+    tenant_id: UUID
+    plan_hash: str
+    triggered_by: UUID
+    start_time: datetime
+    interval: float
+    next_poll_at: float
+    last_status: Optional[ExecutionStatusEnum] = None
+    polls: int = 0
+
+
 class ExecutionMonitor:
     """Monitors execution progress and handles completion events."""
     
@@ -37,22 +87,92 @@ class ExecutionMonitor:
         self,
         redis_manager: Optional[Any] = None,
         event_bus: Optional[Any] = None,
+        portia_client: Optional[Any] = None,
+        min_poll_interval: float = 1.0,
+        max_poll_interval: float = 30.0,
+        poll_backoff: float = 1.5,
+        max_batch_size: int = 100,
+        batch_window: float = 0.25,
+        max_concurrent_lookups: int = 20,
+        lookup_timeout: float = 10.0,
+        progress_flush_interval: float = 0.5,
     ):
         """Initialize execution monitor.
         
         Args:
             redis_manager: Redis manager for progress tracking
             event_bus: Event bus for completion events
+            portia_client: Client for run status lookups (a shared
+                ``PortiaSDKClient`` is created on first use if omitted)
+            min_poll_interval: Seconds between checks of new or changing runs
+            max_poll_interval: Upper bound for the backed-off interval
+            poll_backoff: Interval multiplier per unchanged check
+            max_batch_size: Most runs looked up per scheduler pass
+            batch_window: Runs due within this many seconds join the
+                current batch early
+            max_concurrent_lookups: Concurrent status lookups per batch
+            lookup_timeout: Seconds before a status lookup counts as failed
+            progress_flush_interval: Seconds between Redis progress flushes
         """
         self.redis_manager = redis_manager
         self.event_bus = event_bus
-        
-        # Active monitoring tasks
-        self._monitoring_tasks: Dict[str, asyncio.Task] = {}
-        self._monitored_executions: Set[str] = set()
+        self._portia_client = portia_client
+        self.min_poll_interval = min_poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.poll_backoff = poll_backoff
+        self.max_batch_size = max_batch_size
+        self.batch_window = batch_window
+        self.max_concurrent_lookups = max_concurrent_lookups
+        self.lookup_timeout = lookup_timeout
+        self.progress_flush_interval = progress_flush_interval
+        
+        # Active runs and their poll schedule (heap of (due, seq, run_id);
+        # entries whose due time no longer matches the run are stale)
+        self._runs: Dict[str, _MonitoredRun] = {}
+        self._schedule: List[Tuple[float, int, str]] = []
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._scheduler_task: Optional[asyncio.Task] = None
         
         # Progress tracking
         self._execution_metrics: Dict[str, ExecutionMetrics] = {}
+        self._pending_progress: Dict[str, ExecutionMetrics] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+        
+        # Statistics
+        self.polls = 0
+        self.batches = 0
+        self.progress_flushes = 0
+    
+    @property
+    def _monitored_executions(self) -> Set[str]:
+        return set(self._runs)
+    
+    def _now(self) -> float:
+        return asyncio.get_running_loop().time()
+    
+    def _schedule_poll(self, run: _MonitoredRun, due: float) -> None:
+        run.next_poll_at = due
+        heapq.heappush(self._schedule, (due, next(self._seq), run.run_id))
+    
+    def _ensure_started(self) -> None:
+        if self._scheduler_task is None or self._scheduler_task.done():
+            self._scheduler_task = asyncio.create_task(self._run_scheduler())
+        if self.redis_manager and (self._flush_task is None or self._flush_task.done()):
+            self._flush_task = asyncio.create_task(self._run_progress_flusher())
+    
+    async def close(self) -> None:
+        """Stop the scheduler and flush pending progress writes."""
+        for task in (self._scheduler_task, self._flush_task):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._scheduler_task = None
+        self._flush_task = None
+        await self._flush_progress()
     
     async def start_monitoring(
         self,
@@ -69,7 +189,7 @@ class ExecutionMonitor:
             plan_hash: Plan hash
             triggered_by: User who triggered execution
         """
-        if run_id in self._monitored_executions:
+        if run_id in self._runs:
             logger.warning(f"Execution {run_id} is already being monitored")
             return
         
@@ -79,18 +199,19 @@ class ExecutionMonitor:
             tenant_id=tenant_id,
         )
         
-        # Start monitoring task
-        task = asyncio.create_task(
-            self._monitor_execution_progress(
-                run_id=run_id,
-                tenant_id=tenant_id,
-                plan_hash=plan_hash,
-                triggered_by=triggered_by,
-            )
+        run = _MonitoredRun(
+            run_id=run_id,
+            tenant_id=tenant_id,
+            plan_hash=plan_hash,
+            triggered_by=triggered_by,
+            start_time=datetime.now(timezone.utc),
+            interval=self.min_poll_interval,
+            next_poll_at=0.0,
         )
-        
-        self._monitoring_tasks[run_id] = task
-        self._monitored_executions.add(run_id)
+        self._runs[run_id] = run
+        self._schedule_poll(run, self._now() + self.min_poll_interval)
+        self._ensure_started()
+        self._wakeup.set()
         
         logger.info(f"Started monitoring execution {run_id} for tenant {tenant_id}")
     
@@ -100,27 +221,31 @@ class ExecutionMonitor:
         Args:
             run_id: Portia run ID
         """
-        if run_id not in self._monitored_executions:
+        if self._runs.pop(run_id, None) is None:
             return
         
-        # Cancel monitoring task
-        if run_id in self._monitoring_tasks:
-            task = self._monitoring_tasks[run_id]
-            if not task.done():
-                task.cancel()
-                try:
-                    await task
-                except asyncio.CancelledError:
-                    pass
-            del self._monitoring_tasks[run_id]
-        
-        # Clean up
-        self._monitored_executions.discard(run_id)
-        if run_id in self._execution_metrics:
-            del self._execution_metrics[run_id]
+        # Clean up (the run's schedule entries become stale)
+        self._execution_metrics.pop(run_id, None)
         
         logger.info(f"Stopped monitoring execution {run_id}")
     
+    def notify(self, run_id: str) -> bool:
+        """Check a run's status now, e.g. on a push notification.
+        
+        Args:
+            run_id: Portia run ID
+            
+        Returns:
+            False if the run is not being monitored
+        """
+        run = self._runs.get(run_id)
+        if run is None:
+            return False
+        run.interval = self.min_poll_interval
+        self._schedule_poll(run, self._now())
+        self._wakeup.set()
+        return True
+    
     async def get_execution_metrics(self, run_id: str) -> Optional[ExecutionMetrics]:
         """Get execution metrics for a run.
         
@@ -132,6 +257,17 @@ class ExecutionMonitor:
         """
         return self._execution_metrics.get(run_id)
     
+    def get_stats(self) -> Dict[str, Any]:
+        """Get monitor statistics."""
+        return {
+            "active_runs": len(self._runs),
+            "polls": self.polls,
+            "batches": self.batches,
+            "average_batch_size": self.polls / self.batches if self.batches else 0,
+            "pending_progress_writes": len(self._pending_progress),
+            "progress_flushes": self.progress_flushes,
+        }
+    
     async def update_progress(
         self,
         run_id: str,
@@ -174,81 +310,172 @@ class ExecutionMonitor:
         if self.redis_manager:
             await self._store_progress_in_redis(run_id, metrics)
     
-    async def _monitor_execution_progress(
-        self,
-        run_id: str,
-        tenant_id: UUID,
-        plan_hash: str,
-        triggered_by: UUID,
-    ) -> None:
-        """Monitor execution progress until completion.
-        
-        Args:
-            run_id: Portia run ID
-            tenant_id: Tenant ID
-            plan_hash: Plan hash
-            triggered_by: User who triggered execution
-        """
+    async def _run_scheduler(self) -> None:
+        """Poll due runs in batches until cancelled."""
+        while True:
+            try:
+                batch = self._take_due_runs()
+                if not batch:
+                    await self._wait_for_next_due()
+                    continue
+                await self._poll_batch(batch)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Execution monitor scheduler error: {e}")
+                await asyncio.sleep(self.min_poll_interval)
+    
+    def _take_due_runs(self) -> List[_MonitoredRun]:
+        now = self._now()
+        if not self._schedule or self._schedule[0][0] > now:
+            return []
+        
+        horizon = now + self.batch_window
+        batch: List[_MonitoredRun] = []
+        seen: Set[str] = set()
+        while self._schedule and self._schedule[0][0] <= horizon and len(batch) < self.max_batch_size:
+            due, _, run_id = heapq.heappop(self._schedule)
+            run = self._runs.get(run_id)
+            if run is None or run.next_poll_at != due or run_id in seen:
+                continue
+            seen.add(run_id)
+            batch.append(run)
+        return batch
+    
+    async def _wait_for_next_due(self) -> None:
+        # Drop stale entries so the wait targets a live run
+        while self._schedule:
+            due, _, run_id = self._schedule[0]
+            run = self._runs.get(run_id)
+            if run is not None and run.next_poll_at == due:
+                break
+            heapq.heappop(self._schedule)
+        
+        self._wakeup.clear()
+        timeout = self._schedule[0][0] - self._now() if self._schedule else None
         try:
-            start_time = datetime.now(timezone.utc)
-            last_status = None
-            
-            while True:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+    
+    async def _poll_batch(self, batch: List[_MonitoredRun]) -> None:
+        """Look up a batch of runs and process the results."""
+        self.batches += 1
+        self.polls += len(batch)
+        due = {run.run_id: run.next_poll_at for run in batch}
+        results = await self._fetch_runs(list(due))
+        await asyncio.gather(*(
+            self._process_poll(run, results.get(run.run_id), due[run.run_id])
+            for run in batch
+        ))
+    
+    def _get_portia_client(self) -> Any:
+        if self._portia_client is None:
+            self._portia_client = PortiaSDKClient()
+        return self._portia_client
+    
+    async def _fetch_runs(self, run_ids: List[str]) -> Dict[str, Any]:
+        """Fetch run states; failed lookups map to the exception raised."""
+        client = self._get_portia_client()
+        semaphore = asyncio.Semaphore(self.max_concurrent_lookups)
+        
+        async def fetch(run_id: str) -> Any:
+            async with semaphore:
                 try:
-                    # Get current execution status
-                    async with PortiaSDKClient() as portia_client:
-                        portia_run = await portia_client.get_run(run_id)
-                    
-                    if not portia_run:
-                        logger.error(f"Execution {run_id} not found in Portia")
-                        break
-                    
-                    # Update metrics
-                    await self._update_execution_metrics(run_id, portia_run, start_time)
-                    
-                    # Check if status changed
-                    if portia_run.status != last_status:
-                        await self._handle_status_change(
-                            run_id=run_id,
-                            tenant_id=tenant_id,
-                            plan_hash=plan_hash,
-                            triggered_by=triggered_by,
-                            old_status=last_status,
-                            new_status=portia_run.status,
-                            portia_run=portia_run,
-                        )
-                        last_status = portia_run.status
-                    
-                    # Check if execution is complete
-                    if portia_run.status in [
-                        ExecutionStatusEnum.COMPLETED,
-                        ExecutionStatusEnum.FAILED,
-                        ExecutionStatusEnum.CANCELLED,
-                    ]:
-                        await self._handle_execution_completion(
-                            run_id=run_id,
-                            tenant_id=tenant_id,
-                            plan_hash=plan_hash,
-                            triggered_by=triggered_by,
-                            portia_run=portia_run,
-                        )
-                        break
-                    
-                    # Wait before next check
-                    await asyncio.sleep(5.0)  # Check every 5 seconds
-                    
-                except asyncio.CancelledError:
-                    logger.info(f"Monitoring cancelled for execution {run_id}")
-                    break
+                    return await asyncio.wait_for(client.get_run_status(run_id), self.lookup_timeout)
+                except asyncio.TimeoutError:
+                    return ExecutionMonitorError(f"Status lookup timed out after {self.lookup_timeout}s")
                 except Exception as e:
-                    logger.error(f"Error monitoring execution {run_id}: {e}")
-                    await asyncio.sleep(10.0)  # Wait longer on error
-                    
+                    return e
+        
+        results = await asyncio.gather(*(fetch(run_id) for run_id in run_ids))
+        return dict(zip(run_ids, results))
+    
+    @staticmethod
+    def _to_plan_run(run: _MonitoredRun, result: Any) -> PortiaPlanRun:
+        """Normalize a status lookup result to ``PortiaPlanRun``."""
+        if isinstance(result, PortiaPlanRun):
+            return result
+        
+        status = getattr(result, "status", ExecutionStatusEnum.PENDING)
+        status = str(getattr(status, "value", status)).lower()
+        if status in PORTIA_RUN_STATES:
+            status = PORTIA_RUN_STATES[status]
+        else:
+            try:
+                status = ExecutionStatusEnum(status)
+            except ValueError:
+                status = ExecutionStatusEnum.RUNNING
+        
+        metadata = getattr(result, "metadata", None) or {}
+        return PortiaPlanRun(
+            run_id=run.run_id,
+            plan_id=str(metadata.get("plan_id", "")),
+            status=status,
+            results=getattr(result, "outputs", None) or {},
+            error_message=getattr(result, "error", None),
+            triggered_by=str(run.triggered_by),
+        )
+    
+    async def _process_poll(self, run: _MonitoredRun, result: Any, due: float) -> None:
+        """Handle one run's lookup result and schedule its next check."""
+        run_id = run.run_id
+        try:
+            if isinstance(result, Exception):
+                raise result
+            
+            if not result:
+                logger.error(f"Execution {run_id} not found in Portia")
+                await self.stop_monitoring(run_id)
+                return
+            
+            portia_run = self._to_plan_run(run, result)
+            run.polls += 1
+            
+            # Update metrics
+            await self._update_execution_metrics(run_id, portia_run, run.start_time)
+            if self.redis_manager and run_id in self._execution_metrics:
+                await self._store_progress_in_redis(run_id, self._execution_metrics[run_id])
+            
+            # Check if status changed
+            status_changed = portia_run.status != run.last_status
+            if status_changed:
+                await self._handle_status_change(
+                    run_id=run_id,
+                    tenant_id=run.tenant_id,
+                    plan_hash=run.plan_hash,
+                    triggered_by=run.triggered_by,
+                    old_status=run.last_status,
+                    new_status=portia_run.status,
+                    portia_run=portia_run,
+                )
+                run.last_status = portia_run.status
+            
+            # Check if execution is complete
+            if portia_run.status in TERMINAL_STATUSES:
+                await self._handle_execution_completion(
+                    run_id=run_id,
+                    tenant_id=run.tenant_id,
+                    plan_hash=run.plan_hash,
+                    triggered_by=run.triggered_by,
+                    portia_run=portia_run,
+                )
+                await self.stop_monitoring(run_id)
+                return
+            
+            # Fast while the run is changing, backing off while it is not
+            if status_changed:
+                run.interval = self.min_poll_interval
+            else:
+                run.interval = min(run.interval * self.poll_backoff, self.max_poll_interval)
+            
         except Exception as e:
-            logger.error(f"Fatal error monitoring execution {run_id}: {e}")
-        finally:
-            # Clean up monitoring
-            await self.stop_monitoring(run_id)
+            logger.error(f"Error monitoring execution {run_id}: {e}")
+            run.interval = min(run.interval * 2, self.max_poll_interval)
+        
+        # Unless stopped, or a notification already rescheduled it
+        if self._runs.get(run_id) is run and run.next_poll_at == due:
+            self._schedule_poll(run, self._now() + run.interval)
     
     async def _update_execution_metrics(
         self,
@@ -424,7 +651,7 @@ class ExecutionMonitor:
         metrics = self._execution_metrics.get(run_id)
         
         # Publish execution.completed CloudEvent
-        if self.event_publisher:
+        if self.event_bus:
             await self._publish_execution_completed_event(
                 run_id=run_id,
                 tenant_id=tenant_id,
@@ -575,7 +802,10 @@ class ExecutionMonitor:
         run_id: str,
         metrics: ExecutionMetrics,
     ) -> None:
-        """Store execution progress in Redis.
+        """Queue execution progress for the next Redis flush.
+        
+        Writes for the same run are coalesced; only the latest metrics are
+        written.
         
         Args:
             run_id: Portia run ID
@@ -584,12 +814,36 @@ class ExecutionMonitor:
         if not self.redis_manager:
             return
         
+        self._pending_progress[run_id] = metrics
+        if self._flush_task is None or self._flush_task.done():
+            self._ensure_started()
+    
+    async def _run_progress_flusher(self) -> None:
+        while True:
+            await asyncio.sleep(self.progress_flush_interval)
+            await self._flush_progress()
+    
+    async def _flush_progress(self) -> None:
+        """Write all queued progress in one Redis pipeline."""
+        if not self._pending_progress or not self.redis_manager:
+            return
+        
+        pending, self._pending_progress = self._pending_progress, {}
         try:
-            key = f"execution:progress:{run_id}"
-            data = metrics.model_dump(mode='json')
-            
-            # Store with 24 hour expiry
-            await self.redis_manager.setex(key, 86400, data)
+            client = await self.redis_manager.get_client()
+            pipe = client.pipeline(transaction=False)
+            for run_id, metrics in pending.items():
+                # Store with 24 hour expiry
+                pipe.set(
+                    f"execution:progress:{run_id}",
+                    json.dumps(metrics.model_dump(mode='json')),
+                    ex=PROGRESS_TTL_SECONDS,
+                )
+            await pipe.execute()
+            self.progress_flushes += 1
             
         except Exception as e:
-            logger.error(f"Failed to store progress in Redis for {run_id}: {e}")
\ No newline at end of file
+            logger.error(f"Failed to store progress in Redis for {len(pending)} executions: {e}")
+            # Keep the newest metrics for the next flush
+            for run_id, metrics in pending.items():
+                self._pending_progress.setdefault(run_id, metrics)
@@ -29,6 +29,7 @@ class ExecutionMonitor:
         self._monitoring_tasks: Dict[str, asyncio.Task] = {}
         self._monitored_executions: Set[str] = set()
         self._execution_metrics: Dict[str, ExecutionMetrics] = {}
+        self._wakeups: Dict[str, asyncio.Event] = {}
         self._polling_interval = 2.0  # seconds
     
     async def start_monitoring(
@@ -57,6 +58,7 @@ class ExecutionMonitor:
         
         # Add to monitored set
         self._monitored_executions.add(run_id)
+        self._wakeups[run_id] = asyncio.Event()
         
         # Start monitoring task
         task = asyncio.create_task(self._monitor_execution(run_id))
@@ -95,11 +97,32 @@ class ExecutionMonitor:
         
         # Remove from monitored set
         self._monitored_executions.discard(run_id)
+        self._wakeups.pop(run_id, None)
         
         # Clean up metrics
         if run_id in self._execution_metrics:
             del self._execution_metrics[run_id]
     
+    def notify(self, run_id: str) -> bool:
+        """Check a run's status now, waking its polling loop.
+        
+        Args:
+            run_id: Execution run ID
+            
+        Returns:
+            False if the run is not being monitored
+        """
+        wakeup = self._wakeups.get(run_id)
+        if wakeup is None:
+            return False
+        wakeup.set()
+        return True
+    
+    async def close(self) -> None:
+        """Stop monitoring all executions."""
+        for run_id in list(self._monitoring_tasks):
+            await self.stop_monitoring(run_id)
+    
     async def get_execution_metrics(self, run_id: str) -> Optional[ExecutionMetrics]:
         """Get execution metrics.
         
@@ -165,10 +188,15 @@ class ExecutionMonitor:
             run_id: Execution run ID
         """
         try:
+            wakeup = self._wakeups[run_id]
             while run_id in self._monitored_executions:
                 # In a real implementation, this would poll Portia
-                # For testing, we just sleep
-                await asyncio.sleep(self._polling_interval)
+                # For testing, we just wait for the interval or a notification
+                try:
+                    await asyncio.wait_for(wakeup.wait(), self._polling_interval)
+                except asyncio.TimeoutError:
+                    pass
+                wakeup.clear()
                 
                 # Check if execution is still active
                 if run_id not in self._monitored_executions:
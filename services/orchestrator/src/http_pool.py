@@ -0,0 +1,203 @@
+"""
+Process-wide HTTP client pool for the orchestrator's upstream calls.
+
+Every upstream (Receipts, CapTokens, Approvals, Portia, ...) gets one
+long-lived ``httpx.AsyncClient`` keyed by its base URL, so plan executions
+reuse kept-alive connections instead of paying TCP/TLS setup per call.
+
+- Connection limits are per upstream (defaults, overridable per base URL)
+- HTTP/2 is negotiated when the optional ``h2`` package is installed
+- Clients carry a default timeout; calls can pass their own ``timeout``
+- ``close_http_pool()`` closes every client on shutdown
+
+Configuration (environment):
+    ORCHESTRATOR_HTTP_MAX_CONNECTIONS   per-upstream connection cap (default 100)
+    ORCHESTRATOR_HTTP_MAX_KEEPALIVE     idle connections kept per upstream (default 20)
+    ORCHESTRATOR_HTTP_KEEPALIVE_EXPIRY  idle connection lifetime in seconds (default 30)
+    ORCHESTRATOR_HTTP_TIMEOUT           default request timeout in seconds (default 30)
+    ORCHESTRATOR_HTTP2                  "false" disables HTTP/2 even if h2 is installed
+"""
+
+import asyncio
+import logging
+import os
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import httpx
+
+try:
+    import h2  # noqa: F401
+    HAS_HTTP2 = True
+except ImportError:
+    HAS_HTTP2 = False
+
+logger = logging.getLogger(__name__)
+
+TimeoutTypes = Union[None, float, httpx.Timeout]
+
+
+def _normalize_base(base: str) -> str:
+    return base.rstrip('/')
+
+
+class HTTPClientPool:
+    """
+    Shared ``httpx.AsyncClient`` per upstream base URL.
+
+    Clients are bound to the event loop they were created on; a client
+    requested from another loop (e.g. a sync wrapper running its own loop)
+    gets a fresh client for that loop instead of a broken one. The replaced
+    client is closed on its own loop if that loop is still running, and
+    otherwise kept until ``aclose()``.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        timeout: float = 30.0,
+        connect_timeout: float = 5.0,
+        http2: Optional[bool] = None,
+    ):
+        self.default_limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.default_timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        if http2 and not HAS_HTTP2:
+            logger.warning("HTTP/2 requested but the 'h2' package is not installed; using HTTP/1.1")
+        self.http2 = HAS_HTTP2 if http2 is None else (http2 and HAS_HTTP2)
+        self._upstream_limits: Dict[str, httpx.Limits] = {}
+        self._clients: Dict[str, Tuple[httpx.AsyncClient, Optional[asyncio.AbstractEventLoop]]] = {}
+        self._replaced: List[Tuple[str, httpx.AsyncClient]] = []
+        self._requests: Dict[str, int] = {}
+
+    @classmethod
+    def from_env(cls) -> "HTTPClientPool":
+        """Create a pool configured from ``ORCHESTRATOR_HTTP_*`` variables."""
+        http2_env = os.getenv("ORCHESTRATOR_HTTP2")
+        return cls(
+            max_connections=int(os.getenv("ORCHESTRATOR_HTTP_MAX_CONNECTIONS", "100")),
+            max_keepalive_connections=int(os.getenv("ORCHESTRATOR_HTTP_MAX_KEEPALIVE", "20")),
+            keepalive_expiry=float(os.getenv("ORCHESTRATOR_HTTP_KEEPALIVE_EXPIRY", "30")),
+            timeout=float(os.getenv("ORCHESTRATOR_HTTP_TIMEOUT", "30")),
+            http2=None if http2_env is None else http2_env.lower() == "true",
+        )
+
+    def configure_upstream(self, base: str, limits: httpx.Limits) -> None:
+        """
+        Set connection limits for one upstream.
+
+        Applies to clients created afterwards; call before first use.
+        """
+        self._upstream_limits[_normalize_base(base)] = limits
+
+    def client(self, base: str) -> httpx.AsyncClient:
+        """Get the shared client for an upstream base URL."""
+        key = _normalize_base(base)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+
+        entry = self._clients.get(key)
+        if entry is not None:
+            client, client_loop = entry
+            if not client.is_closed and (client_loop is None or client_loop is loop or loop is None):
+                if client_loop is None and loop is not None:
+                    self._clients[key] = (client, loop)
+                return client
+            if not client.is_closed:
+                logger.debug(f"Replacing HTTP client for {key}: created on another event loop")
+                self._retire(key, client, client_loop)
+
+        client = httpx.AsyncClient(
+            base_url=key,
+            limits=self._upstream_limits.get(key, self.default_limits),
+            timeout=self.default_timeout,
+            http2=self.http2,
+            event_hooks={"request": [self._count_request]},
+        )
+        self._clients[key] = (client, loop)
+        logger.debug(f"Created pooled HTTP client for {key} (http2={self.http2})")
+        return client
+
+    def _retire(self, key: str, client: httpx.AsyncClient, loop: Optional[asyncio.AbstractEventLoop]) -> None:
+        """Close a replaced client on its own loop, or keep it for ``aclose()``."""
+        if loop is not None and loop.is_running() and not loop.is_closed():
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+        else:
+            self._replaced.append((key, client))
+
+    async def _count_request(self, request: httpx.Request) -> None:
+        key = f"{request.url.scheme}://{request.url.netloc.decode()}"
+        self._requests[key] = self._requests.get(key, 0) + 1
+
+    async def request(
+        self,
+        method: str,
+        base: str,
+        path: str,
+        timeout: TimeoutTypes = None,
+        **kwargs: Any,
+    ) -> httpx.Response:
+        """
+        Send a request to an upstream through its shared client.
+
+        Args:
+            method: HTTP method
+            base: Upstream base URL
+            path: Path relative to ``base``
+            timeout: Per-call timeout (seconds or ``httpx.Timeout``); the
+                pool default when omitted
+        """
+        client = self.client(base)
+        if timeout is None:
+            return await client.request(method, path, **kwargs)
+        return await client.request(method, path, timeout=timeout, **kwargs)
+
+    async def aclose(self) -> None:
+        """Close every pooled client, including replaced ones."""
+        clients, self._clients = self._clients, {}
+        replaced, self._replaced = self._replaced, []
+        for key, client in [(key, client) for key, (client, _) in clients.items()] + replaced:
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.warning(f"Error closing HTTP client for {key}: {e}")
+        if clients:
+            logger.info(f"Closed {len(clients)} pooled HTTP clients")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get pool statistics."""
+        return {
+            "http2": self.http2,
+            "upstreams": sorted(self._clients),
+            "requests": dict(self._requests),
+        }
+
+
+_pool: Optional[HTTPClientPool] = None
+
+
+def get_http_pool() -> HTTPClientPool:
+    """Process-wide HTTP client pool, created on first use."""
+    global _pool
+    if _pool is None:
+        _pool = HTTPClientPool.from_env()
+    return _pool
+
+
+def get_http_client(base: str) -> httpx.AsyncClient:
+    """Shared client for an upstream base URL from the process-wide pool."""
+    return get_http_pool().client(base)
+
+
+async def close_http_pool() -> None:
+    """Close the process-wide pool; it is recreated on next use."""
+    global _pool
+    if _pool is not None:
+        pool, _pool = _pool, None
+        await pool.aclose()
@@ -42,6 +42,7 @@ class ExecutionHook(BaseModel):
     hook_type: str = Field(..., description="Hook type (pre_execution, post_step, etc.)")
     enabled: bool = Field(default=True, description="Whether hook is enabled")
     configuration: Dict[str, Any] = Field(default_factory=dict, description="Hook configuration")
+    timeout_seconds: Optional[float] = Field(None, gt=0, description="Hook timeout (service default if unset)")
 
 
 class CapabilityValidation(BaseModel):
@@ -1,7 +1,21 @@
-"""Transform ExecutablePlans to Portia format."""
+"""Transform ExecutablePlans to Portia format.
 
+Transformations are memoized by plan content: everything except the
+per-request fields (tenant, trigger, creation time) depends only on the
+plan, so repeated runs of the same plan reuse the cached result with those
+fields overlaid. The cache key is a digest computed here over the fields the
+transformation reads, never the caller-supplied ``plan_hash`` alone, so an
+edited or mislabelled plan cannot pick up another plan's cached steps.
+"""
+
+import copy
+import hashlib
+import json
 import logging
-from typing import Any, Dict, List, Optional
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
 from uuid import UUID
 
 # Tracing removed for development compatibility
@@ -16,14 +30,109 @@ from models import PortiaPlan, RetryPolicy
 logger = logging.getLogger(__name__)
 
 
+# ExecutablePlan fields the transformation output depends on
+_CONTENT_FIELDS = (
+    'plan_hash', 'name', 'description', 'flows', 'main_flow',
+    'variables', 'configuration', 'resource_requirements',
+)
+
+
+def _copy_json(value: Any) -> Any:
+    """Deep copy of JSON-like data (fast path for dicts, lists and scalars)."""
+    if isinstance(value, dict):
+        return {k: _copy_json(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_copy_json(v) for v in value]
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return copy.deepcopy(value)
+
+
+def plan_content_digest(executable_plan: Dict[str, Any]) -> str:
+    """SHA-256 over the canonical JSON of the plan fields the transform reads."""
+    content = {field: executable_plan.get(field) for field in _CONTENT_FIELDS}
+    canonical = json.dumps(content, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
 class PlanTransformationError(Exception):
     """Plan transformation error."""
     pass
 
 
+@dataclass(frozen=True)
+class _PlanTemplate:
+    """Tenant-independent part of a transformed plan."""
+    plan_id: str
+    name: str
+    description: Optional[str]
+    steps: Tuple[Dict[str, Any], ...]
+    variables: Dict[str, Any]
+    timeout: Optional[int]
+    retry_policy: Optional[RetryPolicy]
+
+
+class PlanTransformCache:
+    """LRU cache of plan templates keyed by (content digest, transformer version)."""
+    
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, int], _PlanTemplate]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, key: Tuple[str, int]) -> Optional[_PlanTemplate]:
+        with self._lock:
+            template = self._entries.get(key)
+            if template is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return template
+    
+    def put(self, key: Tuple[str, int], template: _PlanTemplate) -> None:
+        with self._lock:
+            self._entries[key] = template
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
 class PlanTransformer:
     """Transforms ExecutablePlans to Portia Plans."""
     
+    # Bump when the transformation output changes so cached templates
+    # from the previous logic are not reused.
+    VERSION = 1
+    
+    def __init__(self, cache_size: int = 1024):
+        """Initialize plan transformer.
+        
+        Args:
+            cache_size: Plans whose transformation is memoized (0 disables)
+        """
+        self.cache = PlanTransformCache(cache_size) if cache_size > 0 else None
+    
     @trace("plan_transformer.transform_executable_plan")
     def transform_executable_plan(
         self,
@@ -45,45 +154,94 @@ class PlanTransformer:
             PlanTransformationError: If transformation fails
         """
         try:
-            # Extract basic plan information
-            plan_id = f"anumate-{executable_plan['plan_hash'][:8]}"
-            name = executable_plan.get('name', 'Unnamed Plan')
-            description = executable_plan.get('description')
-            
-            # Transform execution flows to Portia steps
-            steps = self._transform_flows_to_steps(
-                executable_plan.get('flows', []),
-                executable_plan.get('main_flow')
-            )
-            
-            # Extract variables and configuration
-            variables = {
-                **executable_plan.get('variables', {}),
-                **executable_plan.get('configuration', {}),
-                'tenant_id': str(tenant_id),
-                'plan_hash': executable_plan['plan_hash'],
-            }
+            plan_hash = executable_plan['plan_hash']
+            key = (plan_content_digest(executable_plan), self.VERSION)
             
-            # Extract timeout and retry policy
-            timeout = self._extract_timeout(executable_plan)
-            retry_policy = self._extract_retry_policy(executable_plan)
+            template = self.cache.get(key) if self.cache is not None else None
+            if template is None:
+                template = self._build_template(executable_plan)
+                if self.cache is not None:
+                    self.cache.put(key, template)
             
-            return PortiaPlan(
-                plan_id=plan_id,
-                name=name,
-                description=description,
-                steps=steps,
-                variables=variables,
+            # Per-request overlay; the template was validated when built
+            return PortiaPlan.model_construct(
+                plan_id=template.plan_id,
+                name=template.name,
+                description=template.description,
+                steps=[_copy_json(step) for step in template.steps],
+                variables={
+                    **_copy_json(template.variables),
+                    'tenant_id': str(tenant_id),
+                    'plan_hash': plan_hash,
+                },
                 created_by=triggered_by,
-                timeout=timeout,
-                retry_policy=retry_policy,
+                timeout=template.timeout,
+                retry_policy=template.retry_policy.model_copy() if template.retry_policy else None,
             )
             
         except Exception as e:
             error_msg = f"Failed to transform ExecutablePlan: {e}"
             logger.error(error_msg)
-            raise PlanTransformationError(error_msg) from e  
-  
+            raise PlanTransformationError(error_msg) from e
+    
+    def _build_template(self, executable_plan: Dict[str, Any]) -> _PlanTemplate:
+        """Transform the tenant-independent part of an ExecutablePlan.
+        
+        Args:
+            executable_plan: ExecutablePlan data
+            
+        Returns:
+            Plan template
+        """
+        # Extract basic plan information
+        plan_id = f"anumate-{executable_plan['plan_hash'][:8]}"
+        name = executable_plan.get('name', 'Unnamed Plan')
+        description = executable_plan.get('description')
+        
+        # Transform execution flows to Portia steps
+        steps = self._transform_flows_to_steps(
+            executable_plan.get('flows', []),
+            executable_plan.get('main_flow')
+        )
+        
+        # Extract variables and configuration
+        variables = {
+            **executable_plan.get('variables', {}),
+            **executable_plan.get('configuration', {}),
+        }
+        
+        # Extract timeout and retry policy
+        timeout = self._extract_timeout(executable_plan)
+        retry_policy = self._extract_retry_policy(executable_plan)
+        
+        # Validate once, as the uncached transformation did
+        validated = PortiaPlan(
+            plan_id=plan_id,
+            name=name,
+            description=description,
+            steps=steps,
+            variables=variables,
+            created_by="",
+            timeout=timeout,
+            retry_policy=retry_policy,
+        )
+        # Detach from the request's executable_plan; callers get fresh copies
+        return _PlanTemplate(
+            plan_id=validated.plan_id,
+            name=validated.name,
+            description=validated.description,
+            steps=tuple(_copy_json(step) for step in validated.steps),
+            variables=_copy_json(validated.variables),
+            timeout=validated.timeout,
+            retry_policy=validated.retry_policy,
+        )
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get transformation cache statistics."""
+        if self.cache is None:
+            return {"enabled": False}
+        return {"enabled": True, "version": self.VERSION, **self.cache.get_stats()}
+    
     def _transform_flows_to_steps(
         self,
         flows: List[Dict[str, Any]],
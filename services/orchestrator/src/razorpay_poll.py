@@ -6,7 +6,7 @@ Provides polling functionality for payment links and refunds without requiring w
 import asyncio
 import logging
 from datetime import datetime, timezone
-from typing import Dict, Any, Optional, Tuple
+from typing import Dict, Any, List, Optional, Tuple
 from enum import Enum
 
 import httpx
@@ -22,6 +22,7 @@ class PaymentStatus(str, Enum):
     """Razorpay payment status enum."""
     CREATED = "created"
     ATTEMPTED = "attempted"
+    PARTIALLY_PAID = "partially_paid"
     PAID = "paid"
     CANCELLED = "cancelled"
     EXPIRED = "expired"
@@ -64,9 +65,9 @@ class RefundPollResult(BaseModel):
 class RazorpayPoller:
     """Razorpay API poller for tracking payments and refunds."""
     
-    def __init__(self, settings: Settings):
+    def __init__(self, settings: Settings, base_url: Optional[str] = None):
         self.settings = settings
-        self.base_url = "https://api.razorpay.com/v1"
+        self.base_url = (base_url or "https://api.razorpay.com/v1").rstrip('/')
         
         # Create HTTP client with basic auth
         auth = (settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET)
@@ -119,21 +120,32 @@ class RazorpayPoller:
     async def get_payment_link_status(self, payment_link_id: str) -> PaymentPollResult:
         """Get current status of a payment link."""
         response = await self._make_request("GET", f"payment_links/{payment_link_id}")
-        
+        return self.parse_payment_link(response)
+    
+    async def list_payment_links(self, count: int = 100) -> List[PaymentPollResult]:
+        """Get the status of the most recently created payment links."""
+        response = await self._make_request("GET", "payment_links", params={"count": count})
+        return [self.parse_payment_link(link) for link in response.get("payment_links", [])]
+    
+    @classmethod
+    def parse_payment_link(
+        cls,
+        response: Dict[str, Any],
+        payment: Optional[Dict[str, Any]] = None
+    ) -> PaymentPollResult:
+        """Build a poll result from a payment link entity (API or webhook)."""
         # Extract payment information if available
-        payment_id = None
-        payment_data = {}
+        payment_data = payment or {}
         
-        if response.get("payments"):
+        if not payment_data and response.get("payments"):
             # Get the latest payment
             payments = response["payments"]
             if payments:
-                latest_payment = payments[0]  # Assuming sorted by creation time
-                payment_id = latest_payment.get("id")
-                payment_data = latest_payment
+                payment_data = payments[0]  # Assuming sorted by creation time
+        payment_id = payment_data.get("id") or payment_data.get("payment_id")
         
         return PaymentPollResult(
-            payment_link_id=payment_link_id,
+            payment_link_id=response["id"],
             status=PaymentStatus(response.get("status", "created")),
             payment_id=payment_id,
             amount=payment_data.get("amount") or response.get("amount"),
@@ -141,27 +153,37 @@ class RazorpayPoller:
             method=payment_data.get("method"),
             fee=payment_data.get("fee"),
             tax=payment_data.get("tax"),
-            created_at=self._parse_timestamp(response.get("created_at")),
-            completed_at=self._parse_timestamp(payment_data.get("created_at")) if payment_data else None,
+            created_at=cls._parse_timestamp(response.get("created_at")),
+            completed_at=cls._parse_timestamp(payment_data.get("created_at")) if payment_data else None,
             raw_response=response
         )
     
     async def get_refund_status(self, refund_id: str) -> RefundPollResult:
         """Get current status of a refund."""
         response = await self._make_request("GET", f"refunds/{refund_id}")
-        
+        return self.parse_refund(response)
+    
+    async def list_refunds(self, count: int = 100) -> List[RefundPollResult]:
+        """Get the status of the most recently created refunds."""
+        response = await self._make_request("GET", "refunds", params={"count": count})
+        return [self.parse_refund(refund) for refund in response.get("items", [])]
+    
+    @classmethod
+    def parse_refund(cls, response: Dict[str, Any]) -> RefundPollResult:
+        """Build a poll result from a refund entity (API or webhook)."""
         return RefundPollResult(
-            refund_id=refund_id,
+            refund_id=response["id"],
             payment_id=response.get("payment_id"),
             status=RefundStatus(response.get("status", "pending")),
             amount=response.get("amount"),
             currency=response.get("currency"),
-            created_at=self._parse_timestamp(response.get("created_at")),
-            processed_at=self._parse_timestamp(response.get("processed_at")),
+            created_at=cls._parse_timestamp(response.get("created_at")),
+            processed_at=cls._parse_timestamp(response.get("processed_at")),
             raw_response=response
         )
     
-    def _parse_timestamp(self, timestamp: Optional[int]) -> Optional[datetime]:
+    @staticmethod
+    def _parse_timestamp(timestamp: Optional[int]) -> Optional[datetime]:
         """Parse Unix timestamp to datetime."""
         if timestamp is None:
             return None
@@ -176,6 +198,10 @@ class RazorpayPoller:
         """
         Poll a payment link until completion or timeout.
         
+        With a settlement tracker installed (see ``razorpay_settlement.py``),
+        waits on the tracker instead, which settles from webhooks and polls
+        with backoff; ``interval_sec`` then does not apply.
+        
         Args:
             payment_link_id: Razorpay payment link ID
             timeout_sec: Max time to wait (defaults to settings)
@@ -189,6 +215,10 @@ class RazorpayPoller:
             Exception: If API errors occur
         """
         timeout_sec = timeout_sec or self.settings.RAZORPAY_POLL_TIMEOUT_SEC
+        tracker = _settlement_tracker()
+        if tracker is not None:
+            return await tracker.wait_for_payment_link(payment_link_id, timeout_sec=timeout_sec)
+        
         interval_sec = interval_sec or self.settings.RAZORPAY_POLL_INTERVAL_SEC
         
         logger.info(f"Starting payment poll for {payment_link_id} "
@@ -231,6 +261,9 @@ class RazorpayPoller:
         """
         Poll a refund until completion or timeout.
         
+        With a settlement tracker installed, waits on the tracker instead;
+        ``interval_sec`` then does not apply.
+        
         Args:
             refund_id: Razorpay refund ID
             timeout_sec: Max time to wait (defaults to settings)
@@ -244,6 +277,10 @@ class RazorpayPoller:
             Exception: If API errors occur
         """
         timeout_sec = timeout_sec or self.settings.RAZORPAY_POLL_TIMEOUT_SEC
+        tracker = _settlement_tracker()
+        if tracker is not None:
+            return await tracker.wait_for_refund(refund_id, timeout_sec=timeout_sec)
+        
         interval_sec = interval_sec or self.settings.RAZORPAY_POLL_INTERVAL_SEC
         
         logger.info(f"Starting refund poll for {refund_id} "
@@ -278,6 +315,12 @@ class RazorpayPoller:
             raise asyncio.TimeoutError(f"Refund polling timed out. Final status: {final_result.status}")
 
 
+def _settlement_tracker():
+    """The installed settlement tracker, if any (imported late: it imports this module)."""
+    from .razorpay_settlement import get_settlement_tracker
+    return get_settlement_tracker()
+
+
 async def poll_payment_link(
     payment_link_id: str,
     settings: Settings,
@@ -287,11 +330,20 @@ async def poll_payment_link(
     """
     Convenience function to poll a payment link completion.
     
+    Uses the installed settlement tracker if there is one, and falls back to
+    fixed-interval polling otherwise.
+    
     Usage:
         result = await poll_payment_link("plink_abc123", settings)
         if result.status == PaymentStatus.PAID:
             print(f"Payment completed: {result.payment_id}")
     """
+    tracker = _settlement_tracker()
+    if tracker is not None:
+        return await tracker.wait_for_payment_link(
+            payment_link_id,
+            timeout_sec=timeout_sec or settings.RAZORPAY_POLL_TIMEOUT_SEC
+        )
     async with RazorpayPoller(settings) as poller:
         return await poller.poll_payment_completion(
             payment_link_id, 
@@ -309,11 +361,20 @@ async def poll_refund(
     """
     Convenience function to poll a refund completion.
     
+    Uses the installed settlement tracker if there is one, and falls back to
+    fixed-interval polling otherwise.
+    
     Usage:
         result = await poll_refund("rfnd_abc123", settings)
         if result.status == RefundStatus.PROCESSED:
             print(f"Refund processed: {result.amount}")
     """
+    tracker = _settlement_tracker()
+    if tracker is not None:
+        return await tracker.wait_for_refund(
+            refund_id,
+            timeout_sec=timeout_sec or settings.RAZORPAY_POLL_TIMEOUT_SEC
+        )
     async with RazorpayPoller(settings) as poller:
         return await poller.poll_refund_completion(
             refund_id,
@@ -0,0 +1,457 @@
+"""
+Razorpay settlement tracking: signed webhooks first, polling as fallback.
+
+Outstanding payment links and refunds are settled by Razorpay's webhook
+callbacks (``payment_link.paid``, ``refund.processed``, ...). Polling only
+covers webhooks that are late or lost:
+
+- The first poll of an item waits ``initial_poll_delay`` to give the webhook
+  a chance; later polls back off exponentially (``backoff``) up to
+  ``max_poll_interval``, with +/- ``jitter`` so items tracked together do
+  not poll together
+- Each account has a poll budget (token bucket, ``budget_per_minute``);
+  items that would exceed it are deferred, never dropped
+- Items due at the same time are queried together: when at least
+  ``list_threshold`` items of one kind are due for an account, one list
+  call covers the ones created recently and only the rest are fetched
+  one by one
+
+A webhook that arrives before its item is tracked is remembered, so
+tracking it afterwards resolves immediately.
+"""
+
+import asyncio
+import hashlib
+import heapq
+import hmac
+import itertools
+import json
+import logging
+import random
+import time
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from .razorpay_poll import (
+    PaymentPollResult,
+    PaymentStatus,
+    RazorpayPoller,
+    RefundPollResult,
+    RefundStatus,
+)
+
+logger = logging.getLogger(__name__)
+
+PAYMENT_LINK = "payment_link"
+REFUND = "refund"
+
+TERMINAL_PAYMENT_STATUSES = {PaymentStatus.PAID, PaymentStatus.CANCELLED, PaymentStatus.EXPIRED}
+TERMINAL_REFUND_STATUSES = {RefundStatus.PROCESSED, RefundStatus.FAILED}
+
+SettlementResult = Union[PaymentPollResult, RefundPollResult]
+
+
+class WebhookSignatureError(Exception):
+    """Raised when a webhook body does not match its signature."""
+    pass
+
+
+def verify_webhook_signature(secret: str, body: bytes, signature: Optional[str]) -> bool:
+    """Check a Razorpay ``X-Razorpay-Signature`` (hex HMAC-SHA256 of the raw body)."""
+    if not signature:
+        return False
+    expected = hmac.new(secret.encode('utf-8'), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+
+def is_terminal(result: SettlementResult) -> bool:
+    if isinstance(result, PaymentPollResult):
+        return result.status in TERMINAL_PAYMENT_STATUSES
+    return result.status in TERMINAL_REFUND_STATUSES
+
+
+class RateBudget:
+    """Token bucket: ``rate_per_minute`` refill, ``burst`` capacity."""
+
+    def __init__(self, rate_per_minute: float, burst: Optional[float] = None):
+        self.rate = rate_per_minute / 60
+        self.capacity = burst if burst is not None else max(1.0, rate_per_minute / 6)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        self._refill()
+        if self.tokens >= tokens:
+            self.tokens -= tokens
+            return True
+        return False
+
+    def wait_time(self, tokens: float = 1.0) -> float:
+        """Seconds until ``tokens`` are available."""
+        self._refill()
+        return max(0.0, (tokens - self.tokens) / self.rate) if self.rate > 0 else float('inf')
+
+
+@dataclass
+class _Outstanding:
+    """One payment link or refund awaiting settlement."""
+    kind: str
+    entity_id: str
+    account: str
+    future: asyncio.Future
+    interval: float
+    next_poll_at: float
+    polls: int = 0
+
+
+class SettlementTracker:
+    """
+    Tracks payment links and refunds until they settle.
+
+    Features:
+    - Signed webhooks resolve items as soon as they arrive
+    - Fallback polling with exponential backoff and jitter
+    - Per-account poll budgets
+    - Batched status queries for outstanding items
+    """
+
+    def __init__(
+        self,
+        pollers: Union[RazorpayPoller, Dict[str, RazorpayPoller]],
+        webhook_secret: Optional[str] = None,
+        initial_poll_delay: float = 30.0,
+        max_poll_interval: float = 300.0,
+        backoff: float = 2.0,
+        jitter: float = 0.2,
+        budget_per_minute: float = 60.0,
+        list_threshold: int = 3,
+        list_count: int = 100,
+        remembered_webhooks: int = 10000,
+    ):
+        """Initialize settlement tracker.
+
+        Args:
+            pollers: API client, or API clients by account ID
+            webhook_secret: Razorpay webhook secret (required for ``handle_webhook``)
+            initial_poll_delay: Seconds before the first fallback poll
+            max_poll_interval: Upper bound for the backed-off poll interval
+            backoff: Poll interval multiplier per unsettled poll
+            jitter: Relative random spread applied to every poll delay
+            budget_per_minute: Status queries allowed per account per minute
+            list_threshold: Due items of one kind that make a list call worthwhile
+            list_count: Items requested per list call
+            remembered_webhooks: Settlements kept for items not tracked yet
+        """
+        if isinstance(pollers, RazorpayPoller):
+            pollers = {"default": pollers}
+        self.pollers = pollers
+        self.default_account = next(iter(pollers))
+        self.webhook_secret = webhook_secret
+        self.initial_poll_delay = initial_poll_delay
+        self.max_poll_interval = max_poll_interval
+        self.backoff = backoff
+        self.jitter = jitter
+        self.list_threshold = list_threshold
+        self.list_count = list_count
+        self.remembered_webhooks = remembered_webhooks
+
+        self._budgets = {account: RateBudget(budget_per_minute) for account in pollers}
+        self._outstanding: Dict[Tuple[str, str], _Outstanding] = {}
+        self._schedule: List[Tuple[float, int, Tuple[str, str]]] = []
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._settled_early: "OrderedDict[Tuple[str, str], SettlementResult]" = OrderedDict()
+        self._seen_events: "OrderedDict[str, None]" = OrderedDict()
+
+        # Statistics
+        self.webhook_settlements = 0
+        self.poll_settlements = 0
+        self.api_calls: Dict[str, int] = defaultdict(int)
+        self.deferred_polls = 0
+
+    async def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"Razorpay settlement tracker started for {len(self.pollers)} account(s)")
+
+    async def stop(self) -> None:
+        """Stop polling; unsettled items stay pending."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    # Tracking
+
+    def _track(self, kind: str, entity_id: str, account: Optional[str]) -> asyncio.Future:
+        key = (kind, entity_id)
+        existing = self._outstanding.get(key)
+        if existing is not None:
+            return existing.future
+
+        future = asyncio.get_running_loop().create_future()
+        early = self._settled_early.pop(key, None)
+        if early is not None:
+            future.set_result(early)
+            return future
+
+        account = account or self.default_account
+        if account not in self.pollers:
+            raise ValueError(f"Unknown Razorpay account: {account}")
+
+        item = _Outstanding(
+            kind=kind,
+            entity_id=entity_id,
+            account=account,
+            future=future,
+            interval=self.initial_poll_delay,
+            next_poll_at=0.0,
+        )
+        self._outstanding[key] = item
+        self._schedule_poll(item, self._jittered(self.initial_poll_delay))
+        return future
+
+    async def _wait(self, kind: str, entity_id: str, account: Optional[str], timeout_sec: Optional[float]) -> Any:
+        future = self._track(kind, entity_id, account)
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout_sec)
+        except asyncio.TimeoutError:
+            self._outstanding.pop((kind, entity_id), None)
+            raise asyncio.TimeoutError(f"{kind} {entity_id} did not settle within {timeout_sec}s")
+
+    async def wait_for_payment_link(
+        self,
+        payment_link_id: str,
+        account: Optional[str] = None,
+        timeout_sec: Optional[float] = None
+    ) -> PaymentPollResult:
+        """
+        Wait until a payment link is paid, cancelled or expired.
+
+        Raises:
+            asyncio.TimeoutError: If it does not settle within ``timeout_sec``
+        """
+        return await self._wait(PAYMENT_LINK, payment_link_id, account, timeout_sec)
+
+    async def wait_for_refund(
+        self,
+        refund_id: str,
+        account: Optional[str] = None,
+        timeout_sec: Optional[float] = None
+    ) -> RefundPollResult:
+        """
+        Wait until a refund is processed or failed.
+
+        Raises:
+            asyncio.TimeoutError: If it does not settle within ``timeout_sec``
+        """
+        return await self._wait(REFUND, refund_id, account, timeout_sec)
+
+    def _settle(self, kind: str, entity_id: str, result: SettlementResult, source: str) -> bool:
+        key = (kind, entity_id)
+        item = self._outstanding.pop(key, None)
+        if item is None:
+            self._settled_early[key] = result
+            while len(self._settled_early) > self.remembered_webhooks:
+                self._settled_early.popitem(last=False)
+            return False
+
+        if not item.future.done():
+            item.future.set_result(result)
+        if source == "webhook":
+            self.webhook_settlements += 1
+        else:
+            self.poll_settlements += 1
+        logger.info(f"Razorpay {kind} {entity_id} settled via {source}: {result.status.value}")
+        return True
+
+    # Webhooks
+
+    def handle_webhook(self, body: bytes, signature: Optional[str], event_id: Optional[str] = None) -> Optional[str]:
+        """
+        Verify and apply a webhook callback.
+
+        Args:
+            body: Raw request body
+            signature: ``X-Razorpay-Signature`` header
+            event_id: ``X-Razorpay-Event-Id`` header, used to drop redeliveries
+
+        Returns:
+            The event type
+
+        Raises:
+            WebhookSignatureError: If the signature does not match
+        """
+        if not self.webhook_secret or not verify_webhook_signature(self.webhook_secret, body, signature):
+            raise WebhookSignatureError("Invalid webhook signature")
+        event = json.loads(body)
+        self.handle_event(event, event_id)
+        return event.get("event")
+
+    def handle_event(self, event: Dict[str, Any], event_id: Optional[str] = None) -> bool:
+        """
+        Apply an already verified webhook event.
+
+        Returns:
+            True if it settled a tracked item
+        """
+        if event_id is not None:
+            if event_id in self._seen_events:
+                return False
+            self._seen_events[event_id] = None
+            while len(self._seen_events) > self.remembered_webhooks:
+                self._seen_events.popitem(last=False)
+
+        event_type = event.get("event", "")
+        payload = event.get("payload", {})
+
+        try:
+            if event_type.startswith("payment_link."):
+                link = payload["payment_link"]["entity"]
+                payment = payload.get("payment", {}).get("entity")
+                result = RazorpayPoller.parse_payment_link(link, payment)
+                if not is_terminal(result):
+                    return False
+                return self._settle(PAYMENT_LINK, result.payment_link_id, result, "webhook")
+
+            if event_type.startswith("refund."):
+                result = RazorpayPoller.parse_refund(payload["refund"]["entity"])
+                if not is_terminal(result):
+                    return False
+                return self._settle(REFUND, result.refund_id, result, "webhook")
+
+        except (KeyError, ValueError) as e:
+            logger.warning(f"Ignoring malformed Razorpay webhook {event_type}: {e}")
+        return False
+
+    # Fallback polling
+
+    def _jittered(self, delay: float) -> float:
+        return delay * (1 + random.uniform(-self.jitter, self.jitter))
+
+    def _schedule_poll(self, item: _Outstanding, delay: float) -> None:
+        item.next_poll_at = time.monotonic() + delay
+        heapq.heappush(self._schedule, (item.next_poll_at, next(self._seq), (item.kind, item.entity_id)))
+        self._wakeup.set()
+
+    def _take_due(self) -> List[_Outstanding]:
+        now = time.monotonic()
+        due = []
+        while self._schedule and self._schedule[0][0] <= now:
+            when, _, key = heapq.heappop(self._schedule)
+            item = self._outstanding.get(key)
+            if item is not None and item.next_poll_at == when:
+                due.append(item)
+        return due
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                due = self._take_due()
+                if not due:
+                    self._wakeup.clear()
+                    timeout = self._schedule[0][0] - time.monotonic() if self._schedule else None
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), timeout)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+
+                groups: Dict[Tuple[str, str], List[_Outstanding]] = defaultdict(list)
+                for item in due:
+                    groups[(item.account, item.kind)].append(item)
+                await asyncio.gather(*(
+                    self._poll_group(account, kind, items)
+                    for (account, kind), items in groups.items()
+                ))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Razorpay settlement tracker error: {e}")
+                await asyncio.sleep(1.0)
+
+    async def _poll_group(self, account: str, kind: str, items: List[_Outstanding]) -> None:
+        """Query one account's due items of one kind within its budget."""
+        poller = self.pollers[account]
+        budget = self._budgets[account]
+        results: Dict[str, SettlementResult] = {}
+        pending = list(items)
+
+        if len(pending) >= self.list_threshold and budget.try_acquire():
+            self.api_calls[account] += 1
+            try:
+                if kind == PAYMENT_LINK:
+                    listed = {r.payment_link_id: r for r in await poller.list_payment_links(self.list_count)}
+                else:
+                    listed = {r.refund_id: r for r in await poller.list_refunds(self.list_count)}
+                results.update({i.entity_id: listed[i.entity_id] for i in pending if i.entity_id in listed})
+                pending = [i for i in pending if i.entity_id not in listed]
+            except Exception as e:
+                logger.warning(f"Razorpay {kind} list query failed for account {account}: {e}")
+
+        fetch: List[_Outstanding] = []
+        for item in pending:
+            if budget.try_acquire():
+                fetch.append(item)
+            else:
+                # Out of budget: try again once a token is available
+                self.deferred_polls += 1
+                self._schedule_poll(item, self._jittered(max(budget.wait_time(), 1.0)))
+
+        async def get(item: _Outstanding) -> None:
+            self.api_calls[account] += 1
+            try:
+                if kind == PAYMENT_LINK:
+                    results[item.entity_id] = await poller.get_payment_link_status(item.entity_id)
+                else:
+                    results[item.entity_id] = await poller.get_refund_status(item.entity_id)
+            except Exception as e:
+                logger.warning(f"Razorpay {kind} {item.entity_id} status query failed: {e}")
+
+        await asyncio.gather(*(get(item) for item in fetch))
+
+        queried = {item.entity_id for item in fetch} | set(results)
+        for item in items:
+            if item.entity_id not in queried:
+                continue  # deferred
+            item.polls += 1
+            result = results.get(item.entity_id)
+            if result is not None and is_terminal(result):
+                self._settle(kind, item.entity_id, result, "poll")
+            elif self._outstanding.get((kind, item.entity_id)) is item:
+                item.interval = min(item.interval * self.backoff, self.max_poll_interval)
+                self._schedule_poll(item, self._jittered(item.interval))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get settlement tracking statistics."""
+        return {
+            "outstanding": len(self._outstanding),
+            "webhook_settlements": self.webhook_settlements,
+            "poll_settlements": self.poll_settlements,
+            "api_calls": dict(self.api_calls),
+            "deferred_polls": self.deferred_polls,
+        }
+
+
+_tracker: Optional[SettlementTracker] = None
+
+
+def get_settlement_tracker() -> Optional[SettlementTracker]:
+    """The process-wide tracker, if one was installed."""
+    return _tracker
+
+
+def set_settlement_tracker(tracker: Optional[SettlementTracker]) -> None:
+    """Install (or clear) the process-wide tracker used by the webhook route."""
+    global _tracker
+    _tracker = tracker
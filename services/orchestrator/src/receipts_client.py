@@ -5,7 +5,7 @@ Receipts service client for writing execution receipts.
 import logging
 from typing import Dict, Any
 
-import httpx
+from .http_pool import get_http_client
 
 logger = logging.getLogger(__name__)
 
@@ -31,19 +31,19 @@ async def write_receipt(
     """
     logger.info(f"Writing receipt for tenant={tenant_id}")
     
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        response = await client.post(
-            f"{receipts_base.rstrip('/')}/v1/receipts",
-            json=payload,
-            headers={
-                "Content-Type": "application/json",
-                "X-Tenant-ID": tenant_id
-            }
-        )
-        response.raise_for_status()
-        
-        result = response.json()
-        receipt_id = result.get("receipt_id", result.get("id"))
-        
-        logger.info(f"Receipt written: {receipt_id}")
-        return result
+    client = get_http_client(receipts_base)
+    response = await client.post(
+        "/v1/receipts",
+        json=payload,
+        headers={
+            "Content-Type": "application/json",
+            "X-Tenant-ID": tenant_id
+        }
+    )
+    response.raise_for_status()
+    
+    result = response.json()
+    receipt_id = result.get("receipt_id", result.get("id"))
+    
+    logger.info(f"Receipt written: {receipt_id}")
+    return result
@@ -3,7 +3,7 @@
 import asyncio
 import logging
 from datetime import datetime, timezone, timedelta
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from uuid import UUID
 
 try:
@@ -22,7 +22,7 @@ try:
     from .receipts_client import write_receipt
     from .plan_transformer_new import to_portia_plan
     from .captokens_client import verify_token
-    # from .execution_monitor import ExecutionMonitor  # Skip for now
+    from .execution_monitor import ExecutionMonitor
 except ImportError:
     from execution_monitor_standalone import ExecutionMonitor
 from models import (
@@ -53,25 +53,31 @@ class OrchestratorService:
         self,
         redis_manager: Optional[Any] = None,
         event_bus: Optional[Any] = None,
+        hook_timeout: float = 10.0,
     ):
         """Initialize orchestrator service.
         
         Args:
             redis_manager: Redis manager for caching and idempotency
             event_bus: Event bus for notifications
+            hook_timeout: Default timeout in seconds for a single hook
         """
         self.redis_manager = redis_manager
         self.event_bus = event_bus
+        self.hook_timeout = hook_timeout
         
         # Initialize components
         self.plan_transformer = PlanTransformer()
         self.capability_validator = CapabilityValidator()
-        self.clarifications_bridge = ClarificationsBridge(event_bus=event_bus)
         self.retry_handler = RetryHandler(redis_manager=redis_manager)
         self.execution_monitor = ExecutionMonitor(
             redis_manager=redis_manager,
             event_bus=event_bus,
         )
+        self.clarifications_bridge = ClarificationsBridge(
+            event_bus=event_bus,
+            on_run_changed=self.notify_run_changed,
+        )
         
         # Execution tracking
         self._active_executions: Dict[str, PortiaPlanRun] = {}
@@ -93,24 +99,45 @@ class OrchestratorService:
         Raises:
             OrchestratorServiceError: If execution fails
         """
+        idempotency_key = None
+        stage_tasks: List[asyncio.Task] = []
         try:
-            # Check idempotency if enabled
+            # Stage 1: idempotency lookup, capability validation and the plan
+            # transform are independent, so they run concurrently. Results
+            # are consumed in a fixed order (cached response, then
+            # validation, then transform) so the outcome never depends on
+            # which finishes first.
+            lookup_task = None
             if not request.dry_run:
-                idempotency_key = await self.retry_handler.generate_idempotency_key(
-                    tenant_id=request.tenant_id,
-                    request_data=request.model_dump(),
+                lookup_task = asyncio.create_task(self._lookup_idempotent_response(request))
+                stage_tasks.append(lookup_task)
+            
+            validation_task = None
+            if request.validate_capabilities:
+                validation_task = asyncio.create_task(
+                    self._validate_execution_capabilities_with_tokens(request, executable_plan)
                 )
-                
-                cached_response = await self.retry_handler.check_idempotency(idempotency_key)
+                stage_tasks.append(validation_task)
+            
+            # Transform ExecutablePlan to Portia format (CPU work, off the loop)
+            transform_task = asyncio.create_task(asyncio.to_thread(
+                self.plan_transformer.transform_executable_plan,
+                executable_plan=executable_plan,
+                tenant_id=request.tenant_id,
+                triggered_by=str(request.triggered_by),
+            ))
+            stage_tasks.append(transform_task)
+            
+            # Check idempotency if enabled
+            if lookup_task is not None:
+                idempotency_key, cached_response = await lookup_task
                 if cached_response:
                     logger.info(f"Returning cached response for tenant {request.tenant_id}")
                     return ExecutionResponse(**cached_response)
             
             # PRE-EXECUTION CAPABILITY TOKEN VALIDATION
-            if request.validate_capabilities:
-                validation_result = await self._validate_execution_capabilities_with_tokens(
-                    request, executable_plan
-                )
+            if validation_task is not None:
+                validation_result = await validation_task
                 if not validation_result.valid:
                     raise OrchestratorServiceError(
                         f"Pre-execution capability validation failed: {validation_result.error_message}"
@@ -119,47 +146,39 @@ class OrchestratorService:
                 # Track capabilities that will be used
                 logger.info(f"Validated capabilities for execution: {validation_result.capabilities}")
             
-            # Execute pre-execution hooks
+            portia_plan = await transform_task
+            
+            # Stage 2: pre-execution hooks, once the plan is accepted
             await self._execute_hooks(request.hooks, "pre_execution", {
                 "request": request.model_dump(),
                 "plan": executable_plan,
             })
             
-            # Transform ExecutablePlan to Portia format
-            portia_plan = self.plan_transformer.transform_executable_plan(
-                executable_plan=executable_plan,
-                tenant_id=request.tenant_id,
-                triggered_by=str(request.triggered_by),
-            )
-            
-            # Execute plan via Portia
+            # Stage 3: execute plan via Portia
             response = await self._execute_via_portia(
                 request=request,
                 portia_plan=portia_plan,
             )
             
+            # Stage 4: monitoring, idempotency result and post-execution
+            # hooks are independent of each other
+            followups = [self._execute_hooks(request.hooks, "post_execution", {
+                "request": request.model_dump(),
+                "response": response.model_dump(),
+            })]
+            
             # START EXECUTION MONITORING
             if response.success and response.run_id:
-                await self.execution_monitor.start_monitoring(
-                    run_id=response.run_id,
-                    tenant_id=request.tenant_id,
-                    plan_hash=request.plan_hash,
-                    triggered_by=request.triggered_by,
-                )
-                logger.info(f"Started monitoring execution {response.run_id}")
+                followups.append(self._start_monitoring(request, response.run_id))
             
             # Store idempotency result if successful
             if not request.dry_run and response.success:
-                await self.retry_handler.store_idempotency_result(
+                followups.append(self.retry_handler.store_idempotency_result(
                     idempotency_key=idempotency_key,
                     result=response.model_dump(),
-                )
+                ))
             
-            # Execute post-execution hooks
-            await self._execute_hooks(request.hooks, "post_execution", {
-                "request": request.model_dump(),
-                "response": response.model_dump(),
-            })
+            await asyncio.gather(*followups)
             
             return response
             
@@ -181,8 +200,37 @@ class OrchestratorService:
                 "error": error_msg,
             })
             
-            return error_response  
-  
+            return error_response
+        
+        finally:
+            # Stage 1 work left over after an early return or rejection
+            for task in stage_tasks:
+                if not task.done():
+                    task.cancel()
+            if stage_tasks:
+                await asyncio.gather(*stage_tasks, return_exceptions=True)
+    
+    async def _lookup_idempotent_response(
+        self,
+        request: ExecutionRequest,
+    ) -> Tuple[Any, Optional[Dict[str, Any]]]:
+        """Get the request's idempotency key and any cached response for it."""
+        idempotency_key = await self.retry_handler.generate_idempotency_key(
+            tenant_id=request.tenant_id,
+            request_data=request.model_dump(),
+        )
+        cached_response = await self.retry_handler.check_idempotency(idempotency_key)
+        return idempotency_key, cached_response
+    
+    async def _start_monitoring(self, request: ExecutionRequest, run_id: str) -> None:
+        await self.execution_monitor.start_monitoring(
+            run_id=run_id,
+            tenant_id=request.tenant_id,
+            plan_hash=request.plan_hash,
+            triggered_by=request.triggered_by,
+        )
+        logger.info(f"Started monitoring execution {run_id}")
+    
     async def get_execution_status(
         self,
         run_id: str,
@@ -251,6 +299,10 @@ class OrchestratorService:
             async with PortiaSDKClient() as portia_client:
                 success = await portia_client.pause_run(run_id)
                 
+                if success:
+                    # The run's status just changed; check it now instead of at its backed-off poll
+                    self.execution_monitor.notify(run_id)
+                
                 if success and self.event_bus:
                     await self.event_bus.publish(
                         subject="execution.paused",
@@ -279,6 +331,9 @@ class OrchestratorService:
             async with PortiaSDKClient() as portia_client:
                 success = await portia_client.resume_run(run_id)
                 
+                if success:
+                    self.execution_monitor.notify(run_id)
+                
                 if success and self.event_bus:
                     await self.event_bus.publish(
                         subject="execution.resumed",
@@ -336,6 +391,21 @@ class OrchestratorService:
         """
         return await self.execution_monitor.get_execution_metrics(run_id)
     
+    def notify_run_changed(self, run_id: str) -> bool:
+        """Handle a push notification that a run's status changed.
+        
+        Args:
+            run_id: Portia run ID
+            
+        Returns:
+            False if the run is not being monitored
+        """
+        return self.execution_monitor.notify(run_id)
+    
+    async def close(self) -> None:
+        """Stop execution monitoring and flush pending progress writes."""
+        await self.execution_monitor.close()
+    
     async def _validate_execution_capabilities(
         self,
         request: ExecutionRequest,
@@ -368,21 +438,53 @@ class OrchestratorService:
                 )
         
         # Validate tool allowlist for each step
-        flows = executable_plan.get('flows', [])
-        for flow in flows:
-            for step in flow.get('steps', []):
-                tool = step.get('tool')
-                if tool and allowed_tools:
-                    is_allowed = await self.capability_validator.validate_tool_allowlist(
-                        tenant_id=request.tenant_id,
-                        allowed_tools=allowed_tools,
-                        requested_tool=tool,
-                    )
-                    
-                    if not is_allowed:
-                        raise OrchestratorServiceError(
-                            f"Tool '{tool}' not allowed for tenant {request.tenant_id}"
-                        )
+        disallowed_tool = await self._find_disallowed_tool(request, executable_plan, allowed_tools)
+        if disallowed_tool:
+            raise OrchestratorServiceError(
+                f"Tool '{disallowed_tool}' not allowed for tenant {request.tenant_id}"
+            )
+    
+    async def _find_disallowed_tool(
+        self,
+        request: ExecutionRequest,
+        executable_plan: Dict[str, Any],
+        allowed_tools: List[str],
+    ) -> Optional[str]:
+        """Check every step's tool against the allowlist concurrently.
+        
+        Args:
+            request: Execution request
+            executable_plan: ExecutablePlan data
+            allowed_tools: Allowed tools from the security context
+            
+        Returns:
+            The first disallowed tool in plan order, or None
+        """
+        if not allowed_tools:
+            return None
+        
+        # Each distinct tool is checked once, in plan order
+        tools = list(dict.fromkeys(
+            step.get('tool')
+            for flow in executable_plan.get('flows', [])
+            for step in flow.get('steps', [])
+            if step.get('tool')
+        ))
+        if not tools:
+            return None
+        
+        allowed = await asyncio.gather(*(
+            self.capability_validator.validate_tool_allowlist(
+                tenant_id=request.tenant_id,
+                allowed_tools=allowed_tools,
+                requested_tool=tool,
+            )
+            for tool in tools
+        ))
+        for tool, is_allowed in zip(tools, allowed):
+            if not is_allowed:
+                return tool
+        return None
     
     async def _execute_via_portia(
         self,
@@ -426,19 +528,32 @@ class OrchestratorService:
         hook_type: str,
         context: Dict[str, Any],
     ) -> None:
-        """Execute hooks of specified type.
+        """Execute hooks of specified type concurrently.
+        
+        Each hook runs under its own timeout; a failing or slow hook is
+        logged and does not affect the others.
         
         Args:
             hooks: List of execution hooks
             hook_type: Type of hook to execute
             context: Hook execution context
         """
-        for hook in hooks:
-            if hook.hook_type == hook_type and hook.enabled:
-                try:
-                    await self._execute_single_hook(hook, context)
-                except Exception as e:
-                    logger.error(f"Hook execution failed for {hook.hook_type}: {e}")
+        selected = [hook for hook in hooks if hook.hook_type == hook_type and hook.enabled]
+        if selected:
+            await asyncio.gather(*(self._execute_hook_with_timeout(hook, context) for hook in selected))
+    
+    async def _execute_hook_with_timeout(
+        self,
+        hook: ExecutionHook,
+        context: Dict[str, Any],
+    ) -> None:
+        timeout = hook.timeout_seconds or self.hook_timeout
+        try:
+            await asyncio.wait_for(self._execute_single_hook(hook, context), timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"Hook execution timed out for {hook.hook_type} after {timeout}s")
+        except Exception as e:
+            logger.error(f"Hook execution failed for {hook.hook_type}: {e}")
     
     async def _execute_single_hook(
         self,
@@ -492,11 +607,15 @@ class OrchestratorService:
         if not required_capabilities:
             return CapabilityValidation(valid=True, capabilities=[])
         
-        # Validate capabilities with token
-        validation = await self.capability_validator.validate_execution_capabilities(
-            tenant_id=request.tenant_id,
-            required_capabilities=required_capabilities,
-            user_id=request.triggered_by,
+        # Validate capabilities with token while the per-step tool checks
+        # fan out; failures are reported in a fixed order regardless
+        validation, disallowed_tool = await asyncio.gather(
+            self.capability_validator.validate_execution_capabilities(
+                tenant_id=request.tenant_id,
+                required_capabilities=required_capabilities,
+                user_id=request.triggered_by,
+            ),
+            self._find_disallowed_tool(request, executable_plan, allowed_tools),
         )
         
         if not validation.valid:
@@ -509,23 +628,11 @@ class OrchestratorService:
                 error_message="Capability token is expired or close to expiry"
             )
         
-        # Validate tool allowlist for each step
-        flows = executable_plan.get('flows', [])
-        for flow in flows:
-            for step in flow.get('steps', []):
-                tool = step.get('tool')
-                if tool and allowed_tools:
-                    is_allowed = await self.capability_validator.validate_tool_allowlist(
-                        tenant_id=request.tenant_id,
-                        allowed_tools=allowed_tools,
-                        requested_tool=tool,
-                    )
-                    
-                    if not is_allowed:
-                        return CapabilityValidation(
-                            valid=False,
-                            error_message=f"Tool '{tool}' not allowed for tenant {request.tenant_id}"
-                        )
+        if disallowed_tool:
+            return CapabilityValidation(
+                valid=False,
+                error_message=f"Tool '{disallowed_tool}' not allowed for tenant {request.tenant_id}"
+            )
         
         return validation
     
@@ -67,6 +67,13 @@ class Settings:
         self.RAZORPAY_MCP_AUTH: str | None = os.getenv("RAZORPAY_MCP_AUTH")
         self.RAZORPAY_KEY_ID: str | None = os.getenv("RAZORPAY_KEY_ID")
         self.RAZORPAY_KEY_SECRET: str | None = os.getenv("RAZORPAY_KEY_SECRET")
+        self.RAZORPAY_WEBHOOK_SECRET: str | None = os.getenv("RAZORPAY_WEBHOOK_SECRET")
+        
+        # Razorpay settlement tracking (webhooks first, polling as fallback)
+        self.RAZORPAY_POLL_TIMEOUT_SEC = int(os.getenv("RAZORPAY_POLL_TIMEOUT_SEC", "900"))
+        self.RAZORPAY_POLL_INTERVAL_SEC = int(os.getenv("RAZORPAY_POLL_INTERVAL_SEC", "5"))
+        self.RAZORPAY_POLL_MAX_INTERVAL_SEC = int(os.getenv("RAZORPAY_POLL_MAX_INTERVAL_SEC", "300"))
+        self.RAZORPAY_POLL_BUDGET_PER_MIN = int(os.getenv("RAZORPAY_POLL_BUDGET_PER_MIN", "60"))
         
         # Additional validation for Razorpay MCP
         self._validate_razorpay_mcp()
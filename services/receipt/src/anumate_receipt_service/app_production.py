@@ -20,6 +20,8 @@ API Endpoints:
 - GET /v1/receipts/audit - Export audit logs to SIEM
 - POST /v1/retention-policies - Create retention policy
 - GET /v1/retention-policies - List retention policies
+- GET /v1/retention/buckets - Receipts per retention day-bucket
+- POST /v1/retention/sweep - Expire fully elapsed retention buckets
 
 Version: 1.0.0
 """
@@ -27,7 +29,8 @@ Version: 1.0.0
 import logging
 import os
 import uuid
-from datetime import datetime
+import time
+from datetime import date, datetime
 from typing import Optional, List, Dict, Any
 from uuid import UUID
 
@@ -40,6 +43,7 @@ from sqlalchemy import select, and_, desc, func
 from anumate_errors import ValidationError, ExecutionError, ErrorCode
 from anumate_core_config import settings
 
+from . import database
 from .database import (
     init_database,
     create_tables,
@@ -55,17 +59,24 @@ from .schemas import (
     ReceiptResponse,
     ReceiptVerifyRequest,
     ReceiptVerifyResponse,
+    ReceiptBatchVerifyRequest,
+    ReceiptBatchVerifyResponse,
     AuditLogEntry,
     AuditExportRequest,
     AuditExportResponse,
     RetentionPolicyRequest,
     RetentionPolicyResponse,
+    RetentionBucketResponse,
+    RetentionSweepRequest,
+    RetentionSweepResponse,
     WormStorageRequest,
     WormStorageResponse,
     HealthResponse,
     ErrorResponse
 )
 from .receipt_service import ReceiptService, WormStorageService
+from .worm_log import WormLockedError
+from .retention import RetentionIndex
 
 # Configure logging
 logging.basicConfig(
@@ -97,8 +108,8 @@ def create_app() -> FastAPI:
     )
     
     # Initialize services
-    receipt_service = ReceiptService()
     worm_service = WormStorageService()
+    receipt_service = ReceiptService(worm_service=worm_service)
     
     # Startup and shutdown events
     @app.on_event("startup")
@@ -116,6 +127,16 @@ def create_app() -> FastAPI:
             await create_tables()
             await setup_row_level_security()
             
+            # The first process to open the WORM log writes it; others verify read-only
+            worm_service.open()
+            
+            # Audit entries from concurrent requests share commits
+            if os.getenv("RECEIPT_AUDIT_GROUP_COMMIT", "true").lower() == "true":
+                await receipt_service.start_audit_writer(
+                    database.async_session_factory,
+                    max_wait_ms=float(os.getenv("RECEIPT_AUDIT_MAX_WAIT_MS", "5"))
+                )
+            
             # Set startup time
             app.state.startup_time = datetime.utcnow()
             app.state.receipt_service = receipt_service
@@ -130,6 +151,8 @@ def create_app() -> FastAPI:
     @app.on_event("shutdown")  
     async def shutdown_event():
         """Cleanup resources on shutdown."""
+        await receipt_service.stop_audit_writer()
+        worm_service.close()
         await close_database()
         logger.info("Receipt service shutdown complete")
     
@@ -187,8 +210,11 @@ def create_app() -> FastAPI:
                 "create_receipt": "POST /v1/receipts",
                 "get_receipt": "GET /v1/receipts/{receipt_id}",
                 "verify_receipt": "POST /v1/receipts/{receipt_id}/verify",
+                "verify_receipts": "POST /v1/receipts/verify",
                 "audit_logs": "GET /v1/receipts/audit",
-                "retention_policies": "GET /v1/retention-policies"
+                "retention_policies": "GET /v1/retention-policies",
+                "retention_buckets": "GET /v1/retention/buckets",
+                "retention_sweep": "POST /v1/retention/sweep"
             },
             "features": [
                 "Ed25519 digital signatures",
@@ -229,6 +255,41 @@ def create_app() -> FastAPI:
                 detail={"error": ErrorCode.EXECUTION_ERROR, "message": "Failed to create receipt"}
             )
     
+    @app.post("/v1/receipts/verify", response_model=ReceiptBatchVerifyResponse)
+    async def verify_receipts(
+        verify_request: ReceiptBatchVerifyRequest,
+        tenant_id: UUID = Depends(get_tenant_id),
+        session: AsyncSession = Depends(get_async_session)
+    ):
+        """Verify integrity and signatures of many receipts in one call."""
+        try:
+            await set_tenant_context(session, str(tenant_id))
+            
+            started = time.perf_counter()
+            results = await app.state.receipt_service.verify_receipts(
+                session,
+                tenant_id,
+                verify_request.receipt_ids,
+                verify_signature=verify_request.verify_signature,
+                update_timestamp=verify_request.update_verification_timestamp
+            )
+            valid = sum(1 for result in results if result.is_valid)
+            
+            return ReceiptBatchVerifyResponse(
+                results=results,
+                total=len(results),
+                valid=valid,
+                invalid=len(results) - valid,
+                duration_ms=(time.perf_counter() - started) * 1000
+            )
+            
+        except Exception as e:
+            logger.error(f"Failed to verify receipts: {e}")
+            raise HTTPException(
+                status_code=500,
+                detail={"error": ErrorCode.EXECUTION_ERROR, "message": "Failed to verify receipts"}
+            )
+    
     # Audit logging endpoints - must come before {receipt_id} route
     @app.get("/v1/receipts/audit", response_model=List[AuditLogEntry])
     async def get_audit_logs(
@@ -391,6 +452,7 @@ def create_app() -> FastAPI:
             
             session.add(policy)
             await session.flush()
+            app.state.receipt_service.retention_policies.invalidate(tenant_id)
             
             return RetentionPolicyResponse.model_validate(policy)
             
@@ -426,6 +488,49 @@ def create_app() -> FastAPI:
                 detail={"error": ErrorCode.EXECUTION_ERROR, "message": "Failed to list retention policies"}
             )
     
+    @app.get("/v1/retention/buckets", response_model=List[RetentionBucketResponse])
+    async def list_retention_buckets(
+        tenant_id: UUID = Depends(get_tenant_id),
+        start: Optional[date] = Query(None, description="First retention day to include"),
+        end: Optional[date] = Query(None, description="Last retention day to include"),
+        session: AsyncSession = Depends(get_async_session)
+    ):
+        """Count receipts by the day their retention ends."""
+        try:
+            await set_tenant_context(session, str(tenant_id))
+            
+            buckets = await RetentionIndex(session).bucket_counts(tenant_id, start, end)
+            return [RetentionBucketResponse(**bucket) for bucket in buckets]
+            
+        except Exception as e:
+            logger.error(f"Failed to list retention buckets: {e}")
+            raise HTTPException(
+                status_code=500,
+                detail={"error": ErrorCode.EXECUTION_ERROR, "message": "Failed to list retention buckets"}
+            )
+    
+    @app.post("/v1/retention/sweep", response_model=RetentionSweepResponse)
+    async def sweep_retention(
+        sweep_request: RetentionSweepRequest,
+        tenant_id: UUID = Depends(get_tenant_id),
+        session: AsyncSession = Depends(get_async_session)
+    ):
+        """Expire every retention bucket whose day has passed."""
+        try:
+            await set_tenant_context(session, str(tenant_id))
+            
+            result = await RetentionIndex(session).sweep(
+                tenant_id, since=sweep_request.since, dry_run=sweep_request.dry_run
+            )
+            return RetentionSweepResponse(**result)
+            
+        except Exception as e:
+            logger.error(f"Failed to sweep retention buckets: {e}")
+            raise HTTPException(
+                status_code=500,
+                detail={"error": ErrorCode.EXECUTION_ERROR, "message": "Failed to sweep retention buckets"}
+            )
+    
     # WORM storage endpoints
     @app.post("/v1/receipts/{receipt_id}/worm", response_model=WormStorageResponse)
     async def write_to_worm_storage(
@@ -475,6 +580,17 @@ def create_app() -> FastAPI:
             
         except HTTPException:
             raise
+        except ValidationError as e:
+            raise HTTPException(
+                status_code=400,
+                detail={"error": ErrorCode.VALIDATION_ERROR, "message": str(e)}
+            )
+        except WormLockedError as e:
+            logger.warning(f"WORM write refused: {e}")
+            raise HTTPException(
+                status_code=503,
+                detail={"error": ErrorCode.EXECUTION_ERROR, "message": "WORM storage is written by another replica; retry"}
+            )
         except Exception as e:
             logger.error(f"Failed to write to WORM storage: {e}")
             raise HTTPException(
@@ -0,0 +1,193 @@
+"""
+Group-Commit Audit Writer
+=========================
+
+Receipt audit entries from concurrent requests are gathered and inserted in
+one transaction instead of one durable write per entry. Each caller awaits
+the commit that contains its entry, so an acknowledged entry is durable, but
+callers never wait for each other's transactions one by one. A new receipt
+is submitted together with its ``created`` entry, so the receipt and its
+audit row share one group commit.
+
+A batch closes when ``max_batch_size`` entries are pending or ``max_wait_ms``
+after its first entry arrived, whichever comes first; while one batch
+commits, the next one fills up.
+
+Ordering: every audit row, group-committed or written in a request's own
+transaction, is stamped by ``audit_timestamp()``, strictly increasing within
+the process, so the audit endpoints' ``ORDER BY created_at`` returns entries
+in the order they were logged.
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import insert, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .models import Receipt, ReceiptAuditLog
+
+logger = logging.getLogger(__name__)
+
+_last_stamp: Optional[datetime] = None
+
+
+def audit_timestamp() -> datetime:
+    """Current UTC time, strictly increasing across calls in this process."""
+    global _last_stamp
+    now = datetime.now(timezone.utc)
+    if _last_stamp is not None and now <= _last_stamp:
+        now = _last_stamp + timedelta(microseconds=1)
+    _last_stamp = now
+    return now
+
+
+_Item = Tuple[Optional[Dict[str, Any]], Dict[str, Any], asyncio.Future]
+
+
+class GroupCommitAuditWriter:
+    """
+    Batches audit log inserts into shared transactions.
+
+    Features:
+    - One transaction per batch, one acknowledgment per entry
+    - Receipts committed in the same transaction as their audit entry
+    - Bounded wait before a batch is committed
+    - Monotonic ``created_at`` stamps preserve logging order
+    - A failing entry is isolated instead of failing its whole batch
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession],
+        max_batch_size: int = 256,
+        max_wait_ms: float = 5.0,
+    ):
+        self.session_factory = session_factory
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue: "asyncio.Queue[_Item]" = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+        self.batches_committed = 0
+        self.entries_committed = 0
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info(
+                f"Audit group commit started (batch {self.max_batch_size}, wait {self.max_wait * 1000:.1f}ms)"
+            )
+
+    async def stop(self) -> None:
+        """Commit pending entries and stop."""
+        if self._task is not None:
+            await self._queue.join()
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def write(self, receipt_row: Optional[Dict[str, Any]] = None, **entry: Any) -> uuid.UUID:
+        """
+        Log an audit entry and wait until it is committed.
+
+        Args:
+            receipt_row: ``Receipt`` column values to insert in the same
+                transaction, ahead of the entry that references it
+            entry: ``ReceiptAuditLog`` column values
+
+        Returns:
+            The entry's audit ID
+        """
+        if self._task is None:
+            raise RuntimeError("Audit writer is not running")
+
+        created_at = audit_timestamp()
+        row = {"audit_id": uuid.uuid4(), "created_at": created_at, "updated_at": created_at, **entry}
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((receipt_row, row, future))
+        await future
+        return row["audit_id"]
+
+    async def _run(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                await self._commit(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _commit(self, batch: List[_Item]) -> None:
+        try:
+            await self._insert(batch)
+        except Exception as e:
+            if len(batch) == 1:
+                self._resolve(batch, e)
+                return
+            # Isolate the failing entries; the rest still get committed.
+            logger.warning(f"Audit batch of {len(batch)} failed ({e}); retrying entries individually")
+            for item in batch:
+                await self._commit([item])
+            return
+
+        self.batches_committed += 1
+        self.entries_committed += len(batch)
+        self._resolve(batch, None)
+
+    async def _insert(self, batch: List[_Item]) -> None:
+        receipts_by_tenant: Dict[Any, List[Dict[str, Any]]] = defaultdict(list)
+        rows_by_tenant: Dict[Any, List[Dict[str, Any]]] = defaultdict(list)
+        for receipt_row, row, _ in batch:
+            if receipt_row is not None:
+                receipts_by_tenant[row["tenant_id"]].append(receipt_row)
+            rows_by_tenant[row["tenant_id"]].append(row)
+
+        async with self.session_factory() as session:
+            try:
+                for tenant_id, tenant_rows in rows_by_tenant.items():
+                    # Row-level security checks inserted rows against the tenant context.
+                    await session.execute(text(f"SET LOCAL app.current_tenant_id = '{tenant_id}'"))
+                    if receipts_by_tenant[tenant_id]:
+                        await session.execute(insert(Receipt), receipts_by_tenant[tenant_id])
+                    await session.execute(insert(ReceiptAuditLog), tenant_rows)
+                await session.commit()
+            except Exception:
+                await session.rollback()
+                raise
+
+    @staticmethod
+    def _resolve(batch: List[_Item], error: Optional[Exception]) -> None:
+        for _, _, future in batch:
+            if future.done():
+                continue
+            if error is None:
+                future.set_result(None)
+            else:
+                future.set_exception(error)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get group commit statistics."""
+        return {
+            "batches_committed": self.batches_committed,
+            "entries_committed": self.entries_committed,
+            "pending": self._queue.qsize(),
+            "average_batch_size": self.entries_committed / self.batches_committed if self.batches_committed else 0,
+        }
@@ -68,6 +68,27 @@ async def create_tables() -> None:
     
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        # Columns added after the initial schema
+        await conn.execute(text("ALTER TABLE receipts ADD COLUMN IF NOT EXISTS merkle_proof JSONB"))
+        has_retention_bucket = (await conn.execute(text(
+            "SELECT 1 FROM information_schema.columns "
+            "WHERE table_name = 'receipts' AND column_name = 'retention_bucket'"
+        ))).first() is not None
+        await conn.execute(text("ALTER TABLE receipts ADD COLUMN IF NOT EXISTS retention_bucket DATE"))
+        await conn.execute(text("ALTER TABLE receipts ADD COLUMN IF NOT EXISTS retention_policy_id UUID"))
+        await conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS idx_receipts_retention_bucket ON receipts (tenant_id, retention_bucket)"
+        ))
+        if not has_retention_bucket:
+            # Once, when the column is added: sweeps clear the bucket of receipts
+            # they keep, and those must not be put back on every start.
+            # retention_policy_id is not backfilled: whether a policy or an explicit
+            # retention_days set an older receipt's retention is not recorded, so
+            # those receipts are never auto-deleted by retention sweeps.
+            await conn.execute(text(
+                "UPDATE receipts SET retention_bucket = (retention_until AT TIME ZONE 'UTC')::date "
+                "WHERE retention_until IS NOT NULL"
+            ))
     
     logger.info("Database tables created successfully")
 
@@ -0,0 +1,213 @@
+"""
+Merkle Batch Signing for Receipts
+=================================
+
+In batching mode, receipts created within a short window become the leaves of
+a Merkle tree and only the root is signed with Ed25519. Each receipt stores
+the root signature plus an inclusion proof, so it can still be verified on its
+own and offline: hash the receipt content, walk the proof up to the root, and
+check the root signature.
+
+Tree construction follows RFC 6962: leaves are ``SHA-256(0x00 || content_hash)``,
+interior nodes ``SHA-256(0x01 || left || right)``, and an unpaired node is
+promoted to the next level unchanged.
+
+The stored proof (``Receipt.merkle_proof``) looks like::
+
+    {
+        "version": 1,
+        "batch_id": "...",
+        "merkle_root": "<hex>",
+        "leaf_count": 37,
+        "leaf_index": 5,
+        "path": [{"side": "left", "hash": "<hex>"}, ...]
+    }
+
+and ``Receipt.signature`` holds the Ed25519 signature over
+``batch_signing_payload(proof)``.
+"""
+
+import asyncio
+import hashlib
+import logging
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey, Ed25519PublicKey
+
+from .crypto_utils import canonical_json_serialize
+
+logger = logging.getLogger(__name__)
+
+MERKLE_PROOF_VERSION = 1
+
+
+def leaf_hash(content_hash: str) -> bytes:
+    """Leaf for a receipt, from its hex content hash."""
+    return hashlib.sha256(b"\x00" + bytes.fromhex(content_hash)).digest()
+
+
+def node_hash(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(b"\x01" + left + right).digest()
+
+
+def build_tree(content_hashes: Sequence[str]) -> Tuple[bytes, List[List[Dict[str, str]]]]:
+    """
+    Build a Merkle tree over receipt content hashes.
+
+    Returns:
+        Root hash and one inclusion path per leaf, in input order
+    """
+    if not content_hashes:
+        raise ValueError("Cannot build a Merkle tree without leaves")
+
+    level = [leaf_hash(h) for h in content_hashes]
+    # positions[i] is leaf i's node index on the current level
+    positions = list(range(len(level)))
+    paths: List[List[Dict[str, str]]] = [[] for _ in level]
+
+    while len(level) > 1:
+        for leaf, position in enumerate(positions):
+            sibling = position ^ 1
+            if sibling < len(level):
+                side = "left" if sibling < position else "right"
+                paths[leaf].append({"side": side, "hash": level[sibling].hex()})
+            positions[leaf] = position // 2
+        level = [
+            node_hash(level[i], level[i + 1]) if i + 1 < len(level) else level[i]
+            for i in range(0, len(level), 2)
+        ]
+
+    return level[0], paths
+
+
+def root_from_path(content_hash: str, path: Sequence[Dict[str, str]]) -> bytes:
+    """Recompute the root from a leaf and its inclusion path."""
+    node = leaf_hash(content_hash)
+    for step in path:
+        sibling = bytes.fromhex(step["hash"])
+        if step["side"] == "left":
+            node = node_hash(sibling, node)
+        elif step["side"] == "right":
+            node = node_hash(node, sibling)
+        else:
+            raise ValueError(f"Invalid proof step side: {step['side']}")
+    return node
+
+
+def verify_inclusion(content_hash: str, proof: Dict[str, Any]) -> bool:
+    """Check that ``content_hash`` is a leaf of the proof's Merkle root."""
+    try:
+        return root_from_path(content_hash, proof["path"]).hex() == proof["merkle_root"]
+    except (KeyError, TypeError, ValueError):
+        return False
+
+
+def batch_signing_payload(proof: Dict[str, Any]) -> bytes:
+    """Bytes signed for a batch: the root bound to its batch ID and size."""
+    return canonical_json_serialize({
+        "version": proof["version"],
+        "batch_id": proof["batch_id"],
+        "merkle_root": proof["merkle_root"],
+        "leaf_count": proof["leaf_count"],
+    })
+
+
+def verify_batch_signature(public_key: Ed25519PublicKey, proof: Dict[str, Any], signature: str) -> bool:
+    """Check the Ed25519 root signature of a batched receipt."""
+    try:
+        public_key.verify(bytes.fromhex(signature), batch_signing_payload(proof))
+        return True
+    except Exception:
+        return False
+
+
+class MerkleBatchSigner:
+    """
+    Collects receipt hashes for a short window and signs them as one batch.
+
+    Features:
+    - One Ed25519 signature per batch instead of per receipt
+    - Batch closes after ``window_seconds`` or at ``max_batch_size`` leaves
+    - Callers wait only for their own batch; failures propagate to each caller
+    """
+
+    def __init__(
+        self,
+        private_key: Ed25519PrivateKey,
+        window_seconds: float = 0.05,
+        max_batch_size: int = 1024,
+    ):
+        self._private_key = private_key
+        self.window_seconds = window_seconds
+        self.max_batch_size = max_batch_size
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.batches_signed = 0
+        self.receipts_signed = 0
+
+    async def sign(self, content_hash: str) -> Tuple[str, Dict[str, Any]]:
+        """
+        Add a receipt to the current batch and wait for the batch to be signed.
+
+        Returns:
+            Hex root signature and the receipt's inclusion proof
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((content_hash, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._close_batch()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window_seconds, self._close_batch)
+
+        return await future
+
+    def _close_batch(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        try:
+            started = time.perf_counter()
+            root, paths = build_tree([content_hash for content_hash, _ in batch])
+            batch_id = str(uuid.uuid4())
+            header = {
+                "version": MERKLE_PROOF_VERSION,
+                "batch_id": batch_id,
+                "merkle_root": root.hex(),
+                "leaf_count": len(batch),
+            }
+            signature = self._private_key.sign(batch_signing_payload(header)).hex()
+        except Exception as e:
+            logger.error(f"Failed to sign receipt batch: {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for leaf_index, ((_, future), path) in enumerate(zip(batch, paths)):
+            if not future.done():
+                future.set_result((signature, {**header, "leaf_index": leaf_index, "path": path}))
+
+        self.batches_signed += 1
+        self.receipts_signed += len(batch)
+        logger.debug(
+            f"Signed receipt batch {batch_id} with {len(batch)} receipts "
+            f"in {(time.perf_counter() - started) * 1000:.2f}ms"
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get batch signing statistics."""
+        return {
+            "batches_signed": self.batches_signed,
+            "receipts_signed": self.receipts_signed,
+            "pending": len(self._pending),
+            "window_seconds": self.window_seconds,
+            "max_batch_size": self.max_batch_size,
+        }
@@ -12,6 +12,7 @@ from typing import Optional, Dict, Any
 from sqlalchemy import (
     Column,
     String,
+    Date,
     DateTime,
     Boolean,
     Text,
@@ -64,6 +65,7 @@ class Receipt(Base, TimestampMixin, TenantMixin):
     content_hash = Column(String(64), nullable=False)  # SHA-256 hash of receipt_data
     signature = Column(Text, nullable=False)  # Ed25519 signature for integrity
     signing_key_id = Column(String(100), nullable=False)  # Key identifier used for signing
+    merkle_proof = Column(JSONB, nullable=True)  # Inclusion proof when signed as part of a batch
     
     # WORM storage tracking
     worm_storage_path = Column(String(500), nullable=True)  # Path in WORM storage
@@ -72,6 +74,8 @@ class Receipt(Base, TimestampMixin, TenantMixin):
     
     # Audit and compliance
     retention_until = Column(DateTime(timezone=True), nullable=True)  # Retention policy
+    retention_bucket = Column(Date, nullable=True)  # UTC day retention ends, for day-bucket sweeps
+    retention_policy_id = Column(UUID(as_uuid=True), nullable=True)  # Policy applied at creation
     compliance_tags = Column(JSONB, nullable=True)  # Compliance metadata
     
     # Status tracking
@@ -90,6 +94,7 @@ class Receipt(Base, TimestampMixin, TenantMixin):
         Index("idx_receipts_hash", "content_hash"),
         Index("idx_receipts_created", "created_at"),
         Index("idx_receipts_retention", "retention_until"),
+        Index("idx_receipts_retention_bucket", "tenant_id", "retention_bucket"),
         Index("idx_receipts_verification", "is_verified", "last_verified_at"),
         UniqueConstraint("tenant_id", "content_hash", name="uq_receipts_tenant_hash"),
         CheckConstraint("verification_failures >= 0", name="ck_receipts_verification_failures"),
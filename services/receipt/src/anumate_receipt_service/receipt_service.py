@@ -4,10 +4,16 @@ Receipt Generation and Verification Service
 
 Core service for creating tamper-evident receipts with cryptographic integrity,
 digital signatures, and WORM storage integration.
+
+With batch signing enabled, receipts are signed as Merkle batches (see
+``merkle.py``): each receipt carries the batch root signature and its own
+inclusion proof instead of an individual signature.
 """
 
+import asyncio
 import json
 import logging
+import os
 import hashlib
 import base64
 from datetime import datetime, timedelta
@@ -23,7 +29,11 @@ from cryptography.hazmat.primitives import serialization
 from anumate_errors import ValidationError, ExecutionError
 
 from .crypto_utils import canonical_json_serialize, sha256_hash
-from .models import Receipt, ReceiptAuditLog, RetentionPolicy
+from .audit_writer import GroupCommitAuditWriter, audit_timestamp
+from .merkle import MerkleBatchSigner, verify_batch_signature, verify_inclusion
+from .worm_log import SegmentedWormLog, WormLockedError
+from .models import Receipt, ReceiptAuditLog
+from .retention import RetentionPolicyCache, retention_bucket
 from .schemas import ReceiptCreateRequest, ReceiptVerifyResponse
 
 logger = logging.getLogger(__name__)
@@ -37,18 +47,30 @@ class ReceiptService:
     with comprehensive audit logging and multi-tenant support.
     """
     
-    def __init__(self, signing_key_env_var: str = "RECEIPT_SIGNING_KEY", key_id: str = "receipt-key-2024"):
+    def __init__(
+        self,
+        signing_key_env_var: str = "RECEIPT_SIGNING_KEY",
+        key_id: str = "receipt-key-2024",
+        batch_window_ms: Optional[float] = None,
+        max_batch_size: int = 1024,
+        worm_service: Optional["WormStorageService"] = None
+    ):
         """
         Initialize the receipt service.
         
         Args:
             signing_key_env_var: Environment variable containing Ed25519 private key (base64 encoded PEM)
             key_id: Identifier for the signing key
+            batch_window_ms: Enable Merkle batch signing with this collection window
+                (default: ``RECEIPT_BATCH_WINDOW_MS``; unset or 0 signs each receipt)
+            max_batch_size: Maximum receipts per signed batch
+            worm_service: WORM storage checked by ``verify_receipt`` for receipts
+                that have a WORM copy
         """
         self.key_id = key_id
+        self.worm_service = worm_service
         try:
             # Load private key from environment variable
-            import os
             key_b64 = os.environ[signing_key_env_var]
             key_pem = base64.b64decode(key_b64)
             
@@ -61,6 +83,32 @@ class ReceiptService:
         except Exception as e:
             logger.error(f"Failed to load signing key: {e}")
             raise ExecutionError(f"Receipt service initialization failed: {e}")
+        
+        if batch_window_ms is None:
+            batch_window_ms = float(os.environ.get("RECEIPT_BATCH_WINDOW_MS", "0"))
+        self._batch_signer: Optional[MerkleBatchSigner] = None
+        if batch_window_ms > 0:
+            self._batch_signer = MerkleBatchSigner(
+                self._private_key,
+                window_seconds=batch_window_ms / 1000,
+                max_batch_size=max_batch_size
+            )
+            logger.info(f"Receipt batch signing enabled ({batch_window_ms}ms window, max {max_batch_size})")
+        
+        self._audit_writer: Optional[GroupCommitAuditWriter] = None
+        self.retention_policies = RetentionPolicyCache()
+    
+    async def start_audit_writer(self, session_factory, max_batch_size: int = 256, max_wait_ms: float = 5.0) -> None:
+        """Group-commit audit entries from concurrent requests (see ``audit_writer.py``)."""
+        if self._audit_writer is None:
+            self._audit_writer = GroupCommitAuditWriter(session_factory, max_batch_size, max_wait_ms)
+            await self._audit_writer.start()
+    
+    async def stop_audit_writer(self) -> None:
+        """Commit pending audit entries and go back to in-transaction audit logging."""
+        if self._audit_writer is not None:
+            writer, self._audit_writer = self._audit_writer, None
+            await writer.stop()
     
     async def create_receipt(
         self,
@@ -98,22 +146,30 @@ class ReceiptService:
             serialized_content = canonical_json_serialize(receipt_data)
             content_hash = sha256_hash(serialized_content).hex()
             
-            # Generate Ed25519 signature
-            signature_bytes = self._private_key.sign(serialized_content)
-            signature = signature_bytes.hex()
+            # Generate Ed25519 signature, per receipt or over the batch root
+            merkle_proof = None
+            if self._batch_signer is not None:
+                signature, merkle_proof = await self._batch_signer.sign(content_hash)
+            else:
+                signature_bytes = self._private_key.sign(serialized_content)
+                signature = signature_bytes.hex()
             
             # Determine retention period
             retention_until = None
+            retention_policy_id = None
             if request.retention_days:
                 retention_until = datetime.utcnow() + timedelta(days=request.retention_days)
             else:
                 # Apply tenant retention policy
-                retention_policy = await self._get_retention_policy(session, tenant_id, request.receipt_type)
+                retention_policy = await self.retention_policies.policy_for(session, tenant_id, request.receipt_type)
                 if retention_policy:
                     retention_until = datetime.utcnow() + timedelta(days=retention_policy.retention_days)
+                    retention_policy_id = retention_policy.policy_id
             
             # Create receipt record
-            receipt = Receipt(
+            created_at = audit_timestamp()
+            receipt_row = dict(
+                receipt_id=uuid4(),
                 tenant_id=tenant_id,
                 receipt_type=request.receipt_type,
                 subject=request.subject,
@@ -122,31 +178,42 @@ class ReceiptService:
                 content_hash=content_hash,
                 signature=signature,
                 signing_key_id=self.key_id,
+                merkle_proof=merkle_proof,
                 retention_until=retention_until,
+                retention_bucket=retention_bucket(retention_until) if retention_until else None,
+                retention_policy_id=retention_policy_id,
                 compliance_tags=request.compliance_tags,
                 is_verified=True,
-                last_verified_at=datetime.utcnow()
+                verification_failures=0,
+                last_verified_at=datetime.utcnow(),
+                created_at=created_at,
+                updated_at=created_at
             )
-            
-            session.add(receipt)
-            await session.flush()  # Get the generated receipt_id
-            
-            # Log receipt creation
-            await self._log_audit_event(
-                session,
-                receipt.receipt_id,
-                tenant_id,
-                "created",
-                "receipt-service",
+            receipt = Receipt(**receipt_row)
+            audit_entry = dict(
+                receipt_id=receipt.receipt_id,
+                tenant_id=tenant_id,
+                event_type="created",
+                event_source="receipt-service",
                 success=True,
                 event_data={
                     "receipt_type": request.receipt_type,
                     "content_hash": content_hash,
                     "signing_key_id": self.key_id,
+                    "merkle_batch_id": merkle_proof["batch_id"] if merkle_proof else None,
                     "retention_until": retention_until.isoformat() if retention_until else None
                 }
             )
             
+            if self._audit_writer is not None:
+                # The receipt and its audit entry are committed together in the
+                # next group commit; the caller's session is not used for either.
+                await self._audit_writer.write(receipt_row=receipt_row, **audit_entry)
+            else:
+                session.add(receipt)
+                await session.flush()
+                await self._log_audit_event(session, **audit_entry)
+            
             logger.info(f"Created receipt {receipt.receipt_id} for tenant {tenant_id}")
             return receipt
             
@@ -201,32 +268,16 @@ class ReceiptService:
             if not receipt:
                 raise ValidationError(f"Receipt {receipt_id} not found")
             
-            # Verify content hash
-            try:
-                serialized_content = canonical_json_serialize(receipt.receipt_data)
-                calculated_hash = sha256_hash(serialized_content).hex()
-                content_hash_valid = calculated_hash == receipt.content_hash
-                
-                if not content_hash_valid:
-                    verification_errors.append(f"Content hash mismatch: expected {receipt.content_hash}, got {calculated_hash}")
-                    
-            except Exception as e:
-                verification_errors.append(f"Content hash verification failed: {e}")
-            
-            # Verify signature
-            if verify_signature:
-                try:
-                    signature_bytes = bytes.fromhex(receipt.signature)
-                    serialized_content = canonical_json_serialize(receipt.receipt_data)
-                    
-                    # Verify with public key (cryptography library)
-                    self._public_key.verify(signature_bytes, serialized_content)
-                    signature_valid = True
-                    
-                except Exception as e:
-                    verification_errors.append(f"Signature verification failed: {e}")
-            else:
-                signature_valid = True  # Skip signature verification if not requested
+            content_hash_valid, signature_valid, verification_errors = self._check_receipt(
+                receipt, verify_signature
+            )
+            
+            # Compare against the WORM copy, if the receipt has one
+            worm_storage_valid = None
+            if receipt.worm_storage_path and self.worm_service is not None:
+                worm_storage_valid = await self.worm_service.verify_worm_storage(session, receipt)
+                if not worm_storage_valid:
+                    verification_errors.append("WORM copy is missing or does not match the receipt")
             
             # Overall validity
             is_valid = content_hash_valid and signature_valid and len(verification_errors) == 0
@@ -241,7 +292,7 @@ class ReceiptService:
                     receipt.is_verified = True
                 await session.flush()
             
-            # Log verification
+            # Log verification in the same transaction as the status update
             await self._log_audit_event(
                 session,
                 receipt_id,
@@ -249,9 +300,11 @@ class ReceiptService:
                 "verified",
                 "receipt-service",
                 success=is_valid,
+                in_transaction=True,
                 event_data={
                     "content_hash_valid": content_hash_valid,
                     "signature_valid": signature_valid,
+                    "worm_storage_valid": worm_storage_valid,
                     "verification_errors": verification_errors
                 }
             )
@@ -261,7 +314,7 @@ class ReceiptService:
                 is_valid=is_valid,
                 content_hash_valid=content_hash_valid,
                 signature_valid=signature_valid,
-                worm_storage_valid=None,  # TODO: Implement WORM verification
+                worm_storage_valid=worm_storage_valid,
                 verification_errors=verification_errors,
                 verified_at=datetime.utcnow()
             )
@@ -281,26 +334,178 @@ class ReceiptService:
             )
             raise ExecutionError(f"Receipt verification failed: {e}")
     
-    async def _get_retention_policy(
+    async def verify_receipts(
         self,
         session: AsyncSession,
         tenant_id: UUID,
-        receipt_type: str
-    ) -> Optional[RetentionPolicy]:
-        """Get the applicable retention policy for a receipt type."""
-        result = await session.execute(
-            select(RetentionPolicy)
-            .where(
-                and_(
-                    RetentionPolicy.tenant_id == tenant_id,
-                    RetentionPolicy.is_active == True,
-                    RetentionPolicy.receipt_types.contains([receipt_type])
+        receipt_ids: List[UUID],
+        verify_signature: bool = True,
+        update_timestamp: bool = True
+    ) -> List[ReceiptVerifyResponse]:
+        """
+        Verify many receipts with one query and one flush.
+        
+        Each receipt is serialized once; batch-signed receipts from the same
+        Merkle batch share one root signature check. Receipts that do not
+        exist get an invalid result instead of failing the whole call.
+        
+        Args:
+            session: Database session
+            tenant_id: Tenant UUID
+            receipt_ids: Receipt UUIDs to verify
+            verify_signature: Whether to verify Ed25519 signatures
+            update_timestamp: Whether to update last_verified_at
+            
+        Returns:
+            List[ReceiptVerifyResponse]: One result per requested ID, in order
+        """
+        try:
+            result = await session.execute(
+                select(Receipt).where(
+                    and_(Receipt.receipt_id.in_(receipt_ids), Receipt.tenant_id == tenant_id)
                 )
             )
-            .order_by(RetentionPolicy.priority.asc())
-            .limit(1)
-        )
-        return result.scalar_one_or_none()
+            receipts = {receipt.receipt_id: receipt for receipt in result.scalars().all()}
+            
+            # Compare against WORM copies, reading the log once for the whole batch
+            worm_results: Dict[UUID, bool] = {}
+            if self.worm_service is not None:
+                worm_results = await self.worm_service.verify_worm_storage_many(
+                    session, [receipt for receipt in receipts.values() if receipt.worm_storage_path]
+                )
+            
+            # Batch root signatures already checked, by (key ID, batch ID, signature)
+            verified_roots: Dict[tuple, bool] = {}
+            now = datetime.utcnow()
+            responses = []
+            audit_entries = []
+            
+            for receipt_id in receipt_ids:
+                receipt = receipts.get(receipt_id)
+                if receipt is None:
+                    responses.append(ReceiptVerifyResponse(
+                        receipt_id=receipt_id,
+                        is_valid=False,
+                        content_hash_valid=False,
+                        signature_valid=False,
+                        worm_storage_valid=None,
+                        verification_errors=[f"Receipt {receipt_id} not found"],
+                        verified_at=now
+                    ))
+                    continue
+                
+                content_hash_valid, signature_valid, verification_errors = self._check_receipt(
+                    receipt, verify_signature, verified_roots
+                )
+                worm_storage_valid = worm_results.get(receipt_id)
+                if worm_storage_valid is False:
+                    verification_errors.append("WORM copy is missing or does not match the receipt")
+                is_valid = content_hash_valid and signature_valid and not verification_errors
+                
+                if update_timestamp:
+                    receipt.last_verified_at = now
+                    if not is_valid:
+                        receipt.verification_failures += 1
+                    receipt.is_verified = is_valid
+                
+                audit_entries.append(dict(
+                    receipt_id=receipt_id,
+                    tenant_id=tenant_id,
+                    event_type="verified",
+                    event_source="receipt-service",
+                    event_data={
+                        "content_hash_valid": content_hash_valid,
+                        "signature_valid": signature_valid,
+                        "worm_storage_valid": worm_storage_valid,
+                        "verification_errors": verification_errors,
+                        "batch_verification": True
+                    },
+                    success=is_valid
+                ))
+                responses.append(ReceiptVerifyResponse(
+                    receipt_id=receipt_id,
+                    is_valid=is_valid,
+                    content_hash_valid=content_hash_valid,
+                    signature_valid=signature_valid,
+                    worm_storage_valid=worm_storage_valid,
+                    verification_errors=verification_errors,
+                    verified_at=now
+                ))
+            
+            # Entries join the transaction that updates the receipts' status
+            for entry in audit_entries:
+                entry["created_at"] = entry["updated_at"] = audit_timestamp()
+            session.add_all([ReceiptAuditLog(**entry) for entry in audit_entries])
+            await session.flush()
+            
+            logger.info(
+                f"Verified {len(receipt_ids)} receipts for tenant {tenant_id} "
+                f"({sum(r.is_valid for r in responses)} valid, {len(verified_roots)} batch roots)"
+            )
+            return responses
+            
+        except Exception as e:
+            logger.error(f"Batch receipt verification failed: {e}")
+            raise ExecutionError(f"Batch receipt verification failed: {e}")
+    
+    def _check_receipt(
+        self,
+        receipt: Receipt,
+        verify_signature: bool,
+        verified_roots: Optional[Dict[tuple, bool]] = None
+    ) -> tuple:
+        """
+        Check a receipt's content hash and signature, serializing it once.
+        
+        Returns:
+            (content_hash_valid, signature_valid, verification_errors)
+        """
+        verification_errors = []
+        content_hash_valid = False
+        signature_valid = False
+        serialized_content = None
+        
+        # Verify content hash
+        try:
+            serialized_content = canonical_json_serialize(receipt.receipt_data)
+            calculated_hash = sha256_hash(serialized_content).hex()
+            content_hash_valid = calculated_hash == receipt.content_hash
+            
+            if not content_hash_valid:
+                verification_errors.append(f"Content hash mismatch: expected {receipt.content_hash}, got {calculated_hash}")
+                
+        except Exception as e:
+            verification_errors.append(f"Content hash verification failed: {e}")
+        
+        if not verify_signature:
+            return content_hash_valid, True, verification_errors  # Skip signature verification if not requested
+        
+        if receipt.merkle_proof:
+            # Batch-signed: the content must be in the tree whose root was signed
+            proof = receipt.merkle_proof
+            root_key = (receipt.signing_key_id, proof.get("batch_id"), proof.get("merkle_root"), receipt.signature)
+            if not verify_inclusion(receipt.content_hash, proof):
+                verification_errors.append("Merkle inclusion proof does not match the batch root")
+            else:
+                if verified_roots is None or root_key not in verified_roots:
+                    root_valid = verify_batch_signature(self._public_key, proof, receipt.signature)
+                    if verified_roots is not None:
+                        verified_roots[root_key] = root_valid
+                else:
+                    root_valid = verified_roots[root_key]
+                if root_valid:
+                    signature_valid = True
+                else:
+                    verification_errors.append("Batch root signature verification failed")
+        elif serialized_content is not None:
+            try:
+                # Verify with public key (cryptography library)
+                self._public_key.verify(bytes.fromhex(receipt.signature), serialized_content)
+                signature_valid = True
+            except Exception as e:
+                verification_errors.append(f"Signature verification failed: {e}")
+        
+        return content_hash_valid, signature_valid, verification_errors
     
     async def _log_audit_event(
         self,
@@ -314,9 +519,33 @@ class ReceiptService:
         event_data: Optional[Dict[str, Any]] = None,
         user_id: Optional[str] = None,
         client_ip: Optional[str] = None,
-        request_id: Optional[str] = None
+        request_id: Optional[str] = None,
+        in_transaction: bool = False
     ):
-        """Log an audit event for receipt operations."""
+        """
+        Log an audit event for receipt operations.
+        
+        With the group-commit writer running, returns once the entry is
+        committed; otherwise, or with ``in_transaction``, the entry joins the
+        caller's transaction. Either way ``created_at`` comes from
+        ``audit_timestamp()``, so entries sort in the order they were logged.
+        """
+        if self._audit_writer is not None and not in_transaction:
+            await self._audit_writer.write(
+                receipt_id=receipt_id,
+                tenant_id=tenant_id,
+                event_type=event_type,
+                event_source=event_source,
+                user_id=user_id,
+                client_ip=client_ip,
+                request_id=request_id,
+                event_data=event_data,
+                success=success,
+                error_message=error_message
+            )
+            return
+        
+        created_at = audit_timestamp()
         audit_log = ReceiptAuditLog(
             receipt_id=receipt_id,
             tenant_id=tenant_id,
@@ -327,7 +556,9 @@ class ReceiptService:
             request_id=request_id,
             event_data=event_data,
             success=success,
-            error_message=error_message
+            error_message=error_message,
+            created_at=created_at,
+            updated_at=created_at
         )
         
         session.add(audit_log)
@@ -338,14 +569,73 @@ class WormStorageService:
     """
     Service for managing Write-Once-Read-Many (WORM) storage integration.
     
-    Provides integration with immutable storage systems for compliance and
-    long-term retention of tamper-evident receipts.
+    Receipts are appended to a segmented WORM log (see ``worm_log.py``) under
+    ``RECEIPT_WORM_PATH``, which should be a persistent volume shared by all
+    replicas; the log is opened by ``open()`` or on first use.
+    
+    The log has a single writer: the first process to open it takes the
+    directory lock, and every other process opens it read-only and can still
+    verify. A write on a read-only process takes over the lock if the writer
+    has gone away, and otherwise fails with ``WormLockedError``.
     """
     
-    def __init__(self):
-        """Initialize WORM storage service."""
-        # TODO: Initialize WORM storage providers (S3 Glacier, Azure Archive, etc.)
-        logger.info("WORM storage service initialized")
+    SUPPORTED_PROVIDERS = ("local_filesystem", "segment_log")
+    
+    def __init__(self, base_path: Optional[str] = None, segment_max_bytes: Optional[int] = None):
+        """
+        Initialize WORM storage service.
+        
+        Args:
+            base_path: Log directory (default: ``RECEIPT_WORM_PATH`` or ``./worm``)
+            segment_max_bytes: Segment size cap (default: ``RECEIPT_WORM_SEGMENT_MB``, 128 MiB)
+        """
+        self.base_path = base_path or os.environ.get("RECEIPT_WORM_PATH", "./worm")
+        self.segment_max_bytes = segment_max_bytes or int(os.environ.get("RECEIPT_WORM_SEGMENT_MB", "128")) * 1024 * 1024
+        self._log: Optional[SegmentedWormLog] = None
+        logger.info(f"WORM storage service initialized at {self.base_path}")
+    
+    def _get_log(self) -> SegmentedWormLog:
+        if self._log is None:
+            try:
+                self._log = SegmentedWormLog(self.base_path, segment_max_bytes=self.segment_max_bytes)
+            except WormLockedError:
+                self._log = SegmentedWormLog(
+                    self.base_path, segment_max_bytes=self.segment_max_bytes, read_only=True
+                )
+                logger.info(f"WORM log at {self.base_path} is written by another process; opened read-only")
+        return self._log
+    
+    def open(self) -> None:
+        """Open the WORM log, as its writer if no other process is."""
+        self._get_log()
+    
+    def _append(self, receipt_id: UUID, payload: bytes):
+        log = self._get_log()
+        if log.read_only and not log.promote():
+            raise WormLockedError(f"WORM log at {self.base_path} is written by another process")
+        return log.append(receipt_id, payload)
+    
+    def close(self) -> None:
+        """Close the WORM log."""
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+    
+    @staticmethod
+    def _serialize(receipt: Receipt) -> bytes:
+        """The immutable part of a receipt, as stored in WORM."""
+        return canonical_json_serialize({
+            "receipt_id": str(receipt.receipt_id),
+            "tenant_id": str(receipt.tenant_id),
+            "receipt_type": receipt.receipt_type,
+            "subject": receipt.subject,
+            "reference_id": str(receipt.reference_id) if receipt.reference_id else None,
+            "receipt_data": receipt.receipt_data,
+            "content_hash": receipt.content_hash,
+            "signature": receipt.signature,
+            "signing_key_id": receipt.signing_key_id,
+            "merkle_proof": receipt.merkle_proof,
+        })
     
     async def write_to_worm_storage(
         self,
@@ -364,10 +654,14 @@ class WormStorageService:
         Returns:
             str: Storage path in WORM system
         """
+        if storage_provider not in self.SUPPORTED_PROVIDERS:
+            raise ValidationError(f"Unsupported WORM storage provider: {storage_provider}")
+        
         try:
-            # TODO: Implement actual WORM storage integration
-            # For now, simulate writing to local filesystem
-            storage_path = f"/worm/receipts/{receipt.tenant_id}/{receipt.receipt_id}.json"
+            payload = self._serialize(receipt)
+            loop = asyncio.get_running_loop()
+            location = await loop.run_in_executor(None, self._append, receipt.receipt_id, payload)
+            storage_path = f"{self.base_path}/{location}"
             
             # Update receipt with WORM information
             receipt.worm_storage_path = storage_path
@@ -376,6 +670,8 @@ class WormStorageService:
             logger.info(f"Receipt {receipt.receipt_id} written to WORM storage at {storage_path}")
             return storage_path
             
+        except WormLockedError:
+            raise
         except Exception as e:
             logger.error(f"Failed to write receipt to WORM storage: {e}")
             raise ExecutionError(f"WORM storage write failed: {e}")
@@ -399,11 +695,71 @@ class WormStorageService:
             if not receipt.worm_storage_path:
                 return False
             
-            # TODO: Implement actual WORM storage verification
-            # For now, simulate verification
+            loop = asyncio.get_running_loop()
+            stored = await loop.run_in_executor(None, self._get_log().read, receipt.receipt_id)
+            if stored is None:
+                logger.warning(f"Receipt {receipt.receipt_id} missing from WORM storage")
+                return False
+            
+            if not self._matches(receipt, stored):
+                return False
+            
+            receipt.worm_verified_at = datetime.utcnow()
             logger.info(f"Verified receipt {receipt.receipt_id} in WORM storage")
             return True
             
         except Exception as e:
             logger.error(f"WORM storage verification failed: {e}")
             return False
+    
+    async def verify_worm_storage_many(
+        self,
+        session: AsyncSession,
+        receipts: List[Receipt]
+    ) -> Dict[UUID, bool]:
+        """
+        Verify several receipts against WORM storage, reading the log in one executor call.
+        
+        Args:
+            session: Database session
+            receipts: Receipts with a WORM storage path
+            
+        Returns:
+            Dict[UUID, bool]: WORM validity by receipt ID
+        """
+        if not receipts:
+            return {}
+        try:
+            log = self._get_log()
+            receipt_ids = [receipt.receipt_id for receipt in receipts]
+            loop = asyncio.get_running_loop()
+            stored = await loop.run_in_executor(None, lambda: [log.read(receipt_id) for receipt_id in receipt_ids])
+        except Exception as e:
+            logger.error(f"WORM storage verification failed: {e}")
+            return {receipt.receipt_id: False for receipt in receipts}
+        
+        results = {}
+        now = datetime.utcnow()
+        for receipt, copy in zip(receipts, stored):
+            if copy is None:
+                logger.warning(f"Receipt {receipt.receipt_id} missing from WORM storage")
+                results[receipt.receipt_id] = False
+                continue
+            try:
+                results[receipt.receipt_id] = self._matches(receipt, copy)
+            except Exception as e:
+                logger.error(f"WORM storage verification failed for {receipt.receipt_id}: {e}")
+                results[receipt.receipt_id] = False
+            if results[receipt.receipt_id]:
+                receipt.worm_verified_at = now
+        return results
+    
+    @staticmethod
+    def _matches(receipt: Receipt, stored: bytes) -> bool:
+        """Whether a WORM copy matches the receipt's content hash."""
+        stored_receipt = json.loads(stored)
+        stored_hash = sha256_hash(canonical_json_serialize(stored_receipt["receipt_data"])).hex()
+        if stored_hash != receipt.content_hash or stored_receipt["content_hash"] != receipt.content_hash:
+            logger.warning(f"Receipt {receipt.receipt_id} differs from its WORM copy")
+            return False
+        return True
@@ -0,0 +1,234 @@
+"""
+Receipt Retention Index
+=======================
+
+Retention is decided once, when a receipt is created: the receipt records
+the policy that applied and the UTC day its retention ends
+(``Receipt.retention_bucket``). Sweeps then work on whole day-buckets with
+set-based statements, so their cost follows the number of expiring receipts
+rather than the size of the receipts table.
+
+Active policies are cached per tenant, so creating a receipt does not query
+``retention_policies``. The cache is invalidated when this process changes a
+tenant's policies and expires after ``ttl_seconds`` to pick up changes made
+elsewhere.
+
+Only receipts whose recorded policy has ``auto_delete`` are deleted by a
+sweep (with their audit and WORM bookkeeping rows; WORM copies themselves are
+immutable). Other expired receipts are reported once and kept: the sweep
+clears their ``retention_bucket`` so later sweeps do not scan them again.
+Receipts created before ``retention_policy_id`` existed have no recorded
+policy (which one applied cannot be told from the receipt), so they are
+never auto-deleted.
+"""
+
+import logging
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import and_, delete, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .models import Receipt, ReceiptAuditLog, RetentionPolicy, WormStorageRecord
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class CachedRetentionPolicy:
+    """The parts of a retention policy needed to place a receipt."""
+    policy_id: UUID
+    receipt_types: Tuple[str, ...]
+    retention_days: int
+    auto_delete: bool
+    priority: int
+
+
+def retention_bucket(retention_until: datetime) -> date:
+    """Day-bucket of a retention end (UTC date)."""
+    if retention_until.tzinfo is not None:
+        retention_until = retention_until.astimezone(timezone.utc)
+    return retention_until.date()
+
+
+class RetentionPolicyCache:
+    """Active retention policies per tenant, in priority order."""
+
+    def __init__(self, ttl_seconds: float = 60.0):
+        self.ttl_seconds = ttl_seconds
+        self._policies: Dict[UUID, Tuple[float, List[CachedRetentionPolicy]]] = {}
+
+    async def get_policies(self, session: AsyncSession, tenant_id: UUID) -> List[CachedRetentionPolicy]:
+        cached = self._policies.get(tenant_id)
+        if cached is not None and time.monotonic() - cached[0] < self.ttl_seconds:
+            return cached[1]
+
+        result = await session.execute(
+            select(RetentionPolicy)
+            .where(and_(RetentionPolicy.tenant_id == tenant_id, RetentionPolicy.is_active == True))
+            .order_by(RetentionPolicy.priority.asc())
+        )
+        policies = [
+            CachedRetentionPolicy(
+                policy_id=policy.policy_id,
+                receipt_types=tuple(policy.receipt_types or ()),
+                retention_days=policy.retention_days,
+                auto_delete=policy.auto_delete,
+                priority=policy.priority,
+            )
+            for policy in result.scalars().all()
+        ]
+        self._policies[tenant_id] = (time.monotonic(), policies)
+        return policies
+
+    async def policy_for(
+        self,
+        session: AsyncSession,
+        tenant_id: UUID,
+        receipt_type: str
+    ) -> Optional[CachedRetentionPolicy]:
+        """Highest-priority active policy covering ``receipt_type``."""
+        for policy in await self.get_policies(session, tenant_id):
+            if receipt_type in policy.receipt_types:
+                return policy
+        return None
+
+    def invalidate(self, tenant_id: Optional[UUID] = None) -> None:
+        """Drop one tenant's cached policies, or all of them."""
+        if tenant_id is None:
+            self._policies.clear()
+        else:
+            self._policies.pop(tenant_id, None)
+
+
+class RetentionIndex:
+    """
+    Day-bucketed view of receipt retention.
+
+    Features:
+    - Bucket counts from the (tenant_id, retention_bucket) index
+    - Sweeps of fully expired buckets with one statement per table
+    - Swept buckets are emptied, so sweeps only see newly expired receipts
+    - Dry runs that only count
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def bucket_counts(
+        self,
+        tenant_id: UUID,
+        start: Optional[date] = None,
+        end: Optional[date] = None
+    ) -> List[Dict[str, Any]]:
+        """Receipts per retention day-bucket, optionally within [start, end]."""
+        query = (
+            select(Receipt.retention_bucket, func.count())
+            .where(and_(Receipt.tenant_id == tenant_id, Receipt.retention_bucket.isnot(None)))
+            .group_by(Receipt.retention_bucket)
+            .order_by(Receipt.retention_bucket)
+        )
+        if start is not None:
+            query = query.where(Receipt.retention_bucket >= start)
+        if end is not None:
+            query = query.where(Receipt.retention_bucket <= end)
+
+        result = await self.session.execute(query)
+        return [{"bucket": bucket, "receipts": count} for bucket, count in result.fetchall()]
+
+    async def due_buckets(
+        self,
+        tenant_id: UUID,
+        today: Optional[date] = None,
+        since: Optional[date] = None
+    ) -> List[date]:
+        """Buckets whose whole day has passed (from ``since`` on, if given)."""
+        today = today or datetime.now(timezone.utc).date()
+        query = (
+            select(Receipt.retention_bucket)
+            .where(and_(Receipt.tenant_id == tenant_id, Receipt.retention_bucket < today))
+            .group_by(Receipt.retention_bucket)
+            .order_by(Receipt.retention_bucket)
+        )
+        if since is not None:
+            query = query.where(Receipt.retention_bucket >= since)
+        result = await self.session.execute(query)
+        return [row[0] for row in result.fetchall()]
+
+    async def sweep_bucket(self, tenant_id: UUID, bucket: date, dry_run: bool = False) -> Dict[str, int]:
+        """
+        Expire one day-bucket.
+
+        Receipts that are kept leave the bucket (``retention_bucket`` is
+        cleared; ``retention_until`` still records when retention ended).
+
+        Returns:
+            Receipts in the bucket and how many were deleted
+        """
+        in_bucket = and_(Receipt.tenant_id == tenant_id, Receipt.retention_bucket == bucket)
+        deletable = (
+            select(Receipt.receipt_id)
+            .join(RetentionPolicy, RetentionPolicy.policy_id == Receipt.retention_policy_id)
+            .where(and_(in_bucket, RetentionPolicy.auto_delete == True))
+        )
+
+        expired = (await self.session.execute(select(func.count()).select_from(Receipt).where(in_bucket))).scalar()
+        if dry_run:
+            deleted = (await self.session.execute(select(func.count()).select_from(deletable.subquery()))).scalar()
+            return {"expired": expired, "deleted": deleted}
+
+        # Children first; both reference receipts without ON DELETE CASCADE.
+        await self.session.execute(
+            delete(ReceiptAuditLog).where(ReceiptAuditLog.receipt_id.in_(deletable)),
+            execution_options={"synchronize_session": False}
+        )
+        await self.session.execute(
+            delete(WormStorageRecord).where(WormStorageRecord.receipt_id.in_(deletable)),
+            execution_options={"synchronize_session": False}
+        )
+        result = await self.session.execute(
+            delete(Receipt).where(Receipt.receipt_id.in_(deletable)),
+            execution_options={"synchronize_session": False}
+        )
+        await self.session.execute(
+            update(Receipt).where(in_bucket).values(retention_bucket=None),
+            execution_options={"synchronize_session": False}
+        )
+        return {"expired": expired, "deleted": result.rowcount or 0}
+
+    async def sweep(
+        self,
+        tenant_id: UUID,
+        today: Optional[date] = None,
+        since: Optional[date] = None,
+        dry_run: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Sweep every fully expired bucket of a tenant, committing per bucket.
+
+        Swept buckets are left empty, so each sweep only handles receipts
+        that expired since the last one; ``since`` limits it further.
+        """
+        buckets = await self.due_buckets(tenant_id, today, since)
+        expired = deleted = 0
+        for bucket in buckets:
+            counts = await self.sweep_bucket(tenant_id, bucket, dry_run)
+            if not dry_run:
+                await self.session.commit()
+            expired += counts["expired"]
+            deleted += counts["deleted"]
+
+        if buckets:
+            logger.info(
+                f"Retention sweep for tenant {tenant_id}: {len(buckets)} buckets, "
+                f"{expired} expired, {deleted} {'deletable' if dry_run else 'deleted'}"
+            )
+        return {
+            "buckets_processed": len(buckets),
+            "receipts_expired": expired,
+            "receipts_deleted": deleted,
+            "dry_run": dry_run,
+        }
@@ -5,7 +5,7 @@ Pydantic Models for Receipt Service API
 Request/Response models for the Receipt service REST API.
 """
 
-from datetime import datetime
+from datetime import date, datetime
 from typing import Optional, List, Dict, Any
 from uuid import UUID
 
@@ -39,9 +39,11 @@ class ReceiptResponse(BaseModel):
     content_hash: str
     signature: str
     signing_key_id: str
+    merkle_proof: Optional[Dict[str, Any]] = None
     worm_storage_path: Optional[str]
     worm_written_at: Optional[datetime]
     retention_until: Optional[datetime]
+    retention_bucket: Optional[date] = None
     compliance_tags: Optional[Dict[str, Any]]
     is_verified: bool
     verification_failures: int
@@ -72,6 +74,26 @@ class ReceiptVerifyResponse(BaseModel):
     verified_at: datetime
 
 
+class ReceiptBatchVerifyRequest(BaseModel):
+    """Request model for verifying many receipts at once."""
+    
+    model_config = ConfigDict(str_strip_whitespace=True)
+    
+    receipt_ids: List[UUID] = Field(..., min_length=1, max_length=1000, description="Receipts to verify")
+    verify_signature: bool = Field(True, description="Verify Ed25519 signatures")
+    update_verification_timestamp: bool = Field(True, description="Update last verified timestamps")
+
+
+class ReceiptBatchVerifyResponse(BaseModel):
+    """Response model for batch receipt verification."""
+    
+    results: List[ReceiptVerifyResponse]
+    total: int
+    valid: int
+    invalid: int
+    duration_ms: float
+
+
 class AuditLogEntry(BaseModel):
     """Response model for audit log entries."""
     
@@ -147,6 +169,29 @@ class RetentionPolicyResponse(BaseModel):
     updated_at: datetime
 
 
+class RetentionBucketResponse(BaseModel):
+    """Receipts whose retention ends on one UTC day."""
+    
+    bucket: date
+    receipts: int
+
+
+class RetentionSweepRequest(BaseModel):
+    """Request model for sweeping expired retention buckets."""
+    
+    dry_run: bool = Field(False, description="Only count what would be deleted")
+    since: Optional[date] = Field(None, description="Skip buckets before this day")
+
+
+class RetentionSweepResponse(BaseModel):
+    """Response model for retention sweeps."""
+    
+    buckets_processed: int
+    receipts_expired: int
+    receipts_deleted: int
+    dry_run: bool
+
+
 class WormStorageRequest(BaseModel):
     """Request model for WORM storage operations."""
     
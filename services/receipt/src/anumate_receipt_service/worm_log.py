@@ -0,0 +1,529 @@
+"""
+Segmented Append-Only WORM Log
+==============================
+
+Local write-once storage for receipts: records are appended to size-capped
+segment files instead of one file per receipt, so storage needs a handful of
+inodes and listing stays cheap at any scale.
+
+Layout under ``base_path``::
+
+    segment-00000001.log   sealed, read-only (0444)
+    segment-00000001.idx   hash index of the sealed segment, memory-mapped
+    segment-00000002.log   active segment, append-only
+
+Each record is one frame::
+
+    magic "WRM1" | payload length (u32) | record ID (16 bytes) | CRC-32 (u32) | payload
+
+where the CRC covers the record ID and payload. When a segment reaches
+``segment_max_bytes`` it is sealed: a final frame with record ID ``ff..ff``
+stores the frame count and the SHA-256 of everything before it, the offset
+index is written next to it and both files are made read-only. Nothing is
+ever rewritten or compacted; a record ID can be written once.
+
+On restart the active segment is scanned and a torn tail (a frame that was
+never acknowledged because the write or fsync did not finish) is truncated.
+Missing indexes of sealed segments are rebuilt from the segment itself.
+
+One process writes a directory, holding its lock file. Other processes open
+it with ``read_only=True``: they take no lock, never modify files, and pick
+up newly sealed segments and appended records when a lookup misses.
+"""
+
+import fcntl
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+import zlib
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+from uuid import UUID
+
+logger = logging.getLogger(__name__)
+
+FRAME_MAGIC = b"WRM1"
+FRAME_HEADER = struct.Struct(">4sI16sI")  # magic, payload length, record ID, CRC-32
+SEAL_RECORD_ID = b"\xff" * 16
+
+INDEX_MAGIC = b"WIX1"
+INDEX_HEADER = struct.Struct(">4sII20x")  # magic, capacity, count (32 bytes)
+INDEX_SLOT = struct.Struct(">16sQI4x")  # record ID, frame offset, frame length (32 bytes)
+EMPTY_SLOT_ID = b"\x00" * 16
+
+
+class WormIntegrityError(Exception):
+    """A stored record or segment does not match its checksum."""
+
+
+class WormLockedError(RuntimeError):
+    """Another process holds the writer lock of the log directory."""
+
+
+class WormLocation(NamedTuple):
+    """Where a record's frame lives."""
+    segment: int
+    offset: int
+    length: int
+
+    def __str__(self) -> str:
+        return f"{segment_name(self.segment)}.log#{self.offset}"
+
+
+def segment_name(sequence: int) -> str:
+    return f"segment-{sequence:08d}"
+
+
+def _slot_hash(record_id: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(record_id, digest_size=8).digest(), "big")
+
+
+def _encode_frame(record_id: bytes, payload: bytes) -> bytes:
+    crc = zlib.crc32(record_id + payload)
+    return FRAME_HEADER.pack(FRAME_MAGIC, len(payload), record_id, crc) + payload
+
+
+class _ScanResult(NamedTuple):
+    entries: List[Tuple[bytes, int, int]]  # (record ID, offset, frame length)
+    valid_end: int
+    seal: Optional[Dict[str, Any]]
+    body_hash: "hashlib._Hash"
+
+
+def _scan_segment(path: str, start: int = 0) -> _ScanResult:
+    """Read frames until the seal, the end of file or the first invalid frame.
+
+    ``body_hash`` only covers the whole body when scanning from the start.
+    """
+    entries = []
+    body_hash = hashlib.sha256()
+    offset = start
+    with open(path, "rb") as f:
+        f.seek(start)
+        while True:
+            header = f.read(FRAME_HEADER.size)
+            if len(header) < FRAME_HEADER.size:
+                break
+            magic, length, record_id, crc = FRAME_HEADER.unpack(header)
+            if magic != FRAME_MAGIC:
+                break
+            payload = f.read(length)
+            if len(payload) < length or zlib.crc32(record_id + payload) != crc:
+                break
+            if record_id == SEAL_RECORD_ID:
+                return _ScanResult(entries, offset + FRAME_HEADER.size + length, json.loads(payload), body_hash)
+            frame_length = FRAME_HEADER.size + length
+            entries.append((record_id, offset, frame_length))
+            body_hash.update(header)
+            body_hash.update(payload)
+            offset += frame_length
+    return _ScanResult(entries, offset, None, body_hash)
+
+
+class _SegmentIndex:
+    """Open-addressing hash table of a sealed segment, read through mmap."""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.capacity, self.count = INDEX_HEADER.unpack_from(self._mmap, 0)
+        if magic != INDEX_MAGIC or len(self._mmap) != INDEX_HEADER.size + self.capacity * INDEX_SLOT.size:
+            self._mmap.close()
+            raise WormIntegrityError(f"Corrupt segment index {path}")
+
+    @staticmethod
+    def write(path: str, entries: List[Tuple[bytes, int, int]]) -> None:
+        """Write an index for ``entries`` atomically and make it read-only."""
+        capacity = 8
+        while capacity < len(entries) * 2:
+            capacity *= 2
+        table = bytearray(INDEX_HEADER.size + capacity * INDEX_SLOT.size)
+        INDEX_HEADER.pack_into(table, 0, INDEX_MAGIC, capacity, len(entries))
+        for record_id, offset, length in entries:
+            slot = _slot_hash(record_id) & (capacity - 1)
+            while True:
+                position = INDEX_HEADER.size + slot * INDEX_SLOT.size
+                if table[position:position + 16] == EMPTY_SLOT_ID:
+                    break
+                slot = (slot + 1) & (capacity - 1)
+            INDEX_SLOT.pack_into(table, position, record_id, offset, length)
+
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(table)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o444)
+        os.replace(tmp_path, path)
+
+    def get(self, record_id: bytes) -> Optional[Tuple[int, int]]:
+        mask = self.capacity - 1
+        slot = _slot_hash(record_id) & mask
+        for _ in range(self.capacity):
+            slot_id, offset, length = INDEX_SLOT.unpack_from(self._mmap, INDEX_HEADER.size + slot * INDEX_SLOT.size)
+            if slot_id == record_id:
+                return offset, length
+            if slot_id == EMPTY_SLOT_ID:
+                return None
+            slot = (slot + 1) & mask
+        return None
+
+    def keys(self) -> Iterator[bytes]:
+        """Yield the record IDs in the index."""
+        for position in range(INDEX_HEADER.size, len(self._mmap), INDEX_SLOT.size):
+            record_id = self._mmap[position:position + 16]
+            if record_id != EMPTY_SLOT_ID:
+                yield record_id
+
+    def close(self) -> None:
+        self._mmap.close()
+
+
+class SegmentedWormLog:
+    """
+    Append-only, segment-based WORM store keyed by record (receipt) ID.
+
+    Features:
+    - Size-capped segments, sealed with a SHA-256 trailer and made read-only
+    - CRC-32 per frame, checked on every read
+    - Memory-mapped hash index per sealed segment, plus a record-to-segment
+      map, for O(1) lookups
+    - Crash recovery: torn tails truncated, missing indexes rebuilt
+    - Single writer per directory, enforced with a lock file; any number of
+      read-only openers
+    """
+
+    def __init__(
+        self,
+        base_path: str,
+        segment_max_bytes: int = 128 * 1024 * 1024,
+        fsync: bool = True,
+        read_only: bool = False,
+    ):
+        """
+        Open the log; writer mode takes the directory lock and recovers it.
+
+        Raises:
+            WormLockedError: If another process holds the writer lock
+                (writer mode only)
+        """
+        self.base_path = base_path
+        self.segment_max_bytes = segment_max_bytes
+        self.fsync = fsync
+        self.read_only = read_only
+        self._lock = threading.Lock()
+        self._sealed: Dict[int, _SegmentIndex] = {}
+        self._record_segments: Dict[bytes, int] = {}
+        self._readers: Dict[int, int] = {}
+        self._active_sequence: Optional[int] = None
+        self._active_index: Dict[bytes, Tuple[int, int]] = {}
+        self._active_entries: List[Tuple[bytes, int, int]] = []
+        self._active_hash = hashlib.sha256()
+        self._active_size = 0
+        self._active_fd: Optional[int] = None
+        self._lock_fd: Optional[int] = None
+
+        if read_only:
+            self._refresh()
+            return
+
+        os.makedirs(base_path, exist_ok=True)
+        self._acquire_writer_lock()
+        self._recover()
+
+    def _acquire_writer_lock(self) -> None:
+        lock_fd = os.open(os.path.join(self.base_path, "LOCK"), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(lock_fd)
+            raise WormLockedError(f"WORM log at {self.base_path} is already open for writing by another process")
+        self._lock_fd = lock_fd
+
+    def promote(self) -> bool:
+        """
+        Try to become the writer of a log opened read-only.
+
+        Returns:
+            False if another process still holds the writer lock
+        """
+        with self._lock:
+            if not self.read_only:
+                return True
+            os.makedirs(self.base_path, exist_ok=True)
+            try:
+                self._acquire_writer_lock()
+            except WormLockedError:
+                return False
+            self.read_only = False
+            self._recover()
+            logger.info(f"Took over writing the WORM log at {self.base_path}")
+            return True
+
+    def _path(self, sequence: int, suffix: str) -> str:
+        return os.path.join(self.base_path, f"{segment_name(sequence)}.{suffix}")
+
+    def _sequences(self) -> List[int]:
+        return sorted(
+            int(name[len("segment-"):-len(".log")])
+            for name in os.listdir(self.base_path)
+            if name.startswith("segment-") and name.endswith(".log")
+        )
+
+    def _add_sealed(self, sequence: int, index: _SegmentIndex) -> None:
+        self._sealed[sequence] = index
+        for record_id in index.keys():
+            self._record_segments[record_id] = sequence
+
+    def _refresh(self) -> None:
+        """Read-only mode: pick up segments sealed and records appended by the writer."""
+        if not os.path.isdir(self.base_path):
+            return
+        sequences = self._sequences()
+        for sequence in sequences:
+            if sequence not in self._sealed and os.path.exists(self._path(sequence, "idx")):
+                # Indexes are written to a temporary file and renamed into place
+                self._add_sealed(sequence, _SegmentIndex(self._path(sequence, "idx")))
+
+        unsealed = [sequence for sequence in sequences if sequence not in self._sealed]
+        tail = unsealed[-1] if unsealed else None
+        if tail != self._active_sequence:
+            self._active_sequence = tail
+            self._active_index = {}
+            self._active_entries = []
+            self._active_size = 0
+        if tail is None:
+            return
+
+        scan = _scan_segment(self._path(tail, "log"), start=self._active_size)
+        for record_id, offset, length in scan.entries:
+            self._active_index[record_id] = (offset, length)
+        self._active_entries.extend(scan.entries)
+        self._active_size = scan.valid_end
+
+    def _recover(self) -> None:
+        sequences = self._sequences()
+
+        for sequence in sequences[:-1]:
+            self._open_sealed(sequence)
+
+        if not sequences:
+            self._start_segment(1)
+            return
+
+        last = sequences[-1]
+        scan = _scan_segment(self._path(last, "log"))
+        if scan.seal is not None:
+            self._open_sealed(last, scan)
+            self._start_segment(last + 1)
+            return
+
+        size = os.path.getsize(self._path(last, "log"))
+        if size > scan.valid_end:
+            logger.warning(
+                f"Truncating torn tail of {segment_name(last)}: {size - scan.valid_end} bytes after offset {scan.valid_end}"
+            )
+            with open(self._path(last, "log"), "r+b") as f:
+                f.truncate(scan.valid_end)
+                os.fsync(f.fileno())
+
+        self._active_sequence = last
+        self._active_entries = scan.entries
+        self._active_index = {record_id: (offset, length) for record_id, offset, length in scan.entries}
+        self._active_hash = scan.body_hash
+        self._active_size = scan.valid_end
+        self._active_fd = os.open(self._path(last, "log"), os.O_WRONLY | os.O_APPEND)
+        logger.info(f"WORM log recovered: {len(self._sealed)} sealed segments, {len(scan.entries)} active records")
+
+    def _open_sealed(self, sequence: int, scan: Optional[_ScanResult] = None) -> None:
+        if sequence in self._sealed:
+            return
+        index_path = self._path(sequence, "idx")
+        try:
+            self._add_sealed(sequence, _SegmentIndex(index_path))
+            return
+        except (FileNotFoundError, WormIntegrityError):
+            pass
+
+        scan = scan or _scan_segment(self._path(sequence, "log"))
+        if scan.seal is None:
+            logger.error(f"Segment {segment_name(sequence)} is not sealed; indexing its readable records")
+        logger.warning(f"Rebuilding index for {segment_name(sequence)}")
+        _SegmentIndex.write(index_path, scan.entries)
+        os.chmod(self._path(sequence, "log"), 0o444)
+        self._add_sealed(sequence, _SegmentIndex(index_path))
+
+    def _start_segment(self, sequence: int) -> None:
+        self._active_sequence = sequence
+        self._active_entries = []
+        self._active_index = {}
+        self._active_hash = hashlib.sha256()
+        self._active_size = 0
+        self._active_fd = os.open(self._path(sequence, "log"), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self._sync_directory()
+
+    def _sync_directory(self) -> None:
+        if self.fsync:
+            dir_fd = os.open(self.base_path, os.O_RDONLY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+
+    def _seal_active(self) -> None:
+        sequence = self._active_sequence
+        seal = json.dumps({
+            "frames": len(self._active_entries),
+            "sha256": self._active_hash.hexdigest(),
+            "sealed_at": datetime.now(timezone.utc).isoformat(),
+        }, sort_keys=True).encode("utf-8")
+        os.write(self._active_fd, _encode_frame(SEAL_RECORD_ID, seal))
+        os.fsync(self._active_fd)
+        os.close(self._active_fd)
+
+        _SegmentIndex.write(self._path(sequence, "idx"), self._active_entries)
+        os.chmod(self._path(sequence, "log"), 0o444)
+        self._sealed[sequence] = _SegmentIndex(self._path(sequence, "idx"))
+        for record_id, _, _ in self._active_entries:
+            self._record_segments[record_id] = sequence
+        logger.info(f"Sealed WORM segment {segment_name(sequence)} with {len(self._active_entries)} records")
+
+        self._start_segment(sequence + 1)
+
+    @staticmethod
+    def _record_key(record_id: UUID) -> bytes:
+        key = record_id.bytes
+        if key in (EMPTY_SLOT_ID, SEAL_RECORD_ID):
+            raise ValueError(f"Reserved record ID: {record_id}")
+        return key
+
+    def append(self, record_id: UUID, payload: bytes) -> WormLocation:
+        """
+        Durably append a record.
+
+        Writing the same ID again with the same payload returns the original
+        location; a different payload is rejected.
+
+        Raises:
+            ValueError: If the ID was already written with other content
+            WormLockedError: If the log is open read-only
+        """
+        key = self._record_key(record_id)
+        frame = _encode_frame(key, payload)
+
+        with self._lock:
+            if self.read_only:
+                raise WormLockedError(f"WORM log at {self.base_path} is open read-only")
+            existing = self._locate(key)
+            if existing is not None:
+                if self._read_frame(existing, key) != payload:
+                    raise ValueError(f"Record {record_id} already written with different content")
+                return existing
+
+            if self._active_entries and self._active_size + len(frame) > self.segment_max_bytes:
+                self._seal_active()
+
+            offset = self._active_size
+            os.write(self._active_fd, frame)
+            if self.fsync:
+                os.fsync(self._active_fd)
+
+            self._active_size += len(frame)
+            self._active_hash.update(frame)
+            self._active_entries.append((key, offset, len(frame)))
+            self._active_index[key] = (offset, len(frame))
+            return WormLocation(self._active_sequence, offset, len(frame))
+
+    def _locate(self, key: bytes) -> Optional[WormLocation]:
+        found = self._active_index.get(key)
+        if found is not None:
+            return WormLocation(self._active_sequence, *found)
+        sequence = self._record_segments.get(key)
+        if sequence is None:
+            return None
+        found = self._sealed[sequence].get(key)
+        return WormLocation(sequence, *found) if found is not None else None
+
+    def _find(self, key: bytes) -> Optional[WormLocation]:
+        location = self._locate(key)
+        if location is None and self.read_only:
+            # The writer may have appended the record since the last look
+            self._refresh()
+            location = self._locate(key)
+        return location
+
+    def locate(self, record_id: UUID) -> Optional[WormLocation]:
+        """Find where a record is stored."""
+        with self._lock:
+            return self._find(self._record_key(record_id))
+
+    def _read_frame(self, location: WormLocation, key: bytes) -> bytes:
+        fd = self._readers.get(location.segment)
+        if fd is None:
+            fd = os.open(self._path(location.segment, "log"), os.O_RDONLY)
+            self._readers[location.segment] = fd
+        frame = os.pread(fd, location.length, location.offset)
+
+        magic, length, record_id, crc = FRAME_HEADER.unpack_from(frame, 0)
+        payload = frame[FRAME_HEADER.size:]
+        if magic != FRAME_MAGIC or record_id != key or len(payload) != length or zlib.crc32(record_id + payload) != crc:
+            raise WormIntegrityError(f"Checksum mismatch for record at {location}")
+        return payload
+
+    def read(self, record_id: UUID) -> Optional[bytes]:
+        """
+        Read a record's payload, or None if it was never written.
+
+        Raises:
+            WormIntegrityError: If the stored frame fails its checksum
+        """
+        key = self._record_key(record_id)
+        with self._lock:
+            location = self._find(key)
+            if location is None:
+                return None
+            return self._read_frame(location, key)
+
+    def verify_segment(self, sequence: int) -> bool:
+        """Check a sealed segment against the SHA-256 in its seal frame."""
+        if sequence not in self._sealed:
+            raise ValueError(f"Segment {segment_name(sequence)} is not sealed")
+        scan = _scan_segment(self._path(sequence, "log"))
+        return (
+            scan.seal is not None
+            and scan.seal["frames"] == len(scan.entries)
+            and scan.seal["sha256"] == scan.body_hash.hexdigest()
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get log statistics."""
+        return {
+            "base_path": self.base_path,
+            "read_only": self.read_only,
+            "sealed_segments": len(self._sealed),
+            "sealed_records": sum(index.count for index in self._sealed.values()),
+            "active_segment": segment_name(self._active_sequence) if self._active_sequence else None,
+            "active_records": len(self._active_entries),
+            "active_bytes": self._active_size,
+            "segment_max_bytes": self.segment_max_bytes,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._active_fd is not None:
+                os.close(self._active_fd)
+                self._active_fd = None
+            for fd in self._readers.values():
+                os.close(fd)
+            self._readers.clear()
+            for index in self._sealed.values():
+                index.close()
+            self._sealed.clear()
+            self._record_segments.clear()
+            if self._lock_fd is not None:
+                os.close(self._lock_fd)
+                self._lock_fd = None